@@ -63,6 +63,14 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    # Conexão recebida de app.preparar_banco (command.upgrade programático)
+    conexao = config.attributes.get("connection")
+    if conexao is not None:
+        context.configure(connection=conexao, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     url = settings.get_database_url()
     config.set_main_option("sqlalchemy.url", url)
     connectable = engine_from_config(
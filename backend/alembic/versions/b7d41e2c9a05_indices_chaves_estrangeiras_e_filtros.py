@@ -0,0 +1,49 @@
+"""Índices em chaves estrangeiras e colunas de filtro
+
+Une as duas cabeças existentes (84abb2ab14fd e ec7c8b65777b) e cria os índices
+usados pelas consultas por projeto, empresa, cronograma e despesa.
+
+Revision ID: b7d41e2c9a05
+Revises: 84abb2ab14fd, ec7c8b65777b
+Create Date: 2026-10-19 15:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d41e2c9a05'
+down_revision: Union[str, Sequence[str], None] = ('84abb2ab14fd', 'ec7c8b65777b')
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (nome, tabela, colunas) - mantidos em sincronia com os modelos
+INDICES = [
+    ('ix_projetos_cliente_id', 'projetos', ['cliente_id']),
+    ('ix_projetos_status', 'projetos', ['status']),
+    ('ix_contatos_pessoa_juridica_id_nome', 'contatos', ['pessoa_juridica_id', 'nome']),
+    ('ix_faturamentos_projeto_id', 'faturamentos', ['projeto_id']),
+    ('ix_faturamentos_tecnico_id', 'faturamentos', ['tecnico_id']),
+    ('ix_despesas_projetos_projeto_id_fornecedor_id', 'despesas_projetos', ['projeto_id', 'fornecedor_id']),
+    ('ix_despesas_projetos_fornecedor_id', 'despesas_projetos', ['fornecedor_id']),
+    ('ix_despesas_projetos_itens_despesa_projeto_id', 'despesas_projetos_itens', ['despesa_projeto_id']),
+    ('ix_cronogramas_historico_cronograma_id_criado_em', 'cronogramas_historico', ['cronograma_id', 'criado_em']),
+    ('ix_produtos_servicos_fornecedores_produto_servico_id', 'produtos_servicos_fornecedores', ['produto_servico_id']),
+    ('ix_produtos_servicos_fornecedores_fornecedor_id', 'produtos_servicos_fornecedores', ['fornecedor_id']),
+    ('ix_produtos_servicos_historico_precos_produto_data', 'produtos_servicos_historico_precos', ['produto_servico_id', 'registrado_em']),
+]
+
+
+def upgrade() -> None:
+    # if_not_exists: bancos criados pelo create_all da aplicação já podem ter os índices
+    for nome, tabela, colunas in INDICES:
+        op.create_index(nome, tabela, colunas, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for nome, tabela, _ in reversed(INDICES):
+        op.drop_index(nome, table_name=tabela, if_exists=True)
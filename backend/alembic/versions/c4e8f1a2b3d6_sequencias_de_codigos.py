@@ -0,0 +1,46 @@
+"""Sequências de códigos e índice de código interno por tipo
+
+Cria a tabela sequencias_codigos, usada para reservar códigos internos de
+produtos/serviços sem colisão entre requisições concorrentes. As sequências
+são inicializadas pela aplicação a partir do maior código existente.
+
+Revision ID: c4e8f1a2b3d6
+Revises: b7d41e2c9a05
+Create Date: 2026-10-19 17:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8f1a2b3d6'
+down_revision: Union[str, Sequence[str], None] = 'b7d41e2c9a05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (nome, tabela, colunas) - mantidos em sincronia com os modelos
+INDICES = [
+    ('ix_produtos_servicos_tipo_codigo_interno', 'produtos_servicos', ['tipo', 'codigo_interno']),
+]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sequencias_codigos',
+        sa.Column('nome', sa.String(length=50), nullable=False),
+        sa.Column('ultimo_valor', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('nome'),
+        if_not_exists=True,
+    )
+    for nome, tabela, colunas in INDICES:
+        op.create_index(nome, tabela, colunas, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for nome, tabela, _ in reversed(INDICES):
+        op.drop_index(nome, table_name=tabela, if_exists=True)
+    op.drop_table('sequencias_codigos', if_exists=True)
@@ -0,0 +1,46 @@
+"""Índice de busca textual
+
+Cria a tabela busca_indice: tabela virtual FTS5 no SQLite e tabela com índice
+GIN do tsvector no PostgreSQL. O índice de trigramas (pg_trgm) é criado pela
+aplicação na inicialização, quando a extensão está disponível, e o conteúdo é
+populado pela aplicação quando o índice está vazio.
+
+Revision ID: d6a3b9e0c1f4
+Revises: c4e8f1a2b3d6
+Create Date: 2026-10-19 18:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6a3b9e0c1f4'
+down_revision: Union[str, Sequence[str], None] = 'c4e8f1a2b3d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS busca_indice USING fts5("
+            "entidade UNINDEXED, entidade_id UNINDEXED, titulo UNINDEXED, descricao UNINDEXED, conteudo, "
+            "tokenize = 'unicode61', prefix = '2 3')"
+        )
+        return
+
+    op.execute(
+        "CREATE TABLE IF NOT EXISTS busca_indice ("
+        "chave BIGINT PRIMARY KEY, entidade VARCHAR(30) NOT NULL, entidade_id INTEGER NOT NULL, "
+        "titulo TEXT NOT NULL, descricao TEXT NOT NULL, conteudo TEXT NOT NULL)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_busca_indice_documento ON busca_indice "
+        "USING gin (to_tsvector('simple', conteudo))"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS busca_indice")
@@ -0,0 +1,55 @@
+"""Resumo financeiro por projeto
+
+Cria a tabela projeto_financeiro (faturado, despesas, margem e percentual
+faturado de cada projeto) e os índices usados na ordenação da listagem. O
+conteúdo é calculado pela aplicação na inicialização, quando a tabela está
+vazia, e mantido a cada escrita em faturamentos e despesas.
+
+Revision ID: e1f7a3c5b9d2
+Revises: d6a3b9e0c1f4
+Create Date: 2026-10-19 20:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f7a3c5b9d2'
+down_revision: Union[str, Sequence[str], None] = 'd6a3b9e0c1f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDICES = [
+    ('ix_projeto_financeiro_margem', 'projeto_financeiro', ['margem']),
+    ('ix_projeto_financeiro_percentual_faturado', 'projeto_financeiro', ['percentual_faturado']),
+    ('ix_projeto_financeiro_total_faturado', 'projeto_financeiro', ['total_faturado']),
+]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'projeto_financeiro',
+        sa.Column('projeto_id', sa.Integer(), nullable=False),
+        sa.Column('valor_orcado', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('valor_venda', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('total_faturado', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('total_despesas', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('margem', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('percentual_faturado', sa.Numeric(precision=9, scale=2), nullable=False),
+        sa.Column('atualizado_em', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['projeto_id'], ['projetos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('projeto_id'),
+        if_not_exists=True,
+    )
+    for nome, tabela, colunas in INDICES:
+        op.create_index(nome, tabela, colunas, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for nome, tabela, _ in reversed(INDICES):
+        op.drop_index(nome, table_name=tabela, if_exists=True)
+    op.drop_table('projeto_financeiro', if_exists=True)
@@ -0,0 +1,77 @@
+"""Agregados do dashboard
+
+Cria as tabelas de agregados mensais e por status/cliente/prazo lidas por
+GET /api/dashboard, e o índice por data de faturamento usado no recálculo de
+um mês. O conteúdo é calculado pela aplicação na inicialização, quando as
+tabelas estão vazias, e mantido a cada escrita em projetos e faturamentos.
+
+Revision ID: f3a9c1d7e5b2
+Revises: e1f7a3c5b9d2
+Create Date: 2026-10-19 21:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9c1d7e5b2'
+down_revision: Union[str, Sequence[str], None] = 'e1f7a3c5b9d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDICES = [
+    ('ix_faturamentos_data_faturamento', 'faturamentos', ['data_faturamento']),
+    ('ix_dashboard_clientes_total_faturado', 'dashboard_clientes', ['total_faturado']),
+    ('ix_dashboard_prazos_data_entrega', 'dashboard_prazos', ['data_entrega']),
+]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'dashboard_faturamento_mensal',
+        sa.Column('mes', sa.String(length=7), nullable=False),
+        sa.Column('valor_faturado', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('quantidade', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('mes'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'dashboard_projetos_status',
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('quantidade', sa.Integer(), nullable=False),
+        sa.Column('valor_orcado', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('valor_venda', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.PrimaryKeyConstraint('status'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'dashboard_clientes',
+        sa.Column('cliente_id', sa.Integer(), nullable=False),
+        sa.Column('projetos', sa.Integer(), nullable=False),
+        sa.Column('valor_venda', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('total_faturado', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(['cliente_id'], ['pessoas_juridicas.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('cliente_id'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'dashboard_prazos',
+        sa.Column('projeto_id', sa.Integer(), nullable=False),
+        sa.Column('data_entrega', sa.Date(), nullable=True),
+        sa.ForeignKeyConstraint(['projeto_id'], ['projetos.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('projeto_id'),
+        if_not_exists=True,
+    )
+    for nome, tabela, colunas in INDICES:
+        op.create_index(nome, tabela, colunas, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for nome, tabela, _ in reversed(INDICES):
+        op.drop_index(nome, table_name=tabela, if_exists=True)
+    for tabela in ('dashboard_prazos', 'dashboard_clientes', 'dashboard_projetos_status', 'dashboard_faturamento_mensal'):
+        op.drop_table(tabela, if_exists=True)
@@ -0,0 +1,336 @@
+"""
+Autocompletar por prefixo para os campos de seleção dos formulários
+
+Cada catálogo (clientes, fornecedores, contatos, produtos, funcionários) fica em
+memória como uma lista ordenada de chaves normalizadas; a busca por prefixo é
+uma busca binária seguida da leitura das chaves vizinhas, até juntar os K
+primeiros resultados. Cada palavra do nome gera uma chave, então "parana"
+encontra "Automação Paraná Ltda".
+
+O catálogo é carregado com uma consulta na primeira busca (ou em aquecer()) e
+atualizado incrementalmente: as alterações feitas pelo ORM são capturadas no
+after_flush e aplicadas só depois do commit (descartadas no rollback). Como
+cada worker tem sua própria cópia, uma tarefa do lifespan também recarrega os
+catálogos a cada AUTOCOMPLETE_REFRESH_SEGUNDOS, para refletir escritas feitas
+por outros workers. O índice novo é montado fora do lock e só trocado sob ele,
+então buscas e commits não esperam pela recarga.
+"""
+import asyncio
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from .busca_service import normalizar_texto
+from .config import settings
+from .models.contato import Contato as ContatoModel
+from .models.funcionario import Funcionario as FuncionarioModel
+from .models.pessoa_juridica import PessoaJuridica as PessoaJuridicaModel
+from .models.produto_servico import ProdutoServico as ProdutoServicoModel
+
+logger = logging.getLogger(__name__)
+
+_CHAVE_PENDENTES = "autocomplete_pendentes"
+
+
+def _chaves(textos: Iterable) -> List[str]:
+    """Uma chave para cada início de palavra: 'a b c' -> ['a b c', 'b c', 'c']"""
+    chaves = set()
+    for texto in textos:
+        palavras = normalizar_texto(texto).split()
+        for i in range(len(palavras)):
+            chaves.add(" ".join(palavras[i:]))
+    return sorted(chaves)
+
+
+class IndicePrefixos:
+    """Lista ordenada de (chave, id) com os dados de cada item"""
+
+    def __init__(self):
+        self._chaves: List[tuple] = []
+        self._itens: Dict[int, dict] = {}
+        self._chaves_por_id: Dict[int, List[str]] = {}
+        self._grupos: Dict[int, Optional[int]] = {}
+
+    def __len__(self):
+        return len(self._itens)
+
+    def carregar(self, registros: Iterable[tuple]) -> None:
+        """Monta o índice de uma vez a partir de (id, chaves, dados, grupo)"""
+        chaves = []
+        for item_id, chaves_item, dados, grupo in registros:
+            self._itens[item_id] = dados
+            self._chaves_por_id[item_id] = chaves_item
+            self._grupos[item_id] = grupo
+            chaves.extend((chave, item_id) for chave in chaves_item)
+        chaves.sort()
+        self._chaves = chaves
+
+    def remover(self, item_id: int) -> None:
+        for chave in self._chaves_por_id.pop(item_id, []):
+            posicao = bisect_left(self._chaves, (chave, item_id))
+            if posicao < len(self._chaves) and self._chaves[posicao] == (chave, item_id):
+                del self._chaves[posicao]
+        self._itens.pop(item_id, None)
+        self._grupos.pop(item_id, None)
+
+    def adicionar(self, item_id: int, chaves: List[str], dados: dict, grupo: Optional[int] = None) -> None:
+        self.remover(item_id)
+        for chave in chaves:
+            insort(self._chaves, (chave, item_id))
+        self._itens[item_id] = dados
+        self._chaves_por_id[item_id] = chaves
+        self._grupos[item_id] = grupo
+
+    def buscar(self, prefixo: str, limite: int, grupo: Optional[int] = None) -> List[dict]:
+        """Os `limite` primeiros itens (em ordem alfabética da chave) cujo texto começa com o prefixo"""
+        prefixo = normalizar_texto(prefixo)
+        resultados = []
+        vistos = set()
+        posicao = bisect_left(self._chaves, (prefixo,))
+        while posicao < len(self._chaves) and len(resultados) < limite:
+            chave, item_id = self._chaves[posicao]
+            if not chave.startswith(prefixo):
+                break
+            posicao += 1
+            if item_id in vistos or (grupo is not None and self._grupos.get(item_id) != grupo):
+                continue
+            vistos.add(item_id)
+            resultados.append(self._itens[item_id])
+        return resultados
+
+
+class Catalogo:
+    """Como um modelo vira itens de autocompletar"""
+
+    def __init__(
+        self,
+        modelo,
+        textos: Callable,
+        dados: Callable,
+        pertence: Callable = lambda obj: True,
+        grupo: Callable = lambda obj: None,
+        filtro=None,
+    ):
+        self.modelo = modelo
+        self.textos = textos
+        self.dados = dados
+        self.pertence = pertence
+        self.grupo = grupo
+        self.filtro = filtro
+
+    def registro(self, obj) -> tuple:
+        return obj.id, _chaves(self.textos(obj)), self.dados(obj), self.grupo(obj)
+
+
+def _dados_pessoa(p):
+    return {"id": p.id, "razao_social": p.razao_social, "nome_fantasia": p.nome_fantasia, "cnpj": p.cnpj}
+
+
+def _textos_pessoa(p):
+    return [p.razao_social, p.nome_fantasia, p.sigla, re.sub(r"\D", "", p.cnpj or "")]
+
+
+CATALOGOS = {
+    "clientes": Catalogo(
+        PessoaJuridicaModel,
+        textos=_textos_pessoa,
+        dados=_dados_pessoa,
+        pertence=lambda p: p.tipo == "Cliente",
+        filtro=PessoaJuridicaModel.tipo == "Cliente",
+    ),
+    "fornecedores": Catalogo(
+        PessoaJuridicaModel,
+        textos=_textos_pessoa,
+        dados=_dados_pessoa,
+        pertence=lambda p: p.tipo == "Fornecedor",
+        filtro=PessoaJuridicaModel.tipo == "Fornecedor",
+    ),
+    "contatos": Catalogo(
+        ContatoModel,
+        textos=lambda c: [c.nome, c.email],
+        dados=lambda c: {
+            "id": c.id, "nome": c.nome, "email": c.email, "celular": c.celular,
+            "pessoa_juridica_id": c.pessoa_juridica_id,
+        },
+        grupo=lambda c: c.pessoa_juridica_id,
+    ),
+    "produtos": Catalogo(
+        ProdutoServicoModel,
+        textos=lambda p: [p.codigo_interno, p.descricao, p.codigo_fabricante],
+        dados=lambda p: {
+            "id": p.id, "codigo_interno": p.codigo_interno, "descricao": p.descricao,
+            "unidade_medida": p.unidade_medida,
+        },
+    ),
+    "funcionarios": Catalogo(
+        FuncionarioModel,
+        textos=lambda f: [f.nome, f.email],
+        dados=lambda f: {"id": f.id, "nome": f.nome, "departamento": f.departamento, "email": f.email},
+    ),
+}
+
+
+class Autocomplete:
+    """Catálogos em memória, carregados sob demanda e atualizados após cada commit"""
+
+    def __init__(self, catalogos: Dict[str, Catalogo]):
+        self.catalogos = catalogos
+        self._indices: Dict[str, IndicePrefixos] = {}
+        self._carregado_em: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        # Um carregamento por catálogo de cada vez; as alterações aplicadas
+        # enquanto ele roda são repetidas no índice novo antes da troca
+        self._carregando: Dict[str, threading.Lock] = {nome: threading.Lock() for nome in catalogos}
+        self._durante_carga: Dict[str, List[tuple]] = {}
+
+    def _carregar(self, db: Session, nome: str) -> IndicePrefixos:
+        catalogo = self.catalogos[nome]
+        stmt = select(catalogo.modelo)
+        if catalogo.filtro is not None:
+            stmt = stmt.where(catalogo.filtro)
+        indice = IndicePrefixos()
+        indice.carregar(
+            catalogo.registro(obj)
+            for obj in db.execute(stmt.execution_options(yield_per=1000)).scalars()
+        )
+        logger.debug(f"Autocompletar '{nome}' carregado com {len(indice)} itens")
+        return indice
+
+    def recarregar(self, db: Session, nome: str, esperar: bool = True) -> Optional[IndicePrefixos]:
+        """
+        Monta o índice do catálogo fora do lock global (buscas e commits seguem
+        usando o atual) e só troca o índice sob o lock. Com esperar=False,
+        retorna None se o catálogo já estiver sendo carregado.
+        """
+        carregando = self._carregando[nome]
+        if not carregando.acquire(blocking=esperar):
+            return None
+        try:
+            with self._lock:
+                self._durante_carga[nome] = []
+            try:
+                indice = self._carregar(db, nome)
+            except Exception:
+                with self._lock:
+                    self._durante_carga.pop(nome, None)
+                raise
+            with self._lock:
+                for item_id, registro in self._durante_carga.pop(nome, []):
+                    _aplicar_no_indice(indice, item_id, registro)
+                self._indices[nome] = indice
+                self._carregado_em[nome] = time.monotonic()
+            return indice
+        finally:
+            carregando.release()
+
+    def recarregar_todos(self, fabrica_sessao: Callable[[], Session]) -> None:
+        """Recarrega os catálogos já carregados (tarefa de fundo)"""
+        with self._lock:
+            nomes = list(self._indices)
+        with fabrica_sessao() as db:
+            for nome in nomes:
+                self.recarregar(db, nome, esperar=False)
+
+    def _indice(self, db: Session, nome: str) -> IndicePrefixos:
+        with self._lock:
+            indice = self._indices.get(nome)
+            idade = time.monotonic() - self._carregado_em.get(nome, 0)
+        if indice is None:
+            # Primeira busca: quem chega durante o carregamento espera por ele
+            with self._carregando[nome]:
+                with self._lock:
+                    indice = self._indices.get(nome)
+            return indice or self.recarregar(db, nome)
+        if idade > 3 * settings.AUTOCOMPLETE_REFRESH_SEGUNDOS:
+            # Sem a tarefa de fundo (scripts, testes): recarrega aqui, uma vez,
+            # enquanto as outras buscas usam o índice atual
+            return self.recarregar(db, nome, esperar=False) or indice
+        return indice
+
+    def buscar(self, db: Session, nome: str, prefixo: str, limite: int = 10, grupo: Optional[int] = None) -> List[dict]:
+        indice = self._indice(db, nome)
+        with self._lock:
+            return indice.buscar(prefixo, limite, grupo)
+
+    def aquecer(self, db: Session) -> None:
+        """Carrega todos os catálogos (para a primeira busca já ser rápida)"""
+        for nome in self.catalogos:
+            self._indice(db, nome)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._indices.clear()
+            self._carregado_em.clear()
+
+    def registrar_alteracoes(self, session: Session, gravados: Iterable = (), removidos: Iterable = ()) -> None:
+        """Guarda na sessão o estado dos objetos, para aplicar no commit"""
+        pendentes = session.info.setdefault(_CHAVE_PENDENTES, [])
+        for obj in gravados:
+            for nome, catalogo in self.catalogos.items():
+                if type(obj) is catalogo.modelo and obj.id is not None:
+                    registro = catalogo.registro(obj) if catalogo.pertence(obj) else None
+                    pendentes.append((nome, obj.id, registro))
+        for obj in removidos:
+            for nome, catalogo in self.catalogos.items():
+                if type(obj) is catalogo.modelo:
+                    pendentes.append((nome, obj.id, None))
+
+    def aplicar(self, pendentes: List[tuple]) -> None:
+        with self._lock:
+            for nome, item_id, registro in pendentes:
+                if nome in self._durante_carga:
+                    self._durante_carga[nome].append((item_id, registro))
+                indice = self._indices.get(nome)
+                if indice is not None:
+                    _aplicar_no_indice(indice, item_id, registro)
+
+
+def _aplicar_no_indice(indice: IndicePrefixos, item_id: int, registro: Optional[tuple]) -> None:
+    if registro is None:
+        indice.remover(item_id)
+    else:
+        indice.adicionar(*registro)
+
+
+# Instância singleton
+autocomplete = Autocomplete(CATALOGOS)
+
+
+async def recarregar_periodicamente(fabrica_sessao: Callable[[], Session]) -> None:
+    """Tarefa do lifespan: recarrega os catálogos a cada AUTOCOMPLETE_REFRESH_SEGUNDOS"""
+    while True:
+        await asyncio.sleep(settings.AUTOCOMPLETE_REFRESH_SEGUNDOS)
+        try:
+            await run_in_threadpool(autocomplete.recarregar_todos, fabrica_sessao)
+        except Exception as e:
+            logger.error(f"Falha ao recarregar o autocompletar: {str(e)}")
+
+
+_MODELOS = {catalogo.modelo for catalogo in CATALOGOS.values()}
+
+
+@event.listens_for(Session, "after_flush")
+def _apos_flush(session: Session, flush_context) -> None:
+    gravados = [o for o in list(session.new) + list(session.dirty) if type(o) in _MODELOS]
+    removidos = [o for o in session.deleted if type(o) in _MODELOS]
+    if gravados or removidos:
+        autocomplete.registrar_alteracoes(session, gravados, removidos)
+
+
+@event.listens_for(Session, "after_commit")
+def _apos_commit(session: Session) -> None:
+    pendentes = session.info.pop(_CHAVE_PENDENTES, None)
+    if pendentes:
+        autocomplete.aplicar(pendentes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _apos_rollback(session: Session) -> None:
+    session.info.pop(_CHAVE_PENDENTES, None)
@@ -0,0 +1,341 @@
+"""
+Índice de busca textual de projetos, clientes, contatos e produtos/serviços
+
+Os registros pesquisáveis ficam em uma tabela própria, busca_indice, com o
+texto já normalizado (minúsculas e sem acentos):
+
+- SQLite: tabela virtual FTS5, com índice de prefixos e ordenação por bm25;
+- PostgreSQL: tabela comum com índice GIN sobre o tsvector do conteúdo e, se a
+  extensão pg_trgm estiver disponível, índice de trigramas para buscas por
+  trechos de palavras.
+
+A chave de cada linha combina o tipo da entidade e o id, então atualizar ou
+remover um registro do índice é uma busca pela chave primária. O índice é
+mantido pelo evento after_flush da sessão (inclusões, alterações e exclusões
+feitas pelo ORM); inserções em lote com insert() do Core devem ser feitas
+dentro de indexando_insercoes().
+"""
+import logging
+import re
+import unicodedata
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import event, func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from .database import Base
+from .models.contato import Contato as ContatoModel
+from .models.pessoa_juridica import PessoaJuridica as PessoaJuridicaModel
+from .models.produto_servico import ProdutoServico as ProdutoServicoModel
+from .models.projeto import Projeto as ProjetoModel
+
+logger = logging.getLogger(__name__)
+
+TABELA = "busca_indice"
+TAMANHO_LOTE = 1000
+
+
+def normalizar_texto(valor) -> str:
+    """Minúsculas, sem acentos e com espaços simples"""
+    texto = unicodedata.normalize("NFKD", str(valor or "")).encode("ascii", "ignore").decode("ascii")
+    return " ".join(texto.lower().split())
+
+
+def _digitos(valor) -> str:
+    return re.sub(r"\D", "", str(valor or ""))
+
+
+def _juntar(*partes) -> str:
+    return " ".join(str(p) for p in partes if p)
+
+
+def _documento_projeto(p: ProjetoModel) -> dict:
+    return {
+        "titulo": f"{p.numero} - {p.nome}",
+        "descricao": str(getattr(p.status, "value", p.status) or ""),
+        "conteudo": _juntar(p.numero, p.nome, p.tecnico),
+    }
+
+
+def _documento_pessoa(p: PessoaJuridicaModel) -> dict:
+    return {
+        "titulo": p.nome_fantasia or p.razao_social,
+        "descricao": _juntar(p.razao_social, p.cnpj),
+        "conteudo": _juntar(p.razao_social, p.nome_fantasia, p.sigla, p.cnpj, _digitos(p.cnpj)),
+    }
+
+
+def _documento_contato(c: ContatoModel) -> dict:
+    return {
+        "titulo": c.nome,
+        "descricao": c.email or "",
+        "conteudo": _juntar(c.nome, c.email),
+    }
+
+
+def _documento_produto(p: ProdutoServicoModel) -> dict:
+    return {
+        "titulo": f"{p.codigo_interno} - {p.descricao}",
+        "descricao": _juntar(p.nome_fabricante, p.codigo_fabricante),
+        "conteudo": _juntar(p.codigo_interno, p.descricao, p.codigo_fabricante, p.nome_fabricante),
+    }
+
+
+# entidade -> (código usado na chave, modelo, montagem do documento)
+ENTIDADES = {
+    "projeto": (1, ProjetoModel, _documento_projeto),
+    "pessoa_juridica": (2, PessoaJuridicaModel, _documento_pessoa),
+    "contato": (3, ContatoModel, _documento_contato),
+    "produto_servico": (4, ProdutoServicoModel, _documento_produto),
+}
+_ENTIDADE_POR_MODELO = {modelo: nome for nome, (_, modelo, _) in ENTIDADES.items()}
+_QUANTIDADE_ENTIDADES = 8
+
+
+def _chave(entidade: str, entidade_id: int) -> int:
+    return entidade_id * _QUANTIDADE_ENTIDADES + ENTIDADES[entidade][0]
+
+
+def _linha(entidade: str, objeto) -> dict:
+    documento = ENTIDADES[entidade][2](objeto)
+    return {
+        "chave": _chave(entidade, objeto.id),
+        "entidade": entidade,
+        "entidade_id": objeto.id,
+        "titulo": documento["titulo"] or "",
+        "descricao": documento["descricao"] or "",
+        "conteudo": normalizar_texto(documento["conteudo"]),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Criação da tabela
+# ---------------------------------------------------------------------------
+
+def _dialeto(conexao) -> str:
+    return conexao.dialect.name
+
+
+def criar_tabela(conexao: Connection) -> None:
+    """Cria a tabela do índice (e os índices auxiliares) se ainda não existir"""
+    if _dialeto(conexao) == "sqlite":
+        conexao.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA} USING fts5("
+            "entidade UNINDEXED, entidade_id UNINDEXED, titulo UNINDEXED, descricao UNINDEXED, conteudo, "
+            "tokenize = 'unicode61', prefix = '2 3')"
+        ))
+        return
+
+    conexao.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {TABELA} ("
+        "chave BIGINT PRIMARY KEY, entidade VARCHAR(30) NOT NULL, entidade_id INTEGER NOT NULL, "
+        "titulo TEXT NOT NULL, descricao TEXT NOT NULL, conteudo TEXT NOT NULL)"
+    ))
+    if _dialeto(conexao) != "postgresql":
+        return
+    conexao.execute(text(
+        f"CREATE INDEX IF NOT EXISTS ix_{TABELA}_documento ON {TABELA} "
+        "USING gin (to_tsvector('simple', conteudo))"
+    ))
+    try:
+        with conexao.begin_nested():
+            conexao.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conexao.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{TABELA}_trigramas ON {TABELA} USING gin (conteudo gin_trgm_ops)"
+            ))
+    except Exception as e:
+        logger.warning(f"pg_trgm indisponível, busca por trigramas desativada: {str(e)}")
+
+
+def remover_tabela(conexao: Connection) -> None:
+    conexao.execute(text(f"DROP TABLE IF EXISTS {TABELA}"))
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _apos_create_all(target, connection, **kw):
+    criar_tabela(connection)
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def _antes_drop_all(target, connection, **kw):
+    remover_tabela(connection)
+
+
+# ---------------------------------------------------------------------------
+# Escrita no índice
+# ---------------------------------------------------------------------------
+
+def _remover(conexao: Connection, chaves: List[int]) -> None:
+    coluna = "rowid" if _dialeto(conexao) == "sqlite" else "chave"
+    for inicio in range(0, len(chaves), TAMANHO_LOTE):
+        conexao.execute(
+            text(f"DELETE FROM {TABELA} WHERE {coluna} = :chave"),
+            [{"chave": chave} for chave in chaves[inicio:inicio + TAMANHO_LOTE]],
+        )
+
+
+def _gravar(conexao: Connection, linhas: List[dict]) -> None:
+    """Insere ou substitui as linhas no índice"""
+    if not linhas:
+        return
+    _remover(conexao, [linha["chave"] for linha in linhas])
+    coluna = "rowid" if _dialeto(conexao) == "sqlite" else "chave"
+    instrucao = text(
+        f"INSERT INTO {TABELA} ({coluna}, entidade, entidade_id, titulo, descricao, conteudo) "
+        "VALUES (:chave, :entidade, :entidade_id, :titulo, :descricao, :conteudo)"
+    )
+    for inicio in range(0, len(linhas), TAMANHO_LOTE):
+        conexao.execute(instrucao, linhas[inicio:inicio + TAMANHO_LOTE])
+
+
+def indexar(db: Session, objetos: Iterable) -> None:
+    """Atualiza o índice com os objetos informados (modelos não indexados são ignorados)"""
+    linhas = [
+        _linha(_ENTIDADE_POR_MODELO[type(objeto)], objeto)
+        for objeto in objetos
+        if type(objeto) in _ENTIDADE_POR_MODELO and objeto.id is not None
+    ]
+    _gravar(db.connection(), linhas)
+
+
+@contextmanager
+def indexando_insercoes(db: Session, modelo):
+    """
+    Indexa as linhas inseridas no bloco com insert() do Core, que não passam
+    pelos eventos do ORM. As novas linhas são as de id maior que o último
+    existente antes do bloco.
+    """
+    ultimo_id = db.execute(select(func.max(modelo.id))).scalar() or 0
+    yield
+    novos = db.execute(select(modelo).where(modelo.id > ultimo_id)).scalars().all()
+    indexar(db, novos)
+    # O autocompletar também não vê essas linhas pelos eventos do ORM
+    from .autocomplete_service import autocomplete
+    autocomplete.registrar_alteracoes(db, novos)
+
+
+@event.listens_for(Session, "after_flush")
+def _apos_flush(session: Session, flush_context) -> None:
+    alterados = [o for o in list(session.new) + list(session.dirty) if type(o) in _ENTIDADE_POR_MODELO]
+    removidos = [o for o in session.deleted if type(o) in _ENTIDADE_POR_MODELO]
+    if not alterados and not removidos:
+        return
+    conexao = session.connection()
+    if removidos:
+        _remover(conexao, [_chave(_ENTIDADE_POR_MODELO[type(o)], o.id) for o in removidos])
+    _gravar(conexao, [_linha(_ENTIDADE_POR_MODELO[type(o)], o) for o in alterados if o.id is not None])
+
+
+def reconstruir(db: Session) -> int:
+    """Recria o índice a partir das tabelas (sem commit) e retorna quantas linhas foram indexadas"""
+    conexao = db.connection()
+    conexao.execute(text(f"DELETE FROM {TABELA}"))
+    total = 0
+    for entidade, (_, modelo, _) in ENTIDADES.items():
+        lote = []
+        for objeto in db.execute(select(modelo).execution_options(yield_per=TAMANHO_LOTE)).scalars():
+            lote.append(_linha(entidade, objeto))
+            if len(lote) >= TAMANHO_LOTE:
+                _gravar(conexao, lote)
+                total += len(lote)
+                lote = []
+        _gravar(conexao, lote)
+        total += len(lote)
+        db.expunge_all()
+    return total
+
+
+def garantir_indice(engine) -> None:
+    """Cria o índice se não existir e o popula quando está vazio e há dados (bancos anteriores ao índice)"""
+    with engine.begin() as conexao:
+        criar_tabela(conexao)
+        if conexao.execute(text(f"SELECT 1 FROM {TABELA} LIMIT 1")).first():
+            return
+        if not any(
+            conexao.execute(select(modelo.id).limit(1)).first()
+            for _, modelo, _ in ENTIDADES.values()
+        ):
+            return
+    with Session(bind=engine) as db:
+        total = reconstruir(db)
+        db.commit()
+    logger.info(f"Índice de busca reconstruído: {total} registros")
+
+
+# ---------------------------------------------------------------------------
+# Consulta
+# ---------------------------------------------------------------------------
+
+def _termos(consulta: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", normalizar_texto(consulta))
+
+
+_trigramas_disponiveis: Dict[str, bool] = {}
+
+
+def _pg_trgm(conexao: Connection) -> bool:
+    url = str(conexao.engine.url)
+    if url not in _trigramas_disponiveis:
+        _trigramas_disponiveis[url] = bool(conexao.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        ).first())
+    return _trigramas_disponiveis[url]
+
+
+def buscar(
+    db: Session,
+    consulta: str,
+    entidades: Optional[List[str]] = None,
+    limite: int = 20,
+) -> List[dict]:
+    """
+    Busca os termos (todos, como prefixos) no índice e retorna os resultados
+    mais relevantes: entidade, id, título, descrição e pontuação (maior é melhor).
+    """
+    termos = _termos(consulta)
+    if not termos:
+        return []
+
+    conexao = db.connection()
+    parametros = {"limite": limite}
+    filtro_entidade = ""
+    if entidades:
+        nomes = [f":entidade_{i}" for i in range(len(entidades))]
+        filtro_entidade = f" AND entidade IN ({', '.join(nomes)})"
+        parametros.update({f"entidade_{i}": e for i, e in enumerate(entidades)})
+
+    if _dialeto(conexao) == "sqlite":
+        parametros["consulta"] = " ".join(f'"{termo}"*' for termo in termos)
+        sql = (
+            # rank é o bm25 do FTS5 (menor é melhor), com ordenação otimizada pelo próprio índice
+            f"SELECT entidade, entidade_id, titulo, descricao, -rank AS pontuacao "
+            f"FROM {TABELA} WHERE {TABELA} MATCH :consulta{filtro_entidade} "
+            "ORDER BY rank LIMIT :limite"
+        )
+    else:
+        parametros["tsquery"] = " & ".join(f"{termo}:*" for termo in termos)
+        documento = "to_tsvector('simple', conteudo)"
+        condicao = f"{documento} @@ to_tsquery('simple', :tsquery)"
+        pontuacao = f"ts_rank({documento}, to_tsquery('simple', :tsquery))"
+        if _dialeto(conexao) == "postgresql" and _pg_trgm(conexao):
+            parametros["texto"] = " ".join(termos)
+            condicao = f"({condicao} OR conteudo % :texto)"
+            pontuacao = f"{pontuacao} + similarity(conteudo, :texto)"
+        sql = (
+            f"SELECT entidade, entidade_id, titulo, descricao, {pontuacao} AS pontuacao "
+            f"FROM {TABELA} WHERE {condicao}{filtro_entidade} "
+            "ORDER BY pontuacao DESC LIMIT :limite"
+        )
+
+    return [
+        {
+            "tipo": entidade,
+            "id": int(entidade_id),
+            "titulo": titulo,
+            "descricao": descricao,
+            "pontuacao": round(float(pontuacao or 0), 4),
+        }
+        for entidade, entidade_id, titulo, descricao, pontuacao in conexao.execute(text(sql), parametros)
+    ]
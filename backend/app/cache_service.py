@@ -0,0 +1,292 @@
+"""
+Cache de respostas das rotas de leitura, invalidado pelas tabelas envolvidas
+
+Cada tabela tem um contador de versão, incrementado no commit de qualquer
+sessão que a alterou (objetos do ORM capturados no after_flush e
+insert/update/delete executados pela sessão). Uma resposta fica em cache
+marcada com as tabelas de que depende e é reaproveitada enquanto nenhuma delas
+mudar, sem consultar o banco:
+
+    @router.get("/", response_model=List[Projeto])
+    @em_cache("projetos", modelo=List[Projeto])
+    def ler_todos_projetos(db: Session = Depends(get_db)):
+        ...
+
+O ETag é o hash do corpo (ETag forte): o cliente que envia If-None-Match com o
+ETag atual recebe 304 sem corpo.
+
+Por padrão entradas e versões ficam na memória do processo (LRU), e escritas
+feitas por outro worker só aparecem quando a entrada expira
+(CACHE_TTL_SEGUNDOS). Com CACHE_REDIS_URL (e o pacote redis
+instalado) ficam no Redis, compartilhadas entre os workers.
+"""
+import hashlib
+import inspect as inspect_py
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from functools import wraps
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+import orjson
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .metrics import registry
+from .serializacao import serializar
+
+logger = logging.getLogger(__name__)
+
+_CHAVE_TABELAS = "tabelas_alteradas"
+
+CACHE_CONTROL = "private, no-cache"
+
+cache_requests_total = registry.counter(
+    "cache_requests_total",
+    "Consultas ao cache de respostas por rota e resultado (hit/miss)",
+    ("route", "result"),
+)
+
+
+class VersoesTabelas:
+    """Contadores de versão por tabela"""
+
+    def __init__(self):
+        self._versoes = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def versao(self, tabelas: Iterable[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._versoes[t] for t in tabelas)
+
+    def incrementar(self, tabelas: Iterable[str]) -> None:
+        with self._lock:
+            for tabela in tabelas:
+                self._versoes[tabela] += 1
+
+
+class ArmazenamentoMemoria:
+    """Entradas na memória do processo, com descarte LRU"""
+
+    def __init__(self):
+        self.versoes = VersoesTabelas()
+        self._entradas: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def versao(self, tabelas: Tuple[str, ...]) -> Tuple[int, ...]:
+        return self.versoes.versao(tabelas)
+
+    def incrementar(self, tabelas: Iterable[str]) -> None:
+        self.versoes.incrementar(tabelas)
+
+    def obter(self, chave: str) -> Optional[tuple]:
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return None
+            if entrada[0] < time.monotonic():
+                del self._entradas[chave]
+                return None
+            self._entradas.move_to_end(chave)
+            return entrada[1:]
+
+    def guardar(self, chave: str, versao: tuple, etag: str, corpo: bytes) -> None:
+        with self._lock:
+            expira_em = time.monotonic() + settings.CACHE_TTL_SEGUNDOS
+            self._entradas[chave] = (expira_em, versao, etag, corpo)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > settings.CACHE_MAX_ENTRADAS:
+                self._entradas.popitem(last=False)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+
+
+class ArmazenamentoRedis:
+    """
+    Entradas e versões no Redis (ou em outro servidor compatível). O cliente
+    precisa de get/set/mget/incr/scan_iter/delete, como o redis.Redis.
+    """
+
+    def __init__(self, cliente, prefixo: str = "erp:cache:"):
+        self.cliente = cliente
+        self.prefixo = prefixo
+
+    def __len__(self):
+        return sum(1 for _ in self.cliente.scan_iter(match=f"{self.prefixo}resposta:*"))
+
+    def versao(self, tabelas: Tuple[str, ...]) -> Tuple[int, ...]:
+        valores = self.cliente.mget([f"{self.prefixo}versao:{t}" for t in tabelas])
+        return tuple(int(v or 0) for v in valores)
+
+    def incrementar(self, tabelas: Iterable[str]) -> None:
+        for tabela in tabelas:
+            self.cliente.incr(f"{self.prefixo}versao:{tabela}")
+
+    def obter(self, chave: str) -> Optional[tuple]:
+        valor = self.cliente.get(f"{self.prefixo}resposta:{chave}")
+        if valor is None:
+            return None
+        cabecalho, corpo = valor.split(b"\n", 1)
+        versao, etag = json.loads(cabecalho)
+        return tuple(versao), etag, corpo
+
+    def guardar(self, chave: str, versao: tuple, etag: str, corpo: bytes) -> None:
+        cabecalho = json.dumps([list(versao), etag]).encode("utf-8")
+        self.cliente.set(
+            f"{self.prefixo}resposta:{chave}",
+            cabecalho + b"\n" + corpo,
+            ex=settings.CACHE_TTL_SEGUNDOS,
+        )
+
+    def limpar(self) -> None:
+        for chave in self.cliente.scan_iter(match=f"{self.prefixo}resposta:*"):
+            self.cliente.delete(chave)
+
+
+def _criar_armazenamento():
+    if not settings.CACHE_REDIS_URL:
+        return ArmazenamentoMemoria()
+    try:
+        import redis
+    except ImportError:
+        logger.warning("CACHE_REDIS_URL definido, mas o pacote redis não está instalado; usando cache em memória")
+        return ArmazenamentoMemoria()
+    return ArmazenamentoRedis(redis.Redis.from_url(settings.CACHE_REDIS_URL))
+
+
+class CacheRespostas:
+    """Respostas JSON prontas (corpo e ETag) indexadas pela URL e pelas versões das tabelas"""
+
+    def __init__(self, armazenamento):
+        self.armazenamento = armazenamento
+
+    def limpar(self) -> None:
+        self.armazenamento.limpar()
+
+    def incrementar(self, tabelas: Iterable[str]) -> None:
+        self.armazenamento.incrementar(tabelas)
+
+    def responder(
+        self, request: Request, tabelas: Tuple[str, ...], gerar: Callable[[], Any]
+    ) -> Response:
+        """
+        Resposta da rota a partir do cache. `gerar` só é chamado quando alguma
+        das tabelas mudou (ou a entrada expirou) e retorna bytes JSON prontos
+        ou dados serializáveis.
+        """
+        chave = request.url.path + ("?" + request.url.query if request.url.query else "")
+        rota = getattr(request.scope.get("route"), "path", request.url.path)
+        # A versão é lida antes da consulta: um commit durante a geração invalida a entrada
+        versao = self.armazenamento.versao(tabelas)
+        entrada = self.armazenamento.obter(chave)
+        if entrada is not None and entrada[0] == versao:
+            cache_requests_total.inc(route=rota, result="hit")
+            _, etag, corpo = entrada
+        else:
+            cache_requests_total.inc(route=rota, result="miss")
+            corpo = gerar()
+            if not isinstance(corpo, bytes):
+                corpo = orjson.dumps(jsonable_encoder(corpo))
+            etag = '"' + hashlib.sha256(corpo).hexdigest()[:32] + '"'
+            self.armazenamento.guardar(chave, versao, etag, corpo)
+
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if _etag_confere(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=corpo, media_type="application/json", headers=headers)
+
+
+def _etag_confere(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparação fraca do If-None-Match (RFC 9110), aceitando lista e '*'"""
+    if not if_none_match:
+        return False
+    for valor in if_none_match.split(","):
+        valor = valor.strip()
+        if valor == "*" or valor.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+# Instância singleton
+cache_respostas = CacheRespostas(_criar_armazenamento())
+
+registry.gauge_callback(
+    "cache_entries",
+    "Entradas no cache de respostas",
+    lambda: {(): float(len(cache_respostas.armazenamento))},
+)
+
+
+def em_cache(*tabelas: str, modelo=None):
+    """
+    Decorator para rotas GET síncronas: a resposta fica em cache até alguma das
+    tabelas mudar. Com `modelo` (o mesmo do response_model) o retorno é
+    serializado por ele, como o FastAPI faria.
+    """
+    def decorator(func):
+        assinatura = inspect_py.signature(func)
+        parametros = list(assinatura.parameters.values())
+        nome_request = next((p.name for p in parametros if p.annotation is Request), None)
+        if nome_request is None:
+            parametros.append(
+                inspect_py.Parameter("request_cache", inspect_py.Parameter.KEYWORD_ONLY, annotation=Request)
+            )
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            request = kwargs[nome_request] if nome_request else kwargs.pop("request_cache")
+
+            def gerar():
+                resultado = func(*args, **kwargs)
+                if modelo is None:
+                    return resultado
+                return serializar(modelo, resultado)
+
+            return cache_respostas.responder(request, tabelas, gerar)
+
+        wrapper.__signature__ = assinatura.replace(parameters=parametros)
+        return wrapper
+
+    return decorator
+
+
+def _marcar(session: Session, tabelas: Iterable[str]) -> None:
+    session.info.setdefault(_CHAVE_TABELAS, set()).update(tabelas)
+
+
+@event.listens_for(Session, "after_flush")
+def _apos_flush(session: Session, flush_context) -> None:
+    tabelas = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        tabelas.update(tabela.name for tabela in inspect(obj).mapper.tables)
+    if tabelas:
+        _marcar(session, tabelas)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _ao_executar(estado) -> None:
+    # insert()/update()/delete() executados pela sessão não passam pelo flush
+    if estado.is_insert or estado.is_update or estado.is_delete:
+        _marcar(estado.session, [estado.statement.table.name])
+
+
+@event.listens_for(Session, "after_commit")
+def _apos_commit(session: Session) -> None:
+    tabelas = session.info.pop(_CHAVE_TABELAS, None)
+    if tabelas:
+        cache_respostas.incrementar(tabelas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _apos_rollback(session: Session) -> None:
+    session.info.pop(_CHAVE_TABELAS, None)
@@ -2,6 +2,7 @@ from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from datetime import datetime
 import pytz
+import os
 import secrets
 
 class Settings(BaseSettings):
@@ -46,6 +47,36 @@ class Settings(BaseSettings):
     LOCAL_STORAGE_ENABLED: bool = Field(default=False, validation_alias="LOCAL_STORAGE_ENABLED")
     LOCAL_STORAGE_ROOT_PATH: str = Field(default="", validation_alias="LOCAL_STORAGE_ROOT_PATH")
     LOCAL_TEMPLATES_PATH: str = Field(default="templates", validation_alias="LOCAL_TEMPLATES_PATH")
+
+    # Observabilidade
+    METRICS_ENABLED: bool = Field(default=True, validation_alias="METRICS_ENABLED")
+    # Queries acima deste tempo (ms) são logadas com os parâmetros; 0 desativa
+    SLOW_QUERY_MS: float = Field(default=200, validation_alias="SLOW_QUERY_MS")
+    # Adiciona os headers X-DB-Queries e X-DB-Time nas respostas
+    DB_QUERY_HEADERS: bool = Field(default=False, validation_alias="DB_QUERY_HEADERS")
+
+    # Cache dos relatórios PDF de projetos (LRU em disco)
+    PDF_CACHE_ENABLED: bool = Field(default=True, validation_alias="PDF_CACHE_ENABLED")
+    PDF_CACHE_DIR: str = Field(default="cache/pdf", validation_alias="PDF_CACHE_DIR")
+    PDF_CACHE_MAX_MB: int = Field(default=200, validation_alias="PDF_CACHE_MAX_MB")
+    PDF_BATCH_WORKERS: int = Field(default=os.cpu_count() or 1, validation_alias="PDF_BATCH_WORKERS")
+    PDF_BATCH_MAX_PROJETOS: int = Field(default=500, validation_alias="PDF_BATCH_MAX_PROJETOS")
+
+    # Autocompletar (catálogos em memória por worker)
+    AUTOCOMPLETE_REFRESH_SEGUNDOS: int = Field(default=300, validation_alias="AUTOCOMPLETE_REFRESH_SEGUNDOS")
+
+    # Cache de respostas das rotas de leitura (em memória ou no Redis)
+    CACHE_TTL_SEGUNDOS: int = Field(default=60, validation_alias="CACHE_TTL_SEGUNDOS")
+    CACHE_MAX_ENTRADAS: int = Field(default=1024, validation_alias="CACHE_MAX_ENTRADAS")
+    CACHE_REDIS_URL: str = Field(default="", validation_alias="CACHE_REDIS_URL")
+
+    # Hora local da verificação completa diária do resumo financeiro; -1 desativa
+    FINANCEIRO_RECALCULO_HORA: int = Field(default=3, validation_alias="FINANCEIRO_RECALCULO_HORA")
+
+    # Intervalo da verificação de prontidão (banco e revisão do schema) em segundo plano
+    HEALTH_CHECK_SEGUNDOS: float = Field(default=10, validation_alias="HEALTH_CHECK_SEGUNDOS")
+    # Intervalo da amostra de /api/status/info (processos do host, DNS e métricas do worker)
+    STATUS_REFRESH_SEGUNDOS: float = Field(default=15, validation_alias="STATUS_REFRESH_SEGUNDOS")
     
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
     
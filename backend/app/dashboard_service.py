@@ -0,0 +1,337 @@
+"""
+Agregados do dashboard, pré-calculados em tabelas pequenas
+
+GET /api/dashboard lê só estas tabelas, cujo tamanho não cresce com o histórico:
+
+- dashboard_faturamento_mensal: valor e quantidade de faturamentos por mês;
+- dashboard_projetos_status: quantidade, valor orçado e de venda por status (o
+  pipeline é a soma de "Orçando" e "Orçamento Enviado");
+- dashboard_clientes: projetos, valor de venda e faturado por cliente;
+- dashboard_prazos: data de entrega de cada projeto em execução. Estar no prazo
+  ou atrasado depende do dia, então a comparação é feita na leitura.
+
+Como no financeiro_service, o after_flush identifica as chaves afetadas pelos
+objetos alterados (meses, status, clientes e projetos) e recalcula só essas
+linhas, na mesma transação. insert()/update()/delete() do Core em projetos e
+faturamentos não informam as linhas alteradas e recalculam tudo antes do commit.
+"""
+import logging
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, delete, event, func, insert, inspect, or_, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from .models.dashboard import (
+    DashboardCliente,
+    DashboardFaturamentoMensal,
+    DashboardPrazo,
+    DashboardProjetosStatus,
+)
+from .models.faturamento import Faturamento
+from .models.projeto import Projeto, StatusProjeto
+
+logger = logging.getLogger(__name__)
+
+_CHAVE_PENDENTES = "dashboard_pendentes"
+# Recálculo completo de um agregado
+TODOS = "*"
+
+CENTAVOS = Decimal("0.01")
+TAMANHO_LOTE = 500
+
+STATUS_PIPELINE = (StatusProjeto.ORCANDO, StatusProjeto.ORCAMENTO_ENVIADO)
+STATUS_EXECUCAO = StatusProjeto.EM_EXECUCAO
+
+
+def _decimal(valor) -> Decimal:
+    return Decimal(str(valor or 0)).quantize(CENTAVOS)
+
+
+def mes_de(momento) -> Optional[str]:
+    """Chave AAAA-MM do agregado mensal"""
+    return momento.strftime("%Y-%m") if momento else None
+
+
+def intervalo_mes(mes: str) -> Tuple[datetime, datetime]:
+    """Início do mês e início do mês seguinte"""
+    ano, numero = (int(parte) for parte in mes.split("-"))
+    return datetime(ano, numero, 1), datetime(ano + numero // 12, numero % 12 + 1, 1)
+
+
+def data_entrega(data_pedido_compra, prazo_entrega_dias) -> Optional[date]:
+    if data_pedido_compra is None:
+        return None
+    return (data_pedido_compra + timedelta(days=prazo_entrega_dias or 0)).date()
+
+
+def _status(valor) -> Optional[str]:
+    return StatusProjeto(valor).value if valor is not None else None
+
+
+def _substituir(conexao: Connection, chave, chaves: Optional[Set], linhas: Iterable[dict]) -> None:
+    """Troca as linhas das chaves informadas (ou todas) pelas recalculadas"""
+    remocao = delete(chave.table)
+    if chaves is not None:
+        remocao = remocao.where(chave.in_(list(chaves)))
+    conexao.execute(remocao)
+    linhas = list(linhas)
+    for inicio in range(0, len(linhas), TAMANHO_LOTE):
+        conexao.execute(insert(chave.table), linhas[inicio:inicio + TAMANHO_LOTE])
+
+
+# ---------------------------------------------------------------------------
+# Recálculo de cada agregado (chaves=None recalcula tudo)
+# ---------------------------------------------------------------------------
+
+def _recalcular_meses(conexao: Connection, meses: Optional[Set[str]]) -> None:
+    consulta = select(Faturamento.data_faturamento, Faturamento.valor_faturado).where(
+        Faturamento.data_faturamento.is_not(None)
+    )
+    if meses is not None:
+        consulta = consulta.where(or_(*(
+            and_(Faturamento.data_faturamento >= inicio, Faturamento.data_faturamento < fim)
+            for inicio, fim in map(intervalo_mes, meses)
+        )))
+    totais: Dict[str, dict] = {}
+    for momento, valor in conexao.execute(consulta.execution_options(yield_per=TAMANHO_LOTE)):
+        mes = mes_de(momento)
+        linha = totais.setdefault(mes, {"mes": mes, "valor_faturado": Decimal("0.00"), "quantidade": 0})
+        linha["valor_faturado"] += _decimal(valor)
+        linha["quantidade"] += 1
+    _substituir(conexao, DashboardFaturamentoMensal.mes, meses, totais.values())
+
+
+def _recalcular_status(conexao: Connection, status: Optional[Set[str]]) -> None:
+    consulta = (
+        select(
+            Projeto.status,
+            func.count(),
+            func.sum(func.coalesce(Projeto.valor_orcado, 0)),
+            func.sum(func.coalesce(Projeto.valor_venda, 0)),
+        )
+        .where(Projeto.status.is_not(None))
+        .group_by(Projeto.status)
+    )
+    if status is not None:
+        consulta = consulta.where(Projeto.status.in_([StatusProjeto(s) for s in status]))
+    _substituir(conexao, DashboardProjetosStatus.status, status, (
+        {
+            "status": _status(valor),
+            "quantidade": quantidade,
+            "valor_orcado": _decimal(orcado),
+            "valor_venda": _decimal(venda),
+        }
+        for valor, quantidade, orcado, venda in conexao.execute(consulta)
+    ))
+
+
+def _recalcular_clientes(conexao: Connection, clientes: Optional[Set[int]]) -> None:
+    projetos = select(
+        Projeto.cliente_id, func.count(), func.sum(func.coalesce(Projeto.valor_venda, 0))
+    ).group_by(Projeto.cliente_id)
+    faturado = (
+        select(Projeto.cliente_id, func.sum(Faturamento.valor_faturado))
+        .join(Faturamento, Faturamento.projeto_id == Projeto.id)
+        .group_by(Projeto.cliente_id)
+    )
+    if clientes is not None:
+        projetos = projetos.where(Projeto.cliente_id.in_(clientes))
+        faturado = faturado.where(Projeto.cliente_id.in_(clientes))
+    total_faturado = dict(conexao.execute(faturado).all())
+    _substituir(conexao, DashboardCliente.cliente_id, clientes, (
+        {
+            "cliente_id": cliente_id,
+            "projetos": quantidade,
+            "valor_venda": _decimal(venda),
+            "total_faturado": _decimal(total_faturado.get(cliente_id)),
+        }
+        for cliente_id, quantidade, venda in conexao.execute(projetos)
+    ))
+
+
+def _recalcular_prazos(conexao: Connection, projeto_ids: Optional[Set[int]]) -> None:
+    consulta = select(Projeto.id, Projeto.data_pedido_compra, Projeto.prazo_entrega_dias).where(
+        Projeto.status == STATUS_EXECUCAO
+    )
+    if projeto_ids is not None:
+        consulta = consulta.where(Projeto.id.in_(projeto_ids))
+    _substituir(conexao, DashboardPrazo.projeto_id, projeto_ids, (
+        {"projeto_id": projeto_id, "data_entrega": data_entrega(pedido, prazo)}
+        for projeto_id, pedido, prazo in conexao.execute(consulta)
+    ))
+
+
+RECALCULOS = {
+    "meses": _recalcular_meses,
+    "status": _recalcular_status,
+    "clientes": _recalcular_clientes,
+    "prazos": _recalcular_prazos,
+}
+
+
+def recalcular(conexao: Connection, chaves: Optional[Dict[str, Set]] = None) -> None:
+    """
+    Recalcula as chaves de cada agregado ({"meses": {"2026-01"}, ...}). Um
+    agregado com TODOS entre as chaves, ou chaves=None, é recalculado inteiro
+    """
+    for nome, recalculo in RECALCULOS.items():
+        alvo = None if chaves is None else {c for c in chaves.get(nome, ()) if c is not None}
+        if alvo is not None and TODOS in alvo:
+            alvo = None
+        if alvo is None or alvo:
+            recalculo(conexao, alvo)
+
+
+def garantir_agregados(engine) -> None:
+    """Calcula os agregados quando estão vazios e há projetos (bancos anteriores às tabelas)"""
+    with engine.begin() as conexao:
+        if conexao.execute(select(DashboardCliente.cliente_id).limit(1)).first():
+            return
+        if not conexao.execute(select(Projeto.id).limit(1)).first():
+            return
+        recalcular(conexao)
+    logger.info("Agregados do dashboard calculados")
+
+
+# ---------------------------------------------------------------------------
+# Manutenção pelos eventos da sessão
+# ---------------------------------------------------------------------------
+
+_TABELAS = {Faturamento.__tablename__, Projeto.__tablename__}
+# Atributos que alteram algum agregado
+_ATRIBUTOS = {
+    Faturamento: ("valor_faturado", "data_faturamento", "projeto_id"),
+    Projeto: ("status", "cliente_id", "valor_orcado", "valor_venda", "data_pedido_compra", "prazo_entrega_dias"),
+}
+
+
+def _alterado(objeto) -> bool:
+    atributos = inspect(objeto).attrs
+    return any(atributos[nome].history.has_changes() for nome in _ATRIBUTOS[type(objeto)])
+
+
+def _anteriores(objeto, atributo: str, removido: bool, conversao: Callable = lambda v: v) -> Set:
+    """
+    Valores que o atributo tinha antes do flush; {TODOS} quando não se sabe (valor
+    alterado sem ter sido carregado, ou objeto removido já expirado)
+    """
+    estado = inspect(objeto)
+    historico = estado.attrs[atributo].history
+    if historico.deleted:
+        valores = historico.deleted
+    elif removido and atributo in estado.dict:
+        valores = [estado.dict[atributo]]
+    elif removido or historico.added:
+        return {TODOS}
+    else:
+        return set()
+    return {conversao(v) for v in valores if v is not None}
+
+
+def _anteriores_faturamento(faturamento: Faturamento, removido: bool) -> Dict[str, Set]:
+    """Mês e projeto do faturamento antes do flush (o cliente vem do projeto)"""
+    projetos = _anteriores(faturamento, "projeto_id", removido)
+    return {
+        "meses": _anteriores(faturamento, "data_faturamento", removido, mes_de),
+        "clientes": projetos & {TODOS},
+        "projetos": projetos - {TODOS},
+    }
+
+
+def _anteriores_projeto(projeto: Projeto, removido: bool) -> Dict[str, Set]:
+    """Status e cliente do projeto antes do flush"""
+    return {
+        "status": _anteriores(projeto, "status", removido, _status),
+        "clientes": _anteriores(projeto, "cliente_id", removido),
+        "prazos": {projeto.id},
+    }
+
+
+_COLETORES_ANTERIORES = {Faturamento: _anteriores_faturamento, Projeto: _anteriores_projeto}
+
+
+def _atuais_faturamentos(conexao: Connection, ids: List[int]) -> Dict[str, Set]:
+    """Mês e cliente dos faturamentos gravados, lidos depois do flush"""
+    chaves = {"meses": set(), "clientes": set()}
+    if ids:
+        for momento, cliente_id in conexao.execute(
+            select(Faturamento.data_faturamento, Projeto.cliente_id)
+            .join(Projeto, Projeto.id == Faturamento.projeto_id)
+            .where(Faturamento.id.in_(ids))
+        ):
+            chaves["meses"].add(mes_de(momento))
+            chaves["clientes"].add(cliente_id)
+    return chaves
+
+
+def _atuais_projetos(conexao: Connection, ids: List[int]) -> Dict[str, Set]:
+    """Status e cliente dos projetos gravados, lidos depois do flush"""
+    chaves = {"status": set(), "clientes": set(), "prazos": set(ids)}
+    if ids:
+        for valor, cliente_id in conexao.execute(
+            select(Projeto.status, Projeto.cliente_id).where(Projeto.id.in_(ids))
+        ):
+            chaves["status"].add(_status(valor))
+            chaves["clientes"].add(cliente_id)
+    return chaves
+
+
+def _clientes_dos_projetos(conexao: Connection, ids: Set[int]) -> Set:
+    if not ids:
+        return set()
+    return set(conexao.execute(select(Projeto.cliente_id).where(Projeto.id.in_(ids))).scalars())
+
+
+def _juntar(chaves: Dict[str, Set], novas: Dict[str, Set]) -> None:
+    for nome, valores in novas.items():
+        chaves.setdefault(nome, set()).update(valores)
+
+
+def _chaves_afetadas(session: Session) -> Dict[str, Set]:
+    chaves = {nome: set() for nome in RECALCULOS}
+    atuais = {Faturamento: [], Projeto: []}
+    for objeto in session.new:
+        if type(objeto) in atuais:
+            atuais[type(objeto)].append(objeto.id)
+
+    alterados = [(o, False) for o in session.dirty if type(o) in atuais and _alterado(o)]
+    removidos = [(o, True) for o in session.deleted if type(o) in atuais]
+    for objeto, removido in alterados + removidos:
+        if not removido:
+            atuais[type(objeto)].append(objeto.id)
+        _juntar(chaves, _COLETORES_ANTERIORES[type(objeto)](objeto, removido))
+
+    conexao = session.connection()
+    _juntar(chaves, _atuais_faturamentos(conexao, atuais[Faturamento]))
+    _juntar(chaves, _atuais_projetos(conexao, atuais[Projeto]))
+    chaves["clientes"] |= _clientes_dos_projetos(conexao, chaves.pop("projetos", set()))
+    return chaves
+
+
+@event.listens_for(Session, "after_flush")
+def _apos_flush(session: Session, flush_context) -> None:
+    chaves = _chaves_afetadas(session)
+    if any(chaves.values()):
+        recalcular(session.connection(), chaves)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _ao_executar(estado) -> None:
+    if not (estado.is_insert or estado.is_update or estado.is_delete):
+        return
+    if estado.statement.table.name in _TABELAS:
+        estado.session.info[_CHAVE_PENDENTES] = True
+
+
+@event.listens_for(Session, "before_commit")
+def _antes_commit(session: Session) -> None:
+    if session.info.pop(_CHAVE_PENDENTES, None):
+        recalcular(session.connection())
+
+
+@event.listens_for(Session, "after_rollback")
+def _apos_rollback(session: Session) -> None:
+    session.info.pop(_CHAVE_PENDENTES, None)
@@ -0,0 +1,120 @@
+"""
+Instrumentação do SQLAlchemy: contagem e tempo de queries por requisição e
+log de queries lentas
+"""
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from . import metrics
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Tamanho máximo dos parâmetros exibidos no log de queries lentas
+MAX_PARAMS_LOG_LENGTH = 500
+
+# Controle de transação não conta como query: BEGIN e COMMIT o driver emite fora
+# do cursor, mas os SAVEPOINTs (begin_nested e as sessões dos testes) passam por ele
+_CONTROLE_TRANSACAO = ("SAVEPOINT ", "RELEASE SAVEPOINT ", "ROLLBACK TO SAVEPOINT ")
+
+
+@dataclass
+class QueryStats:
+    """Acumulador de queries executadas durante uma requisição"""
+
+    count: int = 0
+    total_time: float = 0.0
+
+
+# O objeto é mutável de propósito: o contexto é copiado para as threads do
+# threadpool e para a task do endpoint, mas todos compartilham a mesma instância.
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("db_query_stats", default=None)
+
+
+def start_query_stats() -> QueryStats:
+    """Inicia a contagem de queries para o contexto atual"""
+    stats = QueryStats()
+    _current_stats.set(stats)
+    return stats
+
+
+def get_query_stats() -> Optional[QueryStats]:
+    """Retorna o acumulador do contexto atual (ou None fora de uma requisição)"""
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    elapsed = time.perf_counter() - start_times.pop()
+    if statement.startswith(_CONTROLE_TRANSACAO):
+        return
+
+    metrics.db_queries_total.inc()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.total_time += elapsed
+
+    slow_query_ms = settings.SLOW_QUERY_MS
+    if slow_query_ms > 0 and elapsed * 1000 >= slow_query_ms:
+        metrics.db_slow_queries_total.inc()
+        params = repr(parameters)
+        if len(params) > MAX_PARAMS_LOG_LENGTH:
+            params = params[:MAX_PARAMS_LOG_LENGTH] + "..."
+        logger.warning(
+            f"Query lenta ({elapsed * 1000:.1f} ms): {' '.join(statement.split())} | "
+            f"Parâmetros: {params}"
+        )
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Registra os listeners de execução no engine (idempotente)"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@dataclass
+class QueryCounter:
+    """
+    Registra os comandos SQL executados em um engine enquanto estiver ativo.
+
+    Independe do contexto da requisição, então também conta as queries feitas
+    pelo TestClient em outra thread. Uso:
+
+        with QueryCounter(engine) as counter:
+            client.get("/api/projetos/")
+        assert counter.count <= 3
+    """
+
+    engine: Engine
+    statements: List[str] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _callback(self, conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith(_CONTROLE_TRANSACAO):
+            self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        self.statements.clear()
+        event.listen(self.engine, "after_cursor_execute", self._callback)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        event.remove(self.engine, "after_cursor_execute", self._callback)
@@ -0,0 +1,210 @@
+"""
+Exportação das listagens em XLSX, CSV, JSON Lines ou Parquet
+
+XLSX continua sendo o formato para pessoas (cabeçalho destacado e colunas
+dimensionadas, gravado com openpyxl em modo write_only). Os demais são para
+integrações: CSV e JSON Lines são gerados em blocos enquanto a resposta é
+enviada, e Parquet (colunar, requer o pacote pyarrow) é gravado em grupos de
+linhas. Nesses formatos as colunas usam o nome normalizado do cabeçalho
+('Razão Social' -> 'razao_social'), o mesmo aceito pelas importações, e
+valores ausentes saem como nulos. O schema do Parquet vem dos tipos de cada
+coluna informados pela rota.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, Iterator, List, Literal, Optional, Sequence
+
+from fastapi.responses import StreamingResponse
+
+from .importacao_service import normalizar_cabecalho
+
+Formato = Literal["xlsx", "csv", "jsonl", "parquet"]
+
+MEDIA_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Linhas por bloco enviado (CSV/JSON Lines) e por grupo de linhas (Parquet)
+TAMANHO_BLOCO = 1000
+TAMANHO_GRUPO_PARQUET = 10_000
+
+
+class FormatoIndisponivelError(ValueError):
+    """Formato que depende de um pacote opcional não instalado"""
+
+
+def _valor_planilha(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+def _valor_json(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+def _xlsx(titulo: str, cabecalho: Sequence[str], linhas: Iterable[Sequence], larguras: Optional[Sequence[int]]) -> Iterator[bytes]:
+    # openpyxl só é carregado na primeira exportação (não pesa na inicialização)
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(titulo)
+    for i, largura in enumerate(larguras or [], start=1):
+        ws.column_dimensions[get_column_letter(i)].width = largura
+
+    fonte = Font(bold=True, color="FFFFFF")
+    preenchimento = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    alinhamento = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    celulas = []
+    for nome in cabecalho:
+        celula = WriteOnlyCell(ws, value=nome)
+        celula.font = fonte
+        celula.fill = preenchimento
+        celula.alignment = alinhamento
+        celulas.append(celula)
+    ws.append(celulas)
+
+    for linha in linhas:
+        ws.append([_valor_planilha(v) for v in linha])
+
+    output = io.BytesIO()
+    wb.save(output)
+    yield output.getvalue()
+
+
+def _csv(cabecalho: Sequence[str], linhas: Iterable[Sequence]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(cabecalho)
+    for i, linha in enumerate(linhas, start=1):
+        writer.writerow(["" if v is None else _valor_json(v) for v in linha])
+        if i % TAMANHO_BLOCO == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def _jsonl(cabecalho: Sequence[str], linhas: Iterable[Sequence]) -> Iterator[bytes]:
+    bloco = []
+    for linha in linhas:
+        registro = {nome: _valor_json(v) for nome, v in zip(cabecalho, linha)}
+        bloco.append(json.dumps(registro, ensure_ascii=False))
+        if len(bloco) == TAMANHO_BLOCO:
+            yield ("\n".join(bloco) + "\n").encode("utf-8")
+            bloco = []
+    if bloco:
+        yield ("\n".join(bloco) + "\n").encode("utf-8")
+
+
+def _modulos_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise FormatoIndisponivelError("O formato parquet requer o pacote pyarrow")
+    return pyarrow, pyarrow.parquet
+
+
+def _tipo_arrow(pa, tipo: type):
+    if tipo is bool:
+        return pa.bool_()
+    if tipo is int:
+        return pa.int64()
+    if tipo in (float, Decimal):
+        return pa.float64()
+    if tipo is datetime:
+        return pa.timestamp("us")
+    if tipo is date:
+        return pa.date32()
+    return pa.string()
+
+
+def _valor_parquet(valor, tipo: type):
+    if valor is None:
+        return None
+    if tipo in (float, Decimal):
+        return float(valor)
+    if tipo in (bool, int, datetime, date):
+        return valor
+    return str(_valor_json(valor))
+
+
+def _parquet(cabecalho: Sequence[str], linhas: Iterable[Sequence], tipos: Optional[Sequence[type]]) -> Iterator[bytes]:
+    pa, pq = _modulos_pyarrow()
+    # O schema vem dos tipos declarados pela rota, e não dos valores: uma coluna
+    # só com nulos no primeiro grupo não pode mudar de tipo no meio do arquivo
+    tipos = list(tipos or [str] * len(cabecalho))
+    schema = pa.schema([pa.field(nome, _tipo_arrow(pa, tipo)) for nome, tipo in zip(cabecalho, tipos)])
+    output = io.BytesIO()
+    writer = pq.ParquetWriter(output, schema)
+
+    def gravar(grupo):
+        colunas = [
+            pa.array([_valor_parquet(linha[i], tipo) for linha in grupo], type=campo.type)
+            for i, (tipo, campo) in enumerate(zip(tipos, schema))
+        ]
+        writer.write_table(pa.Table.from_arrays(colunas, schema=schema))
+
+    grupo = []
+    for linha in linhas:
+        grupo.append(linha)
+        if len(grupo) == TAMANHO_GRUPO_PARQUET:
+            gravar(grupo)
+            grupo = []
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+    gravar(grupo)
+    writer.close()
+    yield output.getvalue()
+
+
+def resposta_exportacao(
+    nome_arquivo: str,
+    titulo: str,
+    cabecalho: List[str],
+    linhas: Iterable[Sequence],
+    formato: Formato = "xlsx",
+    larguras: Optional[Sequence[int]] = None,
+    tipos: Optional[Sequence[type]] = None,
+) -> StreamingResponse:
+    """
+    Resposta de download com as linhas no formato pedido. As linhas trazem os
+    valores como estão no banco (None, datas, Decimal); cada formato os converte.
+    `tipos` (int, float, str, date, datetime ou bool por coluna) define o schema
+    do Parquet; sem ele, todas as colunas são texto. Lança
+    FormatoIndisponivelError para parquet sem pyarrow.
+    """
+    if formato == "xlsx":
+        conteudo = _xlsx(titulo, cabecalho, linhas, larguras)
+    else:
+        colunas = [normalizar_cabecalho(nome) for nome in cabecalho]
+        if formato == "csv":
+            conteudo = _csv(colunas, linhas)
+        elif formato == "jsonl":
+            conteudo = _jsonl(colunas, linhas)
+        else:
+            _modulos_pyarrow()
+            conteudo = _parquet(colunas, linhas, tipos)
+
+    return StreamingResponse(
+        conteudo,
+        media_type=MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f"attachment; filename={nome_arquivo}.{formato}"},
+    )
@@ -0,0 +1,313 @@
+"""
+Resumo financeiro por projeto: orçado, venda, faturado, despesas e margem
+
+A tabela projeto_financeiro guarda uma linha por projeto, então a listagem com
+margem e percentual faturado é uma consulta indexada, sem somar faturamentos e
+despesas a cada requisição.
+
+O resumo é mantido pela própria sessão, na mesma transação da escrita (um
+rollback desfaz os dois):
+
+- after_flush: objetos do ORM alterados (faturamentos, despesas, itens de
+  despesa e valores do projeto) identificam os projetos afetados, que são
+  recalculados logo após o flush;
+- do_orm_execute: insert()/update()/delete() do Core nessas tabelas (como as
+  importações em lote) são anotados e recalculados antes do commit. Sem como
+  saber os projetos de um update/delete em lote, o recálculo é completo.
+
+Recalcular um projeto é agregar no banco só as linhas dele. Como segurança
+contra escritas feitas por fora da aplicação, verificar_divergencias() refaz
+todos os projetos e informa quantas linhas estavam diferentes; roda todo dia na
+hora FINANCEIRO_RECALCULO_HORA e por POST /api/financeiro/projetos/recalcular.
+"""
+import asyncio
+import logging
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy import delete, event, func, insert, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from .config import get_local_now, settings
+from .metrics import registry
+from .models.despesa_projeto import DespesaProjeto, DespesaProjetoItem, StatusDespesa
+from .models.faturamento import Faturamento
+from .models.projeto import Projeto
+from .models.projeto_financeiro import ProjetoFinanceiro
+
+logger = logging.getLogger(__name__)
+
+_CHAVE_PENDENTES = "financeiro_pendentes"
+# Recálculo completo (update/delete em lote)
+TODOS = "*"
+# Projetos inseridos sem o id nos parâmetros: recalcula os que ainda não têm resumo
+NOVOS = "novos"
+
+CENTAVOS = Decimal("0.01")
+
+# Valores de um item de despesa. IPI é cobrado por fora; ICMS, PIS, COFINS e
+# ISS já estão no preço do fornecedor
+VALOR_ITEM = DespesaProjetoItem.quantidade * DespesaProjetoItem.valor_unitario
+VALOR_IPI_ITEM = VALOR_ITEM * func.coalesce(DespesaProjetoItem.ipi, 0) / 100
+VALOR_IMPOSTOS_ITEM = VALOR_ITEM * (
+    func.coalesce(DespesaProjetoItem.icms, 0)
+    + func.coalesce(DespesaProjetoItem.ipi, 0)
+    + func.coalesce(DespesaProjetoItem.pis, 0)
+    + func.coalesce(DespesaProjetoItem.cofins, 0)
+    + func.coalesce(DespesaProjetoItem.iss, 0)
+) / 100
+
+financeiro_divergencias_total = registry.counter(
+    "financeiro_divergencias_total",
+    "Linhas do resumo financeiro corrigidas pela verificação completa",
+)
+
+
+def _decimal(valor) -> Decimal:
+    return Decimal(str(valor or 0)).quantize(CENTAVOS)
+
+
+def calcular(conexao: Connection, projeto_ids: Optional[Iterable[int]] = None) -> Dict[int, dict]:
+    """Resumo de cada projeto (todos, ou só os informados) calculado a partir das tabelas"""
+    ids = None if projeto_ids is None else list(projeto_ids)
+
+    itens = (
+        select(
+            DespesaProjetoItem.despesa_projeto_id.label("despesa_id"),
+            func.sum(VALOR_ITEM + VALOR_IPI_ITEM).label("total"),
+        )
+        .group_by(DespesaProjetoItem.despesa_projeto_id)
+        .subquery()
+    )
+    despesas = (
+        select(
+            DespesaProjeto.projeto_id,
+            func.sum(func.coalesce(itens.c.total, 0) + func.coalesce(DespesaProjeto.valor_frete, 0)),
+        )
+        .outerjoin(itens, itens.c.despesa_id == DespesaProjeto.id)
+        .where(DespesaProjeto.status != StatusDespesa.CANCELADO)
+        .group_by(DespesaProjeto.projeto_id)
+    )
+    faturado = select(Faturamento.projeto_id, func.sum(Faturamento.valor_faturado)).group_by(
+        Faturamento.projeto_id
+    )
+    projetos = select(Projeto.id, Projeto.valor_orcado, Projeto.valor_venda)
+    if ids is not None:
+        despesas = despesas.where(DespesaProjeto.projeto_id.in_(ids))
+        faturado = faturado.where(Faturamento.projeto_id.in_(ids))
+        projetos = projetos.where(Projeto.id.in_(ids))
+
+    total_despesas = dict(conexao.execute(despesas).all())
+    total_faturado = dict(conexao.execute(faturado).all())
+    resumo = {}
+    for projeto_id, valor_orcado, valor_venda in conexao.execute(projetos):
+        venda = _decimal(valor_venda)
+        faturado_projeto = _decimal(total_faturado.get(projeto_id))
+        despesas_projeto = _decimal(total_despesas.get(projeto_id))
+        resumo[projeto_id] = {
+            "projeto_id": projeto_id,
+            "valor_orcado": _decimal(valor_orcado),
+            "valor_venda": venda,
+            "total_faturado": faturado_projeto,
+            "total_despesas": despesas_projeto,
+            "margem": venda - despesas_projeto,
+            "percentual_faturado": _decimal(faturado_projeto * 100 / venda) if venda else Decimal("0.00"),
+        }
+    return resumo
+
+
+def _gravar(conexao: Connection, resumo: Dict[int, dict], projeto_ids: Optional[Iterable[int]]) -> None:
+    remocao = delete(ProjetoFinanceiro)
+    if projeto_ids is not None:
+        remocao = remocao.where(ProjetoFinanceiro.projeto_id.in_(list(projeto_ids)))
+    conexao.execute(remocao)
+    agora = get_local_now()
+    linhas = [{**linha, "atualizado_em": agora} for linha in resumo.values()]
+    if linhas:
+        # Um único executemany, qualquer que seja o número de projetos
+        conexao.execute(insert(ProjetoFinanceiro), linhas)
+
+
+def recalcular(conexao: Connection, projeto_ids: Optional[Iterable[int]] = None) -> int:
+    """Recalcula o resumo dos projetos informados (ou de todos) e retorna quantos foram gravados"""
+    ids = None if projeto_ids is None else {i for i in projeto_ids if i is not None}
+    if ids is not None and not ids:
+        return 0
+    resumo = calcular(conexao, ids)
+    _gravar(conexao, resumo, ids)
+    return len(resumo)
+
+
+def verificar_divergencias(db: Session) -> dict:
+    """
+    Recalcula todos os projetos (sem commit), comparando com o que estava
+    gravado. Divergências indicam escritas que não passaram pelos eventos.
+    """
+    conexao = db.connection()
+    esperado = calcular(conexao)
+    gravado = {
+        linha["projeto_id"]: linha
+        for linha in conexao.execute(select(ProjetoFinanceiro)).mappings()
+    }
+    campos = ("valor_orcado", "valor_venda", "total_faturado", "total_despesas", "margem", "percentual_faturado")
+    divergentes = sum(
+        1
+        for projeto_id, linha in esperado.items()
+        if projeto_id in gravado and any(_decimal(gravado[projeto_id][c]) != linha[c] for c in campos)
+    )
+    faltando = len(esperado.keys() - gravado.keys())
+    sobrando = len(gravado.keys() - esperado.keys())
+    _gravar(conexao, esperado, None)
+
+    corrigidas = divergentes + faltando + sobrando
+    if corrigidas:
+        financeiro_divergencias_total.inc(corrigidas)
+        logger.warning(
+            f"Resumo financeiro divergente: {divergentes} diferentes, {faltando} faltando, {sobrando} sobrando"
+        )
+    return {
+        "projetos": len(esperado),
+        "divergentes": divergentes,
+        "faltando": faltando,
+        "sobrando": sobrando,
+    }
+
+
+def garantir_resumo(engine) -> None:
+    """Popula o resumo quando está vazio e há projetos (bancos anteriores à tabela)"""
+    with engine.begin() as conexao:
+        if conexao.execute(select(ProjetoFinanceiro.projeto_id).limit(1)).first():
+            return
+        if not conexao.execute(select(Projeto.id).limit(1)).first():
+            return
+        total = recalcular(conexao)
+    logger.info(f"Resumo financeiro calculado: {total} projetos")
+
+
+# ---------------------------------------------------------------------------
+# Recálculo diário
+# ---------------------------------------------------------------------------
+
+def segundos_ate_recalculo(hora: int, agora=None) -> float:
+    """Segundos até a próxima ocorrência de `hora` (hora local)"""
+    agora = agora or get_local_now()
+    proximo = agora.replace(hour=hora, minute=0, second=0, microsecond=0)
+    if proximo <= agora:
+        proximo += timedelta(days=1)
+    return (proximo - agora).total_seconds()
+
+
+def _recalcular_tudo(fabrica_sessao) -> dict:
+    with fabrica_sessao() as db:
+        resultado = verificar_divergencias(db)
+        db.commit()
+    return resultado
+
+
+async def recalculo_diario(fabrica_sessao) -> None:
+    """Tarefa do lifespan: verificação completa uma vez por dia, na hora configurada"""
+    while True:
+        await asyncio.sleep(segundos_ate_recalculo(settings.FINANCEIRO_RECALCULO_HORA))
+        try:
+            resultado = await run_in_threadpool(_recalcular_tudo, fabrica_sessao)
+            logger.info(f"Resumo financeiro verificado: {resultado}")
+        except Exception as e:
+            logger.error(f"Falha no recálculo do resumo financeiro: {str(e)}")
+
+
+# ---------------------------------------------------------------------------
+# Manutenção pelos eventos da sessão
+# ---------------------------------------------------------------------------
+
+_TABELAS = {
+    Projeto.__tablename__,
+    Faturamento.__tablename__,
+    DespesaProjeto.__tablename__,
+    DespesaProjetoItem.__tablename__,
+}
+
+
+def _valores(objeto, atributo: str) -> Set:
+    """Valor atual e anterior (quando alterado no flush) do atributo"""
+    historico = inspect(objeto).attrs[atributo].history
+    return {getattr(objeto, atributo), *historico.deleted}
+
+
+def _projetos_afetados(session: Session, objetos: Iterable) -> Set[int]:
+    projetos = set()
+    despesas = set()
+    for objeto in objetos:
+        if isinstance(objeto, (Faturamento, DespesaProjeto)):
+            projetos |= _valores(objeto, "projeto_id")
+        elif isinstance(objeto, DespesaProjetoItem):
+            despesas |= _valores(objeto, "despesa_projeto_id")
+        elif isinstance(objeto, Projeto):
+            estado = inspect(objeto)
+            if (
+                estado.deleted
+                or objeto in session.new
+                or estado.attrs.valor_venda.history.has_changes()
+                or estado.attrs.valor_orcado.history.has_changes()
+            ):
+                projetos.add(objeto.id)
+    despesas.discard(None)
+    if despesas:
+        projetos.update(
+            session.connection().execute(
+                select(DespesaProjeto.projeto_id).where(DespesaProjeto.id.in_(despesas))
+            ).scalars()
+        )
+    projetos.discard(None)
+    return projetos
+
+
+@event.listens_for(Session, "after_flush")
+def _apos_flush(session: Session, flush_context) -> None:
+    projetos = _projetos_afetados(session, list(session.new) + list(session.dirty) + list(session.deleted))
+    if projetos:
+        recalcular(session.connection(), projetos)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _ao_executar(estado) -> None:
+    if not (estado.is_insert or estado.is_update or estado.is_delete):
+        return
+    tabela = estado.statement.table.name
+    if tabela not in _TABELAS:
+        return
+    pendentes = estado.session.info.setdefault(_CHAVE_PENDENTES, set())
+    parametros = estado.parameters
+    linhas = parametros if isinstance(parametros, list) else [parametros or {}]
+    # Inserções com o projeto nos parâmetros recalculam só esses projetos
+    chave = {Projeto.__tablename__: "id", Faturamento.__tablename__: "projeto_id"}.get(tabela)
+    if estado.is_insert and chave and all(chave in linha for linha in linhas):
+        pendentes.update(linha[chave] for linha in linhas)
+    elif estado.is_insert and tabela == Projeto.__tablename__:
+        pendentes.add(NOVOS)
+    else:
+        pendentes.add(TODOS)
+
+
+@event.listens_for(Session, "before_commit")
+def _antes_commit(session: Session) -> None:
+    pendentes = session.info.pop(_CHAVE_PENDENTES, None)
+    if not pendentes:
+        return
+    conexao = session.connection()
+    if TODOS in pendentes:
+        recalcular(conexao)
+        return
+    if NOVOS in pendentes:
+        pendentes.discard(NOVOS)
+        pendentes.update(conexao.execute(
+            select(Projeto.id).where(~Projeto.id.in_(select(ProjetoFinanceiro.projeto_id)))
+        ).scalars())
+    recalcular(conexao, pendentes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _apos_rollback(session: Session) -> None:
+    session.info.pop(_CHAVE_PENDENTES, None)
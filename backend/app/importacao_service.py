@@ -0,0 +1,359 @@
+"""
+Leitura de planilhas de importação e acompanhamento do progresso
+
+As planilhas são lidas linha a linha (openpyxl em modo read_only para XLSX, o
+módulo csv para CSV em UTF-8 ou cp1252, um objeto JSON por linha para JSON Lines e grupos de
+linhas do pyarrow para Parquet), sem carregar o arquivo inteiro em memória. O upload chega
+como UploadFile, que o Starlette já mantém em arquivo temporário (em disco acima
+de 1 MB); as rotas de importação são síncronas, então a leitura roda no pool de
+threads e não bloqueia o event loop.
+
+Todas as importações seguem o mesmo fluxo: ler_registros() mapeia o cabeçalho
+uma vez para a posição de cada campo e gera, linha a linha, os dados já
+convertidos, que cada rota valida e insere em lote.
+
+O progresso de cada importação fica registrado pelo identificador informado
+pelo cliente, que pode consultá-lo enquanto o upload ainda está sendo processado.
+"""
+import codecs
+import csv
+import json
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .config import get_local_now
+
+EXTENSOES_SUPORTADAS = (".xlsx", ".csv", ".jsonl", ".parquet")
+
+# Bytes do início do CSV usados para decidir entre UTF-8 e cp1252
+AMOSTRA_CODIFICACAO = 64 * 1024
+
+# (número da linha na planilha, dados convertidos, mensagem de erro de conversão)
+Registro = Tuple[int, dict, Optional[str]]
+
+
+class ArquivoInvalidoError(ValueError):
+    """Arquivo em formato não suportado ou sem cabeçalho"""
+
+
+def normalizar_cabecalho(valor) -> str:
+    """'Código do Fornecedor' -> 'codigo_do_fornecedor'"""
+    texto = unicodedata.normalize("NFKD", str(valor or "")).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "_", texto.lower()).strip("_")
+
+
+def converter_decimal(valor) -> Optional[Decimal]:
+    """Converte números da planilha, inclusive texto no formato brasileiro ('R$ 1.234,56')"""
+    if valor is None:
+        return None
+    if isinstance(valor, Decimal):
+        return valor
+    if isinstance(valor, (int, float)):
+        return Decimal(str(valor))
+    texto = str(valor).strip().replace("R$", "").replace("%", "").replace(" ", "")
+    if not texto:
+        return None
+    if "," in texto:
+        texto = texto.replace(".", "").replace(",", ".")
+    try:
+        return Decimal(texto)
+    except InvalidOperation:
+        raise ValueError(f"valor numérico inválido: {valor}")
+
+
+def _linhas_xlsx(arquivo: BinaryIO) -> Tuple[List[str], Iterator[tuple], Optional[int]]:
+    # openpyxl só é carregado na primeira importação (não pesa na inicialização)
+    from openpyxl import load_workbook
+
+    try:
+        wb = load_workbook(arquivo, read_only=True, data_only=True)
+    except Exception as e:
+        raise ArquivoInvalidoError(f"Arquivo XLSX inválido: {str(e)}")
+    ws = wb.active
+    linhas = ws.iter_rows(values_only=True)
+    cabecalho = next(linhas, None)
+    if cabecalho is None:
+        wb.close()
+        raise ArquivoInvalidoError("Planilha vazia")
+    total = ws.max_row - 1 if ws.max_row else None
+
+    def iterar():
+        try:
+            yield from linhas
+        finally:
+            wb.close()
+
+    return [normalizar_cabecalho(h) for h in cabecalho], iterar(), total
+
+
+def _codificacao_csv(arquivo: BinaryIO) -> str:
+    """UTF-8 quando o início do arquivo é UTF-8 válido; senão cp1252 (CSV do Excel em pt-BR)"""
+    posicao = arquivo.tell()
+    amostra = arquivo.read(AMOSTRA_CODIFICACAO)
+    arquivo.seek(posicao)
+    try:
+        # final=False: a amostra pode terminar no meio de um caractere
+        codecs.getincrementaldecoder("utf-8")().decode(amostra, final=False)
+    except UnicodeDecodeError:
+        return "cp1252"
+    return "utf-8-sig"
+
+
+def _linhas_csv(arquivo: BinaryIO) -> Tuple[List[str], Iterator[tuple], Optional[int]]:
+    # Bytes inválidos depois da amostra viram U+FFFD em vez de interromper a leitura
+    texto = codecs.getreader(_codificacao_csv(arquivo))(arquivo, errors="replace")
+    primeira = texto.readline()
+    if not primeira.strip():
+        raise ArquivoInvalidoError("Arquivo CSV vazio")
+    delimitador = ";" if primeira.count(";") >= primeira.count(",") else ","
+    cabecalho = next(csv.reader([primeira], delimiter=delimitador))
+    return [normalizar_cabecalho(h) for h in cabecalho], csv.reader(texto, delimiter=delimitador), None
+
+
+def _objetos_jsonl(texto: Iterable[str]) -> Iterator:
+    """Cada objeto do arquivo, ou um ArquivoInvalidoError no lugar da linha inválida"""
+    for numero, linha in enumerate(texto, start=1):
+        if not linha.strip():
+            continue
+        try:
+            objeto = json.loads(linha)
+        except json.JSONDecodeError as e:
+            yield ArquivoInvalidoError(f"JSON inválido na linha {numero}: {str(e)}")
+            continue
+        if not isinstance(objeto, dict):
+            yield ArquivoInvalidoError(f"Linha {numero}: esperado um objeto JSON")
+            continue
+        yield objeto
+
+
+def _linhas_jsonl(arquivo: BinaryIO) -> Tuple[List[str], Iterator[tuple], Optional[int]]:
+    # As chaves do primeiro objeto definem as colunas. Um primeiro objeto
+    # inválido recusa o arquivo; depois dele, a linha inválida vem como exceção
+    # no lugar dos valores e registros() a transforma em erro de linha
+    iterador = _objetos_jsonl(codecs.getreader("utf-8-sig")(arquivo))
+    primeiro = next(iterador, None)
+    if primeiro is None:
+        raise ArquivoInvalidoError("Arquivo JSON Lines vazio")
+    if isinstance(primeiro, ArquivoInvalidoError):
+        raise primeiro
+    chaves = list(primeiro)
+
+    def iterar():
+        yield tuple(primeiro.get(c) for c in chaves)
+        for objeto in iterador:
+            if isinstance(objeto, ArquivoInvalidoError):
+                yield objeto
+            else:
+                yield tuple(objeto.get(c) for c in chaves)
+
+    return [normalizar_cabecalho(c) for c in chaves], iterar(), None
+
+
+def _linhas_parquet(arquivo: BinaryIO) -> Tuple[List[str], Iterator[tuple], Optional[int]]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ArquivoInvalidoError("A importação de Parquet requer o pacote pyarrow")
+    try:
+        parquet = pq.ParquetFile(arquivo)
+    except Exception as e:
+        raise ArquivoInvalidoError(f"Arquivo Parquet inválido: {str(e)}")
+    cabecalho = parquet.schema_arrow.names
+
+    def iterar():
+        for lote in parquet.iter_batches():
+            colunas = [coluna.to_pylist() for coluna in lote.columns]
+            yield from zip(*colunas)
+
+    return [normalizar_cabecalho(c) for c in cabecalho], iterar(), parquet.metadata.num_rows
+
+
+def _formato(filename: str, formato: Optional[str]) -> str:
+    return formato or (filename or "").lower().rsplit(".", 1)[-1]
+
+
+def ler_planilha(
+    arquivo: BinaryIO, filename: str, formato: Optional[str] = None
+) -> Tuple[List[str], Iterator[tuple], Optional[int]]:
+    """
+    Retorna (cabeçalho normalizado, iterador das linhas de dados, total estimado de linhas).
+
+    O formato vem da extensão do arquivo, ou de `formato` quando informado
+    (xlsx, csv, jsonl ou parquet). O total vem das dimensões da planilha XLSX ou
+    dos metadados do Parquet e é None para CSV e JSON Lines.
+    """
+    formato = _formato(filename, formato)
+    leitores = {
+        "xlsx": _linhas_xlsx,
+        "csv": _linhas_csv,
+        "jsonl": _linhas_jsonl,
+        "parquet": _linhas_parquet,
+    }
+    if formato in leitores:
+        return leitores[formato](arquivo)
+    raise ArquivoInvalidoError(
+        f"Formato não suportado. Use um dos seguintes: {', '.join(EXTENSOES_SUPORTADAS)}"
+    )
+
+
+def mapear_colunas(cabecalho: List[str], colunas: Dict[str, Tuple[str, ...]]) -> Dict[str, int]:
+    """Posição de cada campo no cabeçalho (normalizado), pelo primeiro nome aceito encontrado"""
+    posicoes = {}
+    for campo, nomes in colunas.items():
+        for i, nome in enumerate(cabecalho):
+            if nome in nomes:
+                posicoes[campo] = i
+                break
+    return posicoes
+
+
+def valor_celula(linha: tuple, posicao: Optional[int]):
+    """Valor da célula, com texto sem espaços nas pontas e células vazias como None"""
+    if posicao is None or posicao >= len(linha):
+        return None
+    valor = linha[posicao]
+    if isinstance(valor, str):
+        valor = valor.strip() or None
+    return valor
+
+
+def registros(
+    linhas: Iterable[tuple],
+    posicoes: Dict[str, int],
+    conversores: Optional[Dict[str, Callable]] = None,
+    primeira_linha: int = 2,
+) -> Iterator[Registro]:
+    """
+    Gera os dados de cada linha com os valores convertidos. Células vazias ficam
+    de fora dos dados, linhas totalmente vazias são ignoradas e um erro de
+    conversão (ou uma linha ilegível) vem na mensagem, sem interromper a
+    leitura das demais linhas.
+    """
+    conversores = conversores or {}
+    for numero, linha in enumerate(linhas, start=primeira_linha):
+        if isinstance(linha, ArquivoInvalidoError):
+            # Linha ilegível (JSON inválido): erro da linha, a leitura continua
+            yield numero, {}, str(linha)
+            continue
+        dados = {}
+        erro = None
+        for campo, posicao in posicoes.items():
+            valor = valor_celula(linha, posicao)
+            if valor is None:
+                continue
+            conversor = conversores.get(campo)
+            try:
+                dados[campo] = conversor(valor) if conversor else valor
+            except (ValueError, TypeError, InvalidOperation) as e:
+                erro = str(e)
+                break
+        if dados or erro:
+            yield numero, dados, erro
+
+
+def ler_registros(
+    arquivo: BinaryIO,
+    filename: str,
+    colunas: Dict[str, Tuple[str, ...]],
+    conversores: Optional[Dict[str, Callable]] = None,
+    formato: Optional[str] = None,
+) -> Tuple[Dict[str, int], Iterator[Registro]]:
+    """
+    Abre o arquivo (XLSX, CSV, JSON Lines ou Parquet) e retorna (posição de cada
+    campo encontrado, gerador dos registros). Lança ArquivoInvalidoError para
+    arquivo ilegível.
+    """
+    cabecalho, linhas, _ = ler_planilha(arquivo, filename, formato)
+    posicoes = mapear_colunas(cabecalho, colunas)
+    # Em JSON Lines e Parquet não há linha de cabeçalho antes dos dados
+    primeira_linha = 1 if _formato(filename, formato) in ("jsonl", "parquet") else 2
+    return posicoes, registros(linhas, posicoes, conversores, primeira_linha)
+
+
+def converter_inteiro(valor) -> int:
+    """Inteiro a partir de número ou texto ('12', '12.0')"""
+    if isinstance(valor, bool):
+        raise ValueError(f"valor inteiro inválido: {valor}")
+    if isinstance(valor, int):
+        return valor
+    numero = converter_decimal(valor)
+    if numero != numero.to_integral_value():
+        raise ValueError(f"valor inteiro inválido: {valor}")
+    return int(numero)
+
+
+def converter_data(valor) -> datetime:
+    """Data da planilha: célula de data do Excel ou texto dd/mm/aaaa ou ISO"""
+    if isinstance(valor, datetime):
+        return valor
+    if isinstance(valor, date):
+        return datetime.combine(valor, datetime.min.time())
+    texto = str(valor).strip()
+    for formato in ("%d/%m/%Y", "%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S"):
+        try:
+            return datetime.strptime(texto, formato)
+        except ValueError:
+            continue
+    try:
+        return datetime.fromisoformat(texto)
+    except ValueError:
+        raise ValueError(f"data inválida: {valor}")
+
+
+class ProgressoImportacoes:
+    """
+    Registro em memória do progresso das importações.
+
+    Guarda as últimas max_itens importações do processo; com vários workers, a
+    consulta precisa chegar ao mesmo worker que recebeu o upload.
+    """
+
+    def __init__(self, max_itens: int = 100):
+        self.max_itens = max_itens
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def iniciar(self, importacao_id: str, total: Optional[int] = None) -> bool:
+        """Registra a importação; retorna False se já houver uma em andamento com o mesmo id"""
+        with self._lock:
+            atual = self._itens.get(importacao_id)
+            if atual and atual["status"] not in ("concluida", "erro"):
+                return False
+            self._itens[importacao_id] = {
+                "importacao_id": importacao_id,
+                "status": "processando",
+                "total_linhas": total,
+                "linhas_processadas": 0,
+                "inseridos": 0,
+                "atualizados": 0,
+                "total_erros": 0,
+                "iniciado_em": get_local_now(),
+                "concluido_em": None,
+                "mensagem": None,
+            }
+            self._itens.move_to_end(importacao_id)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+            return True
+
+    def atualizar(self, importacao_id: str, **campos) -> None:
+        with self._lock:
+            item = self._itens.get(importacao_id)
+            if item is not None:
+                item.update(campos)
+                if campos.get("status") in ("concluida", "erro"):
+                    item["concluido_em"] = get_local_now()
+
+    def obter(self, importacao_id: str) -> Optional[dict]:
+        with self._lock:
+            item = self._itens.get(importacao_id)
+            return dict(item) if item is not None else None
+
+
+# Instância singleton
+progresso_importacoes = ProgressoImportacoes()
@@ -8,6 +8,7 @@ from pathlib import Path
 from typing import Optional
 from datetime import datetime
 from app.config import settings
+from app.metrics import track_storage
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +25,7 @@ class LocalStorageService:
             logger.warning("Local storage está habilitado mas caminho raiz não foi configurado!")
             self.enabled = False
     
+    @track_storage("local")
     def create_folder(self, folder_path: str) -> bool:
         """
         Cria uma pasta no sistema local
@@ -47,6 +49,7 @@ class LocalStorageService:
             logger.error(f"Erro ao criar pasta {folder_path}: {str(e)}")
             return False
     
+    @track_storage("local")
     def create_file(self, file_path: str, content: bytes) -> bool:
         """
         Cria um arquivo no sistema local
@@ -76,6 +79,7 @@ class LocalStorageService:
             logger.error(f"Erro ao criar arquivo {file_path}: {str(e)}")
             return False
     
+    @track_storage("local")
     def create_project_structure(
         self,
         project_number: str,
@@ -216,6 +220,7 @@ Estrutura de Pastas:
             logger.error(f"Erro ao criar estrutura local do projeto: {str(e)}")
             return False
     
+    @track_storage("local")
     def delete_project_folder(self, project_number: str, project_name: str, client_sigla: str) -> bool:
         """
         Exclui a pasta de um projeto
@@ -263,6 +268,7 @@ Estrutura de Pastas:
             logger.error(f"Erro ao excluir pasta do projeto: {str(e)}")
             return False
     
+    @track_storage("local")
     def move_project_folder(
         self, 
         project_number: str, 
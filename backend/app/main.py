@@ -1,7 +1,12 @@
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
-from .database import engine, Base
+from .database import engine, SessionLocal
 from .routes import (
     pessoa_juridica,
     contato,
@@ -15,11 +20,28 @@ from .routes import (
     templates,
     system,
     status,
+    metrics,
+    busca,
+    autocomplete,
+    financeiro,
+    dashboard,
+    saude,
 )
 from fastapi import Depends
 from .config import settings
 from .logging_config import setup_logging, get_logger
-from .middleware import LoggingMiddleware, ErrorLoggingMiddleware
+from .middleware import (
+    LoggingMiddleware,
+    ErrorLoggingMiddleware,
+    MetricsMiddleware,
+    QueryProfilerMiddleware,
+)
+from .db_instrumentation import instrument_engine
+from .metrics import register_pool_metrics
+from .autocomplete_service import autocomplete as catalogos_autocomplete, recarregar_periodicamente
+from .financeiro_service import recalculo_diario
+from .saude_service import monitorar_prontidao
+from .status_service import amostrar_periodicamente
 
 # Configurar logging
 setup_logging()
@@ -27,9 +49,39 @@ logger = get_logger(__name__)
 
 load_dotenv()
 
-Base.metadata.create_all(bind=engine)
+# O schema é criado/migrado pelo Alembic antes da inicialização (python -m
+# app.preparar_banco, no entrypoint do container), e não aqui em cada worker
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Carrega os catálogos do autocompletar antes da primeira requisição
+    try:
+        with SessionLocal() as db:
+            catalogos_autocomplete.aquecer(db)
+    except Exception as e:
+        logger.error(f"Falha ao carregar o autocompletar: {str(e)}")
+    tarefas = [
+        asyncio.create_task(monitorar_prontidao(engine)),
+        asyncio.create_task(amostrar_periodicamente(engine)),
+        asyncio.create_task(recarregar_periodicamente(SessionLocal)),
+    ]
+    if settings.FINANCEIRO_RECALCULO_HORA >= 0:
+        tarefas.append(asyncio.create_task(recalculo_diario(SessionLocal)))
+    yield
+    for tarefa in tarefas:
+        tarefa.cancel()
+    # O pool de processos dos PDFs só existe se uma exportação em lote já
+    # carregou o pdf_service (importá-lo aqui traria o reportlab)
+    pdf_service = sys.modules.get(f"{__package__}.pdf_service")
+    if pdf_service is not None:
+        pdf_service.encerrar_pool()
+
 
 app = FastAPI(
+    lifespan=lifespan,
+    # orjson codifica as respostas JSON bem mais rápido que o módulo json
+    default_response_class=ORJSONResponse,
     title="ERP Sistema TAKT",
     version="1.0.0",
     description="Sistema ERP completo com gestão de projetos, faturamentos e recursos",
@@ -41,6 +93,16 @@ app = FastAPI(
 app.add_middleware(ErrorLoggingMiddleware)
 app.add_middleware(LoggingMiddleware)
 
+# Contagem de queries por requisição e log de queries lentas
+instrument_engine(engine)
+if settings.DB_QUERY_HEADERS:
+    app.add_middleware(QueryProfilerMiddleware)
+
+# Métricas (latência por rota, queries por requisição, pool de conexões)
+if settings.METRICS_ENABLED:
+    register_pool_metrics(engine)
+    app.add_middleware(MetricsMiddleware)
+
 # Configurar CORS com origens específicas
 allowed_origins = settings.get_allowed_origins()
 
@@ -100,10 +162,27 @@ app.include_router(
     prefix="/api/templates",
     tags=["Templates"],
 )
+app.include_router(
+    financeiro.router,
+    prefix="/api/financeiro",
+    tags=["Financeiro"],
+    dependencies=[Depends(auth.get_current_user)],
+)
+app.include_router(
+    dashboard.router,
+    prefix="/api",
+    tags=["Dashboard"],
+    dependencies=[Depends(auth.get_current_user)],
+)
+app.include_router(busca.router, prefix="/api", tags=["Busca"])
+app.include_router(autocomplete.router, prefix="/api", tags=["Autocompletar"])
 app.include_router(system.router, prefix="/api", tags=["System"])
 app.include_router(
     status.router, prefix="/api", tags=["Status"]
 )
+app.include_router(saude.router, tags=["Health"])
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router, prefix="/api", tags=["Métricas"])
 
 
 @app.get("/")
@@ -111,32 +190,3 @@ def read_root():
     """Endpoint raiz da API"""
     logger.debug("Endpoint raiz acessado")
     return {"message": "ERP Sistema API", "version": "1.0.0", "status": "running"}
-
-
-@app.get("/health")
-def health_check():
-    """
-    Health check endpoint para monitoramento
-    
-    Returns:
-        dict: Status da aplicação e dependências
-    """
-    from sqlalchemy import text
-    
-    health_status = {
-        "status": "healthy",
-        "version": "1.0.0",
-        "environment": settings.ENVIRONMENT,
-    }
-    
-    # Verificar conexão com banco de dados
-    try:
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-        health_status["database"] = "connected"
-    except Exception as e:
-        logger.error(f"Health check - Database error: {str(e)}")
-        health_status["status"] = "unhealthy"
-        health_status["database"] = "disconnected"
-    
-    return health_status
\ No newline at end of file
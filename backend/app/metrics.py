@@ -0,0 +1,321 @@
+"""
+Métricas da aplicação no formato de exposição texto do Prometheus
+"""
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Buckets padrão de latência (segundos)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Buckets para quantidade de queries por requisição
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250, 500)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labelnames: Iterable[str], labelvalues: Iterable[str], extra: str = "") -> str:
+    parts = []
+    for name, value in zip(labelnames, labelvalues):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{escaped}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    """Base das métricas: guarda nome, documentação e rótulos"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+    def collect(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Contador monotônico"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = self.header()
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Histograma com buckets cumulativos, soma e contagem"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # chave -> [contagens por bucket (+Inf no final), soma]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = [[0] * (len(self.buckets) + 1), 0.0]
+                self._values[key] = state
+            state[0][index] += 1
+            state[1] += value
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(state[0]), state[1])) for key, state in self._values.items())
+        lines = self.header()
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackGauge(_Metric):
+    """Gauge cujo valor é lido de uma função no momento da coleta"""
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Dict[Tuple[str, ...], float]],
+        labelnames: Tuple[str, ...] = (),
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def collect(self) -> List[str]:
+        lines = self.header()
+        try:
+            values = self.callback() or {}
+        except Exception:
+            values = {}
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registro central das métricas expostas em /api/metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Dict[Tuple[str, ...], float]],
+        labelnames: Tuple[str, ...] = (),
+    ) -> CallbackGauge:
+        return self.register(CallbackGauge(name, documentation, callback, labelnames))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Requisições HTTP
+http_requests_total = registry.counter(
+    "http_requests_total",
+    "Total de requisições HTTP por rota",
+    ("method", "route", "status"),
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds",
+    "Latência das requisições HTTP por rota",
+    ("method", "route"),
+)
+
+# Banco de dados
+db_queries_total = registry.counter(
+    "db_queries_total",
+    "Total de comandos SQL executados",
+)
+db_slow_queries_total = registry.counter(
+    "db_slow_queries_total",
+    "Total de comandos SQL acima do limite SLOW_QUERY_MS",
+)
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries",
+    "Quantidade de comandos SQL por requisição",
+    ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+http_request_db_seconds = registry.histogram(
+    "http_request_db_seconds",
+    "Tempo gasto no banco de dados por requisição",
+    ("method", "route"),
+)
+
+# Armazenamento (OneDrive / local)
+storage_operations_total = registry.counter(
+    "storage_operations_total",
+    "Operações de armazenamento por backend, operação e resultado",
+    ("backend", "operation", "result"),
+)
+storage_operation_duration_seconds = registry.histogram(
+    "storage_operation_duration_seconds",
+    "Duração das operações de armazenamento",
+    ("backend", "operation"),
+)
+
+
+def pool_stats(engine) -> Dict[Tuple[str, ...], float]:
+    """Lê o estado do pool de conexões do engine (quando o pool expõe essas informações)"""
+    pool = engine.pool
+    stats: Dict[Tuple[str, ...], float] = {}
+    for state, attr in (
+        ("size", "size"),
+        ("checked_out", "checkedout"),
+        ("checked_in", "checkedin"),
+        ("overflow", "overflow"),
+    ):
+        method = getattr(pool, attr, None)
+        if callable(method):
+            try:
+                stats[(state,)] = float(method())
+            except Exception:
+                continue
+    return stats
+
+
+def register_pool_metrics(engine) -> None:
+    """Registra o gauge de uso do pool de conexões do engine informado"""
+    registry.gauge_callback(
+        "db_pool_connections",
+        "Conexões do pool do SQLAlchemy por estado",
+        lambda: pool_stats(engine),
+        ("state",),
+    )
+
+
+def track_storage(backend: str, operation: Optional[str] = None):
+    """
+    Decorator para contabilizar operações dos serviços de armazenamento.
+
+    O resultado é "ok" quando o método retorna valor verdadeiro, "falha" quando
+    retorna falso/None, "erro" quando lança exceção e "desabilitado" quando o
+    serviço está desligado.
+    """
+
+    def decorator(func):
+        op_name = operation or func.__name__
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not getattr(self, "enabled", True):
+                storage_operations_total.inc(backend=backend, operation=op_name, result="desabilitado")
+                return func(self, *args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                result = func(self, *args, **kwargs)
+            except Exception:
+                storage_operations_total.inc(backend=backend, operation=op_name, result="erro")
+                raise
+            finally:
+                storage_operation_duration_seconds.observe(
+                    time.perf_counter() - start, backend=backend, operation=op_name
+                )
+            storage_operations_total.inc(
+                backend=backend, operation=op_name, result="ok" if result else "falha"
+            )
+            return result
+
+        return wrapper
+
+    return decorator
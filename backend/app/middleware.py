@@ -7,6 +7,10 @@ from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 
+from . import metrics
+from .config import settings
+from .db_instrumentation import get_query_stats, start_query_stats
+
 logger = logging.getLogger(__name__)
 
 
@@ -78,3 +82,41 @@ class ErrorLoggingMiddleware(BaseHTTPMiddleware):
                 }
             )
             raise
+
+
+class MetricsMiddleware(BaseHTTPMiddleware):
+    """Middleware para coletar métricas de latência e de queries por rota"""
+
+    async def dispatch(self, request: Request, call_next):
+        stats = get_query_stats() or start_query_stats()
+        start_time = time.perf_counter()
+        status_code = 500
+
+        try:
+            response: Response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            process_time = time.perf_counter() - start_time
+
+            # Usa o template da rota (ex: /api/projetos/{projeto_id}) para não
+            # criar uma série por ID
+            route = request.scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = request.method
+
+            metrics.http_requests_total.inc(method=method, route=route_path, status=str(status_code))
+            metrics.http_request_duration_seconds.observe(process_time, method=method, route=route_path)
+            metrics.http_request_db_queries.observe(stats.count, method=method, route=route_path)
+            metrics.http_request_db_seconds.observe(stats.total_time, method=method, route=route_path)
+
+
+class QueryProfilerMiddleware(BaseHTTPMiddleware):
+    """Middleware que expõe a quantidade e o tempo de queries da requisição em headers"""
+
+    async def dispatch(self, request: Request, call_next):
+        stats = get_query_stats() or start_query_stats()
+        response: Response = await call_next(request)
+        response.headers["X-DB-Queries"] = str(stats.count)
+        response.headers["X-DB-Time"] = f"{stats.total_time * 1000:.2f}ms"
+        return response
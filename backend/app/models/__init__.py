@@ -8,3 +8,6 @@ from .cronograma import *
 from .produto_servico import *
 from .despesa_projeto import *
 
+from .sequencia import *
+from .projeto_financeiro import *
+from .dashboard import *
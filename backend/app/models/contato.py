@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
 
 class Contato(Base):
     __tablename__ = "contatos"
+    __table_args__ = (
+        # Contatos por empresa e verificação de duplicidade (empresa + nome) na importação
+        Index("ix_contatos_pessoa_juridica_id_nome", "pessoa_juridica_id", "nome"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     pessoa_juridica_id = Column(Integer, ForeignKey("pessoas_juridicas.id"), nullable=False)
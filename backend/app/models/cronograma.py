@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Numeric, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Numeric, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship, backref
 from datetime import datetime
 
@@ -26,6 +26,10 @@ class Cronograma(Base):
 
 class CronogramaHistorico(Base):
     __tablename__ = "cronogramas_historico"
+    __table_args__ = (
+        # Histórico de um cronograma ordenado por data (mais recente primeiro)
+        Index("ix_cronogramas_historico_cronograma_id_criado_em", "cronograma_id", "criado_em"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     cronograma_id = Column(Integer, ForeignKey("cronogramas.id"), nullable=False)
@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, String, Numeric, Date, ForeignKey, Index
+
+from ..database import Base
+
+
+class DashboardFaturamentoMensal(Base):
+    """Faturamentos agregados por mês (AAAA-MM), mantidos pelo dashboard_service"""
+    __tablename__ = "dashboard_faturamento_mensal"
+
+    mes = Column(String(7), primary_key=True)
+    valor_faturado = Column(Numeric(15, 2), nullable=False, default=0)
+    quantidade = Column(Integer, nullable=False, default=0)
+
+
+class DashboardProjetosStatus(Base):
+    """Quantidade e valores dos projetos por status (valor do enum StatusProjeto)"""
+    __tablename__ = "dashboard_projetos_status"
+
+    status = Column(String(50), primary_key=True)
+    quantidade = Column(Integer, nullable=False, default=0)
+    valor_orcado = Column(Numeric(15, 2), nullable=False, default=0)
+    valor_venda = Column(Numeric(15, 2), nullable=False, default=0)
+
+
+class DashboardCliente(Base):
+    """Projetos, valor de venda e faturado por cliente"""
+    __tablename__ = "dashboard_clientes"
+    __table_args__ = (
+        # Maiores clientes do dashboard
+        Index("ix_dashboard_clientes_total_faturado", "total_faturado"),
+    )
+
+    cliente_id = Column(Integer, ForeignKey("pessoas_juridicas.id", ondelete="CASCADE"), primary_key=True)
+    projetos = Column(Integer, nullable=False, default=0)
+    valor_venda = Column(Numeric(15, 2), nullable=False, default=0)
+    total_faturado = Column(Numeric(15, 2), nullable=False, default=0)
+
+
+class DashboardPrazo(Base):
+    """
+    Data de entrega (pedido de compra + prazo) de cada projeto em execução.
+    Sem pedido de compra, a data fica nula
+    """
+    __tablename__ = "dashboard_prazos"
+    __table_args__ = (
+        Index("ix_dashboard_prazos_data_entrega", "data_entrega"),
+    )
+
+    projeto_id = Column(Integer, ForeignKey("projetos.id", ondelete="CASCADE"), primary_key=True)
+    data_entrega = Column(Date, nullable=True)
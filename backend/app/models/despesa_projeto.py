@@ -1,25 +1,4 @@
-# Novo modelo para itens de despesa de projeto
-from sqlalchemy import Float
-
-class DespesaProjetoItem(Base):
-    __tablename__ = "despesas_projetos_itens"
-
-    id = Column(Integer, primary_key=True, index=True)
-    despesa_projeto_id = Column(Integer, ForeignKey("despesas_projetos.id"), nullable=False)
-    produto_servico_id = Column(Integer, ForeignKey("produtos_servicos.id"), nullable=False)
-    descricao = Column(String(255), nullable=True)
-    quantidade = Column(Numeric(10, 2), nullable=False, default=1)
-    valor_unitario = Column(Numeric(15, 2), nullable=False, default=0.00)
-    icms = Column(Numeric(5, 2), default=0.00)
-    ipi = Column(Numeric(5, 2), default=0.00)
-    pis = Column(Numeric(5, 2), default=0.00)
-    cofins = Column(Numeric(5, 2), default=0.00)
-    iss = Column(Numeric(5, 2), default=0.00)
-
-    # Relacionamentos
-    despesa = relationship("DespesaProjeto", back_populates="itens")
-    produto_servico = relationship("ProdutoServico")
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, Date, ForeignKey, Enum as SQLEnum, Text
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, Date, ForeignKey, Enum as SQLEnum, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -44,11 +23,15 @@ class TipoFrete(str, enum.Enum):
 
 class DespesaProjeto(Base):
     __tablename__ = "despesas_projetos"
+    __table_args__ = (
+        # Despesas por projeto e contagem por projeto + fornecedor (gerar_numero_despesa)
+        Index("ix_despesas_projetos_projeto_id_fornecedor_id", "projeto_id", "fornecedor_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     numero_despesa = Column(String(50), unique=True, nullable=False, index=True)
     projeto_id = Column(Integer, ForeignKey("projetos.id"), nullable=False)
-    fornecedor_id = Column(Integer, ForeignKey("pessoas_juridicas.id"), nullable=False)
+    fornecedor_id = Column(Integer, ForeignKey("pessoas_juridicas.id"), nullable=False, index=True)
     tecnico_responsavel_id = Column(Integer, ForeignKey("funcionarios.id"), nullable=False)
     contato_id = Column(Integer, ForeignKey("contatos.id"), nullable=True)
     status = Column(SQLEnum(StatusDespesa), nullable=False, default=StatusDespesa.RASCUNHO)
@@ -68,3 +51,24 @@ class DespesaProjeto(Base):
     tecnico_responsavel = relationship("Funcionario", foreign_keys=[tecnico_responsavel_id])
     contato = relationship("Contato", foreign_keys=[contato_id])
     itens = relationship("DespesaProjetoItem", back_populates="despesa", cascade="all, delete-orphan")
+
+
+# Novo modelo para itens de despesa de projeto
+class DespesaProjetoItem(Base):
+    __tablename__ = "despesas_projetos_itens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    despesa_projeto_id = Column(Integer, ForeignKey("despesas_projetos.id"), nullable=False, index=True)
+    produto_servico_id = Column(Integer, ForeignKey("produtos_servicos.id"), nullable=False)
+    descricao = Column(String(255), nullable=True)
+    quantidade = Column(Numeric(10, 2), nullable=False, default=1)
+    valor_unitario = Column(Numeric(15, 2), nullable=False, default=0.00)
+    icms = Column(Numeric(5, 2), default=0.00)
+    ipi = Column(Numeric(5, 2), default=0.00)
+    pis = Column(Numeric(5, 2), default=0.00)
+    cofins = Column(Numeric(5, 2), default=0.00)
+    iss = Column(Numeric(5, 2), default=0.00)
+
+    # Relacionamentos
+    despesa = relationship("DespesaProjeto", back_populates="itens")
+    produto_servico = relationship("ProdutoServico")
@@ -7,10 +7,10 @@ class Faturamento(Base):
     __tablename__ = "faturamentos"
 
     id = Column(Integer, primary_key=True, index=True)
-    projeto_id = Column(Integer, ForeignKey("projetos.id"), nullable=False)
-    tecnico_id = Column(Integer, ForeignKey("funcionarios.id"), nullable=False)
+    projeto_id = Column(Integer, ForeignKey("projetos.id"), nullable=False, index=True)
+    tecnico_id = Column(Integer, ForeignKey("funcionarios.id"), nullable=False, index=True)
     valor_faturado = Column(Numeric(15,2), nullable=False, default=0.00)
-    data_faturamento = Column(DateTime(timezone=True), server_default=func.now())
+    data_faturamento = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     observacoes = Column(Text)
 
     criado_em = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Enum as SQLEnum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -14,6 +14,10 @@ class TipoProdutoServico(str, enum.Enum):
 
 class ProdutoServico(Base):
     __tablename__ = "produtos_servicos"
+    __table_args__ = (
+        # Maior código interno de cada tipo (inicialização da sequência de códigos)
+        Index("ix_produtos_servicos_tipo_codigo_interno", "tipo", "codigo_interno"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     codigo_interno = Column(String(8), unique=True, nullable=False, index=True)
@@ -38,8 +42,8 @@ class ProdutoServicoFornecedor(Base):
     __tablename__ = "produtos_servicos_fornecedores"
 
     id = Column(Integer, primary_key=True, index=True)
-    produto_servico_id = Column(Integer, ForeignKey("produtos_servicos.id"), nullable=False)
-    fornecedor_id = Column(Integer, ForeignKey("pessoas_juridicas.id"), nullable=False)
+    produto_servico_id = Column(Integer, ForeignKey("produtos_servicos.id"), nullable=False, index=True)
+    fornecedor_id = Column(Integer, ForeignKey("pessoas_juridicas.id"), nullable=False, index=True)
     codigo_fornecedor = Column(String(50), nullable=False)
     preco_unitario = Column(Numeric(15, 2), default=0.00)
     prazo_entrega_dias = Column(Integer, default=0)
@@ -55,6 +59,10 @@ class ProdutoServicoFornecedor(Base):
 
 class ProdutoServicoHistoricoPreco(Base):
     __tablename__ = "produtos_servicos_historico_precos"
+    __table_args__ = (
+        # Histórico de um produto ordenado por data
+        Index("ix_produtos_servicos_historico_precos_produto_data", "produto_servico_id", "registrado_em"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     produto_servico_id = Column(Integer, ForeignKey("produtos_servicos.id"), nullable=False)
@@ -20,7 +20,7 @@ class Projeto(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     numero = Column(String(50), unique=True, nullable=False, index=True)
-    cliente_id = Column(Integer, ForeignKey("pessoas_juridicas.id"), nullable=False)
+    cliente_id = Column(Integer, ForeignKey("pessoas_juridicas.id"), nullable=False, index=True)
     nome = Column(String(255), nullable=False)
     contato_id = Column(Integer, ForeignKey("contatos.id"), nullable=False)
     tecnico = Column(String(255), nullable=False)
@@ -28,7 +28,7 @@ class Projeto(Base):
     valor_venda = Column(Numeric(15, 2), default=0.00)
     prazo_entrega_dias = Column(Integer, default=0)
     data_pedido_compra = Column(DateTime, nullable=True)
-    status = Column(SQLEnum(StatusProjeto), default=StatusProjeto.ORCANDO)
+    status = Column(SQLEnum(StatusProjeto), default=StatusProjeto.ORCANDO, index=True)
     criado_em = Column(DateTime, default=get_local_now)
     atualizado_em = Column(DateTime, default=get_local_now, onupdate=get_local_now)
 
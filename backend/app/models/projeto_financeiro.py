@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, Numeric, DateTime, ForeignKey, Index
+
+from ..database import Base
+from ..config import get_local_now
+
+
+class ProjetoFinanceiro(Base):
+    """
+    Resumo financeiro de cada projeto, mantido pelo financeiro_service a partir
+    dos faturamentos e despesas (não deve ser alterado diretamente)
+    """
+    __tablename__ = "projeto_financeiro"
+    __table_args__ = (
+        # Ordenação e filtros da listagem /api/financeiro/projetos
+        Index("ix_projeto_financeiro_margem", "margem"),
+        Index("ix_projeto_financeiro_percentual_faturado", "percentual_faturado"),
+        Index("ix_projeto_financeiro_total_faturado", "total_faturado"),
+    )
+
+    projeto_id = Column(Integer, ForeignKey("projetos.id", ondelete="CASCADE"), primary_key=True)
+    valor_orcado = Column(Numeric(15, 2), nullable=False, default=0)
+    valor_venda = Column(Numeric(15, 2), nullable=False, default=0)
+    total_faturado = Column(Numeric(15, 2), nullable=False, default=0)
+    # Itens (com IPI) e frete das despesas não canceladas
+    total_despesas = Column(Numeric(15, 2), nullable=False, default=0)
+    # Valor de venda menos despesas
+    margem = Column(Numeric(15, 2), nullable=False, default=0)
+    # Faturado sobre o valor de venda, em %
+    percentual_faturado = Column(Numeric(9, 2), nullable=False, default=0)
+    atualizado_em = Column(DateTime, default=get_local_now, onupdate=get_local_now)
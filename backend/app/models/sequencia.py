@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String
+
+from ..database import Base
+
+
+class SequenciaCodigo(Base):
+    """Último valor emitido de cada sequência de códigos (ex.: códigos internos por tipo de produto)"""
+    __tablename__ = "sequencias_codigos"
+
+    nome = Column(String(50), primary_key=True)
+    ultimo_valor = Column(Integer, nullable=False, default=0)
@@ -2,13 +2,15 @@
 Serviço de integração com OneDrive usando Microsoft Graph API
 """
 import logging
-from typing import Optional, Dict, List
+from typing import TYPE_CHECKING, Optional, Dict, List
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from msal import ConfidentialClientApplication
-import requests
-from requests.adapters import HTTPAdapter
 from app.config import settings
+from app.metrics import track_storage
+
+# msal e requests são carregados no primeiro uso, só com o OneDrive habilitado
+if TYPE_CHECKING:
+    import requests
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +27,7 @@ class OneDriveService:
         self.root_folder = settings.ONEDRIVE_ROOT_FOLDER
         self.access_token: Optional[str] = None
         self._created_folders_cache: set = set()  # Cache de pastas já criadas
-        self._session: Optional[requests.Session] = None  # Sessão HTTP reutilizável
+        self._session: Optional["requests.Session"] = None  # Sessão HTTP reutilizável
         
         if self.enabled and not (self.client_id and self.client_secret and self.tenant_id and self.user_email):
             logger.warning("OneDrive está habilitado mas credenciais não foram configuradas!")
@@ -37,6 +39,8 @@ class OneDriveService:
             return None
             
         try:
+            from msal import ConfidentialClientApplication
+
             app = ConfidentialClientApplication(
                 self.client_id,
                 authority=f"https://login.microsoftonline.com/{self.tenant_id}",
@@ -58,9 +62,12 @@ class OneDriveService:
             logger.error(f"Erro na autenticação OneDrive: {str(e)}")
             return None
     
-    def _get_session(self) -> requests.Session:
+    def _get_session(self) -> "requests.Session":
         """Retorna sessão HTTP reutilizável com pool de conexões otimizado"""
         if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
             self._session = requests.Session()
             # Aumenta o pool de conexões para suportar mais requisições paralelas
             adapter = HTTPAdapter(
@@ -81,6 +88,7 @@ class OneDriveService:
             'Content-Type': 'application/json'
         }
     
+    @track_storage("onedrive")
     def create_folder(self, folder_path: str, parent_path: str = "") -> Optional[Dict]:
         """
         Cria uma pasta no OneDrive (suporta criação hierárquica)
@@ -186,6 +194,7 @@ class OneDriveService:
             logger.error(f"Exceção ao criar pasta {folder_name}: {str(e)}")
             return None
     
+    @track_storage("onedrive")
     def upload_file(self, file_path: str, file_data: bytes, folder_path: str = "") -> Optional[Dict]:
         """
         Faz upload de um arquivo para o OneDrive
@@ -273,6 +282,7 @@ class OneDriveService:
                     except Exception as e:
                         logger.error(f"Erro ao criar pasta {folder}: {str(e)}")
     
+    @track_storage("onedrive")
     def create_project_structure(self, project_number: str, project_name: str, client_sigla: str) -> bool:
         """
         Cria estrutura de pastas para um projeto
@@ -0,0 +1,661 @@
+"""
+Geração do relatório PDF de projetos com cache em disco
+
+O relatório é montado em duas etapas: os dados do projeto são coletados do banco
+em um dicionário simples (serializável e sem objetos do SQLAlchemy) e depois
+renderizados com o reportlab. O hash desse dicionário identifica o conteúdo do
+PDF, então downloads repetidos de um projeto que não mudou são servidos do
+cache sem renderizar de novo.
+
+A exportação em lote carrega os dados de vários projetos em poucas queries e
+renderiza os PDFs em paralelo em um pool de processos (o reportlab é limitado
+pela CPU e pelo GIL), montando o ZIP à medida que cada relatório fica pronto.
+"""
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from sqlalchemy.orm import Session, joinedload
+
+from .config import settings
+from .models.cronograma import Cronograma as CronogramaModel, CronogramaHistorico as CronogramaHistoricoModel
+from .models.faturamento import Faturamento as FaturamentoModel
+from .models.projeto import Projeto as ProjetoModel
+
+logger = logging.getLogger(__name__)
+
+# Incrementar quando o layout mudar, para invalidar os PDFs em cache
+PDF_LAYOUT_VERSION = 2
+
+LOGO_MAX_WIDTH = 160
+LOGO_MAX_HEIGHT = 70
+
+
+def _format_currency_br(value: Decimal) -> str:
+    try:
+        val = float(value)
+    except Exception:
+        val = 0.0
+    formatted = f"{val:,.2f}"
+    formatted = formatted.replace(",", "X").replace(".", ",").replace("X", ".")
+    return f"R$ {formatted}"
+
+
+def _format_date_br(value: datetime) -> str:
+    if not value:
+        return "N/A"
+    return value.strftime("%d/%m/%Y")
+
+
+def _format_datetime_br(value: datetime) -> str:
+    if not value:
+        return "N/A"
+    return value.strftime("%d/%m/%Y %H:%M")
+
+
+def _prazo_status(projeto: ProjetoModel) -> str:
+    if projeto.data_pedido_compra and projeto.prazo_entrega_dias:
+        prazo_entrega = projeto.data_pedido_compra + timedelta(days=projeto.prazo_entrega_dias)
+        dias_restantes = (prazo_entrega - datetime.now()).days
+        if dias_restantes < 0:
+            return "Atrasado"
+        if dias_restantes <= 5:
+            return "Urgente"
+    return "No prazo"
+
+
+def montar_dados_projeto(
+    projeto: ProjetoModel,
+    faturamentos: List[FaturamentoModel],
+    cronograma: Optional[CronogramaModel],
+) -> dict:
+    """
+    Converte o projeto e seus relacionamentos (já carregados) no dicionário
+    usado pela renderização. Só contém tipos simples, então pode ser
+    serializado, enviado para outro processo e usado como chave de cache.
+    """
+    cliente = projeto.cliente
+    contato = projeto.contato
+    total_faturado = sum([float(f.valor_faturado or 0) for f in faturamentos])
+
+    dados = {
+        "numero": projeto.numero,
+        "nome": projeto.nome or "N/A",
+        "status": str(getattr(projeto.status, "value", projeto.status)),
+        "tecnico": projeto.tecnico or "N/A",
+        "prazo_dias": str(projeto.prazo_entrega_dias or "N/A"),
+        "data_pedido_compra": _format_date_br(projeto.data_pedido_compra),
+        "valor_orcado": _format_currency_br(projeto.valor_orcado or 0),
+        "valor_venda": _format_currency_br(projeto.valor_venda or 0),
+        "total_faturado": _format_currency_br(Decimal(str(total_faturado))),
+        "criado_em": _format_datetime_br(projeto.criado_em),
+        "atualizado_em": _format_datetime_br(projeto.atualizado_em),
+        "cliente": {
+            "nome": (cliente.nome_fantasia or cliente.razao_social) if cliente else "N/A",
+            "cnpj": cliente.cnpj if cliente else "N/A",
+            "cidade_uf": f"{cliente.cidade}/{cliente.estado}" if cliente and cliente.cidade and cliente.estado else "N/A",
+            "endereco": cliente.endereco if cliente else "N/A",
+        },
+        "contato": {
+            "nome": contato.nome if contato else "N/A",
+            "email": contato.email if contato else "N/A",
+            "telefone": (contato.celular or contato.telefone_fixo or "N/A") if contato else "N/A",
+        },
+        "faturamentos": [
+            [
+                _format_date_br(fat.data_faturamento),
+                fat.tecnico.nome if fat.tecnico else "N/A",
+                _format_currency_br(fat.valor_faturado or 0),
+                fat.observacoes or "",
+            ]
+            for fat in faturamentos
+        ],
+        "cronograma": None,
+    }
+
+    if cronograma:
+        dados["cronograma"] = {
+            "percentual": f"{cronograma.percentual_conclusao}%",
+            "prazo_status": _prazo_status(projeto),
+            "observacoes": cronograma.observacoes or "N/A",
+            "historico": [
+                [
+                    _format_datetime_br(h.criado_em),
+                    h.criado_por.username if h.criado_por else "N/A",
+                    f"{h.percentual_conclusao}%",
+                    h.observacoes or "-",
+                ]
+                for h in cronograma.historico
+            ],
+        }
+    return dados
+
+
+def carregar_dados_projeto(db: Session, projeto_id: int) -> Optional[dict]:
+    """Carrega os dados do relatório com um número fixo de queries (None se não existir)"""
+    projeto = db.query(ProjetoModel).options(
+        joinedload(ProjetoModel.cliente),
+        joinedload(ProjetoModel.contato),
+    ).filter(ProjetoModel.id == projeto_id).first()
+    if not projeto:
+        return None
+
+    faturamentos = db.query(FaturamentoModel).options(
+        joinedload(FaturamentoModel.tecnico)
+    ).filter(FaturamentoModel.projeto_id == projeto.id).all()
+
+    cronograma = db.query(CronogramaModel).options(
+        joinedload(CronogramaModel.historico).joinedload(CronogramaHistoricoModel.criado_por)
+    ).filter(CronogramaModel.projeto_id == projeto.id).first()
+
+    return montar_dados_projeto(projeto, faturamentos, cronograma)
+
+
+def carregar_dados_projetos(db: Session, projetos: List[ProjetoModel]) -> List[dict]:
+    """
+    Monta os dados do relatório de vários projetos (com cliente e contato já
+    carregados) usando uma query para os faturamentos e outra para os cronogramas
+    """
+    ids = [p.id for p in projetos]
+    if not ids:
+        return []
+
+    faturamentos_por_projeto = defaultdict(list)
+    faturamentos = db.query(FaturamentoModel).options(
+        joinedload(FaturamentoModel.tecnico)
+    ).filter(FaturamentoModel.projeto_id.in_(ids)).order_by(FaturamentoModel.id).all()
+    for faturamento in faturamentos:
+        faturamentos_por_projeto[faturamento.projeto_id].append(faturamento)
+
+    cronogramas = db.query(CronogramaModel).options(
+        joinedload(CronogramaModel.historico).joinedload(CronogramaHistoricoModel.criado_por)
+    ).filter(CronogramaModel.projeto_id.in_(ids)).all()
+    cronograma_por_projeto = {c.projeto_id: c for c in cronogramas}
+
+    return [
+        montar_dados_projeto(p, faturamentos_por_projeto[p.id], cronograma_por_projeto.get(p.id))
+        for p in projetos
+    ]
+
+
+def chave_pdf(dados: dict, usuario: str) -> str:
+    """Hash do conteúdo do relatório (dados, usuário do rodapé e versão do layout)"""
+    conteudo = json.dumps(
+        {"layout": PDF_LAYOUT_VERSION, "usuario": usuario, "dados": dados},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=4)
+def _carregar_logo(logo_path: str, mtime: float):
+    """Decodifica e dimensiona o logo uma única vez (o mtime invalida ao trocar o arquivo)"""
+    logo = ImageReader(logo_path)
+    img_width, img_height = logo.getSize()
+    scale = min(1.0, LOGO_MAX_WIDTH / img_width, LOGO_MAX_HEIGHT / img_height)
+    return logo, img_width * scale, img_height * scale
+
+
+def obter_logo():
+    """Logo configurado em LOGO_PATH, ou None se não existir/for inválido"""
+    logo_path = settings.LOGO_PATH
+    if not logo_path or not os.path.exists(logo_path):
+        return None
+    try:
+        return _carregar_logo(logo_path, os.path.getmtime(logo_path))
+    except Exception as e:
+        logger.warning(f"Não foi possível carregar o logo {logo_path}: {str(e)}")
+        return None
+
+
+def _tabela_campos(rows: list) -> Table:
+    table = Table(rows, colWidths=[140, 360])
+    table.setStyle(
+        TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f3f4f6")),
+                ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#111827")),
+                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("FONTSIZE", (0, 0), (-1, -1), 9),
+                ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#fafafa")]),
+                ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#e5e7eb")),
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                ("LEFTPADDING", (0, 0), (-1, -1), 6),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+                ("TOPPADDING", (0, 0), (-1, -1), 4),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+            ]
+        )
+    )
+    return table
+
+
+def _tabela_lista(rows: list, col_widths: list) -> Table:
+    table = Table(rows, colWidths=col_widths)
+    table.setStyle(
+        TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#e5e7eb")),
+                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("FONTSIZE", (0, 0), (-1, -1), 8.5),
+                ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#e5e7eb")),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("LEFTPADDING", (0, 0), (-1, -1), 4),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 4),
+                ("TOPPADDING", (0, 0), (-1, -1), 3),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 3),
+            ]
+        )
+    )
+    return table
+
+
+def renderizar_pdf_projeto(dados: dict, usuario: str) -> bytes:
+    """Renderiza o relatório do projeto a partir de montar_dados_projeto"""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, leftMargin=36, rightMargin=36, topMargin=88, bottomMargin=52)
+    styles = getSampleStyleSheet()
+    title_style = styles["Title"]
+    subtitle_style = ParagraphStyle(
+        name="Subtitle",
+        parent=styles["Heading2"],
+        fontSize=12,
+        textColor=colors.HexColor("#1f2937"),
+        spaceAfter=6,
+    )
+    label_style = ParagraphStyle(
+        name="Label",
+        parent=styles["BodyText"],
+        fontSize=9,
+        textColor=colors.HexColor("#6b7280"),
+    )
+
+    story = []
+    story.append(Paragraph(f"Relatorio do Projeto {dados['numero']}", title_style))
+    story.append(Spacer(1, 12))
+
+    def add_section(title: str):
+        story.append(Paragraph(title, subtitle_style))
+
+    def add_table(rows: list):
+        story.append(_tabela_campos(rows))
+        story.append(Spacer(1, 12))
+
+    cliente = dados["cliente"]
+    contato = dados["contato"]
+
+    add_section("Dados do Projeto")
+    add_table(
+        [
+            ["Campo", "Valor"],
+            ["Nome", dados["nome"]],
+            ["Status", dados["status"]],
+            ["Tecnico", dados["tecnico"]],
+            ["Prazo (dias)", dados["prazo_dias"]],
+            ["Data Pedido Compra", dados["data_pedido_compra"]],
+        ]
+    )
+
+    add_section("Cliente")
+    add_table(
+        [
+            ["Campo", "Valor"],
+            ["Nome", cliente["nome"]],
+            ["CNPJ", cliente["cnpj"]],
+            ["Cidade/UF", cliente["cidade_uf"]],
+            ["Endereco", cliente["endereco"]],
+        ]
+    )
+
+    add_section("Contato")
+    add_table(
+        [
+            ["Campo", "Valor"],
+            ["Nome", contato["nome"]],
+            ["Email", contato["email"]],
+            ["Telefone", contato["telefone"]],
+        ]
+    )
+
+    add_section("Valores")
+    add_table(
+        [
+            ["Campo", "Valor"],
+            ["Valor Orcado", dados["valor_orcado"]],
+            ["Valor de Venda", dados["valor_venda"]],
+            ["Total Faturado", dados["total_faturado"]],
+        ]
+    )
+
+    add_section("Historico")
+    add_table(
+        [
+            ["Campo", "Valor"],
+            ["Criado em", dados["criado_em"]],
+            ["Atualizado em", dados["atualizado_em"]],
+        ]
+    )
+
+    add_section("Faturamentos")
+    if dados["faturamentos"]:
+        fat_rows = [["Data", "Tecnico", "Valor", "Observacoes"]] + dados["faturamentos"]
+        story.append(_tabela_lista(fat_rows, [80, 140, 90, 190]))
+    else:
+        story.append(Paragraph("Nenhum faturamento registrado para este projeto.", label_style))
+
+    cronograma = dados["cronograma"]
+    if cronograma:
+        story.append(Spacer(1, 12))
+        add_section("Cronograma de Execucao")
+        add_table(
+            [
+                ["Campo", "Valor"],
+                ["Percentual de Conclusao", cronograma["percentual"]],
+                ["Prazo Status", cronograma["prazo_status"]],
+                ["Observacoes", cronograma["observacoes"]],
+            ]
+        )
+
+        if cronograma["historico"]:
+            story.append(Paragraph("Historico de Alteracoes", subtitle_style))
+            hist_rows = [["Data", "Usuario", "% Conclusao", "Observacoes"]] + cronograma["historico"]
+            story.append(_tabela_lista(hist_rows, [100, 120, 80, 200]))
+
+    logo = obter_logo()
+    # O PDF fica em cache enquanto os dados não mudam, então o rodapé traz o
+    # momento em que estes dados foram lidos, não o de cada download
+    dados_de = _format_datetime_br(datetime.now())
+
+    def draw_header_footer(canvas_obj, doc_obj):
+        canvas_obj.saveState()
+
+        if logo:
+            imagem, logo_width, logo_height = logo
+            try:
+                canvas_obj.drawImage(
+                    imagem,
+                    36,
+                    A4[1] - (logo_height + 20),
+                    width=logo_width,
+                    height=logo_height,
+                    mask='auto'
+                )
+            except Exception:
+                pass
+
+        canvas_obj.setFont("Helvetica", 8.5)
+        canvas_obj.setFillColor(colors.HexColor("#6b7280"))
+        page_number = canvas_obj.getPageNumber()
+        canvas_obj.drawRightString(A4[0] - 36, 24, f"Pagina {page_number}")
+        canvas_obj.drawString(36, 24, f"Dados de: {dados_de} | Usuario: {usuario}")
+
+        canvas_obj.restoreState()
+
+    doc.build(story, onFirstPage=draw_header_footer, onLaterPages=draw_header_footer)
+    return buffer.getvalue()
+
+
+class PdfCache:
+    """
+    Cache LRU em disco dos PDFs, endereçado pelo hash do conteúdo.
+
+    O acesso atualiza o mtime do arquivo; ao gravar, os arquivos menos
+    recentes são removidos até o diretório caber em max_bytes. Como o estado
+    fica só no sistema de arquivos, vários workers podem compartilhar o cache.
+    """
+
+    def __init__(self, diretorio: str, max_bytes: int, enabled: bool = True):
+        self.diretorio = Path(diretorio)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+
+    def _caminho(self, chave: str) -> Path:
+        return self.diretorio / f"{chave}.pdf"
+
+    def get(self, chave: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        caminho = self._caminho(chave)
+        try:
+            conteudo = caminho.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Erro ao ler PDF do cache {caminho}: {str(e)}")
+            return None
+        try:
+            os.utime(caminho)
+        except OSError:
+            pass
+        return conteudo
+
+    def put(self, chave: str, conteudo: bytes) -> None:
+        if not self.enabled:
+            return
+        try:
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+            temporario = self.diretorio / f".{chave}.{os.getpid()}.{threading.get_ident()}.tmp"
+            temporario.write_bytes(conteudo)
+            os.replace(temporario, self._caminho(chave))
+            self._evict()
+        except OSError as e:
+            logger.warning(f"Erro ao gravar PDF no cache: {str(e)}")
+
+    def _evict(self) -> None:
+        with self._lock:
+            arquivos = []
+            total = 0
+            for caminho in self.diretorio.glob("*.pdf"):
+                try:
+                    stat = caminho.stat()
+                except FileNotFoundError:
+                    continue
+                arquivos.append((stat.st_mtime, stat.st_size, caminho))
+                total += stat.st_size
+            if total <= self.max_bytes:
+                return
+            for _, tamanho, caminho in sorted(arquivos, key=lambda a: a[0]):
+                try:
+                    caminho.unlink()
+                except FileNotFoundError:
+                    pass
+                total -= tamanho
+                if total <= self.max_bytes:
+                    break
+
+    def clear(self) -> None:
+        with self._lock:
+            for caminho in self.diretorio.glob("*.pdf"):
+                try:
+                    caminho.unlink()
+                except FileNotFoundError:
+                    pass
+
+
+def gerar_pdf_projeto(dados: dict, usuario: str) -> tuple:
+    """Retorna (conteúdo, veio_do_cache) para o relatório do projeto"""
+    chave = chave_pdf(dados, usuario)
+    conteudo = pdf_cache.get(chave)
+    if conteudo is not None:
+        return conteudo, True
+    conteudo = renderizar_pdf_projeto(dados, usuario)
+    pdf_cache.put(chave, conteudo)
+    return conteudo, False
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _obter_pool() -> Optional[ProcessPoolExecutor]:
+    """Pool de processos compartilhado pelas exportações (None renderiza no próprio processo)"""
+    global _pool
+    if settings.PDF_BATCH_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # fork copiaria um worker do uvicorn com várias threads (locks no meio
+            # do uso); os processos do pool partem de um forkserver (spawn no Windows)
+            metodo = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PDF_BATCH_WORKERS,
+                mp_context=multiprocessing.get_context(metodo),
+            )
+        return _pool
+
+
+def _descartar_pool(pool: ProcessPoolExecutor) -> None:
+    """Tira de uso um pool quebrado (worker morto); o próximo lote cria outro"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def encerrar_pool() -> None:
+    """Encerra o pool de processos da exportação em lote"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+class _ZipStream:
+    """Destino sem seek para o ZipFile; o conteúdo gravado é consumido em partes"""
+
+    def __init__(self):
+        self._partes = []
+
+    def write(self, dados: bytes) -> int:
+        self._partes.append(bytes(dados))
+        return len(dados)
+
+    def flush(self) -> None:
+        pass
+
+    def consumir(self) -> bytes:
+        conteudo = b"".join(self._partes)
+        self._partes = []
+        return conteudo
+
+
+def gerar_zip_pdfs(lista_dados: List[dict], usuario: str) -> Iterator[bytes]:
+    """
+    Gera o ZIP com os relatórios dos projetos, em partes, à medida que os PDFs
+    ficam prontos. Relatórios em cache entram primeiro; os demais são
+    renderizados no pool de processos e gravados no cache. Falhas individuais
+    não interrompem o lote e são listadas em erros.txt.
+    """
+    destino = _ZipStream()
+    erros = []
+    with zipfile.ZipFile(destino, mode="w", compression=zipfile.ZIP_DEFLATED) as arquivo_zip:
+        pendentes = []
+        for dados in lista_dados:
+            chave = chave_pdf(dados, usuario)
+            conteudo = pdf_cache.get(chave)
+            if conteudo is not None:
+                arquivo_zip.writestr(f"projeto_{dados['numero']}.pdf", conteudo)
+                yield destino.consumir()
+            else:
+                pendentes.append((chave, dados))
+
+        concluidos = _renderizar_pendentes(pendentes, usuario)
+        try:
+            for chave, dados, resultado in concluidos:
+                if isinstance(resultado, Exception):
+                    logger.error(f"Erro ao gerar PDF do projeto {dados['numero']}: {str(resultado)}")
+                    erros.append(f"projeto_{dados['numero']}: {str(resultado)}")
+                    continue
+                pdf_cache.put(chave, resultado)
+                arquivo_zip.writestr(f"projeto_{dados['numero']}.pdf", resultado)
+                yield destino.consumir()
+        finally:
+            # Cliente desconectado: cancela as renderizações que ainda não começaram
+            concluidos.close()
+
+        if erros:
+            arquivo_zip.writestr("erros.txt", "\n".join(erros) + "\n")
+    yield destino.consumir()
+
+
+def _renderizar_pendentes(pendentes: List[tuple], usuario: str) -> Iterator[tuple]:
+    """
+    (chave, dados, resultado) de cada relatório, na ordem em que ficam prontos
+    no pool. Se o pool quebrar (um worker morto por falta de memória, por
+    exemplo), ele é descartado e o que faltava é renderizado no próprio processo.
+    """
+    restantes = dict(enumerate(pendentes))
+    futuros = {}
+    pool = _obter_pool()
+    if pool is not None:
+        try:
+            for indice, (_, dados) in restantes.items():
+                futuros[pool.submit(renderizar_pdf_projeto, dados, usuario)] = indice
+            for futuro in as_completed(futuros):
+                resultado = _resultado_seguro(futuro)
+                if isinstance(resultado, BrokenProcessPool):
+                    raise resultado
+                chave, dados = restantes.pop(futuros[futuro])
+                yield chave, dados, resultado
+        except BrokenProcessPool:
+            logger.error(
+                f"Pool de PDFs quebrado; renderizando {len(restantes)} relatório(s) no próprio processo"
+            )
+            _descartar_pool(pool)
+        finally:
+            for futuro in futuros:
+                futuro.cancel()
+    # Os que o pool concluiu antes de quebrar não são renderizados de novo
+    prontos = {
+        indice: futuro.result()
+        for futuro, indice in futuros.items()
+        if futuro.done() and not futuro.cancelled() and futuro.exception() is None
+    }
+    for indice, (chave, dados) in restantes.items():
+        resultado = prontos[indice] if indice in prontos else _renderizar_seguro(dados, usuario)
+        yield chave, dados, resultado
+
+
+def _renderizar_seguro(dados: dict, usuario: str):
+    try:
+        return renderizar_pdf_projeto(dados, usuario)
+    except Exception as e:
+        return e
+
+
+def _resultado_seguro(futuro):
+    try:
+        return futuro.result()
+    except Exception as e:
+        return e
+
+
+# Instância singleton do cache
+pdf_cache = PdfCache(
+    settings.PDF_CACHE_DIR,
+    settings.PDF_CACHE_MAX_MB * 1024 * 1024,
+    enabled=settings.PDF_CACHE_ENABLED,
+)
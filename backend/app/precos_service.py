@@ -0,0 +1,414 @@
+"""
+Estatísticas de preço dos produtos/serviços
+
+O preço de compra de um fornecedor é o preço unitário acrescido do IPI (os
+demais impostos são por dentro). Média, mínimo e máximo por produto são
+calculados em uma única consulta agregada, agrupada por produto, seja para um
+produto só ou para o catálogo inteiro.
+
+As funções daqui não fazem commit: o histórico de preços é gravado na mesma
+transação de quem chamou, de modo que uma importação ou um recálculo em massa
+termina com um único commit. Um registro só é gravado quando os preços mudaram
+em relação ao registro anterior do produto.
+
+A importação da tabela de preços de um fornecedor casa cada linha com o produto
+pelo código do fornecedor (vínculo já existente) ou pelo código do fabricante,
+usando dicionários carregados uma única vez, e grava inserções e atualizações
+em lotes.
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Numeric, func, insert, literal_column, select, type_coerce, update
+from sqlalchemy.orm import Session
+
+from .config import get_local_now
+from .importacao_service import ArquivoInvalidoError, converter_decimal, mapear_colunas, valor_celula
+from .models.produto_servico import (
+    ProdutoServico as ProdutoServicoModel,
+    ProdutoServicoFornecedor as ProdutoServicoFornecedorModel,
+    ProdutoServicoHistoricoPreco as ProdutoServicoHistoricoPrecoModel,
+)
+
+ZERO = Decimal("0.00")
+
+INTERVALOS_HISTORICO = ("dia", "semana", "mes")
+
+# Linhas gravadas por instrução na importação de tabelas de preço
+TAMANHO_LOTE = 1000
+
+# Cabeçalhos aceitos (já normalizados) para cada coluna da tabela do fornecedor
+COLUNAS_TABELA_PRECOS = {
+    "codigo_fornecedor": ("codigo_fornecedor", "codigo_do_fornecedor", "cod_fornecedor", "codigo"),
+    "codigo_fabricante": ("codigo_fabricante", "codigo_do_fabricante", "cod_fabricante", "part_number"),
+    "preco_unitario": ("preco_unitario", "preco", "valor_unitario", "valor"),
+    "prazo_entrega_dias": ("prazo_entrega_dias", "prazo_entrega", "prazo_de_entrega", "prazo"),
+    "icms": ("icms",),
+    "ipi": ("ipi",),
+    "pis": ("pis",),
+    "cofins": ("cofins",),
+    "iss": ("iss",),
+}
+
+COLUNAS_VALORES = ("preco_unitario", "prazo_entrega_dias", "icms", "ipi", "pis", "cofins", "iss")
+
+# Valores de um vínculo novo para as colunas ausentes no arquivo
+VALORES_PADRAO_VINCULO = {
+    **{c: ZERO for c in COLUNAS_VALORES if c != "prazo_entrega_dias"},
+    "prazo_entrega_dias": 0,
+}
+
+# (preço médio, preço mínimo, preço máximo)
+Estatisticas = Tuple[Decimal, Decimal, Decimal]
+
+
+def calcular_preco_com_impostos(preco_unitario: Decimal, ipi: Decimal) -> Decimal:
+    """Calcula o preço com impostos (apenas IPI é adicionado, outros são por dentro)"""
+    preco_base = Decimal(str(preco_unitario or 0))
+    ipi_percent = Decimal(str(ipi or 0))
+    return preco_base * (1 + ipi_percent / 100)
+
+
+def _preco_com_ipi():
+    """Expressão SQL equivalente a calcular_preco_com_impostos"""
+    fornecedor = ProdutoServicoFornecedorModel
+    # Literal decimal no SQL: numeric no PostgreSQL e real no SQLite (sem divisão inteira)
+    cem = literal_column("100.0")
+    return func.coalesce(fornecedor.preco_unitario, 0) * (cem + func.coalesce(fornecedor.ipi, 0)) / cem
+
+
+def _agregado(expressao):
+    # Arredonda como a coluna do histórico, Numeric(15, 2), e devolve Decimal
+    return type_coerce(func.round(expressao, 2), Numeric(15, 2))
+
+
+def calcular_estatisticas(db: Session, produto_ids: Optional[Iterable[int]] = None) -> Dict[int, Estatisticas]:
+    """
+    Média, mínimo e máximo do preço com IPI por produto, em uma consulta.
+
+    Sem produto_ids considera todos os produtos. Produtos sem fornecedores
+    não aparecem no resultado.
+    """
+    preco = _preco_com_ipi()
+    stmt = select(
+        ProdutoServicoFornecedorModel.produto_servico_id,
+        _agregado(func.avg(preco)),
+        _agregado(func.min(preco)),
+        _agregado(func.max(preco)),
+    ).group_by(ProdutoServicoFornecedorModel.produto_servico_id)
+
+    if produto_ids is not None:
+        produto_ids = list(produto_ids)
+        if not produto_ids:
+            return {}
+        stmt = stmt.where(ProdutoServicoFornecedorModel.produto_servico_id.in_(produto_ids))
+
+    return {
+        produto_id: (media or ZERO, minimo or ZERO, maximo or ZERO)
+        for produto_id, media, minimo, maximo in db.execute(stmt)
+    }
+
+
+def calcular_preco_medio_com_impostos(db: Session, produto_id: int) -> Estatisticas:
+    """Calcula preço médio, mínimo e máximo com impostos para um produto"""
+    return calcular_estatisticas(db, [produto_id]).get(produto_id, (ZERO, ZERO, ZERO))
+
+
+def _ultimos_registros(db: Session, produto_ids: Optional[list] = None) -> Dict[int, Estatisticas]:
+    """Último registro do histórico de cada produto"""
+    historico = ProdutoServicoHistoricoPrecoModel
+    ultimos = select(func.max(historico.id)).group_by(historico.produto_servico_id)
+    if produto_ids is not None:
+        ultimos = ultimos.where(historico.produto_servico_id.in_(produto_ids))
+    linhas = db.execute(
+        select(historico.produto_servico_id, historico.preco_medio, historico.preco_minimo, historico.preco_maximo)
+        .where(historico.id.in_(ultimos.scalar_subquery()))
+    )
+    return {produto_id: (media, minimo, maximo) for produto_id, media, minimo, maximo in linhas}
+
+
+def filtrar_alterados(db: Session, estatisticas: Dict[int, Estatisticas]) -> Dict[int, Estatisticas]:
+    """Remove os produtos cujo último registro do histórico tem os mesmos preços"""
+    if not estatisticas:
+        return {}
+    ids = list(estatisticas)
+    # Listas grandes de ids estouram o limite de parâmetros; nesse caso lê o último de todos
+    ultimos = _ultimos_registros(db, ids if len(ids) <= TAMANHO_LOTE else None)
+    return {
+        produto_id: valores
+        for produto_id, valores in estatisticas.items()
+        if ultimos.get(produto_id) != valores
+    }
+
+
+def registrar_historico(
+    db: Session,
+    estatisticas: Dict[int, Estatisticas],
+    apenas_alterados: bool = True,
+) -> Dict[int, Estatisticas]:
+    """
+    Adiciona um registro de histórico por produto (sem commit) e retorna os registrados.
+
+    Com apenas_alterados, um registro igual ao anterior do mesmo produto não é gravado.
+    """
+    if apenas_alterados:
+        estatisticas = filtrar_alterados(db, estatisticas)
+    if not estatisticas:
+        return {}
+    registrado_em = get_local_now()
+    db.execute(
+        insert(ProdutoServicoHistoricoPrecoModel),
+        [
+            {
+                "produto_servico_id": produto_id,
+                "preco_medio": media,
+                "preco_minimo": minimo,
+                "preco_maximo": maximo,
+                "registrado_em": registrado_em,
+            }
+            for produto_id, (media, minimo, maximo) in estatisticas.items()
+        ],
+    )
+    return estatisticas
+
+
+def recalcular_precos(
+    db: Session,
+    produto_ids: Optional[Iterable[int]] = None,
+    apenas_alterados: bool = True,
+) -> Dict[int, Estatisticas]:
+    """
+    Recalcula as estatísticas dos produtos e registra no histórico (sem commit).
+
+    Com apenas_alterados, produtos cujo preço não mudou desde o último
+    registro são ignorados. Retorna as estatísticas que foram registradas.
+    """
+    return registrar_historico(db, calcular_estatisticas(db, produto_ids), apenas_alterados)
+
+
+def _inicio_periodo(momento: datetime, intervalo: str) -> date:
+    dia = momento.date()
+    if intervalo == "semana":
+        return dia - timedelta(days=dia.weekday())
+    if intervalo == "mes":
+        return dia.replace(day=1)
+    return dia
+
+
+def serie_historico(
+    db: Session,
+    produto_id: int,
+    intervalo: str = "dia",
+    inicio: Optional[datetime] = None,
+    fim: Optional[datetime] = None,
+) -> List[dict]:
+    """
+    Histórico de preços de um produto agregado por dia, semana ou mês.
+
+    Cada período traz abertura, fechamento, máxima e mínima do preço médio, o
+    menor preço mínimo, o maior preço máximo e a quantidade de registros. Os
+    registros são lidos em ordem pelo índice (produto, data), só no intervalo pedido.
+    """
+    if intervalo not in INTERVALOS_HISTORICO:
+        raise ValueError(f"Intervalo deve ser um dos seguintes: {', '.join(INTERVALOS_HISTORICO)}")
+
+    historico = ProdutoServicoHistoricoPrecoModel
+    stmt = (
+        select(historico.registrado_em, historico.preco_medio, historico.preco_minimo, historico.preco_maximo)
+        .where(historico.produto_servico_id == produto_id)
+        .order_by(historico.registrado_em.asc(), historico.id.asc())
+    )
+    if inicio is not None:
+        stmt = stmt.where(historico.registrado_em >= inicio)
+    if fim is not None:
+        stmt = stmt.where(historico.registrado_em <= fim)
+
+    periodos = []
+    atual = None
+    for registrado_em, media, minimo, maximo in db.execute(stmt.execution_options(yield_per=1000)):
+        periodo = _inicio_periodo(registrado_em, intervalo)
+        if atual is None or atual["periodo"] != periodo:
+            atual = {
+                "periodo": periodo,
+                "abertura": media,
+                "fechamento": media,
+                "maxima": media,
+                "minima": media,
+                "preco_minimo": minimo,
+                "preco_maximo": maximo,
+                "registros": 0,
+            }
+            periodos.append(atual)
+        atual["fechamento"] = media
+        atual["maxima"] = max(atual["maxima"], media)
+        atual["minima"] = min(atual["minima"], media)
+        atual["preco_minimo"] = min(atual["preco_minimo"], minimo)
+        atual["preco_maximo"] = max(atual["preco_maximo"], maximo)
+        atual["registros"] += 1
+    return periodos
+
+
+def _lotes(itens: List, tamanho: int = TAMANHO_LOTE) -> Iterator[List]:
+    for inicio in range(0, len(itens), tamanho):
+        yield itens[inicio:inicio + tamanho]
+
+
+def mapear_colunas_tabela_precos(cabecalho: List[str]) -> Dict[str, int]:
+    """
+    Posição de cada coluna conhecida no cabeçalho (normalizado) da planilha.
+    Levanta ValueError se faltar alguma coluna obrigatória.
+    """
+    colunas = mapear_colunas(cabecalho, COLUNAS_TABELA_PRECOS)
+    if "codigo_fornecedor" not in colunas or "preco_unitario" not in colunas:
+        raise ValueError("Colunas obrigatórias: Código Fornecedor, Preço Unitário")
+    return colunas
+
+
+def _linha_vazia(linha: tuple) -> bool:
+    return not linha or all(v is None or str(v).strip() == "" for v in linha)
+
+
+def _ler_linha_preco(linha: tuple, colunas: Dict[str, int], valores_no_arquivo: List[str]) -> dict:
+    """
+    Código do fornecedor e valores de uma linha da tabela de preços. Levanta
+    ValueError com a mensagem da linha se ela não puder ser importada.
+    """
+    codigo_fornecedor = valor_celula(linha, colunas.get("codigo_fornecedor"))
+    if codigo_fornecedor is None:
+        raise ValueError("Código do fornecedor ausente")
+
+    dados = {"codigo_fornecedor": str(codigo_fornecedor)}
+    for coluna in valores_no_arquivo:
+        numero = converter_decimal(valor_celula(linha, colunas.get(coluna)))
+        if coluna == "prazo_entrega_dias":
+            dados[coluna] = int(numero or 0)
+        else:
+            dados[coluna] = numero if numero is not None else ZERO
+    if dados["preco_unitario"] < 0:
+        raise ValueError("Preço unitário negativo")
+    return dados
+
+
+def _produto_da_linha(
+    linha: tuple,
+    colunas: Dict[str, int],
+    codigo_fornecedor: str,
+    vinculo_por_codigo: Dict[str, int],
+    produto_por_fabricante: Dict[str, int],
+) -> int:
+    """Produto pelo código do fornecedor (vínculo existente) ou pelo código do fabricante"""
+    produto_id = vinculo_por_codigo.get(codigo_fornecedor)
+    if produto_id is None:
+        codigo_fabricante = valor_celula(linha, colunas.get("codigo_fabricante"))
+        if codigo_fabricante is not None:
+            produto_id = produto_por_fabricante.get(str(codigo_fabricante))
+    if produto_id is None:
+        raise ValueError(f"Produto não encontrado para o código {codigo_fornecedor}")
+    return produto_id
+
+
+def _vinculos_do_fornecedor(db: Session, fornecedor_id: int) -> Tuple[Dict[str, int], Dict[int, int]]:
+    """(código do fornecedor -> produto, produto -> vínculo) dos vínculos atuais"""
+    vinculo_por_codigo = {}
+    vinculo_por_produto = {}
+    for vinculo_id, produto_id, codigo in db.execute(
+        select(
+            ProdutoServicoFornecedorModel.id,
+            ProdutoServicoFornecedorModel.produto_servico_id,
+            ProdutoServicoFornecedorModel.codigo_fornecedor,
+        ).where(ProdutoServicoFornecedorModel.fornecedor_id == fornecedor_id)
+    ):
+        vinculo_por_codigo.setdefault(codigo, produto_id)
+        vinculo_por_produto.setdefault(produto_id, vinculo_id)
+    return vinculo_por_codigo, vinculo_por_produto
+
+
+def _produtos_por_fabricante(db: Session) -> Dict[str, int]:
+    produto_por_fabricante = {}
+    for produto_id, codigo in db.execute(
+        select(ProdutoServicoModel.id, ProdutoServicoModel.codigo_fabricante)
+        .where(ProdutoServicoModel.codigo_fabricante.isnot(None))
+        .order_by(ProdutoServicoModel.id)
+    ):
+        produto_por_fabricante.setdefault(str(codigo).strip(), produto_id)
+    return produto_por_fabricante
+
+
+def importar_tabela_precos(
+    db: Session,
+    fornecedor_id: int,
+    cabecalho: List[str],
+    linhas: Iterable[tuple],
+    progresso: Optional[Callable[..., None]] = None,
+) -> dict:
+    """
+    Insere ou atualiza os vínculos (produto, fornecedor) a partir das linhas da
+    tabela de preços e registra o histórico dos produtos afetados. Não faz commit.
+
+    Colunas ausentes no arquivo mantêm os valores atuais dos vínculos existentes.
+    progresso, se informado, recebe os contadores a cada lote.
+    """
+    colunas = mapear_colunas_tabela_precos(cabecalho)
+    valores_no_arquivo = [c for c in COLUNAS_VALORES if c in colunas]
+    informar = progresso or (lambda **campos: None)
+
+    # Vínculos atuais do fornecedor e produtos por código do fabricante, carregados uma vez
+    vinculo_por_codigo, vinculo_por_produto = _vinculos_do_fornecedor(db, fornecedor_id)
+    produto_por_fabricante = _produtos_por_fabricante(db) if "codigo_fabricante" in colunas else {}
+
+    # Por produto: a última linha do arquivo prevalece
+    atualizacoes = {}
+    insercoes = {}
+    afetados = set()
+    erros = []
+    processadas = 0
+
+    for numero, linha in enumerate(linhas, start=2):
+        processadas += 1
+        if processadas % TAMANHO_LOTE == 0:
+            informar(linhas_processadas=processadas, total_erros=len(erros))
+        if isinstance(linha, ArquivoInvalidoError):
+            erros.append(str(linha))
+            continue
+        if _linha_vazia(linha):
+            continue
+        try:
+            dados = _ler_linha_preco(linha, colunas, valores_no_arquivo)
+            produto_id = _produto_da_linha(
+                linha, colunas, dados["codigo_fornecedor"], vinculo_por_codigo, produto_por_fabricante
+            )
+        except (ValueError, ArithmeticError) as e:
+            erros.append(f"Linha {numero}: {str(e)}")
+            continue
+
+        vinculo_id = vinculo_por_produto.get(produto_id)
+        if vinculo_id is not None:
+            atualizacoes[vinculo_id] = {"id": vinculo_id, **dados}
+        else:
+            insercoes[produto_id] = {
+                "produto_servico_id": produto_id,
+                "fornecedor_id": fornecedor_id,
+                **VALORES_PADRAO_VINCULO,
+                **dados,
+            }
+        vinculo_por_codigo.setdefault(dados["codigo_fornecedor"], produto_id)
+        afetados.add(produto_id)
+
+    informar(status="gravando", linhas_processadas=processadas, total_erros=len(erros))
+
+    for lote in _lotes(list(atualizacoes.values())):
+        db.execute(update(ProdutoServicoFornecedorModel), lote)
+    for lote in _lotes(list(insercoes.values())):
+        db.execute(insert(ProdutoServicoFornecedorModel), lote)
+
+    historico = sum(len(recalcular_precos(db, lote)) for lote in _lotes(sorted(afetados)))
+
+    return {
+        "linhas_processadas": processadas,
+        "inseridos": len(insercoes),
+        "atualizados": len(atualizacoes),
+        "produtos_afetados": len(afetados),
+        "historico_registrado": historico,
+        "erros": erros,
+    }
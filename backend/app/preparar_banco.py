@@ -0,0 +1,91 @@
+"""
+Preparação do banco antes de iniciar a aplicação
+
+O schema é responsabilidade do Alembic. Este passo roda uma única vez por
+implantação (no entrypoint do container, antes dos workers do uvicorn), e não
+na importação de app.main, em que cada worker verificava todas as tabelas e
+competia com os demais no primeiro boot:
+
+    python -m app.preparar_banco
+
+- banco com alembic_version: `alembic upgrade head`;
+- banco PostgreSQL vazio: `alembic upgrade head` desde a primeira migração;
+- banco sem alembic_version (SQLite novo, em que as migrações iniciais não
+  rodam, ou banco criado pelo antigo create_all): as tabelas que faltam são
+  criadas pelos modelos e a versão é marcada como head.
+
+Em seguida são preenchidos os dados derivados de bancos anteriores às tabelas
+(índice de busca, resumo financeiro e agregados do dashboard). No PostgreSQL um
+advisory lock serializa containers iniciando ao mesmo tempo.
+"""
+import logging
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from . import models  # noqa: F401 - registra as tabelas em Base.metadata
+from .busca_service import garantir_indice as garantir_indice_busca
+from .dashboard_service import garantir_agregados as garantir_agregados_dashboard
+from .database import Base, engine as engine_padrao
+from .financeiro_service import garantir_resumo as garantir_resumo_financeiro
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_DIR = Path(__file__).resolve().parent.parent / "alembic"
+# Chave do pg_advisory_lock da preparação
+CHAVE_LOCK = 0x45525001
+
+
+def configuracao_alembic(conexao=None) -> Config:
+    """Config do Alembic sem o alembic.ini (não reconfigura o logging da aplicação)"""
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    if conexao is not None:
+        config.attributes["connection"] = conexao
+    return config
+
+
+def revisao_head() -> str:
+    return ScriptDirectory.from_config(configuracao_alembic()).get_current_head()
+
+
+def _migrar(engine: Engine) -> str:
+    """Aplica as migrações (ou adota o banco) e retorna a ação executada"""
+    with engine.begin() as conexao:
+        tabelas = set(inspect(conexao).get_table_names())
+        config = configuracao_alembic(conexao)
+        if "alembic_version" in tabelas or (not tabelas and conexao.dialect.name != "sqlite"):
+            command.upgrade(config, "head")
+            return "upgrade"
+        Base.metadata.create_all(bind=conexao)
+        command.stamp(config, "head")
+        return "stamp" if tabelas else "create"
+
+
+def preparar_banco(engine: Engine = engine_padrao) -> str:
+    """Migra o schema e preenche os dados derivados; retorna a ação do Alembic"""
+    with engine.connect() as trava:
+        postgres = trava.dialect.name == "postgresql"
+        if postgres:
+            trava.execute(text("SELECT pg_advisory_lock(:chave)"), {"chave": CHAVE_LOCK})
+        try:
+            acao = _migrar(engine)
+            garantir_indice_busca(engine)
+            garantir_resumo_financeiro(engine)
+            garantir_agregados_dashboard(engine)
+        finally:
+            if postgres:
+                trava.execute(text("SELECT pg_advisory_unlock(:chave)"), {"chave": CHAVE_LOCK})
+    logger.info(f"Banco preparado ({acao}, revisão {revisao_head()})")
+    return acao
+
+
+if __name__ == "__main__":
+    from .logging_config import setup_logging
+
+    setup_logging()
+    preparar_banco()
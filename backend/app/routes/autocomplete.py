@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from ..database import get_db
+from ..models.user import User as UserModel
+from ..autocomplete_service import CATALOGOS, autocomplete
+from .auth import get_current_user
+
+router = APIRouter()
+
+
+@router.get("/autocomplete/{catalogo}")
+def autocompletar(
+    catalogo: str,
+    q: str = Query("", max_length=100),
+    limite: int = Query(10, ge=1, le=50),
+    cliente_id: Optional[int] = Query(None, description="Só para contatos: restringe à empresa"),
+    current_user: UserModel = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Sugestões por prefixo para os campos de seleção (clientes, fornecedores, contatos, produtos, funcionários)"""
+    if catalogo not in CATALOGOS:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Catálogo inválido: {catalogo}. Use: {', '.join(CATALOGOS)}"
+        )
+    return autocomplete.buscar(db, catalogo, q, limite, cliente_id if catalogo == "contatos" else None)
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from ..database import get_db
+from ..models.user import User as UserModel
+from ..busca_service import ENTIDADES, buscar, reconstruir
+from .auth import get_current_user, verify_admin
+
+router = APIRouter()
+
+
+@router.get("/search")
+def buscar_registros(
+    q: str = Query(..., min_length=1, max_length=200),
+    tipos: Optional[str] = Query(None, description="Entidades separadas por vírgula"),
+    limite: int = Query(20, ge=1, le=100),
+    current_user: UserModel = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Busca textual em projetos, clientes/fornecedores, contatos e produtos/serviços"""
+    entidades = None
+    if tipos:
+        entidades = [t.strip() for t in tipos.split(",") if t.strip()]
+        invalidas = [t for t in entidades if t not in ENTIDADES]
+        if invalidas:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Tipos inválidos: {', '.join(invalidas)}. Use: {', '.join(ENTIDADES)}"
+            )
+    return {"q": q, "resultados": buscar(db, q, entidades, limite)}
+
+
+@router.post("/search/reindexar")
+def reindexar(
+    current_user: UserModel = Depends(verify_admin),
+    db: Session = Depends(get_db),
+):
+    """Reconstrói o índice de busca a partir das tabelas (apenas admin)"""
+    total = reconstruir(db)
+    db.commit()
+    return {"message": "Índice de busca reconstruído com sucesso", "total_indexados": total}
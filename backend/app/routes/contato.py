@@ -1,175 +1,134 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, joinedload
+from datetime import datetime
+from typing import List, Optional
 
 from ..database import get_db
 from ..models.contato import Contato as ContatoModel
 from ..models.pessoa_juridica import PessoaJuridica as PessoaJuridicaModel
 from ..schemas.contato import Contato, ContatoCreate, ContatoUpdate
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-from io import BytesIO
+from ..busca_service import indexando_insercoes
+from ..exportacao_service import Formato, FormatoIndisponivelError, resposta_exportacao
+from ..importacao_service import ArquivoInvalidoError, ler_registros
 
 router = APIRouter()
 
 
 # Rotas com paths específicos (devem vir primeiro)
 @router.get("/export/excel")
-def exportar_excel(db: Session = Depends(get_db)):
-    """Exportar todos os contatos para arquivo Excel"""
+def exportar_excel(formato: Formato = Query("xlsx", alias="format"), db: Session = Depends(get_db)):
+    """Exportar todos os contatos (XLSX, CSV, JSON Lines ou Parquet)"""
     try:
-        contatos = db.query(ContatoModel).all()
-        
-        # Criar workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Contatos"
-        
-        # Definir headers
-        headers = [
-            "ID",
-            "Nome",
-            "Empresa",
-            "Departamento",
-            "Telefone Fixo",
-            "Celular",
-            "Email",
-            "Data de Criação",
-            "Última Atualização"
-        ]
-        
-        ws.append(headers)
-        
-        # Estilo do header
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-        
-        # Adicionar dados
-        for contato in contatos:
-            pessoa = db.query(PessoaJuridicaModel).filter(PessoaJuridicaModel.id == contato.pessoa_juridica_id).first()
-            empresa_nome = pessoa.razao_social if pessoa else "N/A"
-            
-            ws.append([
+        contatos = db.query(ContatoModel).options(joinedload(ContatoModel.pessoa_juridica)).all()
+        linhas = [
+            (
                 contato.id,
                 contato.nome,
-                empresa_nome,
-                contato.departamento or "",
-                contato.telefone_fixo or "",
-                contato.celular or "",
-                contato.email or "",
-                contato.criado_em.isoformat() if contato.criado_em else "",
-                contato.atualizado_em.isoformat() if contato.atualizado_em else ""
-            ])
-        
-        # Ajustar largura das colunas
-        ws.column_dimensions['A'].width = 8
-        ws.column_dimensions['B'].width = 20
-        ws.column_dimensions['C'].width = 25
-        ws.column_dimensions['D'].width = 18
-        ws.column_dimensions['E'].width = 15
-        ws.column_dimensions['F'].width = 15
-        ws.column_dimensions['G'].width = 25
-        ws.column_dimensions['H'].width = 20
-        ws.column_dimensions['I'].width = 20
-        
-        # Salvar em memória
-        output = BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
-        return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": "attachment; filename=contatos.xlsx"}
+                contato.pessoa_juridica.razao_social if contato.pessoa_juridica else "N/A",
+                contato.departamento,
+                contato.telefone_fixo,
+                contato.celular,
+                contato.email,
+                contato.criado_em,
+                contato.atualizado_em,
+            )
+            for contato in contatos
+        ]
+        return resposta_exportacao(
+            "contatos",
+            "Contatos",
+            [
+                "ID",
+                "Nome",
+                "Empresa",
+                "Departamento",
+                "Telefone Fixo",
+                "Celular",
+                "Email",
+                "Data de Criação",
+                "Última Atualização"
+            ],
+            linhas,
+            formato,
+            larguras=[8, 20, 25, 18, 15, 15, 25, 20, 20],
+            tipos=[int, str, str, str, str, str, str, datetime, datetime],
         )
+    except FormatoIndisponivelError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao exportar: {str(e)}")
 
 
+COLUNAS_IMPORTACAO = {
+    "nome": ("nome",),
+    "empresa": ("empresa",),
+    "departamento": ("departamento",),
+    "telefone_fixo": ("telefone_fixo",),
+    "celular": ("celular",),
+    "email": ("email",),
+}
+
+
 @router.post("/import/excel")
-async def importar_excel(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    """Importar contatos de arquivo Excel"""
-    if not file.filename.endswith(('.xlsx', '.xls')):
-        raise HTTPException(status_code=400, detail="Arquivo deve ser em formato Excel (.xlsx ou .xls)")
+def importar_excel(
+    file: UploadFile = File(...),
+    formato: Optional[Formato] = Query(None, alias="format"),
+    db: Session = Depends(get_db),
+):
+    """Importar contatos de arquivo Excel (ou CSV, JSON Lines, Parquet)"""
+    try:
+        _, registros = ler_registros(file.file, file.filename, COLUNAS_IMPORTACAO, formato=formato)
+    except ArquivoInvalidoError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     try:
-        # Ler arquivo
-        contents = await file.read()
-        wb = load_workbook(BytesIO(contents))
-        ws = wb.active
-        
-        # Processar linhas
         contatos_importados = []
+        novos_contatos = []
         erros = []
         
-        for idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-            try:
-                # Mapear colunas (case-insensitive)
-                dados = {}
-                headers_arquivo = [cell.value for cell in ws[1]]
-                
-                for header_idx, header in enumerate(headers_arquivo):
-                    if header and row[header_idx] is not None:
-                        header_lower = header.lower()
-                        if header_lower == "id":
-                            continue
-                        elif header_lower == "nome":
-                            dados['nome'] = row[header_idx]
-                        elif header_lower == "empresa":
-                            # Procurar empresa pelo nome
-                            empresa = db.query(PessoaJuridicaModel).filter(
-                                PessoaJuridicaModel.razao_social == row[header_idx]
-                            ).first()
-                            if not empresa:
-                                erros.append(f"Linha {idx}: Empresa '{row[header_idx]}' não encontrada")
-                                raise ValueError(f"Empresa não encontrada")
-                            dados['pessoa_juridica_id'] = empresa.id
-                        elif header_lower == "departamento":
-                            dados['departamento'] = row[header_idx]
-                        elif header_lower == "telefone fixo":
-                            dados['telefone_fixo'] = row[header_idx]
-                        elif header_lower == "celular":
-                            dados['celular'] = row[header_idx]
-                        elif header_lower == "email":
-                            dados['email'] = row[header_idx]
-                
-                # Validações obrigatórias
-                if not dados.get('nome'):
-                    erros.append(f"Linha {idx}: Nome é obrigatório")
-                    continue
-                
-                if not dados.get('pessoa_juridica_id'):
-                    erros.append(f"Linha {idx}: Empresa é obrigatória")
-                    continue
-                
-                # Validar se contato com mesmo nome e empresa já existe
-                contato_existente = db.query(ContatoModel).filter(
-                    ContatoModel.nome == dados['nome'],
-                    ContatoModel.pessoa_juridica_id == dados['pessoa_juridica_id']
-                ).first()
-                
-                if contato_existente:
-                    erros.append(f"Linha {idx}: Contato '{dados['nome']}' já existe nessa empresa")
+        # Carregar empresas e contatos existentes uma única vez
+        empresas_por_nome = {}
+        for empresa_id, razao_social in db.query(PessoaJuridicaModel.id, PessoaJuridicaModel.razao_social):
+            empresas_por_nome.setdefault(razao_social, empresa_id)
+        contatos_existentes = set(
+            db.query(ContatoModel.nome, ContatoModel.pessoa_juridica_id).all()
+        )
+        
+        for idx, dados, erro in registros:
+            if erro:
+                erros.append(f"Linha {idx}: {erro}")
+                continue
+            
+            # Procurar empresa pelo nome
+            empresa = dados.pop('empresa', None)
+            if empresa is not None:
+                dados['pessoa_juridica_id'] = empresas_por_nome.get(empresa)
+                if not dados['pessoa_juridica_id']:
+                    erros.append(f"Linha {idx}: Empresa '{empresa}' não encontrada")
                     continue
-                
-                # Criar objeto
-                novo_contato = ContatoModel(**dados)
-                db.add(novo_contato)
-                contatos_importados.append(dados.get('nome'))
-                
-            except Exception as e:
-                if not any(f"Linha {idx}" in erro for erro in erros):
-                    erros.append(f"Linha {idx}: {str(e)}")
+            
+            # Validações obrigatórias
+            if not dados.get('nome'):
+                erros.append(f"Linha {idx}: Nome é obrigatório")
+                continue
+            
+            if not dados.get('pessoa_juridica_id'):
+                erros.append(f"Linha {idx}: Empresa é obrigatória")
+                continue
+            
+            # Validar se contato com mesmo nome e empresa já existe
+            if (dados['nome'], dados['pessoa_juridica_id']) in contatos_existentes:
+                erros.append(f"Linha {idx}: Contato '{dados['nome']}' já existe nessa empresa")
+                continue
+            
+            novos_contatos.append(dados)
+            contatos_importados.append(dados.get('nome'))
         
-        # Commit se houver contatos válidos
+        # Inserir em lote e commitar se houver contatos válidos
         if contatos_importados:
+            with indexando_insercoes(db, ContatoModel):
+                db.execute(insert(ContatoModel), novos_contatos)
             db.commit()
         
         return {
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, insert
 from typing import List
 from datetime import datetime
 from decimal import Decimal
@@ -20,27 +20,31 @@ router = APIRouter()
 def listar_cronogramas(db: Session = Depends(get_db)):
     """Listar todos os projetos em execução com seus cronogramas"""
     # Buscar todos os projetos com status "Em Execução"
-    projetos = db.query(ProjetoModel).filter(
+    # Cliente e cronograma são carregados junto, sem uma query por projeto
+    projetos = db.query(ProjetoModel).options(
+        joinedload(ProjetoModel.cliente),
+        joinedload(ProjetoModel.cronograma)
+    ).filter(
         ProjetoModel.status == StatusProjeto.EM_EXECUCAO
     ).all()
     
+    cronogramas = {projeto.id: projeto.cronograma for projeto in projetos if projeto.cronograma}
+    
+    # Criar em lote os cronogramas vazios que ainda não existem
+    sem_cronograma = [projeto.id for projeto in projetos if projeto.id not in cronogramas]
+    if sem_cronograma:
+        db.execute(insert(CronogramaModel), [
+            {"projeto_id": projeto_id, "percentual_conclusao": Decimal('0.00'), "observacoes": None}
+            for projeto_id in sem_cronograma
+        ])
+        for cronograma in db.query(CronogramaModel).filter(
+            CronogramaModel.projeto_id.in_(sem_cronograma)
+        ):
+            cronogramas[cronograma.projeto_id] = cronograma
+    
     resultado = []
     for projeto in projetos:
-        # Verificar se já existe cronograma para este projeto
-        cronograma = db.query(CronogramaModel).filter(
-            CronogramaModel.projeto_id == projeto.id
-        ).first()
-        
-        # Se não existe, criar um vazio
-        if not cronograma:
-            cronograma = CronogramaModel(
-                projeto_id=projeto.id,
-                percentual_conclusao=Decimal('0.00'),
-                observacoes=None
-            )
-            db.add(cronograma)
-            db.commit()
-            db.refresh(cronograma)
+        cronograma = cronogramas[projeto.id]
         
         # Calcular status do prazo
         prazo_status = "No prazo"
@@ -74,6 +78,9 @@ def listar_cronogramas(db: Session = Depends(get_db)):
             "data_pedido_compra": projeto.data_pedido_compra
         })
     
+    if sem_cronograma:
+        db.commit()
+    
     return resultado
 
 
@@ -166,7 +173,9 @@ def listar_historico(cronograma_id: int, db: Session = Depends(get_db)):
     if not cronograma:
         raise HTTPException(status_code=404, detail="Cronograma não encontrado")
     
-    historico = db.query(CronogramaHistoricoModel).filter(
+    historico = db.query(CronogramaHistoricoModel).options(
+        joinedload(CronogramaHistoricoModel.criado_por)
+    ).filter(
         CronogramaHistoricoModel.cronograma_id == cronograma_id
     ).order_by(CronogramaHistoricoModel.criado_em.desc()).all()
     
@@ -0,0 +1,98 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from ..config import get_local_now
+from ..dashboard_service import STATUS_PIPELINE
+from ..database import get_db
+from ..models.dashboard import (
+    DashboardCliente,
+    DashboardFaturamentoMensal,
+    DashboardPrazo,
+    DashboardProjetosStatus,
+)
+from ..models.pessoa_juridica import PessoaJuridica
+from ..models.projeto import StatusProjeto
+from ..schemas.dashboard import Dashboard
+
+router = APIRouter()
+
+
+def _ultimos_meses(quantidade: int, hoje) -> list:
+    """Chaves AAAA-MM dos últimos meses, do mais antigo ao atual"""
+    ano, mes = hoje.year, hoje.month
+    meses = []
+    for _ in range(quantidade):
+        meses.append(f"{ano:04d}-{mes:02d}")
+        ano, mes = (ano - 1, 12) if mes == 1 else (ano, mes - 1)
+    return meses[::-1]
+
+
+@router.get("/dashboard", response_model=Dashboard)
+def obter_dashboard(
+    meses: int = Query(12, ge=1, le=120, description="Meses do faturamento mensal, até o atual"),
+    clientes: int = Query(5, ge=1, le=50, description="Quantidade de maiores clientes (por faturado)"),
+    db: Session = Depends(get_db),
+):
+    """Indicadores do dashboard, lidos das tabelas de agregados (ver dashboard_service)"""
+    hoje = get_local_now().date()
+    chaves = _ultimos_meses(meses, hoje)
+
+    mensal = {
+        linha.mes: linha
+        for linha in db.execute(
+            select(DashboardFaturamentoMensal).where(DashboardFaturamentoMensal.mes >= chaves[0])
+        ).scalars()
+    }
+    por_status = {linha.status: linha for linha in db.execute(select(DashboardProjetosStatus)).scalars()}
+
+    situacao = case(
+        (DashboardPrazo.data_entrega.is_(None), "sem_prazo"),
+        (DashboardPrazo.data_entrega < hoje, "atrasados"),
+        else_="no_prazo",
+    )
+    execucao = {"no_prazo": 0, "atrasados": 0, "sem_prazo": 0}
+    execucao.update(db.execute(select(situacao, func.count()).group_by(situacao)).all())
+
+    maiores = db.execute(
+        select(DashboardCliente, PessoaJuridica.razao_social)
+        .outerjoin(PessoaJuridica, PessoaJuridica.id == DashboardCliente.cliente_id)
+        .order_by(DashboardCliente.total_faturado.desc(), DashboardCliente.cliente_id)
+        .limit(clientes)
+    ).all()
+
+    zerado = {"quantidade": 0, "valor_orcado": 0, "valor_venda": 0}
+    status = [
+        {
+            "status": s.value,
+            **({c: getattr(por_status[s.value], c) for c in zerado} if s.value in por_status else zerado),
+        }
+        for s in StatusProjeto
+    ]
+    pipeline = [linha for linha in status if linha["status"] in {s.value for s in STATUS_PIPELINE}]
+    return {
+        "faturamento_por_mes": [
+            {
+                "mes": mes,
+                "valor_faturado": mensal[mes].valor_faturado if mes in mensal else 0,
+                "quantidade": mensal[mes].quantidade if mes in mensal else 0,
+            }
+            for mes in chaves
+        ],
+        "projetos_por_status": status,
+        "pipeline": {
+            campo: sum(linha[campo] for linha in pipeline)
+            for campo in ("quantidade", "valor_orcado", "valor_venda")
+        },
+        "execucao": execucao,
+        "maiores_clientes": [
+            {
+                "cliente_id": cliente.cliente_id,
+                "razao_social": razao_social,
+                "projetos": cliente.projetos,
+                "valor_venda": cliente.valor_venda,
+                "total_faturado": cliente.total_faturado,
+            }
+            for cliente, razao_social in maiores
+        ],
+    }
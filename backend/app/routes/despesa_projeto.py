@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime
 
 from ..database import get_db
+from ..cache_service import em_cache
+from ..serializacao import resposta_orm, serializar
+from ..financeiro_service import VALOR_IMPOSTOS_ITEM, VALOR_IPI_ITEM, VALOR_ITEM
 from ..models.despesa_projeto import DespesaProjeto, DespesaProjetoItem
 from ..models.projeto import Projeto
 from ..models.pessoa_juridica import PessoaJuridica
@@ -11,6 +15,7 @@ from ..models.funcionario import Funcionario
 from ..schemas.despesa_projeto import (
     DespesaProjeto as DespesaProjetoSchema,
     DespesaProjetoCreate,
+    DespesaProjetoDetalhada,
     DespesaProjetoUpdate,
 )
 from ..schemas.despesa_projeto_item import (
@@ -55,101 +60,133 @@ def gerar_numero_despesa(db: Session, projeto_id: int, fornecedor_id: int) -> st
     return numero_despesa
 
 
-@router.get("/despesas-projetos", response_model=List[DespesaProjetoSchema])
-def listar_despesas(db: Session = Depends(get_db)):
-    """Lista todas as despesas de projetos"""
-    despesas = db.query(DespesaProjeto).options(
+INCLUDES_DESPESA = ("itens", "totais")
+
+
+def _com_relacionados(query):
+    """Carrega projeto, fornecedor e técnico junto com as despesas"""
+    return query.options(
         joinedload(DespesaProjeto.projeto),
         joinedload(DespesaProjeto.fornecedor),
         joinedload(DespesaProjeto.tecnico_responsavel)
-    ).all()
-    
-    # Formata os dados relacionados
-    result = []
-    for despesa in despesas:
-        despesa_dict = {
-            "id": despesa.id,
-            "numero_despesa": despesa.numero_despesa,
-            "projeto_id": despesa.projeto_id,
-            "fornecedor_id": despesa.fornecedor_id,
-            "tecnico_responsavel_id": despesa.tecnico_responsavel_id,
-            "contato_id": despesa.contato_id,
-            "status": despesa.status,
-            "data_pedido": despesa.data_pedido,
-            "previsao_entrega": despesa.previsao_entrega,
-            "prazo_entrega_dias": despesa.prazo_entrega_dias,
-            "condicao_pagamento": despesa.condicao_pagamento,
-            "tipo_frete": despesa.tipo_frete,
-            "valor_frete": float(despesa.valor_frete) if despesa.valor_frete else 0.0,
-            "observacoes": despesa.observacoes,
-            "criado_em": despesa.criado_em,
-            "atualizado_em": despesa.atualizado_em,
-            "projeto": {
-                "id": despesa.projeto.id,
-                "numero": despesa.projeto.numero,
-                "nome": despesa.projeto.nome,
-            } if despesa.projeto else None,
-            "fornecedor": {
-                "id": despesa.fornecedor.id,
-                "razao_social": despesa.fornecedor.razao_social,
-                "sigla": despesa.fornecedor.sigla,
-            } if despesa.fornecedor else None,
-            "tecnico_responsavel": {
-                "id": despesa.tecnico_responsavel.id,
-                "nome": despesa.tecnico_responsavel.nome,
-            } if despesa.tecnico_responsavel else None,
+    )
+
+
+def _ler_include(include: Optional[str]) -> Set[str]:
+    incluir = {parte.strip() for parte in (include or "").split(",") if parte.strip()}
+    invalidos = incluir - set(INCLUDES_DESPESA)
+    if invalidos:
+        raise HTTPException(
+            status_code=400,
+            detail=f"include inválido: {', '.join(sorted(invalidos))}. Use: {', '.join(INCLUDES_DESPESA)}"
+        )
+    return incluir
+
+
+def _consultar_despesas(db: Session, incluir: Set[str]):
+    query = _com_relacionados(db.query(DespesaProjeto))
+    if "itens" in incluir:
+        query = query.options(selectinload(DespesaProjeto.itens))
+    return query
+
+
+def _totais_despesas(db: Session, despesa_id: Optional[int] = None) -> Dict[int, dict]:
+    """Subtotal, IPI, impostos, frete e total de cada despesa, agregados no banco"""
+    subtotal = func.coalesce(func.sum(VALOR_ITEM), 0)
+    valor_ipi = func.coalesce(func.sum(VALOR_IPI_ITEM), 0)
+    valor_impostos = func.coalesce(func.sum(VALOR_IMPOSTOS_ITEM), 0)
+    valor_frete = func.coalesce(DespesaProjeto.valor_frete, 0)
+
+    query = db.query(
+        DespesaProjeto.id,
+        func.count(DespesaProjetoItem.id),
+        subtotal,
+        valor_ipi,
+        valor_impostos,
+        valor_frete,
+        subtotal + valor_ipi + valor_frete,
+    ).outerjoin(DespesaProjeto.itens).group_by(DespesaProjeto.id)
+    if despesa_id is not None:
+        query = query.filter(DespesaProjeto.id == despesa_id)
+
+    campos = ("subtotal", "valor_ipi", "valor_impostos", "valor_frete", "total")
+    return {
+        linha[0]: {
+            "quantidade_itens": linha[1],
+            **{campo: round(float(v), 2) for campo, v in zip(campos, linha[2:])},
         }
-        result.append(despesa_dict)
-    
-    return result
+        for linha in query
+    }
 
 
-@router.get("/despesas-projetos/{despesa_id}", response_model=DespesaProjetoSchema)
-def obter_despesa(despesa_id: int, db: Session = Depends(get_db)):
-    """Obtém uma despesa específica"""
-    despesa = db.query(DespesaProjeto).options(
-        joinedload(DespesaProjeto.projeto),
-        joinedload(DespesaProjeto.fornecedor),
-        joinedload(DespesaProjeto.tecnico_responsavel)
-    ).filter(DespesaProjeto.id == despesa_id).first()
+class _DespesaSerializada:
+    """Despesa do ORM acrescida dos itens/totais pedidos, lida pelo schema via from_attributes"""
+
+    def __init__(self, despesa: DespesaProjeto, itens=None, totais=None):
+        self._despesa = despesa
+        self.itens = itens
+        self.totais = totais
+
+    def __getattr__(self, nome):
+        return getattr(self._despesa, nome)
+
+
+def serializar_despesas(
+    db: Session, despesas: List[DespesaProjeto], incluir: Set[str], despesa_id: Optional[int] = None
+) -> Tuple[List[_DespesaSerializada], Set[str]]:
+    """
+    Dados para o schema DespesaProjetoDetalhada e o exclude das partes não
+    pedidas. Sem include as despesas vão direto ao schema DespesaProjeto.
+    """
+    totais = _totais_despesas(db, despesa_id) if "totais" in incluir and despesas else {}
+    return [
+        _DespesaSerializada(
+            despesa,
+            itens=despesa.itens if "itens" in incluir else None,
+            totais=totais.get(despesa.id) if "totais" in incluir else None,
+        )
+        for despesa in despesas
+    ], set(INCLUDES_DESPESA) - incluir
+
+
+@router.get("/despesas-projetos", response_model=List[DespesaProjetoDetalhada])
+@em_cache(
+    DespesaProjeto.__tablename__,
+    DespesaProjetoItem.__tablename__,
+    Projeto.__tablename__,
+    PessoaJuridica.__tablename__,
+    Funcionario.__tablename__,
+)
+def listar_despesas(
+    include: Optional[str] = Query(None, description="itens e/ou totais, separados por vírgula"),
+    db: Session = Depends(get_db),
+):
+    """Lista todas as despesas de projetos, opcionalmente com itens e totais"""
+    incluir = _ler_include(include)
+    despesas = _consultar_despesas(db, incluir).all()
+    if not incluir:
+        return serializar(List[DespesaProjetoSchema], despesas)
+    dados, excluir = serializar_despesas(db, despesas, incluir)
+    return serializar(List[DespesaProjetoDetalhada], dados, exclude={"__all__": excluir})
+
+
+@router.get("/despesas-projetos/{despesa_id}", response_model=DespesaProjetoDetalhada)
+def obter_despesa(
+    despesa_id: int,
+    include: Optional[str] = Query(None, description="itens e/ou totais, separados por vírgula"),
+    db: Session = Depends(get_db),
+):
+    """Obtém uma despesa específica, opcionalmente com itens e totais"""
+    incluir = _ler_include(include)
+    despesa = _consultar_despesas(db, incluir).filter(DespesaProjeto.id == despesa_id).first()
     
     if not despesa:
         raise HTTPException(status_code=404, detail="Despesa não encontrada")
     
-    despesa_dict = {
-        "id": despesa.id,
-        "numero_despesa": despesa.numero_despesa,
-        "projeto_id": despesa.projeto_id,
-        "fornecedor_id": despesa.fornecedor_id,
-        "tecnico_responsavel_id": despesa.tecnico_responsavel_id,
-        "contato_id": despesa.contato_id,
-        "status": despesa.status,
-        "data_pedido": despesa.data_pedido,
-        "previsao_entrega": despesa.previsao_entrega,
-        "prazo_entrega_dias": despesa.prazo_entrega_dias,
-        "condicao_pagamento": despesa.condicao_pagamento,
-        "tipo_frete": despesa.tipo_frete,
-        "valor_frete": float(despesa.valor_frete) if despesa.valor_frete else 0.0,
-        "observacoes": despesa.observacoes,
-        "criado_em": despesa.criado_em,
-        "atualizado_em": despesa.atualizado_em,
-        "projeto": {
-            "id": despesa.projeto.id,
-            "numero": despesa.projeto.numero,
-            "nome": despesa.projeto.nome,
-        } if despesa.projeto else None,
-        "fornecedor": {
-            "id": despesa.fornecedor.id,
-            "razao_social": despesa.fornecedor.razao_social,
-            "sigla": despesa.fornecedor.sigla,
-        } if despesa.fornecedor else None,
-        "tecnico_responsavel": {
-            "id": despesa.tecnico_responsavel.id,
-            "nome": despesa.tecnico_responsavel.nome,
-        } if despesa.tecnico_responsavel else None,
-    }
-    
-    return despesa_dict
+    if not incluir:
+        return resposta_orm(DespesaProjetoSchema, despesa)
+    dados, excluir = serializar_despesas(db, [despesa], incluir, despesa_id)
+    return resposta_orm(DespesaProjetoDetalhada, dados[0], exclude=excluir)
 
 
 @router.post("/despesas-projetos", response_model=DespesaProjetoSchema)
@@ -171,46 +208,11 @@ def criar_despesa(despesa: DespesaProjetoCreate, db: Session = Depends(get_db)):
     db.refresh(db_despesa)
     
     # Recarrega com relationships
-    despesa_completa = db.query(DespesaProjeto).options(
-        joinedload(DespesaProjeto.projeto),
-        joinedload(DespesaProjeto.fornecedor),
-        joinedload(DespesaProjeto.tecnico_responsavel)
-    ).filter(DespesaProjeto.id == db_despesa.id).first()
-    
-    despesa_dict = {
-        "id": despesa_completa.id,
-        "numero_despesa": despesa_completa.numero_despesa,
-        "projeto_id": despesa_completa.projeto_id,
-        "fornecedor_id": despesa_completa.fornecedor_id,
-        "tecnico_responsavel_id": despesa_completa.tecnico_responsavel_id,
-        "contato_id": despesa_completa.contato_id,
-        "status": despesa_completa.status,
-        "data_pedido": despesa_completa.data_pedido,
-        "previsao_entrega": despesa_completa.previsao_entrega,
-        "prazo_entrega_dias": despesa_completa.prazo_entrega_dias,
-        "condicao_pagamento": despesa_completa.condicao_pagamento,
-        "tipo_frete": despesa_completa.tipo_frete,
-        "valor_frete": float(despesa_completa.valor_frete) if despesa_completa.valor_frete else 0.0,
-        "observacoes": despesa_completa.observacoes,
-        "criado_em": despesa_completa.criado_em,
-        "atualizado_em": despesa_completa.atualizado_em,
-        "projeto": {
-            "id": despesa_completa.projeto.id,
-            "numero": despesa_completa.projeto.numero,
-            "nome": despesa_completa.projeto.nome,
-        } if despesa_completa.projeto else None,
-        "fornecedor": {
-            "id": despesa_completa.fornecedor.id,
-            "razao_social": despesa_completa.fornecedor.razao_social,
-            "sigla": despesa_completa.fornecedor.sigla,
-        } if despesa_completa.fornecedor else None,
-        "tecnico_responsavel": {
-            "id": despesa_completa.tecnico_responsavel.id,
-            "nome": despesa_completa.tecnico_responsavel.nome,
-        } if despesa_completa.tecnico_responsavel else None,
-    }
+    despesa_completa = _com_relacionados(db.query(DespesaProjeto)).filter(
+        DespesaProjeto.id == db_despesa.id
+    ).first()
     
-    return despesa_dict
+    return resposta_orm(DespesaProjetoSchema, despesa_completa)
 
 
 @router.put("/despesas-projetos/{despesa_id}", response_model=DespesaProjetoSchema)
@@ -230,46 +232,11 @@ def atualizar_despesa(despesa_id: int, despesa: DespesaProjetoUpdate, db: Sessio
     db.refresh(db_despesa)
     
     # Recarrega com relationships
-    despesa_completa = db.query(DespesaProjeto).options(
-        joinedload(DespesaProjeto.projeto),
-        joinedload(DespesaProjeto.fornecedor),
-        joinedload(DespesaProjeto.tecnico_responsavel)
-    ).filter(DespesaProjeto.id == db_despesa.id).first()
-    
-    despesa_dict = {
-        "id": despesa_completa.id,
-        "numero_despesa": despesa_completa.numero_despesa,
-        "projeto_id": despesa_completa.projeto_id,
-        "fornecedor_id": despesa_completa.fornecedor_id,
-        "tecnico_responsavel_id": despesa_completa.tecnico_responsavel_id,
-        "contato_id": despesa_completa.contato_id,
-        "status": despesa_completa.status,
-        "data_pedido": despesa_completa.data_pedido,
-        "previsao_entrega": despesa_completa.previsao_entrega,
-        "prazo_entrega_dias": despesa_completa.prazo_entrega_dias,
-        "condicao_pagamento": despesa_completa.condicao_pagamento,
-        "tipo_frete": despesa_completa.tipo_frete,
-        "valor_frete": float(despesa_completa.valor_frete) if despesa_completa.valor_frete else 0.0,
-        "observacoes": despesa_completa.observacoes,
-        "criado_em": despesa_completa.criado_em,
-        "atualizado_em": despesa_completa.atualizado_em,
-        "projeto": {
-            "id": despesa_completa.projeto.id,
-            "numero": despesa_completa.projeto.numero,
-            "nome": despesa_completa.projeto.nome,
-        } if despesa_completa.projeto else None,
-        "fornecedor": {
-            "id": despesa_completa.fornecedor.id,
-            "razao_social": despesa_completa.fornecedor.razao_social,
-            "sigla": despesa_completa.fornecedor.sigla,
-        } if despesa_completa.fornecedor else None,
-        "tecnico_responsavel": {
-            "id": despesa_completa.tecnico_responsavel.id,
-            "nome": despesa_completa.tecnico_responsavel.nome,
-        } if despesa_completa.tecnico_responsavel else None,
-    }
+    despesa_completa = _com_relacionados(db.query(DespesaProjeto)).filter(
+        DespesaProjeto.id == db_despesa.id
+    ).first()
     
-    return despesa_dict
+    return resposta_orm(DespesaProjetoSchema, despesa_completa)
 
 
 @router.delete("/despesas-projetos/{despesa_id}")
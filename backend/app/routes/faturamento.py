@@ -1,15 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from ..database import get_db
+from ..cache_service import em_cache
+from ..exportacao_service import Formato, FormatoIndisponivelError, resposta_exportacao
+from ..importacao_service import (
+    ArquivoInvalidoError,
+    converter_data,
+    converter_decimal,
+    converter_inteiro,
+    ler_registros,
+)
 from ..models.faturamento import Faturamento as FaturamentoModel
 from ..models.projeto import Projeto as ProjetoModel
 from ..models.funcionario import Funcionario as FuncionarioModel
 from ..schemas.faturamento import FaturamentoCreate, FaturamentoUpdate, Faturamento
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-from io import BytesIO
 from datetime import datetime
 
 router = APIRouter()
@@ -17,123 +23,118 @@ router = APIRouter()
 # Rotas específicas PRIMEIRO (antes das genéricas com {id})
 
 @router.get("/export/excel")
-def exportar_excel(db: Session = Depends(get_db)):
+def exportar_excel(formato: Formato = Query("xlsx", alias="format"), db: Session = Depends(get_db)):
     try:
         fats = db.query(FaturamentoModel).all()
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Faturamentos"
-
-        headers = ["ID", "Projeto ID", "Técnico ID", "Valor Faturado", "Data Faturamento", "Observações", "Data Criação", "Última Atualização"]
-        ws.append(headers)
-
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-
-        for f in fats:
-            ws.append([
+        linhas = [
+            (
                 f.id,
                 f.projeto_id,
                 f.tecnico_id,
                 float(f.valor_faturado) if f.valor_faturado is not None else 0,
-                f.data_faturamento.isoformat() if f.data_faturamento else "",
-                f.observacoes or "",
-                f.criado_em.isoformat() if f.criado_em else "",
-                f.atualizado_em.isoformat() if f.atualizado_em else "",
-            ])
-
-        ws.column_dimensions['A'].width = 8
-        ws.column_dimensions['B'].width = 12
-        ws.column_dimensions['C'].width = 12
-        ws.column_dimensions['D'].width = 16
-        ws.column_dimensions['E'].width = 20
-        ws.column_dimensions['F'].width = 30
-        ws.column_dimensions['G'].width = 20
-        ws.column_dimensions['H'].width = 20
-
-        output = BytesIO()
-        wb.save(output)
-        output.seek(0)
-
-        return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": "attachment; filename=faturamentos.xlsx"}
+                f.data_faturamento,
+                f.observacoes,
+                f.criado_em,
+                f.atualizado_em,
+            )
+            for f in fats
+        ]
+        headers = ["ID", "Projeto ID", "Técnico ID", "Valor Faturado", "Data Faturamento", "Observações", "Data Criação", "Última Atualização"]
+        return resposta_exportacao(
+            "faturamentos",
+            "Faturamentos",
+            headers,
+            linhas,
+            formato,
+            larguras=[8, 12, 12, 16, 20, 30, 20, 20],
+            tipos=[int, int, int, float, datetime, str, datetime, datetime],
         )
+    except FormatoIndisponivelError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao exportar: {str(e)}")
 
 
+COLUNAS_IMPORTACAO = {
+    "projeto_id": ("projeto_id",),
+    "tecnico_id": ("tecnico_id",),
+    "valor_faturado": ("valor_faturado",),
+    "data_faturamento": ("data_faturamento",),
+    "observacoes": ("observacoes",),
+}
+
+CONVERSORES_IMPORTACAO = {
+    "projeto_id": converter_inteiro,
+    "tecnico_id": converter_inteiro,
+    "valor_faturado": converter_decimal,
+    "data_faturamento": converter_data,
+    "observacoes": str,
+}
+
+
 @router.post("/import/excel")
-async def importar_excel(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    if not file.filename.endswith(('.xlsx', '.xls')):
-        raise HTTPException(status_code=400, detail="Arquivo deve ser em formato Excel (.xlsx ou .xls)")
+def importar_excel(
+    file: UploadFile = File(...),
+    formato: Optional[Formato] = Query(None, alias="format"),
+    db: Session = Depends(get_db),
+):
+    try:
+        colunas, registros = ler_registros(
+            file.file, file.filename, COLUNAS_IMPORTACAO, CONVERSORES_IMPORTACAO, formato
+        )
+    except ArquivoInvalidoError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Colunas mínimas: Projeto ID, Valor Faturado
+    if not {"projeto_id", "valor_faturado"}.issubset(colunas):
+        raise HTTPException(status_code=400, detail="Arquivo inválido. Colunas obrigatórias: Projeto ID, Valor Faturado")
     try:
-        contents = await file.read()
-        wb = load_workbook(BytesIO(contents))
-        ws = wb.active
+        erros = []
+        novos = []
 
-        headers = [cell.value for cell in ws[1]]
-        # Expected minimal columns: Projeto ID, Técnico ID, Valor Faturado
-        lower_headers = [ (h or "").lower() for h in headers ]
-        required = {"projeto id", "técnico id", "tecnico id", "valor faturado"}
-        if not any(r in lower_headers for r in ["projeto id","projeto_id"]) or not any(r in lower_headers for r in ["valor faturado","valor_faturado"]):
-            raise HTTPException(status_code=400, detail="Arquivo inválido. Colunas obrigatórias: Projeto ID, Valor Faturado")
+        # IDs válidos carregados uma única vez, em vez de uma consulta por linha
+        projetos_ids = {id_ for (id_,) in db.query(ProjetoModel.id)}
+        funcionarios_ids = {id_ for (id_,) in db.query(FuncionarioModel.id)}
 
-        erros = []
-        inseridos = 0
-        for idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-            try:
-                # Map by position: ID, Projeto ID, Técnico ID, Valor Faturado, Data Faturamento, Observações
-                projeto_id = row[1]
-                tecnico_id = row[2]
-                valor = row[3] or 0
-                data_fat = row[4]
-                obs = row[5]
-
-                if not projeto_id:
-                    erros.append(f"Linha {idx}: Projeto ID ausente")
-                    continue
-
-                if not tecnico_id:
-                    erros.append(f"Linha {idx}: Técnico ID ausente (obrigatório)")
-                    continue
-
-                projeto = db.query(ProjetoModel).filter(ProjetoModel.id == int(projeto_id)).first()
-                if not projeto:
-                    erros.append(f"Linha {idx}: Projeto {projeto_id} não encontrado")
-                    continue
-
-                func = db.query(FuncionarioModel).filter(FuncionarioModel.id == int(tecnico_id)).first()
-                if not func:
-                    erros.append(f"Linha {idx}: Técnico {tecnico_id} não encontrado")
-                    continue
-
-                novo = FaturamentoModel(
-                    projeto_id=int(projeto_id),
-                    tecnico_id=int(tecnico_id),
-                    valor_faturado=float(valor),
-                    data_faturamento=data_fat if isinstance(data_fat, datetime) else None,
-                    observacoes=str(obs) if obs else None
-                )
-                db.add(novo)
-                db.commit()
-                db.refresh(novo)
-                inseridos += 1
-            except Exception as e:
-                erros.append(f"Linha {idx}: Erro {str(e)}")
-
-        return {"mensagem": f"Importação concluída. Inseridos: {inseridos}", "erros": erros}
+        for idx, dados, erro in registros:
+            if erro:
+                erros.append(f"Linha {idx}: Erro {erro}")
+                continue
+
+            projeto_id = dados.get("projeto_id")
+            tecnico_id = dados.get("tecnico_id")
+
+            if not projeto_id:
+                erros.append(f"Linha {idx}: Projeto ID ausente")
+                continue
+
+            if not tecnico_id:
+                erros.append(f"Linha {idx}: Técnico ID ausente (obrigatório)")
+                continue
+
+            if projeto_id not in projetos_ids:
+                erros.append(f"Linha {idx}: Projeto {projeto_id} não encontrado")
+                continue
+
+            if tecnico_id not in funcionarios_ids:
+                erros.append(f"Linha {idx}: Técnico {tecnico_id} não encontrado")
+                continue
+
+            # Sem valor informado fatura zero; sem data, vale o server_default (now())
+            dados.setdefault("valor_faturado", 0)
+            novos.append(dados)
+
+        # Inserção em lote: uma única instrução para todas as linhas válidas
+        if novos:
+            db.execute(insert(FaturamentoModel), novos)
+            db.commit()
+
+        return {"mensagem": f"Importação concluída. Inseridos: {len(novos)}", "erros": erros}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao importar: {str(e)}")
 
 
 @router.get("/projeto/{projeto_id}", response_model=List[Faturamento])
+@em_cache(FaturamentoModel.__tablename__, modelo=List[Faturamento])
 def listar_por_projeto(projeto_id: int, db: Session = Depends(get_db)):
     return db.query(FaturamentoModel).filter(FaturamentoModel.projeto_id == projeto_id).all()
 
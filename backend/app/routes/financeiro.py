@@ -0,0 +1,97 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from typing import Literal, Optional
+
+from ..database import get_db
+from ..financeiro_service import verificar_divergencias
+from ..models.pessoa_juridica import PessoaJuridica
+from ..models.projeto import Projeto, StatusProjeto
+from ..models.projeto_financeiro import ProjetoFinanceiro
+from ..schemas.projeto_financeiro import ProjetoFinanceiroPagina, VerificacaoFinanceiro
+from ..serializacao import resposta_orm
+from .auth import verify_admin
+
+router = APIRouter()
+
+# Colunas de ordenação (as do resumo têm índice próprio)
+ORDENACOES = {
+    "margem": ProjetoFinanceiro.margem,
+    "percentual_faturado": ProjetoFinanceiro.percentual_faturado,
+    "total_faturado": ProjetoFinanceiro.total_faturado,
+    "total_despesas": ProjetoFinanceiro.total_despesas,
+    "valor_venda": ProjetoFinanceiro.valor_venda,
+    "numero": Projeto.numero,
+}
+
+
+@router.get("/projetos", response_model=ProjetoFinanceiroPagina)
+def listar_resumo_projetos(
+    ordenar: Literal[
+        "margem", "percentual_faturado", "total_faturado", "total_despesas", "valor_venda", "numero"
+    ] = Query("margem"),
+    ordem: Literal["asc", "desc"] = Query("asc"),
+    status: Optional[StatusProjeto] = Query(None),
+    cliente_id: Optional[int] = Query(None),
+    margem_max: Optional[float] = Query(None, description="Ex.: 0 para projetos com prejuízo"),
+    percentual_faturado_max: Optional[float] = Query(None, description="Ex.: 99.99 para os não totalmente faturados"),
+    limite: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
+    """Orçado, venda, faturado, despesas, margem e % faturado por projeto, do resumo pré-calculado"""
+    filtros = []
+    if status is not None:
+        filtros.append(Projeto.status == status)
+    if cliente_id is not None:
+        filtros.append(Projeto.cliente_id == cliente_id)
+    if margem_max is not None:
+        filtros.append(ProjetoFinanceiro.margem <= margem_max)
+    if percentual_faturado_max is not None:
+        filtros.append(ProjetoFinanceiro.percentual_faturado <= percentual_faturado_max)
+
+    coluna = ORDENACOES[ordenar]
+    consulta = (
+        select(
+            ProjetoFinanceiro,
+            Projeto.numero,
+            Projeto.nome,
+            Projeto.status,
+            Projeto.cliente_id,
+            PessoaJuridica.razao_social.label("cliente"),
+        )
+        .join(Projeto, Projeto.id == ProjetoFinanceiro.projeto_id)
+        .outerjoin(PessoaJuridica, PessoaJuridica.id == Projeto.cliente_id)
+        .where(*filtros)
+        .order_by(coluna.desc() if ordem == "desc" else coluna.asc(), ProjetoFinanceiro.projeto_id)
+        .limit(limite)
+        .offset(offset)
+    )
+    total = db.execute(
+        select(func.count())
+        .select_from(ProjetoFinanceiro)
+        .join(Projeto, Projeto.id == ProjetoFinanceiro.projeto_id)
+        .where(*filtros)
+    ).scalar_one()
+    itens = [
+        {
+            **{c.key: getattr(resumo, c.key) for c in ProjetoFinanceiro.__table__.columns},
+            "numero": numero,
+            "nome": nome,
+            "status": status_projeto,
+            "cliente_id": projeto_cliente_id,
+            "cliente": cliente,
+        }
+        for resumo, numero, nome, status_projeto, projeto_cliente_id, cliente in db.execute(consulta)
+    ]
+    return resposta_orm(ProjetoFinanceiroPagina, {"total": total, "itens": itens})
+
+
+@router.post(
+    "/projetos/recalcular", response_model=VerificacaoFinanceiro, dependencies=[Depends(verify_admin)]
+)
+def recalcular_resumo_projetos(db: Session = Depends(get_db)):
+    """Recalcula o resumo de todos os projetos e informa as divergências corrigidas (apenas admin)"""
+    resultado = verificar_divergencias(db)
+    db.commit()
+    return resultado
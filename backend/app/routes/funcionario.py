@@ -1,20 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from typing import List
-from io import BytesIO
+from datetime import datetime
+from typing import List, Optional
 
 from ..database import get_db
+from ..cache_service import em_cache
+from ..exportacao_service import Formato, FormatoIndisponivelError, resposta_exportacao
+from ..importacao_service import ArquivoInvalidoError, ler_registros
 from ..models.funcionario import Funcionario as FuncionarioModel
 from ..schemas.funcionario import Funcionario, FuncionarioCreate, FuncionarioUpdate
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
 
 router = APIRouter()
 
 
 # Rotas com paths específicos
 @router.get("/tecnicos")
+@em_cache(FuncionarioModel.__tablename__)
 def listar_tecnicos(db: Session = Depends(get_db)):
     """Listar todos os funcionários para seleção como técnico"""
     funcionarios = db.query(FuncionarioModel).all()
@@ -30,135 +32,96 @@ def listar_tecnicos(db: Session = Depends(get_db)):
 
 
 @router.get("/export/excel")
-def exportar_excel(db: Session = Depends(get_db)):
-    """Exportar todos os funcionários para arquivo Excel"""
+def exportar_excel(formato: Formato = Query("xlsx", alias="format"), db: Session = Depends(get_db)):
+    """Exportar todos os funcionários (XLSX, CSV, JSON Lines ou Parquet)"""
     try:
         funcionarios = db.query(FuncionarioModel).all()
-        
-        # Criar workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Funcionários"
-        
-        # Definir headers
-        headers = [
-            "ID",
-            "Nome",
-            "Departamento",
-            "Telefone Fixo",
-            "Celular",
-            "Email",
-            "Data de Criação",
-            "Última Atualização"
-        ]
-        
-        ws.append(headers)
-        
-        # Estilo do header
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-        
-        # Adicionar dados
-        for funcionario in funcionarios:
-            ws.append([
+        linhas = [
+            (
                 funcionario.id,
                 funcionario.nome,
-                funcionario.departamento or "",
-                funcionario.telefone_fixo or "",
-                funcionario.celular or "",
-                funcionario.email or "",
-                funcionario.criado_em.isoformat() if funcionario.criado_em else "",
-                funcionario.atualizado_em.isoformat() if funcionario.atualizado_em else ""
-            ])
-        
-        # Ajustar largura das colunas
-        ws.column_dimensions['A'].width = 8
-        ws.column_dimensions['B'].width = 25
-        ws.column_dimensions['C'].width = 18
-        ws.column_dimensions['D'].width = 15
-        ws.column_dimensions['E'].width = 15
-        ws.column_dimensions['F'].width = 25
-        ws.column_dimensions['G'].width = 20
-        ws.column_dimensions['H'].width = 20
-        
-        # Salvar em memória
-        output = BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
-        return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": "attachment; filename=funcionarios.xlsx"}
+                funcionario.departamento,
+                funcionario.telefone_fixo,
+                funcionario.celular,
+                funcionario.email,
+                funcionario.criado_em,
+                funcionario.atualizado_em,
+            )
+            for funcionario in funcionarios
+        ]
+        return resposta_exportacao(
+            "funcionarios",
+            "Funcionários",
+            [
+                "ID",
+                "Nome",
+                "Departamento",
+                "Telefone Fixo",
+                "Celular",
+                "Email",
+                "Data de Criação",
+                "Última Atualização"
+            ],
+            linhas,
+            formato,
+            larguras=[8, 25, 18, 15, 15, 25, 20, 20],
+            tipos=[int, str, str, str, str, str, datetime, datetime],
         )
+    except FormatoIndisponivelError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao exportar: {str(e)}")
 
 
+COLUNAS_IMPORTACAO = {
+    "nome": ("nome",),
+    "departamento": ("departamento",),
+    "telefone_fixo": ("telefone_fixo",),
+    "celular": ("celular",),
+    "email": ("email",),
+}
+
+
 @router.post("/import/excel")
-async def importar_excel(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    """Importar funcionários de arquivo Excel"""
-    if not file.filename.endswith(('.xlsx', '.xls')):
-        raise HTTPException(status_code=400, detail="Arquivo deve ser em formato Excel (.xlsx ou .xls)")
+def importar_excel(
+    file: UploadFile = File(...),
+    formato: Optional[Formato] = Query(None, alias="format"),
+    db: Session = Depends(get_db),
+):
+    """Importar funcionários de arquivo Excel (ou CSV, JSON Lines, Parquet)"""
+    try:
+        _, registros = ler_registros(file.file, file.filename, COLUNAS_IMPORTACAO, formato=formato)
+    except ArquivoInvalidoError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     try:
-        contents = await file.read()
-        wb = load_workbook(BytesIO(contents))
-        ws = wb.active
-        
         funcionarios_importados = []
+        novos_funcionarios = []
         erros = []
         
-        for idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-            try:
-                dados = {}
-                headers_arquivo = [cell.value for cell in ws[1]]
-                
-                for header_idx, header in enumerate(headers_arquivo):
-                    if header and row[header_idx] is not None:
-                        header_lower = header.lower()
-                        if header_lower == "id":
-                            continue
-                        elif header_lower == "nome":
-                            dados['nome'] = row[header_idx]
-                        elif header_lower == "departamento":
-                            dados['departamento'] = row[header_idx]
-                        elif header_lower == "telefone fixo":
-                            dados['telefone_fixo'] = row[header_idx]
-                        elif header_lower == "celular":
-                            dados['celular'] = row[header_idx]
-                        elif header_lower == "email":
-                            dados['email'] = row[header_idx]
-                
-                # Validação obrigatória
-                if not dados.get('nome'):
-                    erros.append(f"Linha {idx}: Nome é obrigatório")
-                    continue
-                
-                # Validar se funcionário com mesmo nome já existe
-                funcionario_existente = db.query(FuncionarioModel).filter(
-                    FuncionarioModel.nome == dados['nome']
-                ).first()
-                
-                if funcionario_existente:
-                    erros.append(f"Linha {idx}: Funcionário '{dados['nome']}' já existe")
-                    continue
-                
-                novo_funcionario = FuncionarioModel(**dados)
-                db.add(novo_funcionario)
-                funcionarios_importados.append(dados.get('nome'))
-                
-            except Exception as e:
-                if not any(f"Linha {idx}" in erro for erro in erros):
-                    erros.append(f"Linha {idx}: {str(e)}")
+        # Nomes já cadastrados, carregados uma única vez
+        nomes_existentes = {nome for (nome,) in db.query(FuncionarioModel.nome)}
+        
+        for idx, dados, erro in registros:
+            if erro:
+                erros.append(f"Linha {idx}: {erro}")
+                continue
+            
+            # Validação obrigatória
+            if not dados.get('nome'):
+                erros.append(f"Linha {idx}: Nome é obrigatório")
+                continue
+            
+            # Validar se funcionário com mesmo nome já existe
+            if dados['nome'] in nomes_existentes:
+                erros.append(f"Linha {idx}: Funcionário '{dados['nome']}' já existe")
+                continue
+            
+            novos_funcionarios.append(dados)
+            funcionarios_importados.append(dados.get('nome'))
         
         if funcionarios_importados:
+            db.execute(insert(FuncionarioModel), novos_funcionarios)
             db.commit()
         
         return {
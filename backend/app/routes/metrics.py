@@ -0,0 +1,20 @@
+"""
+Endpoint de métricas no formato Prometheus
+"""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..metrics import registry
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Retorna contagens e histogramas de latência por rota, queries por
+    requisição, uso do pool de conexões e operações de armazenamento.
+    """
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from decimal import Decimal
+from fastapi import APIRouter, Depends, HTTPException, Header, UploadFile, File, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Literal, Optional
+from datetime import datetime
+from uuid import uuid4
 
 from ..database import get_db
 from ..models.produto_servico import (
@@ -11,55 +13,25 @@ from ..models.produto_servico import (
     TipoProdutoServico,
 )
 from ..models.pessoa_juridica import PessoaJuridica as PessoaJuridicaModel
+from ..models.user import User as UserModel
 from ..schemas import produto_servico as schemas
+from ..precos_service import (
+    calcular_estatisticas,
+    calcular_preco_medio_com_impostos,
+    importar_tabela_precos,
+    recalcular_precos,
+    registrar_historico,
+    serie_historico,
+)
+from .. import sequencia_service
+from ..cache_service import em_cache
+from ..importacao_service import ArquivoInvalidoError, ler_planilha, progresso_importacoes
+from .auth import get_current_user, verify_admin
 
 router = APIRouter()
 
-
-def calcular_preco_com_impostos(
-    preco_unitario: Decimal,
-    ipi: Decimal
-) -> Decimal:
-    """Calcula o preço com impostos (apenas IPI é adicionado, outros são por dentro)"""
-    preco_base = Decimal(str(preco_unitario)) or Decimal("0.00")
-    ipi_percent = Decimal(str(ipi)) or Decimal("0.00")
-    ipi_valor = ipi_percent / 100
-    return preco_base * (1 + ipi_valor)
-
-
-def calcular_preco_medio_com_impostos(db: Session, produto_id: int) -> tuple[Decimal, Decimal, Decimal]:
-    """Calcula preço médio, mínimo e máximo com impostos para um produto"""
-    fornecedores = db.query(ProdutoServicoFornecedorModel).filter(
-        ProdutoServicoFornecedorModel.produto_servico_id == produto_id
-    ).all()
-    
-    if not fornecedores:
-        return Decimal("0.00"), Decimal("0.00"), Decimal("0.00")
-    
-    precos = [
-        calcular_preco_com_impostos(f.preco_unitario, f.ipi)
-        for f in fornecedores
-    ]
-    
-    total = sum(precos)
-    media = total / len(precos)
-    minimo = min(precos)
-    maximo = max(precos)
-    
-    return media, minimo, maximo
-
-
-def registrar_historico_precos(db: Session, produto_id: int, preco_meio: Decimal, preco_minimo: Decimal, preco_maximo: Decimal):
-    """Registra os preços no histórico"""
-    historico = ProdutoServicoHistoricoPrecoModel(
-        produto_servico_id=produto_id,
-        preco_medio=preco_meio,
-        preco_minimo=preco_minimo,
-        preco_maximo=preco_maximo,
-    )
-    db.add(historico)
-    db.commit()
-
+# Erros de linha devolvidos na resposta da importação (o total vem em total_erros)
+LIMITE_ERROS_RESPOSTA = 1000
 
 
 @router.get("/test-health")
@@ -80,28 +52,78 @@ def test_auth(authorization: Optional[str] = Header(None)):
     return {"success": True, "token_length": len(token)}
 
 
-def gerar_codigo_interno(db: Session, tipo: str) -> str:
-    if tipo == TipoProdutoServico.PRODUTO.value:
-        prefixo = "P"
-    elif tipo == TipoProdutoServico.SERVICO.value:
-        prefixo = "S"
-    else:
+PREFIXOS_CODIGO_INTERNO = {
+    TipoProdutoServico.PRODUTO.value: "P",
+    TipoProdutoServico.SERVICO.value: "S",
+}
+
+# codigo_interno é String(8): prefixo + 7 dígitos
+DIGITOS_CODIGO_INTERNO = 7
+
+
+def _maior_codigo_interno(db: Session, tipo: str, prefixo: str) -> int:
+    """Maior número já usado nos códigos internos do tipo (usa o índice tipo + código)"""
+    ultimo = db.query(func.max(ProdutoServicoModel.codigo_interno)).filter(
+        ProdutoServicoModel.tipo == tipo,
+        ProdutoServicoModel.codigo_interno.like(f"{prefixo}%"),
+    ).scalar()
+    if ultimo and len(ultimo) >= 2 and ultimo[1:].isdigit():
+        return int(ultimo[1:])
+    return 0
+
+
+def reservar_codigos_internos(db: Session, tipo: str, quantidade: int = 1) -> List[str]:
+    """Reserva códigos internos consecutivos do tipo, sem colisão entre requisições concorrentes"""
+    prefixo = PREFIXOS_CODIGO_INTERNO.get(tipo)
+    if prefixo is None:
         raise HTTPException(status_code=400, detail="Tipo inválido. Use Produto ou Serviço")
 
-    ultimo = (
-        db.query(ProdutoServicoModel)
-        .filter(ProdutoServicoModel.tipo == tipo)
-        .order_by(ProdutoServicoModel.codigo_interno.desc())
-        .first()
+    numeros = sequencia_service.reservar(
+        db,
+        f"codigo_interno_{prefixo}",
+        quantidade,
+        valor_atual=lambda: _maior_codigo_interno(db, tipo, prefixo),
     )
+    if numeros.stop > 10 ** DIGITOS_CODIGO_INTERNO:
+        raise HTTPException(status_code=400, detail=f"Códigos internos do tipo {tipo} esgotados")
+    return [f"{prefixo}{numero:0{DIGITOS_CODIGO_INTERNO}d}" for numero in numeros]
 
-    proximo_numero = 1
-    if ultimo and ultimo.codigo_interno and len(ultimo.codigo_interno) >= 2:
-        ultimo_numero = ultimo.codigo_interno[1:]
-        if ultimo_numero.isdigit():
-            proximo_numero = int(ultimo_numero) + 1
 
-    return f"{prefixo}{proximo_numero:07d}"
+def validar_codigo_reservado(db: Session, tipo: str, codigo: str) -> str:
+    """Aceita um código reservado antes (prefixo do tipo, já emitido pela sequência e ainda livre)"""
+    prefixo = PREFIXOS_CODIGO_INTERNO.get(tipo)
+    if prefixo is None:
+        raise HTTPException(status_code=400, detail="Tipo inválido. Use Produto ou Serviço")
+    numero = codigo[1:]
+    if (
+        not codigo.startswith(prefixo)
+        or len(numero) != DIGITOS_CODIGO_INTERNO
+        or not numero.isdigit()
+        or not 0 < int(numero) <= sequencia_service.valor_atual(db, f"codigo_interno_{prefixo}")
+    ):
+        raise HTTPException(status_code=400, detail=f"Código interno {codigo} não foi reservado para {tipo}")
+    if db.query(ProdutoServicoModel.id).filter(ProdutoServicoModel.codigo_interno == codigo).first():
+        raise HTTPException(status_code=400, detail=f"Código interno {codigo} já está em uso")
+    return codigo
+
+
+def gerar_codigo_interno(db: Session, tipo: str) -> str:
+    return reservar_codigos_internos(db, tipo, 1)[0]
+
+
+@router.post("/codigos-internos/reservar")
+def reservar_codigos(
+    reserva: schemas.ReservaCodigosInternos,
+    current_user: UserModel = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Reserva de uma vez N códigos internos; cada um é usado depois no cadastro
+    (campo codigo_interno de POST /)
+    """
+    codigos = reservar_codigos_internos(db, reserva.tipo, reserva.quantidade)
+    db.commit()
+    return {"tipo": reserva.tipo, "codigos": codigos}
 
 
 @router.post("/", response_model=schemas.ProdutoServico)
@@ -109,7 +131,10 @@ def criar_produto_servico(
     produto: schemas.ProdutoServicoCreate,
     db: Session = Depends(get_db),
 ):
-    codigo_interno = gerar_codigo_interno(db, produto.tipo)
+    if produto.codigo_interno:
+        codigo_interno = validar_codigo_reservado(db, produto.tipo, produto.codigo_interno)
+    else:
+        codigo_interno = gerar_codigo_interno(db, produto.tipo)
 
     db_produto = ProdutoServicoModel(
         codigo_interno=codigo_interno,
@@ -145,22 +170,114 @@ def criar_produto_servico(
         )
         db.add(db_fornecedor)
 
+    # Registra o preço inicial no histórico (se houver fornecedores), na mesma transação
+    if produto.fornecedores:
+        db.flush()
+        registrar_historico(db, calcular_estatisticas(db, [db_produto.id]))
+
     db.commit()
     db.refresh(db_produto)
-    
-    # Registra o preço inicial no histórico (se houver fornecedores)
-    if produto.fornecedores:
-        media, minimo, maximo = calcular_preco_medio_com_impostos(db, db_produto.id)
-        registrar_historico_precos(db, db_produto.id, media, minimo, maximo)
-    
     return db_produto
 
 
+@router.post("/recalcular-precos")
+def recalcular_todos_precos(
+    current_user: UserModel = Depends(verify_admin),
+    db: Session = Depends(get_db),
+):
+    """Recalcula os preços de todos os produtos e registra no histórico os que mudaram (apenas admin)"""
+    registrados = recalcular_precos(db)
+    db.commit()
+    return {
+        "message": "Preços recalculados com sucesso",
+        "total_registrados": len(registrados),
+    }
+
+
+@router.post("/fornecedores/{fornecedor_id}/importar-precos")
+def importar_tabela_precos_fornecedor(
+    fornecedor_id: int,
+    file: UploadFile = File(...),
+    importacao_id: Optional[str] = Query(None, max_length=64),
+    current_user: UserModel = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Importar a tabela de preços (XLSX ou CSV) de um fornecedor.
+
+    O progresso pode ser acompanhado em GET /importacoes/{importacao_id}
+    enquanto a importação roda.
+    """
+    fornecedor = db.query(PessoaJuridicaModel).filter(PessoaJuridicaModel.id == fornecedor_id).first()
+    if not fornecedor:
+        raise HTTPException(status_code=404, detail="Fornecedor não encontrado")
+
+    importacao_id = importacao_id or uuid4().hex
+    try:
+        cabecalho, linhas, total = ler_planilha(file.file, file.filename)
+    except ArquivoInvalidoError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not progresso_importacoes.iniciar(importacao_id, total):
+        raise HTTPException(status_code=409, detail="Já existe uma importação em andamento com este identificador")
+
+    def informar_progresso(**campos):
+        progresso_importacoes.atualizar(importacao_id, **campos)
+
+    try:
+        resultado = importar_tabela_precos(db, fornecedor_id, cabecalho, linhas, informar_progresso)
+        db.commit()
+    except ValueError as e:
+        db.rollback()
+        informar_progresso(status="erro", mensagem=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        informar_progresso(status="erro", mensagem=str(e))
+        raise HTTPException(status_code=500, detail=f"Erro ao importar arquivo: {str(e)}")
+
+    erros = resultado.pop("erros")
+    informar_progresso(
+        status="concluida",
+        linhas_processadas=resultado["linhas_processadas"],
+        inseridos=resultado["inseridos"],
+        atualizados=resultado["atualizados"],
+        total_erros=len(erros),
+    )
+    return {
+        "importacao_id": importacao_id,
+        "mensagem": f"Importação concluída. Inseridos: {resultado['inseridos']}, Atualizados: {resultado['atualizados']}",
+        **resultado,
+        "total_erros": len(erros),
+        "erros": erros[:LIMITE_ERROS_RESPOSTA],
+    }
+
+
+@router.get("/importacoes/{importacao_id}")
+def obter_progresso_importacao(
+    importacao_id: str,
+    current_user: UserModel = Depends(get_current_user),
+):
+    """Progresso de uma importação de tabela de preços"""
+    progresso = progresso_importacoes.obter(importacao_id)
+    if progresso is None:
+        raise HTTPException(status_code=404, detail="Importação não encontrada")
+    return progresso
+
+
 @router.get("/", response_model=List[schemas.ProdutoServico])
+@em_cache(
+    ProdutoServicoModel.__tablename__,
+    ProdutoServicoFornecedorModel.__tablename__,
+    PessoaJuridicaModel.__tablename__,
+    modelo=List[schemas.ProdutoServico],
+)
 def listar_produtos_servicos(
     db: Session = Depends(get_db),
 ):
-    return db.query(ProdutoServicoModel).all()
+    return db.query(ProdutoServicoModel).options(
+        joinedload(ProdutoServicoModel.fornecedores).joinedload(ProdutoServicoFornecedorModel.fornecedor)
+    ).all()
 
 
 @router.get("/{produto_id}", response_model=schemas.ProdutoServico)
@@ -219,13 +336,11 @@ def atualizar_produto_servico(
             )
             db.add(db_fornecedor)
 
+        # Calcula e registra o novo preço médio no histórico, na mesma transação
+        db.flush()
+        registrar_historico(db, {produto_id: calcular_preco_medio_com_impostos(db, produto_id)})
+
     db.commit()
-    
-    # Calcula e registra o novo preço médio no histórico
-    if fornecedores is not None:
-        media, minimo, maximo = calcular_preco_medio_com_impostos(db, produto_id)
-        registrar_historico_precos(db, produto_id, media, minimo, maximo)
-    
     db.refresh(db_produto)
     return db_produto
 
@@ -247,15 +362,37 @@ def deletar_produto_servico(
 @router.get("/{produto_id}/historico-precos", response_model=List[schemas.ProdutoServicoHistoricoPreco])
 def obter_historico_precos(
     produto_id: int,
+    inicio: Optional[datetime] = Query(None),
+    fim: Optional[datetime] = Query(None),
     db: Session = Depends(get_db),
 ):
-    """Retorna o histórico de preços médios de um produto"""
+    """Retorna o histórico de preços médios de um produto, opcionalmente limitado a um intervalo de datas"""
     produto = db.query(ProdutoServicoModel).filter(ProdutoServicoModel.id == produto_id).first()
     if not produto:
         raise HTTPException(status_code=404, detail="Produto/Serviço não encontrado")
     
-    historico = db.query(ProdutoServicoHistoricoPrecoModel).filter(
+    query = db.query(ProdutoServicoHistoricoPrecoModel).filter(
         ProdutoServicoHistoricoPrecoModel.produto_servico_id == produto_id
-    ).order_by(ProdutoServicoHistoricoPrecoModel.registrado_em.asc()).all()
+    )
+    if inicio is not None:
+        query = query.filter(ProdutoServicoHistoricoPrecoModel.registrado_em >= inicio)
+    if fim is not None:
+        query = query.filter(ProdutoServicoHistoricoPrecoModel.registrado_em <= fim)
+    
+    return query.order_by(ProdutoServicoHistoricoPrecoModel.registrado_em.asc()).all()
+
+
+@router.get("/{produto_id}/historico-precos/serie", response_model=List[schemas.ProdutoServicoHistoricoPrecoPeriodo])
+def obter_serie_historico_precos(
+    produto_id: int,
+    intervalo: Literal["dia", "semana", "mes"] = Query("dia"),
+    inicio: Optional[datetime] = Query(None),
+    fim: Optional[datetime] = Query(None),
+    db: Session = Depends(get_db),
+):
+    """Histórico de preços agregado por dia, semana ou mês (abertura, fechamento, máxima e mínima)"""
+    produto = db.query(ProdutoServicoModel.id).filter(ProdutoServicoModel.id == produto_id).first()
+    if not produto:
+        raise HTTPException(status_code=404, detail="Produto/Serviço não encontrado")
     
-    return historico
+    return serie_historico(db, produto_id, intervalo, inicio, fim)
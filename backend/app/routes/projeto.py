@@ -1,32 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
-from typing import List
-from datetime import datetime
-import os
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, func, insert
+from typing import List, Optional
+from datetime import datetime, time, timedelta
 import logging
 from decimal import Decimal
-from io import BytesIO
 
 from ..database import get_db
 from ..models.projeto import Projeto as ProjetoModel, StatusProjeto
 from ..models.pessoa_juridica import PessoaJuridica as PessoaJuridicaModel
 from ..models.contato import Contato as ContatoModel
-from ..models.faturamento import Faturamento as FaturamentoModel
 from ..models.cronograma import Cronograma as CronogramaModel, CronogramaHistorico as CronogramaHistoricoModel
 from ..models.user import User as UserModel
 from ..config import settings, get_local_now
-from ..schemas.projeto import Projeto, ProjetoCreate, ProjetoUpdate
+from ..schemas.projeto import Projeto, ProjetoCreate, ProjetoUpdate, ProjetoPdfLoteFiltro
 from ..onedrive_service import onedrive_service
 from ..local_storage_service import local_storage_service
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.utils import ImageReader
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from ..busca_service import indexando_insercoes
+from ..cache_service import em_cache
+from ..exportacao_service import Formato, FormatoIndisponivelError, resposta_exportacao
+from ..importacao_service import (
+    ArquivoInvalidoError,
+    converter_data,
+    converter_decimal,
+    converter_inteiro,
+    ler_registros,
+)
 from .auth import get_current_user
 
 router = APIRouter()
@@ -62,6 +62,7 @@ def gerar_numero_projeto(db: Session, numero_manual: str = None) -> str:
 
 # Rotas com paths específicos
 @router.get("/clientes", response_model=List[dict])
+@em_cache(PessoaJuridicaModel.__tablename__)
 def listar_clientes(db: Session = Depends(get_db)):
     """Listar apenas pessoas jurídicas que são clientes"""
     clientes = db.query(PessoaJuridicaModel).filter(
@@ -79,6 +80,7 @@ def listar_clientes(db: Session = Depends(get_db)):
 
 
 @router.get("/cliente/{cliente_id}/contatos", response_model=List[dict])
+@em_cache(ContatoModel.__tablename__)
 def listar_contatos_cliente(cliente_id: int, db: Session = Depends(get_db)):
     """Listar contatos de um cliente específico"""
     contatos = db.query(ContatoModel).filter(
@@ -106,216 +108,161 @@ def obter_proximo_numero(db: Session = Depends(get_db)):
 
 
 @router.get("/export/excel")
-def exportar_excel(db: Session = Depends(get_db)):
-    """Exportar todos os projetos para arquivo Excel"""
+def exportar_excel(formato: Formato = Query("xlsx", alias="format"), db: Session = Depends(get_db)):
+    """Exportar todos os projetos (XLSX, CSV, JSON Lines ou Parquet)"""
     try:
-        projetos = db.query(ProjetoModel).all()
-        
-        # Criar workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Projetos"
-        
-        # Definir headers
-        headers = [
-            "Número",
-            "Cliente",
-            "Nome do Projeto",
-            "Contato",
-            "Técnico",
-            "Valor Orçado",
-            "Valor de Venda",
-            "Prazo (dias)",
-            "Data Pedido Compra",
-            "Status",
-            "Data de Criação",
-            "Última Atualização"
-        ]
-        
-        ws.append(headers)
-        
-        # Estilo do header
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-        
-        # Adicionar dados
-        for projeto in projetos:
-            cliente = db.query(PessoaJuridicaModel).filter(
-                PessoaJuridicaModel.id == projeto.cliente_id
-            ).first()
-            contato = db.query(ContatoModel).filter(
-                ContatoModel.id == projeto.contato_id
-            ).first()
-            
-            cliente_nome = cliente.razao_social if cliente else "N/A"
-            contato_nome = contato.nome if contato else "N/A"
-            
-            ws.append([
+        projetos = db.query(ProjetoModel).options(
+            joinedload(ProjetoModel.cliente),
+            joinedload(ProjetoModel.contato)
+        ).all()
+        linhas = [
+            (
                 projeto.numero,
-                cliente_nome,
+                projeto.cliente.razao_social if projeto.cliente else "N/A",
                 projeto.nome,
-                contato_nome,
+                projeto.contato.nome if projeto.contato else "N/A",
                 projeto.tecnico,
                 float(projeto.valor_orcado) if projeto.valor_orcado else 0.00,
                 float(projeto.valor_venda) if projeto.valor_venda else 0.00,
                 projeto.prazo_entrega_dias,
-                projeto.data_pedido_compra.isoformat() if projeto.data_pedido_compra else "",
+                projeto.data_pedido_compra,
                 projeto.status.value,
-                projeto.criado_em.isoformat() if projeto.criado_em else "",
-                projeto.atualizado_em.isoformat() if projeto.atualizado_em else ""
-            ])
-        
-        # Ajustar largura das colunas
-        ws.column_dimensions['A'].width = 12
-        ws.column_dimensions['B'].width = 25
-        ws.column_dimensions['C'].width = 25
-        ws.column_dimensions['D'].width = 20
-        ws.column_dimensions['E'].width = 15
-        ws.column_dimensions['F'].width = 15
-        ws.column_dimensions['G'].width = 15
-        ws.column_dimensions['H'].width = 12
-        ws.column_dimensions['I'].width = 18
-        ws.column_dimensions['J'].width = 18
-        ws.column_dimensions['K'].width = 20
-        ws.column_dimensions['L'].width = 20
-        
-        # Salvar em memória
-        output = BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
-        return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": "attachment; filename=projetos.xlsx"}
+                projeto.criado_em,
+                projeto.atualizado_em,
+            )
+            for projeto in projetos
+        ]
+        return resposta_exportacao(
+            "projetos",
+            "Projetos",
+            [
+                "Número",
+                "Cliente",
+                "Nome do Projeto",
+                "Contato",
+                "Técnico",
+                "Valor Orçado",
+                "Valor de Venda",
+                "Prazo (dias)",
+                "Data Pedido Compra",
+                "Status",
+                "Data de Criação",
+                "Última Atualização"
+            ],
+            linhas,
+            formato,
+            larguras=[12, 25, 25, 20, 15, 15, 15, 12, 18, 18, 20, 20],
+            tipos=[str, str, str, str, str, float, float, int, datetime, str, datetime, datetime],
         )
+    except FormatoIndisponivelError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao exportar: {str(e)}")
 
 
-def _format_currency_br(value: Decimal) -> str:
-    try:
-        val = float(value)
-    except Exception:
-        val = 0.0
-    formatted = f"{val:,.2f}"
-    formatted = formatted.replace(",", "X").replace(".", ",").replace("X", ".")
-    return f"R$ {formatted}"
-
-
-def _format_date_br(value: datetime) -> str:
-    if not value:
-        return "N/A"
-    return value.strftime("%d/%m/%Y")
-
-
-def _format_datetime_br(value: datetime) -> str:
-    if not value:
-        return "N/A"
-    return value.strftime("%d/%m/%Y %H:%M")
+COLUNAS_IMPORTACAO = {
+    "numero": ("numero",),
+    "cliente": ("cliente",),
+    "nome": ("nome_do_projeto", "nome"),
+    "contato": ("contato",),
+    "tecnico": ("tecnico",),
+    "valor_orcado": ("valor_orcado",),
+    "valor_venda": ("valor_de_venda", "valor_venda"),
+    "prazo_entrega_dias": ("prazo_dias", "prazo_entrega_dias"),
+    "data_pedido_compra": ("data_pedido_compra",),
+    "status": ("status",),
+}
+
+CONVERSORES_IMPORTACAO = {
+    "numero": str,
+    "valor_orcado": converter_decimal,
+    "valor_venda": converter_decimal,
+    "prazo_entrega_dias": converter_inteiro,
+    "data_pedido_compra": converter_data,
+}
 
 
 @router.post("/import/excel")
-async def importar_excel(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    """Importar projetos de arquivo Excel"""
-    if not file.filename.endswith(('.xlsx', '.xls')):
-        raise HTTPException(status_code=400, detail="Arquivo deve ser em formato Excel (.xlsx ou .xls)")
+def importar_excel(
+    file: UploadFile = File(...),
+    formato: Optional[Formato] = Query(None, alias="format"),
+    db: Session = Depends(get_db),
+):
+    """Importar projetos de arquivo Excel (ou CSV, JSON Lines, Parquet)"""
+    try:
+        _, registros = ler_registros(
+            file.file, file.filename, COLUNAS_IMPORTACAO, CONVERSORES_IMPORTACAO, formato
+        )
+    except ArquivoInvalidoError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     try:
-        contents = await file.read()
-        wb = load_workbook(BytesIO(contents))
-        ws = wb.active
-        
         projetos_importados = []
+        novos_projetos = []
         erros = []
         
-        for idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-            try:
-                dados = {}
-                headers_arquivo = [cell.value for cell in ws[1]]
-                
-                for header_idx, header in enumerate(headers_arquivo):
-                    if header and row[header_idx] is not None:
-                        header_lower = header.lower()
-                        if header_lower == "número":
-                            dados['numero'] = str(row[header_idx])
-                        elif header_lower == "cliente":
-                            cliente = db.query(PessoaJuridicaModel).filter(
-                                PessoaJuridicaModel.razao_social == row[header_idx]
-                            ).first()
-                            if not cliente:
-                                erros.append(f"Linha {idx}: Cliente '{row[header_idx]}' não encontrado")
-                                raise ValueError("Cliente não encontrado")
-                            dados['cliente_id'] = cliente.id
-                        elif header_lower == "nome do projeto":
-                            dados['nome'] = row[header_idx]
-                        elif header_lower == "contato":
-                            contato = db.query(ContatoModel).filter(
-                                ContatoModel.nome == row[header_idx]
-                            ).first()
-                            if not contato:
-                                erros.append(f"Linha {idx}: Contato '{row[header_idx]}' não encontrado")
-                                raise ValueError("Contato não encontrado")
-                            dados['contato_id'] = contato.id
-                        elif header_lower == "técnico":
-                            dados['tecnico'] = row[header_idx]
-                        elif header_lower == "valor orçado":
-                            dados['valor_orcado'] = Decimal(str(row[header_idx]))
-                        elif header_lower == "valor de venda":
-                            dados['valor_venda'] = Decimal(str(row[header_idx]))
-                        elif header_lower == "prazo (dias)":
-                            dados['prazo_entrega_dias'] = int(row[header_idx])
-                        elif header_lower == "data pedido compra" and row[header_idx]:
-                            if isinstance(row[header_idx], datetime):
-                                dados['data_pedido_compra'] = row[header_idx]
-                        elif header_lower == "status":
-                            dados['status'] = row[header_idx]
-                
-                # Validações obrigatórias
-                if not dados.get('numero'):
-                    erros.append(f"Linha {idx}: Número é obrigatório")
-                    continue
-                
-                if not dados.get('cliente_id'):
-                    erros.append(f"Linha {idx}: Cliente é obrigatório")
-                    continue
-                
-                if not dados.get('nome'):
-                    erros.append(f"Linha {idx}: Nome do projeto é obrigatório")
-                    continue
-                
-                if not dados.get('contato_id'):
-                    erros.append(f"Linha {idx}: Contato é obrigatório")
-                    continue
-                
-                if not dados.get('tecnico'):
-                    erros.append(f"Linha {idx}: Técnico é obrigatório")
+        # Carregar clientes, contatos e números existentes uma única vez
+        clientes_por_nome = {}
+        for cliente_id, razao_social in db.query(
+            PessoaJuridicaModel.id, PessoaJuridicaModel.razao_social
+        ).order_by(PessoaJuridicaModel.id):
+            clientes_por_nome.setdefault(razao_social, cliente_id)
+        contatos_por_nome = {}
+        for contato_id, nome in db.query(ContatoModel.id, ContatoModel.nome).order_by(ContatoModel.id):
+            contatos_por_nome.setdefault(nome, contato_id)
+        numeros_existentes = {numero for (numero,) in db.query(ProjetoModel.numero)}
+        
+        for idx, dados, erro in registros:
+            if erro:
+                erros.append(f"Linha {idx}: {erro}")
+                continue
+            
+            cliente = dados.pop('cliente', None)
+            if cliente is not None:
+                dados['cliente_id'] = clientes_por_nome.get(cliente)
+                if not dados['cliente_id']:
+                    erros.append(f"Linha {idx}: Cliente '{cliente}' não encontrado")
                     continue
-                
-                # Validar duplicidade de número
-                existente = db.query(ProjetoModel).filter(
-                    ProjetoModel.numero == dados['numero']
-                ).first()
-                
-                if existente:
-                    erros.append(f"Linha {idx}: Projeto com número '{dados['numero']}' já existe")
+            
+            contato = dados.pop('contato', None)
+            if contato is not None:
+                dados['contato_id'] = contatos_por_nome.get(contato)
+                if not dados['contato_id']:
+                    erros.append(f"Linha {idx}: Contato '{contato}' não encontrado")
                     continue
-                
-                novo_projeto = ProjetoModel(**dados)
-                db.add(novo_projeto)
-                projetos_importados.append(dados.get('numero'))
-                
-            except Exception as e:
-                if not any(f"Linha {idx}" in erro for erro in erros):
-                    erros.append(f"Linha {idx}: {str(e)}")
+            
+            # Validações obrigatórias
+            if not dados.get('numero'):
+                erros.append(f"Linha {idx}: Número é obrigatório")
+                continue
+            
+            if not dados.get('cliente_id'):
+                erros.append(f"Linha {idx}: Cliente é obrigatório")
+                continue
+            
+            if not dados.get('nome'):
+                erros.append(f"Linha {idx}: Nome do projeto é obrigatório")
+                continue
+            
+            if not dados.get('contato_id'):
+                erros.append(f"Linha {idx}: Contato é obrigatório")
+                continue
+            
+            if not dados.get('tecnico'):
+                erros.append(f"Linha {idx}: Técnico é obrigatório")
+                continue
+            
+            # Validar duplicidade de número
+            if dados['numero'] in numeros_existentes:
+                erros.append(f"Linha {idx}: Projeto com número '{dados['numero']}' já existe")
+                continue
+            
+            novos_projetos.append(dados)
+            projetos_importados.append(dados.get('numero'))
         
         if projetos_importados:
+            with indexando_insercoes(db, ProjetoModel):
+                db.execute(insert(ProjetoModel), novos_projetos)
             db.commit()
         
         return {
@@ -332,272 +279,73 @@ async def importar_excel(file: UploadFile = File(...), db: Session = Depends(get
         raise HTTPException(status_code=500, detail=f"Erro ao importar arquivo: {str(e)}")
 
 
-@router.get("/{projeto_id}/export/pdf")
-def exportar_pdf(
-    projeto_id: int,
+@router.post("/export/pdf-batch")
+def exportar_pdf_lote(
+    filtro: ProjetoPdfLoteFiltro,
     current_user: UserModel = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Exportar projeto em PDF"""
-    projeto = db.query(ProjetoModel).filter(ProjetoModel.id == projeto_id).first()
-    if not projeto:
-        raise HTTPException(status_code=404, detail="Projeto não encontrado")
+    """Exportar em um ZIP os relatórios PDF dos projetos que atendem ao filtro"""
+    # pdf_service (reportlab) só é carregado no primeiro relatório
+    from ..pdf_service import carregar_dados_projetos, gerar_zip_pdfs
 
-    cliente = db.query(PessoaJuridicaModel).filter(PessoaJuridicaModel.id == projeto.cliente_id).first()
-    contato = db.query(ContatoModel).filter(ContatoModel.id == projeto.contato_id).first()
-
-    cliente_nome = "N/A"
-    if cliente:
-        cliente_nome = cliente.nome_fantasia or cliente.razao_social
-
-    contato_nome = contato.nome if contato else "N/A"
-    status_valor = getattr(projeto.status, "value", projeto.status)
-    faturamentos = db.query(FaturamentoModel).filter(FaturamentoModel.projeto_id == projeto.id).all()
-    total_faturado = sum([float(f.valor_faturado or 0) for f in faturamentos])
-
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, leftMargin=36, rightMargin=36, topMargin=88, bottomMargin=52)
-    styles = getSampleStyleSheet()
-    title_style = styles["Title"]
-    subtitle_style = ParagraphStyle(
-        name="Subtitle",
-        parent=styles["Heading2"],
-        fontSize=12,
-        textColor=colors.HexColor("#1f2937"),
-        spaceAfter=6,
-    )
-    label_style = ParagraphStyle(
-        name="Label",
-        parent=styles["BodyText"],
-        fontSize=9,
-        textColor=colors.HexColor("#6b7280"),
+    query = db.query(ProjetoModel).options(
+        joinedload(ProjetoModel.cliente),
+        joinedload(ProjetoModel.contato),
     )
-
-    story = []
-    story.append(Paragraph(f"Relatorio do Projeto {projeto.numero}", title_style))
-    story.append(Spacer(1, 12))
-
-    def add_section(title: str):
-        story.append(Paragraph(title, subtitle_style))
-
-    def add_table(rows: list):
-        table = Table(rows, colWidths=[140, 360])
-        table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f3f4f6")),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#111827")),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, -1), 9),
-                    ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#fafafa")]),
-                    ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#e5e7eb")),
-                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                    ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                    ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-                    ("TOPPADDING", (0, 0), (-1, -1), 4),
-                    ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-                ]
-            )
+    if filtro.status:
+        query = query.filter(ProjetoModel.status.in_([StatusProjeto(s) for s in filtro.status]))
+    if filtro.cliente_id is not None:
+        query = query.filter(ProjetoModel.cliente_id == filtro.cliente_id)
+    if filtro.data_inicio:
+        query = query.filter(ProjetoModel.criado_em >= datetime.combine(filtro.data_inicio, time.min))
+    if filtro.data_fim:
+        query = query.filter(ProjetoModel.criado_em < datetime.combine(filtro.data_fim + timedelta(days=1), time.min))
+
+    projetos = query.order_by(ProjetoModel.numero).limit(settings.PDF_BATCH_MAX_PROJETOS + 1).all()
+    if not projetos:
+        raise HTTPException(status_code=404, detail="Nenhum projeto encontrado para o filtro informado")
+    if len(projetos) > settings.PDF_BATCH_MAX_PROJETOS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"O filtro retorna mais de {settings.PDF_BATCH_MAX_PROJETOS} projetos; refine a seleção"
         )
-        story.append(table)
-        story.append(Spacer(1, 12))
-
-    add_section("Dados do Projeto")
-    add_table(
-        [
-            ["Campo", "Valor"],
-            ["Nome", projeto.nome or "N/A"],
-            ["Status", str(status_valor)],
-            ["Tecnico", projeto.tecnico or "N/A"],
-            ["Prazo (dias)", str(projeto.prazo_entrega_dias or "N/A")],
-            ["Data Pedido Compra", _format_date_br(projeto.data_pedido_compra)],
-        ]
-    )
-
-    add_section("Cliente")
-    add_table(
-        [
-            ["Campo", "Valor"],
-            ["Nome", cliente_nome],
-            ["CNPJ", cliente.cnpj if cliente else "N/A"],
-            ["Cidade/UF", f"{cliente.cidade}/{cliente.estado}" if cliente and cliente.cidade and cliente.estado else "N/A"],
-            ["Endereco", cliente.endereco if cliente else "N/A"],
-        ]
-    )
-
-    add_section("Contato")
-    contato_telefone = "N/A"
-    if contato:
-        contato_telefone = contato.celular or contato.telefone_fixo or "N/A"
-    add_table(
-        [
-            ["Campo", "Valor"],
-            ["Nome", contato_nome],
-            ["Email", contato.email if contato else "N/A"],
-            ["Telefone", contato_telefone],
-        ]
-    )
 
-    add_section("Valores")
-    add_table(
-        [
-            ["Campo", "Valor"],
-            ["Valor Orcado", _format_currency_br(projeto.valor_orcado or 0)],
-            ["Valor de Venda", _format_currency_br(projeto.valor_venda or 0)],
-            ["Total Faturado", _format_currency_br(Decimal(str(total_faturado)))],
-        ]
+    lista_dados = carregar_dados_projetos(db, projetos)
+    filename = f"relatorios_projetos_{get_local_now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return StreamingResponse(
+        gerar_zip_pdfs(lista_dados, current_user.username),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "X-Total-Projetos": str(len(lista_dados)),
+        }
     )
 
-    add_section("Historico")
-    add_table(
-        [
-            ["Campo", "Valor"],
-            ["Criado em", _format_datetime_br(projeto.criado_em)],
-            ["Atualizado em", _format_datetime_br(projeto.atualizado_em)],
-        ]
-    )
 
-    add_section("Faturamentos")
-    if faturamentos:
-        fat_rows = [["Data", "Tecnico", "Valor", "Observacoes"]]
-        for fat in faturamentos:
-            tecnico_nome = fat.tecnico.nome if fat.tecnico else "N/A"
-            fat_rows.append(
-                [
-                    _format_date_br(fat.data_faturamento),
-                    tecnico_nome,
-                    _format_currency_br(fat.valor_faturado or 0),
-                    fat.observacoes or "",
-                ]
-            )
-        fat_table = Table(fat_rows, colWidths=[80, 140, 90, 190])
-        fat_table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#e5e7eb")),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, -1), 8.5),
-                    ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#e5e7eb")),
-                    ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                    ("LEFTPADDING", (0, 0), (-1, -1), 4),
-                    ("RIGHTPADDING", (0, 0), (-1, -1), 4),
-                    ("TOPPADDING", (0, 0), (-1, -1), 3),
-                    ("BOTTOMPADDING", (0, 0), (-1, -1), 3),
-                ]
-            )
-        )
-        story.append(fat_table)
-    else:
-        story.append(Paragraph("Nenhum faturamento registrado para este projeto.", label_style))
-
-    # Buscar cronograma e histórico
-    cronograma = db.query(CronogramaModel).filter(CronogramaModel.projeto_id == projeto.id).first()
-    if cronograma:
-        # Calcular prazo status
-        prazo_status = "No prazo"
-        if projeto.data_pedido_compra and projeto.prazo_entrega_dias:
-            from datetime import timedelta
-            prazo_entrega = projeto.data_pedido_compra + timedelta(days=projeto.prazo_entrega_dias)
-            dias_restantes = (prazo_entrega - datetime.now()).days
-            
-            if dias_restantes < 0:
-                prazo_status = "Atrasado"
-            elif dias_restantes <= 5:
-                prazo_status = "Urgente"
-        
-        story.append(Spacer(1, 12))
-        add_section("Cronograma de Execucao")
-        add_table(
-            [
-                ["Campo", "Valor"],
-                ["Percentual de Conclusao", f"{cronograma.percentual_conclusao}%"],
-                ["Prazo Status", prazo_status],
-                ["Observacoes", cronograma.observacoes or "N/A"],
-            ]
-        )
-        
-        # Histórico do cronograma
-        historico = db.query(CronogramaHistoricoModel).filter(
-            CronogramaHistoricoModel.cronograma_id == cronograma.id
-        ).order_by(CronogramaHistoricoModel.criado_em.desc()).all()
-        
-        if historico:
-            story.append(Paragraph("Historico de Alteracoes", subtitle_style))
-            hist_rows = [["Data", "Usuario", "% Conclusao", "Observacoes"]]
-            for h in historico:
-                usuario = db.query(UserModel).filter(UserModel.id == h.criado_por_id).first()
-                usuario_nome = usuario.username if usuario else "N/A"
-                hist_rows.append(
-                    [
-                        _format_datetime_br(h.criado_em),
-                        usuario_nome,
-                        f"{h.percentual_conclusao}%",
-                        h.observacoes or "-",
-                    ]
-                )
-            hist_table = Table(hist_rows, colWidths=[100, 120, 80, 200])
-            hist_table.setStyle(
-                TableStyle(
-                    [
-                        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#e5e7eb")),
-                        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                        ("FONTSIZE", (0, 0), (-1, -1), 8.5),
-                        ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#e5e7eb")),
-                        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                        ("LEFTPADDING", (0, 0), (-1, -1), 4),
-                        ("RIGHTPADDING", (0, 0), (-1, -1), 4),
-                        ("TOPPADDING", (0, 0), (-1, -1), 3),
-                        ("BOTTOMPADDING", (0, 0), (-1, -1), 3),
-                    ]
-                )
-            )
-            story.append(hist_table)
-
-    def draw_header_footer(canvas_obj, doc_obj):
-        canvas_obj.saveState()
-
-        logo_path = settings.LOGO_PATH
-        if logo_path and os.path.exists(logo_path):
-            try:
-                logo = ImageReader(logo_path)
-                img_width, img_height = logo.getSize()
-                max_width = 160
-                max_height = 70
-                scale = min(1.0, max_width / img_width, max_height / img_height)
-                logo_width = img_width * scale
-                logo_height = img_height * scale
-                logo_x = 36
-                canvas_obj.drawImage(
-                    logo,
-                    logo_x,
-                    A4[1] - (logo_height + 20),
-                    width=logo_width,
-                    height=logo_height,
-                    mask='auto'
-                )
-            except Exception:
-                pass
-
-        canvas_obj.setFont("Helvetica", 8.5)
-        canvas_obj.setFillColor(colors.HexColor("#6b7280"))
-        page_number = canvas_obj.getPageNumber()
-        canvas_obj.drawRightString(A4[0] - 36, 24, f"Pagina {page_number}")
-        canvas_obj.drawString(
-            36,
-            24,
-            f"Gerado em: {_format_datetime_br(datetime.now())} | Usuario: {current_user.username}"
-        )
+@router.get("/{projeto_id}/export/pdf")
+def exportar_pdf(
+    projeto_id: int,
+    current_user: UserModel = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Exportar projeto em PDF (servido do cache quando os dados não mudaram)"""
+    from ..pdf_service import carregar_dados_projeto, gerar_pdf_projeto
 
-        canvas_obj.restoreState()
+    dados = carregar_dados_projeto(db, projeto_id)
+    if dados is None:
+        raise HTTPException(status_code=404, detail="Projeto não encontrado")
 
-    doc.build(story, onFirstPage=draw_header_footer, onLaterPages=draw_header_footer)
-    buffer.seek(0)
+    conteudo, em_cache = gerar_pdf_projeto(dados, current_user.username)
 
-    filename = f"projeto_{projeto.numero}.pdf"
-    return StreamingResponse(
-        iter([buffer.getvalue()]),
+    filename = f"projeto_{dados['numero']}.pdf"
+    return Response(
+        content=conteudo,
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "X-PDF-Cache": "HIT" if em_cache else "MISS",
+        }
     )
 
 
@@ -656,6 +404,7 @@ def criar_projeto(projeto: ProjetoCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=List[Projeto])
+@em_cache(ProjetoModel.__tablename__, modelo=List[Projeto])
 def ler_todos_projetos(db: Session = Depends(get_db)):
     projetos = db.query(ProjetoModel).all()
     return projetos
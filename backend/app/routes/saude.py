@@ -0,0 +1,42 @@
+from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
+
+from ..config import settings
+from ..database import engine
+from ..saude_service import prontidao
+
+router = APIRouter()
+
+
+@router.get("/health")
+def health_check():
+    """
+    Health check endpoint para monitoramento
+
+    Returns:
+        dict: Status da aplicação e dependências (do último resultado da prontidão)
+    """
+    resultado = prontidao.atual(engine)
+    return {
+        "status": "healthy" if resultado["database"] == "connected" else "unhealthy",
+        "version": "1.0.0",
+        "environment": settings.ENVIRONMENT,
+        "database": resultado["database"],
+        "schema": resultado["schema"],
+    }
+
+
+@router.get("/health/live")
+async def liveness():
+    """Vivacidade: responde sem acessar o banco nem o pool de threads"""
+    return {"status": "alive"}
+
+
+@router.get("/health/ready")
+def readiness():
+    """Prontidão: 200 com banco acessível e schema atualizado, senão 503"""
+    resultado = prontidao.atual(engine)
+    return ORJSONResponse(
+        {"status": "ready" if resultado["ready"] else "not_ready", **resultado},
+        status_code=200 if resultado["ready"] else 503,
+    )
@@ -0,0 +1,90 @@
+"""
+Sondas de saúde da aplicação
+
+- vivacidade (/health/live): o processo responde; nenhuma E/S;
+- prontidão (/health/ready): banco acessível e schema na revisão head do
+  Alembic (o schema não é mais criado na inicialização, ver preparar_banco).
+
+A prontidão é verificada em segundo plano a cada HEALTH_CHECK_SEGUNDOS pela
+tarefa do lifespan, e as sondas leem o último resultado, sem abrir conexão com
+o banco a cada chamada. Se a tarefa parar (resultado com mais de três
+intervalos), a próxima sonda verifica na hora.
+"""
+import asyncio
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+from .config import get_local_now, settings
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def _revisao_head() -> str:
+    # Importado só na primeira verificação (o Alembic não pesa na inicialização)
+    from .preparar_banco import revisao_head
+
+    return revisao_head()
+
+
+def _estado_schema(conexao) -> str:
+    try:
+        versoes = set(conexao.execute(text("SELECT version_num FROM alembic_version")).scalars())
+    except Exception:
+        return "sem_versao"
+    return "atualizado" if versoes == {_revisao_head()} else "desatualizado"
+
+
+class Prontidao:
+    """Último resultado da verificação de prontidão"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.resultado: Optional[dict] = None
+        self._verificado_em: Optional[float] = None
+
+    def verificar(self, engine: Engine) -> dict:
+        database, schema = "disconnected", "desconhecido"
+        try:
+            with engine.connect() as conexao:
+                conexao.execute(text("SELECT 1"))
+                database = "connected"
+                schema = _estado_schema(conexao)
+        except Exception as e:
+            logger.error(f"Health check - Database error: {str(e)}")
+        resultado = {
+            "ready": database == "connected" and schema == "atualizado",
+            "database": database,
+            "schema": schema,
+            "verificado_em": get_local_now().isoformat(),
+        }
+        with self._lock:
+            self.resultado = resultado
+            self._verificado_em = time.monotonic()
+        return resultado
+
+    def atual(self, engine: Engine) -> dict:
+        """Resultado em cache; verifica na hora se não houver um recente"""
+        validade = 3 * settings.HEALTH_CHECK_SEGUNDOS
+        with self._lock:
+            resultado, verificado_em = self.resultado, self._verificado_em
+        if resultado is None or time.monotonic() - verificado_em > validade:
+            return self.verificar(engine)
+        return resultado
+
+
+prontidao = Prontidao()
+
+
+async def monitorar_prontidao(engine: Engine) -> None:
+    """Tarefa do lifespan: atualiza a prontidão a cada HEALTH_CHECK_SEGUNDOS"""
+    while True:
+        await run_in_threadpool(prontidao.verificar, engine)
+        await asyncio.sleep(settings.HEALTH_CHECK_SEGUNDOS)
@@ -0,0 +1,43 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class FaturamentoMes(BaseModel):
+    mes: str
+    valor_faturado: float
+    quantidade: int
+
+
+class ProjetosStatus(BaseModel):
+    status: str
+    quantidade: int
+    valor_orcado: float
+    valor_venda: float
+
+
+class Pipeline(BaseModel):
+    quantidade: int
+    valor_orcado: float
+    valor_venda: float
+
+
+class Execucao(BaseModel):
+    no_prazo: int
+    atrasados: int
+    sem_prazo: int
+
+
+class ClienteDashboard(BaseModel):
+    cliente_id: int
+    razao_social: Optional[str] = None
+    projetos: int
+    valor_venda: float
+    total_faturado: float
+
+
+class Dashboard(BaseModel):
+    faturamento_por_mes: List[FaturamentoMes]
+    projetos_por_status: List[ProjetosStatus]
+    pipeline: Pipeline
+    execucao: Execucao
+    maiores_clientes: List[ClienteDashboard]
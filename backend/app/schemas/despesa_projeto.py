@@ -1,7 +1,42 @@
-from pydantic import BaseModel, field_validator
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, field_validator
+from typing import List, Optional
 from datetime import date, datetime
 
+from .despesa_projeto_item import DespesaProjetoItem
+
+
+class ProjetoResumo(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    numero: str
+    nome: str
+
+
+class FornecedorResumo(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    razao_social: str
+    sigla: str
+
+
+class TecnicoResumo(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    nome: str
+
+
+class DespesaProjetoTotais(BaseModel):
+    """Totais dos itens da despesa, calculados no banco"""
+    quantidade_itens: int = 0
+    subtotal: float = 0.0
+    valor_ipi: float = 0.0
+    valor_impostos: float = 0.0
+    valor_frete: float = 0.0
+    total: float = 0.0
+
 
 class DespesaProjetoBase(BaseModel):
     projeto_id: int
@@ -63,12 +98,25 @@ class DespesaProjetoUpdate(BaseModel):
 
 
 class DespesaProjeto(DespesaProjetoBase):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     numero_despesa: str
     criado_em: datetime
     atualizado_em: Optional[datetime] = None
     contato_id: Optional[int] = None
     # Dados relacionados
-    projeto: Optional[dict] = None
-    fornecedor: Optional[dict] = None
-    tecnico_responsavel: Optional[dict] = None
+    projeto: Optional[ProjetoResumo] = None
+    fornecedor: Optional[FornecedorResumo] = None
+    tecnico_responsavel: Optional[TecnicoResumo] = None
+
+    @field_validator('valor_frete', mode='before')
+    @classmethod
+    def frete_ausente(cls, v):
+        return 0.0 if v is None else v
+
+
+class DespesaProjetoDetalhada(DespesaProjeto):
+    """Despesa com os itens e/ou totais pedidos em ?include=itens,totais"""
+    itens: Optional[List[DespesaProjetoItem]] = None
+    totais: Optional[DespesaProjetoTotais] = None
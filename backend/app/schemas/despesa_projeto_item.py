@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 from decimal import Decimal
 
@@ -28,6 +28,6 @@ class DespesaProjetoItemUpdate(BaseModel):
     iss: Optional[Decimal] = None
 
 class DespesaProjetoItem(DespesaProjetoItemBase):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
-    class Config:
-        orm_mode = True
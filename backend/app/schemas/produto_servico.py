@@ -1,7 +1,7 @@
-from pydantic import BaseModel, ConfigDict, field_serializer
+from pydantic import BaseModel, ConfigDict, Field, field_serializer
 from typing import Optional, List
 from decimal import Decimal
-from datetime import datetime
+from datetime import date, datetime
 
 
 class FornecedorResumo(BaseModel):
@@ -56,7 +56,8 @@ class ProdutoServicoBase(BaseModel):
 
 
 class ProdutoServicoCreate(ProdutoServicoBase):
-    pass
+    # Código reservado em /codigos-internos/reservar; sem ele, um novo é gerado
+    codigo_interno: Optional[str] = None
 
 
 class ProdutoServicoUpdate(BaseModel):
@@ -102,3 +103,24 @@ class ProdutoServicoHistoricoPreco(ProdutoServicoHistoricoPrecoBase):
     id: int
     produto_servico_id: int
     registrado_em: datetime
+
+
+class ProdutoServicoHistoricoPrecoPeriodo(BaseModel):
+    """Histórico de preços agregado por período (dia, semana ou mês)"""
+    periodo: date
+    abertura: Decimal
+    fechamento: Decimal
+    maxima: Decimal
+    minima: Decimal
+    preco_minimo: Decimal
+    preco_maximo: Decimal
+    registros: int
+
+    @field_serializer('abertura', 'fechamento', 'maxima', 'minima', 'preco_minimo', 'preco_maximo')
+    def serialize_decimal(self, value: Decimal) -> float:
+        return float(value) if value is not None else 0.0
+
+
+class ReservaCodigosInternos(BaseModel):
+    tipo: str
+    quantidade: int = Field(default=1, ge=1, le=10000)
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, field_validator, ConfigDict
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
-from typing import Optional
+from typing import List, Optional
 
 # Valores válidos para o status do projeto
 VALID_STATUS = [
@@ -78,3 +78,20 @@ class Projeto(ProjetoBase):
     id: int
     criado_em: datetime
     atualizado_em: datetime
+
+
+class ProjetoPdfLoteFiltro(BaseModel):
+    """Filtro da exportação de relatórios PDF em lote (datas sobre a criação do projeto)"""
+    status: Optional[List[str]] = None
+    cliente_id: Optional[int] = None
+    data_inicio: Optional[date] = None
+    data_fim: Optional[date] = None
+
+    @field_validator('status')
+    @classmethod
+    def validate_status(cls, v):
+        if v is not None:
+            for item in v:
+                if item not in VALID_STATUS:
+                    raise ValueError(f'Status deve ser um dos seguintes: {", ".join(VALID_STATUS)}')
+        return v
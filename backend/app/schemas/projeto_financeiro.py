@@ -0,0 +1,33 @@
+from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+from typing import List, Optional
+
+
+class ProjetoFinanceiro(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    projeto_id: int
+    numero: str
+    nome: str
+    status: str
+    cliente_id: int
+    cliente: Optional[str] = None
+    valor_orcado: float
+    valor_venda: float
+    total_faturado: float
+    total_despesas: float
+    margem: float
+    percentual_faturado: float
+    atualizado_em: Optional[datetime] = None
+
+
+class ProjetoFinanceiroPagina(BaseModel):
+    total: int
+    itens: List[ProjetoFinanceiro]
+
+
+class VerificacaoFinanceiro(BaseModel):
+    projetos: int
+    divergentes: int
+    faltando: int
+    sobrando: int
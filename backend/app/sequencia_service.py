@@ -0,0 +1,75 @@
+"""
+Sequências de códigos com reserva atômica
+
+Cada sequência é uma linha de sequencias_codigos. A reserva incrementa o último
+valor com um único UPDATE ... RETURNING, então requisições concorrentes nunca
+recebem o mesmo valor: o banco serializa os incrementos na linha da sequência.
+A reserva faz parte da transação de quem chamou; se ela for desfeita, os
+valores voltam para a sequência.
+"""
+from typing import Callable, Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .models.sequencia import SequenciaCodigo
+
+# Dialetos com INSERT ... ON CONFLICT DO NOTHING
+_INSERT_SEM_CONFLITO = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def _criar_sequencia(db: Session, nome: str, valor_inicial: int) -> None:
+    """Cria a linha da sequência; se outra requisição criou antes, mantém a existente"""
+    construtor = _INSERT_SEM_CONFLITO.get(db.get_bind().dialect.name)
+    if construtor is not None:
+        db.execute(
+            construtor(SequenciaCodigo)
+            .values(nome=nome, ultimo_valor=valor_inicial)
+            .on_conflict_do_nothing(index_elements=["nome"])
+        )
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(SequenciaCodigo).values(nome=nome, ultimo_valor=valor_inicial))
+    except IntegrityError:
+        pass
+
+
+def reservar(
+    db: Session,
+    nome: str,
+    quantidade: int = 1,
+    valor_atual: Optional[Callable[[], int]] = None,
+) -> range:
+    """
+    Reserva `quantidade` valores consecutivos da sequência e retorna o intervalo.
+
+    Na primeira reserva a sequência é criada a partir de valor_atual() (o maior
+    valor já usado, por exemplo), ou de zero.
+    """
+    if quantidade < 1:
+        raise ValueError("A quantidade reservada deve ser maior que zero")
+
+    incremento = (
+        update(SequenciaCodigo)
+        .where(SequenciaCodigo.nome == nome)
+        .values(ultimo_valor=SequenciaCodigo.ultimo_valor + quantidade)
+        .returning(SequenciaCodigo.ultimo_valor)
+        .execution_options(synchronize_session=False)
+    )
+    ultimo = db.execute(incremento).scalar_one_or_none()
+    if ultimo is None:
+        _criar_sequencia(db, nome, valor_atual() if valor_atual else 0)
+        ultimo = db.execute(incremento).scalar_one()
+    return range(ultimo - quantidade + 1, ultimo + 1)
+
+
+def valor_atual(db: Session, nome: str) -> int:
+    """Último valor reservado da sequência (zero se ela ainda não existe)"""
+    ultimo = db.execute(select(SequenciaCodigo.ultimo_valor).where(SequenciaCodigo.nome == nome)).scalar()
+    return ultimo or 0
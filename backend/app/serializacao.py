@@ -0,0 +1,44 @@
+"""
+Serialização direta de objetos do ORM para JSON
+
+No caminho padrão do FastAPI o retorno da rota é validado pelo response_model,
+convertido em dicts/listas Python (jsonable_encoder) e só então codificado em
+JSON. Para listagens grandes de objetos confiáveis (vindos do próprio banco)
+resposta_orm() valida uma única vez, lendo os atributos do ORM, e gera os bytes
+JSON direto no pydantic-core:
+
+    @router.get("/{id}", response_model=DespesaProjeto)
+    def obter(...):
+        return resposta_orm(DespesaProjeto, despesa)
+
+O response_model continua documentando a rota; como o retorno já é uma
+Response, o FastAPI não o valida de novo. Campos Decimal saem como texto, a
+menos que o schema os converta (float ou field_serializer).
+"""
+from functools import lru_cache
+from typing import Any
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def adaptador(modelo) -> TypeAdapter:
+    """TypeAdapter do schema (ou de List[schema]), criado uma vez por tipo"""
+    return TypeAdapter(modelo)
+
+
+def serializar(modelo, dados: Any, exclude=None) -> bytes:
+    """
+    JSON de `dados` (objetos do ORM ou dicts) no formato do schema `modelo`.
+    `exclude` segue o formato do pydantic ({"__all__": {...}} para listas).
+    """
+    tipo = adaptador(modelo)
+    return tipo.dump_json(tipo.validate_python(dados, from_attributes=True), by_alias=True, exclude=exclude)
+
+
+def resposta_orm(modelo, dados: Any, status_code: int = 200, exclude=None) -> Response:
+    """Resposta JSON de `dados` serializados por `modelo`, sem a segunda validação do response_model"""
+    return Response(
+        serializar(modelo, dados, exclude), status_code=status_code, media_type="application/json"
+    )
@@ -0,0 +1,136 @@
+"""
+Amostra do estado do servidor para /api/status/info
+
+Percorrer os processos do host (psutil), resolver o IP pelo DNS e consultar o
+banco custam dezenas de ms de CPU em um host ocupado, e o frontend consulta a
+rota periodicamente. Uma tarefa do lifespan refaz a amostra a cada
+STATUS_REFRESH_SEGUNDOS e a rota só devolve a última.
+
+Além dos campos de sempre (db_status, hostname, ip, server_count), a amostra
+traz métricas do worker: memória residente, CPU, threads, conexões do pool e o
+atraso do event loop (quanto o timer da tarefa acordou depois do previsto).
+Cada worker tem a sua amostra; server_count é do host. O banco não é
+consultado aqui: db_status vem do último resultado da prontidão.
+"""
+import asyncio
+import os
+import socket
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+from .config import get_local_now, settings
+from .metrics import pool_stats, registry
+from .saude_service import prontidao
+
+
+def _contar_servidores(psutil) -> int:
+    """Processos uvicorn/fastapi rodando no host"""
+    total = 0
+    for proc in psutil.process_iter(['name', 'cmdline']):
+        try:
+            nome = proc.info['name']
+            cmdline = proc.info['cmdline'] or []
+            if nome and ('uvicorn' in nome.lower() or any('uvicorn' in c for c in cmdline)):
+                total += 1
+        except Exception:
+            continue
+    return total
+
+
+def _ip(hostname: str) -> str:
+    try:
+        return socket.gethostbyname(hostname)
+    except Exception:
+        return "?"
+
+
+class AmostraSistema:
+    """Última amostra do host e do worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.dados: Optional[dict] = None
+        self._amostrado_em: Optional[float] = None
+        self._processo = None
+        # Atraso do event loop medido pela tarefa de amostragem (segundos)
+        self.atraso_event_loop = 0.0
+
+    def amostrar(self, engine: Engine) -> dict:
+        # psutil só é carregado na primeira amostra (não pesa na inicialização)
+        import psutil
+
+        if self._processo is None:
+            self._processo = psutil.Process(os.getpid())
+            # A primeira leitura de CPU de um processo é sempre 0
+            self._processo.cpu_percent(None)
+        hostname = socket.gethostname()
+        with self._processo.oneshot():
+            worker = {
+                "pid": self._processo.pid,
+                "rss_bytes": self._processo.memory_info().rss,
+                "cpu_percent": self._processo.cpu_percent(None),
+                "threads": self._processo.num_threads(),
+            }
+        worker["db_connections"] = {estado: int(valor) for (estado,), valor in pool_stats(engine).items()}
+        worker["event_loop_lag_ms"] = round(self.atraso_event_loop * 1000, 2)
+
+        dados = {
+            "db_status": "ok" if prontidao.atual(engine)["database"] == "connected" else "erro",
+            "hostname": hostname,
+            "ip": _ip(hostname),
+            "server_count": _contar_servidores(psutil),
+            "worker": worker,
+            "atualizado_em": get_local_now().isoformat(),
+        }
+        with self._lock:
+            self.dados = dados
+            self._amostrado_em = time.monotonic()
+        return dados
+
+    def atual(self, engine: Engine) -> dict:
+        """Amostra em cache; amostra na hora se não houver uma recente"""
+        validade = 3 * settings.STATUS_REFRESH_SEGUNDOS
+        with self._lock:
+            dados, amostrado_em = self.dados, self._amostrado_em
+        if dados is None or time.monotonic() - amostrado_em > validade:
+            return self.amostrar(engine)
+        return dados
+
+    def _valor_worker(self, campo: str) -> dict:
+        dados = self.dados
+        return {(): dados["worker"][campo]} if dados else {}
+
+
+amostra_sistema = AmostraSistema()
+
+
+async def amostrar_periodicamente(engine: Engine, amostra: AmostraSistema = amostra_sistema) -> None:
+    """Tarefa do lifespan: nova amostra a cada STATUS_REFRESH_SEGUNDOS"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await run_in_threadpool(amostra.amostrar, engine)
+        intervalo = settings.STATUS_REFRESH_SEGUNDOS
+        inicio = loop.time()
+        await asyncio.sleep(intervalo)
+        amostra.atraso_event_loop = max(0.0, loop.time() - inicio - intervalo)
+
+
+registry.gauge_callback(
+    "process_resident_memory_bytes",
+    "Memória residente do worker (última amostra de /api/status/info)",
+    lambda: amostra_sistema._valor_worker("rss_bytes"),
+)
+registry.gauge_callback(
+    "process_cpu_percent",
+    "Uso de CPU do worker desde a amostra anterior",
+    lambda: amostra_sistema._valor_worker("cpu_percent"),
+)
+registry.gauge_callback(
+    "event_loop_lag_seconds",
+    "Atraso do event loop medido pela tarefa de amostragem",
+    lambda: {(): amostra_sistema.atraso_event_loop},
+)
@@ -0,0 +1,13 @@
+#!/bin/sh
+# ==============================================================================
+# ENTRYPOINT DO BACKEND
+# ==============================================================================
+# Migra o banco (Alembic) uma única vez, antes de iniciar os workers, e então
+# executa o comando do container (uvicorn por padrão).
+set -e
+
+if [ "${SKIP_DB_PREPARE:-0}" != "1" ]; then
+    python -m app.preparar_banco
+fi
+
+exec "$@"
@@ -0,0 +1,441 @@
+"""
+Teste de carga da API com um mix de tráfego parecido com o uso real do ERP
+
+Cada usuário virtual faz login em /api/auth/token e executa, em loop, tarefas
+sorteadas por peso: listagem e detalhe de projetos, visualização de
+cronogramas, CRUD de despesas, exportação de PDF e importação de Excel.
+Ao final é exibido, por endpoint, p50/p95/p99, média, erros e requisições
+por segundo.
+
+Uso:
+    # Popular o banco configurado (SQLite/PostgreSQL) e subir a API localmente
+    python load_test.py --popular 200 --iniciar-servidor --usuarios 20 --duracao 60
+
+    # Contra uma API já em execução
+    python load_test.py --url http://localhost:8000 --usuarios 50 --duracao 120
+
+    # Alterar o mix (nome=peso) e salvar o relatório
+    python load_test.py --mix projetos_listar=50,projeto_pdf=0 --json resultado.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import date
+from io import BytesIO
+from typing import Dict, List, Optional
+
+import httpx
+
+USUARIO_PADRAO = "loadtest"
+SENHA_PADRAO = "loadtest123"
+
+# Peso relativo de cada tarefa no mix de tráfego
+MIX_PADRAO = {
+    "projetos_listar": 30,
+    "projeto_detalhe": 10,
+    "cronogramas_listar": 15,
+    "cronograma_projeto": 10,
+    "despesas_listar": 10,
+    "despesa_crud": 15,
+    "projeto_pdf": 5,
+    "funcionarios_importar": 5,
+}
+
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil pelo método nearest-rank (valores já ordenados)"""
+    if not valores:
+        return 0.0
+    indice = max(0, min(len(valores) - 1, int(round(p / 100 * len(valores) + 0.5)) - 1))
+    return valores[indice]
+
+
+def parse_mix(texto: Optional[str]) -> Dict[str, int]:
+    """Converte "tarefa=peso,tarefa=peso" sobre o mix padrão"""
+    mix = dict(MIX_PADRAO)
+    if not texto:
+        return mix
+    for item in texto.split(","):
+        nome, _, peso = item.partition("=")
+        nome = nome.strip()
+        if nome not in MIX_PADRAO:
+            raise ValueError(f"Tarefa desconhecida: {nome}. Opções: {', '.join(MIX_PADRAO)}")
+        mix[nome] = int(peso)
+    return {nome: peso for nome, peso in mix.items() if peso > 0}
+
+
+class Estatisticas:
+    """Latências e status agrupados por endpoint"""
+
+    def __init__(self):
+        self.latencias: Dict[str, List[float]] = defaultdict(list)
+        self.erros: Dict[str, int] = defaultdict(int)
+
+    def registrar(self, endpoint: str, duracao: float, sucesso: bool):
+        self.latencias[endpoint].append(duracao)
+        if not sucesso:
+            self.erros[endpoint] += 1
+
+    def resumo(self, tempo_total: float) -> List[dict]:
+        linhas = []
+        for endpoint in sorted(self.latencias):
+            valores = sorted(self.latencias[endpoint])
+            linhas.append({
+                "endpoint": endpoint,
+                "requisicoes": len(valores),
+                "erros": self.erros[endpoint],
+                "p50_ms": percentil(valores, 50) * 1000,
+                "p95_ms": percentil(valores, 95) * 1000,
+                "p99_ms": percentil(valores, 99) * 1000,
+                "media_ms": sum(valores) / len(valores) * 1000,
+                "req_s": len(valores) / tempo_total if tempo_total else 0.0,
+            })
+        return linhas
+
+
+class UsuarioVirtual:
+    """Sessão autenticada que executa as tarefas do mix"""
+
+    def __init__(self, client: httpx.AsyncClient, stats: Estatisticas, dados: dict):
+        self.client = client
+        self.stats = stats
+        self.dados = dados
+        self.headers: Dict[str, str] = {}
+
+    async def requisicao(self, endpoint: str, metodo: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        inicio = time.perf_counter()
+        try:
+            response = await self.client.request(metodo, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError:
+            self.stats.registrar(endpoint, time.perf_counter() - inicio, False)
+            return None
+        self.stats.registrar(endpoint, time.perf_counter() - inicio, response.status_code < 400)
+        return response
+
+    async def login(self, username: str, password: str):
+        response = await self.requisicao(
+            "POST /api/auth/token", "POST", "/api/auth/token",
+            json={"username": username, "password": password},
+        )
+        if response is None or response.status_code != 200:
+            raise RuntimeError(f"Falha no login de '{username}'")
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def projetos_listar(self):
+        await self.requisicao("GET /api/projetos/", "GET", "/api/projetos/")
+
+    async def projeto_detalhe(self):
+        projeto_id = random.choice(self.dados["projetos"])
+        await self.requisicao("GET /api/projetos/{id}", "GET", f"/api/projetos/{projeto_id}")
+
+    async def cronogramas_listar(self):
+        await self.requisicao("GET /api/cronogramas/", "GET", "/api/cronogramas/")
+
+    async def cronograma_projeto(self):
+        projeto_id = random.choice(self.dados["projetos"])
+        await self.requisicao(
+            "GET /api/cronogramas/projeto/{id}", "GET", f"/api/cronogramas/projeto/{projeto_id}"
+        )
+
+    async def despesas_listar(self):
+        await self.requisicao("GET /api/despesas-projetos", "GET", "/api/despesas-projetos")
+
+    async def despesa_crud(self):
+        payload = {
+            "projeto_id": random.choice(self.dados["projetos"]),
+            "fornecedor_id": random.choice(self.dados["fornecedores"]),
+            "tecnico_responsavel_id": random.choice(self.dados["funcionarios"]),
+            "status": "Rascunho",
+            "data_pedido": date.today().isoformat(),
+            "observacoes": "Teste de carga",
+        }
+        response = await self.requisicao(
+            "POST /api/despesas-projetos", "POST", "/api/despesas-projetos", json=payload
+        )
+        if response is None or response.status_code != 200:
+            return
+        despesa_id = response.json()["id"]
+        await self.requisicao(
+            "GET /api/despesas-projetos/{id}", "GET", f"/api/despesas-projetos/{despesa_id}"
+        )
+        await self.requisicao(
+            "PUT /api/despesas-projetos/{id}", "PUT", f"/api/despesas-projetos/{despesa_id}",
+            json={"status": "Enviado"},
+        )
+        await self.requisicao(
+            "DELETE /api/despesas-projetos/{id}", "DELETE", f"/api/despesas-projetos/{despesa_id}"
+        )
+
+    async def projeto_pdf(self):
+        projeto_id = random.choice(self.dados["projetos"])
+        await self.requisicao(
+            "GET /api/projetos/{id}/export/pdf", "GET", f"/api/projetos/{projeto_id}/export/pdf"
+        )
+
+    async def funcionarios_importar(self):
+        await self.requisicao(
+            "POST /api/funcionarios/import/excel", "POST", "/api/funcionarios/import/excel",
+            files={"file": ("funcionarios.xlsx", planilha_funcionarios(20), XLSX)},
+        )
+
+
+def planilha_funcionarios(linhas: int) -> bytes:
+    """Planilha de importação com nomes únicos"""
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Nome", "Departamento", "Email"])
+    lote = uuid.uuid4().hex[:8]
+    for i in range(linhas):
+        ws.append([f"Carga {lote}-{i}", "Técnico", f"carga.{lote}.{i}@loadtest.local"])
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def popular_banco(quantidade: int, username: str, password: str):
+    """
+    Popula o banco configurado no .env com dados fake para o teste de carga.
+    Pode ser executado mais de uma vez: só cria o que ainda não existe.
+    """
+    from sqlalchemy.orm import sessionmaker
+
+    from app.database import Base, engine
+    from app.models.contato import Contato
+    from app.models.cronograma import Cronograma
+    from app.models.funcionario import Funcionario
+    from app.models.pessoa_juridica import PessoaJuridica
+    from app.models.projeto import Projeto, StatusProjeto
+    from app.models.user import User
+    from app.routes.auth import get_password_hash
+
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine, expire_on_commit=False)()
+
+    try:
+        if not session.query(User).filter(User.username == username).first():
+            session.add(User(
+                username=username,
+                email=f"{username}@loadtest.local",
+                hashed_password=get_password_hash(password),
+                role="admin",
+                is_active=True,
+            ))
+
+        siglas = {s for (s,) in session.query(PessoaJuridica.sigla)}
+        cnpjs = {c for (c,) in session.query(PessoaJuridica.cnpj)}
+        quantidade_empresas = max(1, quantidade // 10)
+        empresas = []
+        for i in range(quantidade_empresas * 2):
+            tipo = "Cliente" if i % 2 == 0 else "Fornecedor"
+            cnpj = f"99{i:012d}"
+            if cnpj in cnpjs:
+                continue
+            sigla = next(
+                s for s in (
+                    f"{chr(65 + (k // 676) % 26)}{chr(65 + (k // 26) % 26)}{chr(65 + k % 26)}"
+                    for k in range(i, 17576)
+                )
+                if s not in siglas
+            )
+            siglas.add(sigla)
+            empresas.append(PessoaJuridica(
+                razao_social=f"Carga {tipo} {i} Ltda", sigla=sigla, cnpj=cnpj, tipo=tipo
+            ))
+        session.add_all(empresas)
+        session.flush()
+
+        clientes = session.query(PessoaJuridica).filter(PessoaJuridica.razao_social.like("Carga Cliente %")).all()
+        if not session.query(Contato).filter(Contato.nome.like("Contato Carga %")).first():
+            session.add_all([
+                Contato(nome=f"Contato Carga {c.id}", pessoa_juridica_id=c.id) for c in clientes
+            ])
+        if not session.query(Funcionario).filter(Funcionario.nome.like("Técnico Carga %")).first():
+            session.add_all([Funcionario(nome=f"Técnico Carga {i}") for i in range(10)])
+        session.flush()
+
+        contatos = session.query(Contato).filter(Contato.nome.like("Contato Carga %")).all()
+        numeros = {n for (n,) in session.query(Projeto.numero).filter(Projeto.numero.like("LT%"))}
+        status = list(StatusProjeto)
+        novos = []
+        for i in range(quantidade):
+            numero = f"LT{i:06d}"
+            if numero in numeros:
+                continue
+            contato = contatos[i % len(contatos)]
+            novos.append(Projeto(
+                numero=numero,
+                cliente_id=contato.pessoa_juridica_id,
+                contato_id=contato.id,
+                nome=f"Projeto de carga {i}",
+                tecnico="Técnico Carga 0",
+                valor_orcado=10000,
+                valor_venda=15000,
+                prazo_entrega_dias=30,
+                status=status[i % len(status)],
+            ))
+        session.add_all(novos)
+        session.flush()
+        session.add_all([
+            Cronograma(projeto_id=p.id, percentual_conclusao=random.randint(0, 100))
+            for p in novos if p.status == StatusProjeto.EM_EXECUCAO
+        ])
+        session.commit()
+        print(f"✓ Banco populado: {len(empresas)} empresas e {len(novos)} projetos novos")
+    finally:
+        session.close()
+
+
+async def carregar_dados(client: httpx.AsyncClient, headers: Dict[str, str]) -> dict:
+    """IDs existentes usados para montar as requisições"""
+    projetos = (await client.get("/api/projetos/", headers=headers)).json()
+    empresas = (await client.get("/api/pessoas-juridicas/", params={"limit": 1000})).json()
+    funcionarios = (await client.get("/api/funcionarios/", headers=headers)).json()
+    dados = {
+        "projetos": [p["id"] for p in projetos],
+        "fornecedores": [e["id"] for e in empresas if e.get("tipo") == "Fornecedor"] or [e["id"] for e in empresas],
+        "funcionarios": [f["id"] for f in funcionarios],
+    }
+    faltando = [nome for nome, ids in dados.items() if not ids]
+    if faltando:
+        raise RuntimeError(f"Sem dados para o teste ({', '.join(faltando)}). Use --popular N.")
+    return dados
+
+
+async def executar_usuario(
+    client: httpx.AsyncClient,
+    stats: Estatisticas,
+    dados: dict,
+    mix: Dict[str, int],
+    args,
+    fim: float,
+):
+    usuario = UsuarioVirtual(client, stats, dados)
+    await usuario.login(args.username, args.password)
+    tarefas, pesos = list(mix), list(mix.values())
+    while time.perf_counter() < fim:
+        tarefa = random.choices(tarefas, weights=pesos)[0]
+        await getattr(usuario, tarefa)()
+        if args.espera:
+            await asyncio.sleep(random.uniform(0, args.espera))
+
+
+async def executar(args) -> dict:
+    mix = parse_mix(args.mix)
+    stats = Estatisticas()
+    limites = httpx.Limits(max_connections=args.usuarios, max_keepalive_connections=args.usuarios)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limites) as client:
+        preparacao = UsuarioVirtual(client, Estatisticas(), {})
+        await preparacao.login(args.username, args.password)
+        dados = await carregar_dados(client, preparacao.headers)
+
+        print(f"▶ {args.usuarios} usuários por {args.duracao}s contra {args.url}")
+        print(f"  Mix: {', '.join(f'{k}={v}' for k, v in mix.items())}")
+        inicio = time.perf_counter()
+        fim = inicio + args.duracao
+        usuarios = []
+        for _ in range(args.usuarios):
+            usuarios.append(asyncio.create_task(executar_usuario(client, stats, dados, mix, args, fim)))
+            if args.rampa:
+                await asyncio.sleep(args.rampa / args.usuarios)
+        await asyncio.gather(*usuarios)
+        tempo_total = time.perf_counter() - inicio
+
+    linhas = stats.resumo(tempo_total)
+    total = sum(linha["requisicoes"] for linha in linhas)
+    return {
+        "url": args.url,
+        "usuarios": args.usuarios,
+        "duracao_s": tempo_total,
+        "total_requisicoes": total,
+        "total_erros": sum(linha["erros"] for linha in linhas),
+        "req_s": total / tempo_total if tempo_total else 0.0,
+        "endpoints": linhas,
+    }
+
+
+def imprimir_relatorio(resultado: dict):
+    print()
+    print(f"{'Endpoint':<42}{'Req':>7}{'Erros':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'Média':>9}{'req/s':>8}")
+    print("-" * 100)
+    for linha in resultado["endpoints"]:
+        print(
+            f"{linha['endpoint']:<42}{linha['requisicoes']:>7}{linha['erros']:>7}"
+            f"{linha['p50_ms']:>9.1f}{linha['p95_ms']:>9.1f}{linha['p99_ms']:>9.1f}{linha['media_ms']:>9.1f}{linha['req_s']:>8.1f}"
+        )
+    print("-" * 100)
+    print(
+        f"Total: {resultado['total_requisicoes']} requisições, {resultado['total_erros']} erros, "
+        f"{resultado['req_s']:.1f} req/s em {resultado['duracao_s']:.1f}s"
+    )
+
+
+def iniciar_servidor(url: str, workers: int) -> subprocess.Popen:
+    """Sobe a API com uvicorn e aguarda o /health responder"""
+    porta = httpx.URL(url).port or 8000
+    processo = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(porta),
+        "--workers", str(workers), "--log-level", "warning",
+    ])
+    limite = time.time() + 60
+    while time.time() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError("O servidor encerrou durante a inicialização")
+        try:
+            if httpx.get(f"{url}/health", timeout=2).status_code == 200:
+                return processo
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    processo.terminate()
+    raise RuntimeError("Timeout aguardando o servidor iniciar")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga da API do ERP")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="URL base da API")
+    parser.add_argument("--usuarios", type=int, default=10, help="Usuários virtuais simultâneos")
+    parser.add_argument("--duracao", type=float, default=30, help="Duração do teste em segundos")
+    parser.add_argument("--rampa", type=float, default=0, help="Segundos para iniciar todos os usuários")
+    parser.add_argument("--espera", type=float, default=0, help="Pausa máxima entre tarefas (segundos)")
+    parser.add_argument("--timeout", type=float, default=60, help="Timeout por requisição (segundos)")
+    parser.add_argument("--mix", help="Pesos das tarefas, ex.: projetos_listar=50,projeto_pdf=0")
+    parser.add_argument("--username", default=USUARIO_PADRAO)
+    parser.add_argument("--password", default=SENHA_PADRAO)
+    parser.add_argument("--popular", type=int, metavar="N", help="Popular o banco com N projetos antes do teste")
+    parser.add_argument("--iniciar-servidor", action="store_true", help="Subir a API localmente com uvicorn")
+    parser.add_argument("--workers", type=int, default=1, help="Workers do uvicorn (com --iniciar-servidor)")
+    parser.add_argument("--json", help="Salvar o relatório em JSON neste arquivo")
+    args = parser.parse_args(argv)
+
+    if args.popular:
+        popular_banco(args.popular, args.username, args.password)
+
+    servidor = iniciar_servidor(args.url, args.workers) if args.iniciar_servidor else None
+    try:
+        resultado = asyncio.run(executar(args))
+    finally:
+        if servidor:
+            servidor.terminate()
+            servidor.wait(timeout=30)
+
+    imprimir_relatorio(resultado)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+        print(f"✓ Relatório salvo em {args.json}")
+    return 1 if resultado["total_erros"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,4 +8,8 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 import uvicorn
 
 if __name__ == "__main__":
+    # Migra o banco uma vez, antes do servidor (e dos reloads)
+    from app.preparar_banco import preparar_banco
+
+    preparar_banco()
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
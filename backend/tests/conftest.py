@@ -8,33 +8,95 @@ from pathlib import Path
 # Adicionar o diretório raiz ao path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from contextlib import contextmanager
+
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.autocomplete_service import autocomplete
+from app.cache_service import cache_respostas
 from app.database import Base, get_db
+from app.db_instrumentation import QueryCounter, instrument_engine
+from app.models.user import User
+from app.routes.auth import create_access_token, get_password_hash
 
-# Banco de dados de teste em memória
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+# Banco em memória compartilhado entre as conexões do processo (cache=shared),
+# um por worker do pytest-xdist (PYTEST_XDIST_WORKER = gw0, gw1, ...)
+WORKER = os.environ.get("PYTEST_XDIST_WORKER", "master")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///file:erp_testes_{WORKER}?mode=memory&cache=shared&uri=true"
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=QueuePool
+)
+instrument_engine(engine)
+
+
+# O pysqlite abre e fecha transações por conta própria e não respeita SAVEPOINT;
+# o SQLAlchemy passa a emitir o BEGIN (receita da documentação do dialeto)
+@event.listens_for(engine, "connect")
+def _sem_transacao_implicita(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine, "begin")
+def _begin(conn):
+    # Direto no driver, fora dos eventos que contam queries
+    conn.connection.dbapi_connection.execute("BEGIN")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def banco_de_testes():
+    """
+    Cria o schema uma vez por sessão (por worker). A conexão fica aberta até o
+    fim: o banco em memória deixa de existir quando a última conexão fecha.
+    """
+    with engine.connect() as conexao:
+        Base.metadata.create_all(bind=conexao)
+        conexao.commit()
+        yield
+    engine.dispose()
+
+
+@pytest.fixture
+def db_engine():
+    """Engine do banco de testes"""
+    return engine
+
+
+@pytest.fixture
+def db_connection():
+    """
+    Conexão do teste, dentro de uma transação desfeita no final. As sessões
+    ligadas a ela trabalham em SAVEPOINTs: commit e rollback delas não saem da
+    transação do teste.
+    """
+    with engine.connect() as conexao:
+        transacao = conexao.begin()
+        try:
+            yield conexao
+        finally:
+            transacao.rollback()
+            autocomplete.limpar()
+            cache_respostas.limpar()
+
+
+TestingSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, join_transaction_mode="create_savepoint"
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
 @pytest.fixture(scope="function")
-def db_session():
+def db_session(db_connection):
     """Cria uma sessão de banco de dados para testes"""
-    Base.metadata.create_all(bind=engine)
-    db = TestingSessionLocal()
+    db = TestingSessionLocal(bind=db_connection)
     try:
         yield db
     finally:
         db.close()
-        Base.metadata.drop_all(bind=engine)
 
 
 @pytest.fixture(scope="function")
@@ -48,10 +110,57 @@ def client(db_session):
     
     app.dependency_overrides[get_db] = override_get_db
     with TestClient(app) as test_client:
+        # O lifespan carrega o autocompletar do banco da aplicação, não do de testes
+        autocomplete.limpar()
         yield test_client
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def seed_session(db_connection, db_session):
+    """Sessão própria para popular o banco, sem expirar os objetos no commit"""
+    session = TestingSessionLocal(bind=db_connection, expire_on_commit=False)
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope="session")
+def hash_senha_benchmark():
+    """Hash da senha de auth_headers, calculado uma vez (o hash é lento de propósito)"""
+    return get_password_hash("benchmark123")
+
+
+@pytest.fixture
+def auth_headers(seed_session, hash_senha_benchmark):
+    """Cabeçalho Authorization de um usuário ativo (username "benchmark")"""
+    seed_session.add(User(
+        username="benchmark",
+        email="benchmark@test.com",
+        hashed_password=hash_senha_benchmark,
+        is_active=True,
+    ))
+    seed_session.commit()
+    token = create_access_token(data={"sub": "benchmark"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def admin_headers(seed_session, hash_senha_benchmark):
+    """Cabeçalho Authorization de um usuário com role "admin" (rotas de manutenção)"""
+    seed_session.add(User(
+        username="admin_benchmark",
+        email="admin_benchmark@test.com",
+        hashed_password=hash_senha_benchmark,
+        is_active=True,
+        role="admin",
+    ))
+    seed_session.commit()
+    token = create_access_token(data={"sub": "admin_benchmark"})
+    return {"Authorization": f"Bearer {token}"}
+
+
 @pytest.fixture
 def test_user_data():
     """Dados de usuário para testes"""
@@ -74,3 +183,25 @@ def test_admin_data():
         "is_active": True,
         "is_admin": True
     }
+
+
+@pytest.fixture
+def assert_max_queries():
+    """
+    Verifica o orçamento de queries de um bloco de código
+
+    Uso:
+        with assert_max_queries(3):
+            client.get("/api/projetos/")
+    """
+    @contextmanager
+    def _assert_max_queries(limite: int):
+        with QueryCounter(engine) as counter:
+            yield counter
+        if counter.count > limite:
+            comandos = "\n".join(f"  {i + 1}. {s}" for i, s in enumerate(counter.statements))
+            pytest.fail(
+                f"Esperado no máximo {limite} queries, executadas {counter.count}:\n{comandos}"
+            )
+
+    return _assert_max_queries
@@ -0,0 +1,184 @@
+"""
+Fábricas de dados fake para os testes, no estilo do seed_fake_data.py
+
+Cada função insere `n` registros de uma vez (add_all + commit) e devolve a
+lista criada. O parâmetro `inicio` permite chamar a mesma fábrica várias
+vezes no mesmo banco sem violar as colunas únicas (sigla, CNPJ, número).
+
+Use uma sessão com expire_on_commit=False: assim os IDs continuam acessíveis
+depois do commit sem um SELECT por objeto.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from io import BytesIO
+from string import ascii_uppercase
+from typing import List, Optional, Sequence
+
+from openpyxl import Workbook
+
+from app.models.contato import Contato
+from app.models.cronograma import Cronograma
+from app.models.despesa_projeto import DespesaProjeto, StatusDespesa
+from app.models.faturamento import Faturamento
+from app.models.funcionario import Funcionario
+from app.models.pessoa_juridica import PessoaJuridica
+from app.models.produto_servico import (
+    ProdutoServico,
+    ProdutoServicoFornecedor,
+    TipoProdutoServico,
+)
+from app.models.projeto import Projeto, StatusProjeto
+
+
+def gerar_sigla(indice: int) -> str:
+    """Sigla única de 3 letras (AAA, AAB, ...)"""
+    letras = []
+    for _ in range(3):
+        indice, resto = divmod(indice, 26)
+        letras.append(ascii_uppercase[resto])
+    return "".join(reversed(letras))
+
+
+def _salvar(db, objetos: list) -> list:
+    db.add_all(objetos)
+    db.commit()
+    return objetos
+
+
+def criar_pessoas_juridicas(db, n: int, inicio: int = 0, tipo: str = "Cliente") -> List[PessoaJuridica]:
+    return _salvar(db, [
+        PessoaJuridica(
+            razao_social=f"Empresa Fake {i} Ltda",
+            nome_fantasia=f"Empresa Fake {i}",
+            sigla=gerar_sigla(i),
+            tipo=tipo,
+            cnpj=f"{i:014d}",
+            cidade="Curitiba",
+            estado="PR",
+            pais="Brasil",
+        )
+        for i in range(inicio, inicio + n)
+    ])
+
+
+def criar_contatos(db, n: int, pessoas: Sequence[PessoaJuridica], inicio: int = 0) -> List[Contato]:
+    return _salvar(db, [
+        Contato(
+            nome=f"Contato Fake {i}",
+            email=f"contato{i}@fake.com",
+            pessoa_juridica_id=pessoas[i % len(pessoas)].id,
+        )
+        for i in range(inicio, inicio + n)
+    ])
+
+
+def criar_funcionarios(db, n: int, inicio: int = 0) -> List[Funcionario]:
+    return _salvar(db, [
+        Funcionario(nome=f"Funcionário Fake {i}", departamento="Técnico", email=f"func{i}@fake.com")
+        for i in range(inicio, inicio + n)
+    ])
+
+
+def criar_projetos(
+    db,
+    n: int,
+    contatos: Sequence[Contato],
+    inicio: int = 0,
+    status: StatusProjeto = StatusProjeto.EM_EXECUCAO,
+) -> List[Projeto]:
+    return _salvar(db, [
+        Projeto(
+            numero=f"PRJ-{i:05d}",
+            cliente_id=contatos[i % len(contatos)].pessoa_juridica_id,
+            contato_id=contatos[i % len(contatos)].id,
+            nome=f"Projeto Fake {i}",
+            tecnico="Técnico Fake",
+            valor_orcado=Decimal("1000.00"),
+            valor_venda=Decimal("1500.00"),
+            prazo_entrega_dias=30,
+            data_pedido_compra=datetime(2026, 1, 1),
+            status=status,
+        )
+        for i in range(inicio, inicio + n)
+    ])
+
+
+def criar_cronogramas(db, projetos: Sequence[Projeto]) -> List[Cronograma]:
+    return _salvar(db, [
+        Cronograma(projeto_id=projeto.id, percentual_conclusao=Decimal("50.00"))
+        for projeto in projetos
+    ])
+
+
+def criar_faturamentos(
+    db, n: int, projetos: Sequence[Projeto], funcionarios: Sequence[Funcionario]
+) -> List[Faturamento]:
+    return _salvar(db, [
+        Faturamento(
+            projeto_id=projetos[i % len(projetos)].id,
+            tecnico_id=funcionarios[i % len(funcionarios)].id,
+            valor_faturado=Decimal("100.00"),
+            observacoes=f"Faturamento fake {i}",
+        )
+        for i in range(n)
+    ])
+
+
+def criar_produtos(
+    db, n: int, fornecedores: Sequence[PessoaJuridica], inicio: int = 0
+) -> List[ProdutoServico]:
+    produtos = _salvar(db, [
+        ProdutoServico(
+            codigo_interno=f"{i + 1:08d}",
+            tipo=TipoProdutoServico.PRODUTO,
+            unidade_medida="un",
+            descricao=f"Produto Fake {i}",
+            preco_unitario=Decimal("100.00"),
+        )
+        for i in range(inicio, inicio + n)
+    ])
+    _salvar(db, [
+        ProdutoServicoFornecedor(
+            produto_servico_id=produto.id,
+            fornecedor_id=fornecedores[i % len(fornecedores)].id,
+            codigo_fornecedor=f"F{i}",
+            preco_unitario=Decimal("90.00"),
+        )
+        for i, produto in enumerate(produtos, start=inicio)
+    ])
+    return produtos
+
+
+def criar_despesas(
+    db,
+    n: int,
+    projetos: Sequence[Projeto],
+    fornecedores: Sequence[PessoaJuridica],
+    funcionarios: Sequence[Funcionario],
+    inicio: int = 0,
+) -> List[DespesaProjeto]:
+    return _salvar(db, [
+        DespesaProjeto(
+            numero_despesa=f"PC{i:05d}",
+            projeto_id=projetos[i % len(projetos)].id,
+            fornecedor_id=fornecedores[i % len(fornecedores)].id,
+            tecnico_responsavel_id=funcionarios[i % len(funcionarios)].id,
+            status=StatusDespesa.RASCUNHO,
+            data_pedido=date(2026, 1, 1),
+        )
+        for i in range(inicio, inicio + n)
+    ])
+
+
+def planilha_excel(headers: Sequence[str], linhas: Sequence[Sequence], titulo: Optional[str] = None) -> bytes:
+    """Monta um arquivo .xlsx em memória para os endpoints de importação"""
+    wb = Workbook()
+    ws = wb.active
+    if titulo:
+        ws.title = titulo
+    ws.append(list(headers))
+    for linha in linhas:
+        ws.append(list(linha))
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
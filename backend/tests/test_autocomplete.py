@@ -0,0 +1,183 @@
+"""
+Testes do autocompletar por prefixo (/api/autocomplete/{catalogo})
+"""
+import threading
+import time
+
+import pytest
+from app.autocomplete_service import CATALOGOS, Autocomplete, IndicePrefixos, _chaves
+from tests import factories
+
+
+@pytest.fixture
+def dados(seed_session):
+    pessoas = factories.criar_pessoas_juridicas(seed_session, 3)
+    pessoas[0].razao_social = "Automação Paraná Ltda"
+    fornecedores = factories.criar_pessoas_juridicas(seed_session, 1, inicio=3, tipo="Fornecedor")
+    contatos = factories.criar_contatos(seed_session, 4, pessoas[:2])
+    funcionarios = factories.criar_funcionarios(seed_session, 2)
+    produtos = factories.criar_produtos(seed_session, 2, fornecedores)
+    produtos[0].descricao = "Inversor de frequência 5CV"
+    seed_session.commit()
+    return {
+        "pessoas": pessoas, "fornecedores": fornecedores, "contatos": contatos,
+        "funcionarios": funcionarios, "produtos": produtos,
+    }
+
+
+def _sugerir(client, auth_headers, catalogo, q, **params):
+    response = client.get(f"/api/autocomplete/{catalogo}", params={"q": q, **params}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    return [item["id"] for item in response.json()]
+
+
+class TestAutocompletar:
+    """Testes do endpoint GET /api/autocomplete/{catalogo}"""
+
+    def test_prefixo_de_qualquer_palavra_sem_acento(self, client, auth_headers, dados):
+        pessoa_id = dados["pessoas"][0].id
+        assert _sugerir(client, auth_headers, "clientes", "autom") == [pessoa_id]
+        assert _sugerir(client, auth_headers, "clientes", "parana") == [pessoa_id]
+
+    def test_clientes_e_fornecedores_separados(self, client, auth_headers, dados):
+        clientes = _sugerir(client, auth_headers, "clientes", "empresa")
+        assert clientes == [p.id for p in dados["pessoas"]]
+        assert _sugerir(client, auth_headers, "fornecedores", "empresa") == [dados["fornecedores"][0].id]
+
+    def test_contatos_por_cliente(self, client, auth_headers, dados):
+        cliente_id = dados["pessoas"][1].id
+        ids = _sugerir(client, auth_headers, "contatos", "contato", cliente_id=cliente_id)
+        assert ids == [c.id for c in dados["contatos"] if c.pessoa_juridica_id == cliente_id]
+
+    def test_produtos_e_funcionarios(self, client, auth_headers, dados):
+        assert _sugerir(client, auth_headers, "produtos", "inv") == [dados["produtos"][0].id]
+        assert _sugerir(client, auth_headers, "produtos", "00000002") == [dados["produtos"][1].id]
+        assert _sugerir(client, auth_headers, "funcionarios", "func1@") == [dados["funcionarios"][1].id]
+
+    def test_limite(self, client, auth_headers, dados):
+        assert len(_sugerir(client, auth_headers, "contatos", "", limite=2)) == 2
+
+    def test_catalogo_invalido(self, client, auth_headers):
+        response = client.get("/api/autocomplete/outro", params={"q": "x"}, headers=auth_headers)
+        assert response.status_code == 404
+
+    def test_requer_autenticacao(self, client):
+        assert client.get("/api/autocomplete/clientes", params={"q": "x"}).status_code == 401
+
+
+class TestAtualizacaoIncremental:
+    """O catálogo em memória acompanha as escritas sem ser recarregado"""
+
+    def test_commit_altera_e_remove(self, client, auth_headers, dados, seed_session):
+        _sugerir(client, auth_headers, "clientes", "")
+        pessoa = dados["pessoas"][1]
+        pessoa.razao_social = "Zeladoria Quintana"
+        seed_session.commit()
+        assert _sugerir(client, auth_headers, "clientes", "zelad") == [pessoa.id]
+
+        pessoa.tipo = "Fornecedor"
+        seed_session.commit()
+        assert _sugerir(client, auth_headers, "clientes", "zelad") == []
+        assert _sugerir(client, auth_headers, "fornecedores", "zelad") == [pessoa.id]
+
+    def test_rollback_descartado(self, client, auth_headers, dados, seed_session):
+        _sugerir(client, auth_headers, "funcionarios", "")
+        funcionario = dados["funcionarios"][0]
+        funcionario.nome = "Teodoro Descartado"
+        seed_session.flush()
+        seed_session.rollback()
+        assert _sugerir(client, auth_headers, "funcionarios", "teodoro") == []
+
+    def test_cadastro_pela_api(self, client, auth_headers, dados):
+        _sugerir(client, auth_headers, "contatos", "")
+        response = client.post("/api/contatos/", json={
+            "nome": "Herculano Bittencourt", "pessoa_juridica_id": dados["pessoas"][0].id,
+        }, headers=auth_headers)
+        assert response.status_code in (200, 201), response.text
+        assert _sugerir(client, auth_headers, "contatos", "hercul") == [response.json()["id"]]
+
+    def test_importacao_em_lote(self, client, auth_headers, dados):
+        """Contatos inseridos em lote pela importação também entram no catálogo"""
+        _sugerir(client, auth_headers, "contatos", "")
+        conteudo = factories.planilha_excel(
+            ["ID", "Nome", "Empresa", "Email", "Telefone", "Celular"],
+            [["", "Leocádia Importada", dados["pessoas"][1].razao_social, "l@i.com", "", ""]],
+        )
+        response = client.post(
+            "/api/contatos/import/excel", files={"file": ("contatos.xlsx", conteudo)}, headers=auth_headers
+        )
+        assert response.status_code == 200, response.text
+        assert len(_sugerir(client, auth_headers, "contatos", "leocadia")) == 1
+
+
+class TestRecarga:
+    """A recarga monta o índice fora do lock: buscas e commits não esperam por ela"""
+
+    def _autocomplete(self, liberar: threading.Event):
+        autocomplete = Autocomplete(CATALOGOS)
+        autocomplete.carregamentos = 0
+
+        def carregar(db, nome):
+            autocomplete.carregamentos += 1
+            indice = IndicePrefixos()
+            indice.carregar([(1, _chaves(["Cliente Antigo"]), {"id": 1}, None)])
+            if autocomplete.carregamentos > 1:
+                assert liberar.wait(5)
+                indice.adicionar(2, _chaves(["Cliente Relido"]), {"id": 2})
+            return indice
+
+        autocomplete._carregar = carregar
+        autocomplete.recarregar(None, "clientes")
+        return autocomplete
+
+    def test_busca_e_commit_durante_a_recarga(self):
+        liberar = threading.Event()
+        autocomplete = self._autocomplete(liberar)
+        recarga = threading.Thread(target=autocomplete.recarregar, args=(None, "clientes"))
+        recarga.start()
+        while autocomplete.carregamentos < 2:
+            time.sleep(0.001)
+
+        # A recarga está parada no meio; a busca usa o índice atual e o commit não espera
+        assert [r["id"] for r in autocomplete.buscar(None, "clientes", "cliente")] == [1]
+        autocomplete.aplicar([("clientes", 3, (3, _chaves(["Cliente Novo"]), {"id": 3}, None))])
+        assert [r["id"] for r in autocomplete.buscar(None, "clientes", "novo")] == [3]
+        assert autocomplete.recarregar(None, "clientes", esperar=False) is None
+
+        liberar.set()
+        recarga.join(5)
+        # O commit feito durante a recarga continua no índice novo
+        assert [r["id"] for r in autocomplete.buscar(None, "clientes", "cliente")] == [1, 3, 2]
+        assert autocomplete.carregamentos == 2
+
+    def test_recarga_por_tempo(self, monkeypatch):
+        liberar = threading.Event()
+        liberar.set()
+        autocomplete = self._autocomplete(liberar)
+        monkeypatch.setattr("app.autocomplete_service.settings.AUTOCOMPLETE_REFRESH_SEGUNDOS", 0)
+        autocomplete._carregado_em["clientes"] -= 1
+        assert [r["id"] for r in autocomplete.buscar(None, "clientes", "relido")] == [2]
+
+
+@pytest.mark.benchmark
+class TestDesempenho:
+    """A busca no catálogo não depende do número de registros"""
+
+    def test_50_mil_clientes(self):
+        indice = IndicePrefixos()
+        indice.carregar(
+            (i, _chaves([f"Cliente Industrial {i}"]), {"id": i}, None) for i in range(50_000)
+        )
+
+        duracoes = []
+        for _ in range(21):
+            inicio = time.perf_counter()
+            resultados = indice.buscar("industrial 4242", 10)
+            duracoes.append(time.perf_counter() - inicio)
+        assert [r["id"] for r in resultados] == [4242] + list(range(42420, 42429))
+        assert sorted(duracoes)[10] < 0.001, f"mediana de {sorted(duracoes)[10] * 1000:.2f} ms"
+
+        inicio = time.perf_counter()
+        indice.adicionar(50_000, _chaves(["Cliente Novo"]), {"id": 50_000})
+        assert time.perf_counter() - inicio < 0.01
+        assert [r["id"] for r in indice.buscar("novo", 10)] == [50_000]
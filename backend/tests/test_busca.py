@@ -0,0 +1,171 @@
+"""
+Testes da busca textual (/api/search) e da manutenção do índice
+"""
+import time
+
+import pytest
+from sqlalchemy import insert
+
+from app import busca_service
+from app.models.contato import Contato
+from app.models.pessoa_juridica import PessoaJuridica
+from tests import factories
+
+
+@pytest.fixture
+def dados(seed_session):
+    """Empresas, contatos, projetos e produtos indexados pelos eventos do ORM"""
+    pessoas = factories.criar_pessoas_juridicas(seed_session, 3)
+    pessoas[0].razao_social = "Automação Paraná Ltda"
+    pessoas[0].nome_fantasia = "AutoPR"
+    pessoas[0].cnpj = "12.345.678/0001-90"
+    contatos = factories.criar_contatos(seed_session, 3, pessoas)
+    projetos = factories.criar_projetos(seed_session, 3, contatos)
+    projetos[1].nome = "Retrofit da linha de envase"
+    produtos = factories.criar_produtos(seed_session, 2, pessoas)
+    produtos[0].descricao = "Inversor de frequência 5CV"
+    seed_session.commit()
+    return {"pessoas": pessoas, "contatos": contatos, "projetos": projetos, "produtos": produtos}
+
+
+def _buscar(client, auth_headers, q, **params):
+    response = client.get("/api/search", params={"q": q, **params}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    return response.json()["resultados"]
+
+
+def _ids(resultados, tipo):
+    return [r["id"] for r in resultados if r["tipo"] == tipo]
+
+
+class TestBusca:
+    """Testes do endpoint GET /api/search"""
+
+    def test_sem_acentos_e_por_prefixo(self, client, auth_headers, dados):
+        """Termos parciais e sem acento encontram o registro"""
+        resultados = _buscar(client, auth_headers, "automacao paran")
+        assert _ids(resultados, "pessoa_juridica") == [dados["pessoas"][0].id]
+        assert resultados[0]["titulo"] == "AutoPR"
+
+    def test_cnpj_com_e_sem_pontuacao(self, client, auth_headers, dados):
+        pessoa_id = dados["pessoas"][0].id
+        assert _ids(_buscar(client, auth_headers, "12.345.678/0001-90"), "pessoa_juridica") == [pessoa_id]
+        assert _ids(_buscar(client, auth_headers, "12345678"), "pessoa_juridica") == [pessoa_id]
+
+    def test_entidades(self, client, auth_headers, dados):
+        """Projetos por número/nome, contatos por e-mail e produtos por descrição"""
+        projeto = dados["projetos"][1]
+        assert _ids(_buscar(client, auth_headers, "envase"), "projeto") == [projeto.id]
+        assert _ids(_buscar(client, auth_headers, projeto.numero), "projeto") == [projeto.id]
+        assert _ids(_buscar(client, auth_headers, "contato2@fake"), "contato") == [dados["contatos"][2].id]
+        assert _ids(_buscar(client, auth_headers, "inversor"), "produto_servico") == [dados["produtos"][0].id]
+
+    def test_filtro_por_tipo(self, client, auth_headers, dados):
+        resultados = _buscar(client, auth_headers, "fake", tipos="contato")
+        assert resultados and {r["tipo"] for r in resultados} == {"contato"}
+
+    def test_ordenado_por_relevancia(self, client, auth_headers, dados):
+        """Resultados vêm da maior para a menor pontuação"""
+        resultados = _buscar(client, auth_headers, "fake")
+        pontuacoes = [r["pontuacao"] for r in resultados]
+        assert pontuacoes == sorted(pontuacoes, reverse=True)
+
+    def test_limite(self, client, auth_headers, dados):
+        assert len(_buscar(client, auth_headers, "fake", limite=2)) == 2
+
+    def test_consulta_sem_termos(self, client, auth_headers, dados):
+        """Só pontuação não gera erro de sintaxe no índice"""
+        assert _buscar(client, auth_headers, '"*-') == []
+
+    def test_tipo_invalido(self, client, auth_headers):
+        response = client.get("/api/search", params={"q": "x", "tipos": "outro"}, headers=auth_headers)
+        assert response.status_code == 400
+
+    def test_requer_autenticacao(self, client):
+        assert client.get("/api/search", params={"q": "x"}).status_code == 401
+
+
+class TestManutencaoIndice:
+    """O índice acompanha as escritas"""
+
+    def test_alteracao_e_exclusao(self, client, auth_headers, dados, seed_session):
+        """Alterações pelo ORM reindexam e exclusões removem do índice"""
+        contato = dados["contatos"][0]
+        contato.nome = "Genoveva Quintana"
+        seed_session.commit()
+        assert _ids(_buscar(client, auth_headers, "genoveva"), "contato") == [contato.id]
+
+        seed_session.delete(contato)
+        seed_session.commit()
+        assert _buscar(client, auth_headers, "genoveva") == []
+
+    def test_alteracao_pela_api(self, client, auth_headers, dados):
+        projeto = dados["projetos"][0]
+        response = client.put(
+            f"/api/projetos/{projeto.id}", json={"nome": "Subestação Norte"}, headers=auth_headers
+        )
+        assert response.status_code == 200
+        assert _ids(_buscar(client, auth_headers, "subestacao"), "projeto") == [projeto.id]
+
+    def test_insercao_em_lote(self, client, auth_headers, dados):
+        """Contatos importados com insert() em lote também são indexados"""
+        conteudo = factories.planilha_excel(
+            ["ID", "Nome", "Empresa", "Email", "Telefone", "Celular"],
+            [["", "Herculano Bittencourt", dados["pessoas"][1].razao_social, "h@b.com", "", ""]],
+        )
+        response = client.post(
+            "/api/contatos/import/excel",
+            files={"file": ("contatos.xlsx", conteudo)},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200, response.text
+        assert len(_ids(_buscar(client, auth_headers, "herculano"), "contato")) == 1
+
+    def test_reindexar(self, client, auth_headers, admin_headers, dados, seed_session):
+        """Registros gravados sem passar pelo ORM entram ao reconstruir o índice"""
+        seed_session.execute(insert(Contato), [{
+            "nome": "Zulmira Sem Indice", "pessoa_juridica_id": dados["pessoas"][0].id, "email": "z@z.com",
+        }])
+        seed_session.commit()
+        assert _buscar(client, auth_headers, "zulmira") == []
+
+        response = client.post("/api/search/reindexar", headers=admin_headers)
+        assert response.status_code == 200
+        assert response.json()["total_indexados"] == 3 + 4 + 3 + 2
+        assert len(_buscar(client, auth_headers, "zulmira")) == 1
+
+    def test_reindexar_apenas_admin(self, client, auth_headers, db_session):
+        assert client.post("/api/search/reindexar", headers=auth_headers).status_code == 403
+
+
+@pytest.mark.benchmark
+class TestDesempenho:
+    """A consulta usa o índice e não depende do tamanho das tabelas"""
+
+    def test_busca_seletiva_em_50_mil_registros(self, seed_session):
+        # A sigla de 3 letras limita as empresas; o restante são contatos
+        seed_session.execute(insert(PessoaJuridica), [
+            {
+                "razao_social": f"Empresa {factories.gerar_sigla(i)} Industria {i}",
+                "sigla": factories.gerar_sigla(i),
+                "tipo": "Cliente",
+                "cnpj": f"{i:014d}",
+            }
+            for i in range(15_000)
+        ])
+        seed_session.execute(insert(Contato), [
+            {"nome": f"Contato Industria {i}", "pessoa_juridica_id": 1 + i % 15_000, "email": f"c{i}@fake.com"}
+            for i in range(35_000)
+        ])
+        busca_service.reconstruir(seed_session)
+        seed_session.commit()
+
+        busca_service.buscar(seed_session, "industria 4242")
+        duracoes = []
+        for _ in range(5):
+            inicio = time.perf_counter()
+            resultados = busca_service.buscar(seed_session, "industria 4242")
+            duracoes.append(time.perf_counter() - inicio)
+
+        assert [r["titulo"] for r in resultados][0].endswith("Industria 4242")
+        assert sorted(duracoes)[2] < 0.02, f"mediana de {sorted(duracoes)[2] * 1000:.1f} ms"
@@ -0,0 +1,213 @@
+"""
+Testes do cache de respostas (ETag, 304, invalidação por tabela e métricas)
+"""
+from datetime import datetime, timedelta
+from fnmatch import fnmatch
+
+import pytest
+from sqlalchemy import update
+
+from app import cache_service
+from app.metrics import registry
+from app.models.funcionario import Funcionario
+from app.routes import cronograma
+from tests import factories
+
+
+@pytest.fixture
+def dados(seed_session):
+    pessoas = factories.criar_pessoas_juridicas(seed_session, 2)
+    contatos = factories.criar_contatos(seed_session, 2, pessoas)
+    funcionarios = factories.criar_funcionarios(seed_session, 2)
+    produtos = factories.criar_produtos(seed_session, 2, pessoas)
+    return {"pessoas": pessoas, "contatos": contatos, "funcionarios": funcionarios, "produtos": produtos}
+
+
+ROTAS = [
+    "/api/projetos/clientes",
+    "/api/projetos/cliente/1/contatos",
+    "/api/funcionarios/tecnicos",
+    "/api/produtos-servicos/",
+]
+
+
+class TestEtag:
+    """Respostas com ETag forte e 304 para o cliente que já tem a versão atual"""
+
+    @pytest.mark.parametrize("rota", ROTAS)
+    def test_304_sem_corpo_e_sem_consultas(self, client, auth_headers, dados, assert_max_queries, rota):
+        primeira = client.get(rota, headers=auth_headers)
+        assert primeira.status_code == 200
+        assert primeira.json()
+        etag = primeira.headers["etag"]
+        assert etag.startswith('"') and not etag.startswith("W/")
+        assert primeira.headers["cache-control"] == "private, no-cache"
+
+        # Só a consulta do usuário autenticado
+        with assert_max_queries(1):
+            repetida = client.get(rota, headers={**auth_headers, "If-None-Match": etag})
+        assert repetida.status_code == 304
+        assert repetida.content == b""
+        assert repetida.headers["etag"] == etag
+
+    def test_sem_if_none_match_usa_cache(self, client, dados, assert_max_queries):
+        primeira = client.get("/api/produtos-servicos/")
+        with assert_max_queries(0):
+            repetida = client.get("/api/produtos-servicos/")
+        assert repetida.status_code == 200
+        assert repetida.content == primeira.content
+
+    def test_conteudo_igual_ao_sem_cache(self, client, dados):
+        """O corpo em cache é o mesmo que a serialização pelo response_model"""
+        produtos = client.get("/api/produtos-servicos/").json()
+        assert produtos[0]["descricao"] == "Produto Fake 0"
+        assert produtos[0]["fornecedores"][0]["codigo_fornecedor"] == "F0"
+
+    def test_etag_diferente_retorna_corpo(self, client, auth_headers, dados):
+        response = client.get("/api/funcionarios/tecnicos", headers={**auth_headers, "If-None-Match": '"outro"'})
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+
+
+class TestInvalidacao:
+    """Escritas nas tabelas envolvidas geram nova versão"""
+
+    def test_commit_pelo_orm(self, client, auth_headers, dados, seed_session):
+        etag = client.get("/api/funcionarios/tecnicos", headers=auth_headers).headers["etag"]
+        dados["funcionarios"][0].nome = "Renomeado"
+        seed_session.commit()
+
+        response = client.get("/api/funcionarios/tecnicos", headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert response.json()[0]["nome"] == "Renomeado"
+
+    def test_update_em_lote(self, client, auth_headers, dados, seed_session):
+        client.get("/api/funcionarios/tecnicos", headers=auth_headers)
+        seed_session.execute(update(Funcionario).values(departamento="Comercial"))
+        seed_session.commit()
+        response = client.get("/api/funcionarios/tecnicos", headers=auth_headers)
+        assert {f["departamento"] for f in response.json()} == {"Comercial"}
+
+    def test_rollback_nao_invalida(self, client, auth_headers, dados, seed_session, assert_max_queries):
+        client.get("/api/funcionarios/tecnicos", headers=auth_headers)
+        dados["funcionarios"][0].nome = "Descartado"
+        seed_session.flush()
+        seed_session.rollback()
+        with assert_max_queries(1):
+            client.get("/api/funcionarios/tecnicos", headers=auth_headers)
+
+    def test_outras_tabelas_nao_invalidam(self, client, auth_headers, dados, seed_session, assert_max_queries):
+        client.get("/api/projetos/clientes", headers=auth_headers)
+        dados["funcionarios"][0].nome = "Outro"
+        seed_session.commit()
+        with assert_max_queries(1):
+            client.get("/api/projetos/clientes", headers=auth_headers)
+
+    def test_cadastro_pela_api(self, client, dados):
+        antes = client.get("/api/produtos-servicos/").json()
+        client.post("/api/produtos-servicos/", json={
+            "tipo": "Produto", "unidade_medida": "un", "descricao": "Novo", "fornecedores": [],
+        })
+        assert len(client.get("/api/produtos-servicos/").json()) == len(antes) + 1
+
+
+class TestCacheDeRotas:
+    """Decorator em_cache nas listagens e métricas de hit/miss"""
+
+    def test_listagens(self, client, auth_headers, dados, seed_session, assert_max_queries):
+        projetos = factories.criar_projetos(seed_session, 2, dados["contatos"])
+        factories.criar_faturamentos(seed_session, 2, projetos, dados["funcionarios"])
+        rotas = [
+            "/api/projetos/",
+            "/api/despesas-projetos",
+            f"/api/faturamentos/projeto/{projetos[0].id}",
+        ]
+        primeiras = [client.get(rota, headers=auth_headers) for rota in rotas]
+        assert all(r.status_code == 200 for r in primeiras)
+        for rota, primeira in zip(rotas, primeiras):
+            with assert_max_queries(1):
+                repetida = client.get(rota, headers=auth_headers)
+            assert repetida.content == primeira.content
+
+    def test_cronogramas_sem_cache(self, client, auth_headers, dados, seed_session, monkeypatch):
+        """dias_restantes e prazo_status dependem da data atual, não só das tabelas"""
+        projetos = factories.criar_projetos(seed_session, 1, dados["contatos"])
+        factories.criar_cronogramas(seed_session, projetos)
+        antes = client.get("/api/cronogramas/", headers=auth_headers).json()[0]
+
+        class Amanha(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.now(tz) + timedelta(days=1)
+
+        monkeypatch.setattr(cronograma, "datetime", Amanha)
+        depois = client.get("/api/cronogramas/", headers=auth_headers).json()[0]
+        assert depois["dias_restantes"] == antes["dias_restantes"] - 1
+
+    def test_faturamentos_por_projeto_separados(self, client, auth_headers, dados, seed_session):
+        """A URL (com parâmetros) faz parte da chave"""
+        projetos = factories.criar_projetos(seed_session, 2, dados["contatos"])
+        factories.criar_faturamentos(seed_session, 1, projetos[:1], dados["funcionarios"])
+        assert client.get(f"/api/faturamentos/projeto/{projetos[0].id}", headers=auth_headers).json()
+        assert client.get(f"/api/faturamentos/projeto/{projetos[1].id}", headers=auth_headers).json() == []
+
+    def test_metricas(self, client, auth_headers, dados):
+        contador = cache_service.cache_requests_total
+        rota = "/api/funcionarios/tecnicos"
+        hits, misses = contador.value(route=rota, result="hit"), contador.value(route=rota, result="miss")
+        for _ in range(3):
+            client.get(rota, headers=auth_headers)
+        assert contador.value(route=rota, result="miss") == misses + 1
+        assert contador.value(route=rota, result="hit") == hits + 2
+        assert "cache_entries" in registry.render()
+
+
+class ClienteRedisEmMemoria:
+    """Subconjunto da API do redis.Redis usado pelo cache"""
+
+    def __init__(self):
+        self.dados = {}
+
+    def get(self, chave):
+        return self.dados.get(chave)
+
+    def set(self, chave, valor, ex=None):
+        self.dados[chave] = valor
+
+    def mget(self, chaves):
+        return [self.dados.get(c) for c in chaves]
+
+    def incr(self, chave):
+        self.dados[chave] = str(int(self.dados.get(chave, 0)) + 1).encode()
+
+    def scan_iter(self, match):
+        return [c for c in list(self.dados) if fnmatch(c, match)]
+
+    def delete(self, chave):
+        self.dados.pop(chave, None)
+
+
+class TestArmazenamentoRedis:
+    """Entradas e versões compartilhadas entre processos"""
+
+    def test_versoes_compartilhadas(self, client, auth_headers, dados, seed_session, monkeypatch):
+        cliente = ClienteRedisEmMemoria()
+        monkeypatch.setattr(
+            cache_service.cache_respostas, "armazenamento", cache_service.ArmazenamentoRedis(cliente)
+        )
+        etag = client.get("/api/funcionarios/tecnicos", headers=auth_headers).headers["etag"]
+        assert len(cache_service.cache_respostas.armazenamento) == 1
+
+        # Outro worker incrementa a versão no Redis
+        cache_service.ArmazenamentoRedis(cliente).incrementar(["funcionarios"])
+        dados["funcionarios"][0].nome = "Alterado em outro worker"
+        seed_session.commit()
+        response = client.get("/api/funcionarios/tecnicos", headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()[0]["nome"] == "Alterado em outro worker"
+
+        repetida = client.get(
+            "/api/funcionarios/tecnicos", headers={**auth_headers, "If-None-Match": response.headers["etag"]}
+        )
+        assert repetida.status_code == 304
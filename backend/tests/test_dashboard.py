@@ -0,0 +1,235 @@
+"""
+Testes do dashboard: agregados mantidos pelos eventos da sessão (mês, status,
+cliente e prazo) e GET /api/dashboard com queries constantes
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import insert, select, update
+
+from app.config import get_local_now
+from app.dashboard_service import data_entrega, intervalo_mes, recalcular
+from app.models.dashboard import (
+    DashboardCliente,
+    DashboardFaturamentoMensal,
+    DashboardPrazo,
+    DashboardProjetosStatus,
+)
+from app.models.faturamento import Faturamento
+from app.models.projeto import StatusProjeto
+from tests import factories
+
+TABELAS = (DashboardFaturamentoMensal, DashboardProjetosStatus, DashboardCliente, DashboardPrazo)
+
+
+def _base(db, n_projetos: int = 2, n_clientes: int = 1):
+    pessoas = factories.criar_pessoas_juridicas(db, n_clientes)
+    projetos = factories.criar_projetos(db, n_projetos, factories.criar_contatos(db, n_clientes, pessoas))
+    funcionarios = factories.criar_funcionarios(db, 1)
+    return pessoas, projetos, funcionarios
+
+
+def _faturar(db, projeto, funcionario, valor, data):
+    faturamento = Faturamento(
+        projeto_id=projeto.id, tecnico_id=funcionario.id, valor_faturado=Decimal(valor), data_faturamento=data
+    )
+    db.add(faturamento)
+    db.commit()
+    return faturamento
+
+
+def _conteudo(db) -> dict:
+    """Linhas de todas as tabelas de agregados"""
+    return {
+        modelo.__tablename__: sorted(
+            tuple(str(v) for v in linha) for linha in db.execute(select(*modelo.__table__.columns))
+        )
+        for modelo in TABELAS
+    }
+
+
+def _mensal(db) -> dict:
+    db.expire_all()
+    return {
+        linha.mes: (linha.valor_faturado, linha.quantidade)
+        for linha in db.execute(select(DashboardFaturamentoMensal)).scalars()
+    }
+
+
+def _status(db) -> dict:
+    db.expire_all()
+    return {linha.status: linha.quantidade for linha in db.execute(select(DashboardProjetosStatus)).scalars()}
+
+
+class TestFuncoes:
+    """Chaves mensais e data de entrega"""
+
+    def test_intervalo_mes(self):
+        assert intervalo_mes("2026-03") == (datetime(2026, 3, 1), datetime(2026, 4, 1))
+        assert intervalo_mes("2026-12") == (datetime(2026, 12, 1), datetime(2027, 1, 1))
+
+    def test_data_entrega(self):
+        assert data_entrega(datetime(2026, 1, 1, 15, 0), 30).isoformat() == "2026-01-31"
+        assert data_entrega(datetime(2026, 1, 1), None).isoformat() == "2026-01-01"
+        assert data_entrega(None, 30) is None
+
+
+class TestManutencaoIncremental:
+    """Escritas em projetos e faturamentos atualizam só as linhas afetadas"""
+
+    def test_faturamento_por_mes(self, seed_session):
+        _, projetos, funcionarios = _base(seed_session)
+        fevereiro = _faturar(seed_session, projetos[0], funcionarios[0], "100.00", datetime(2026, 2, 10))
+        _faturar(seed_session, projetos[1], funcionarios[0], "50.00", datetime(2026, 2, 28, 23, 59))
+        _faturar(seed_session, projetos[0], funcionarios[0], "70.00", datetime(2026, 3, 1))
+        assert _mensal(seed_session) == {
+            "2026-02": (Decimal("150.00"), 2),
+            "2026-03": (Decimal("70.00"), 1),
+        }
+
+        fevereiro.data_faturamento = datetime(2026, 3, 5)
+        seed_session.commit()
+        assert _mensal(seed_session) == {
+            "2026-02": (Decimal("50.00"), 1),
+            "2026-03": (Decimal("170.00"), 2),
+        }
+
+        seed_session.delete(fevereiro)
+        seed_session.commit()
+        assert _mensal(seed_session)["2026-03"] == (Decimal("70.00"), 1)
+
+    def test_projetos_por_status(self, seed_session):
+        _, projetos, _ = _base(seed_session, 3)
+        assert _status(seed_session) == {StatusProjeto.EM_EXECUCAO.value: 3}
+
+        projetos[0].status = StatusProjeto.ORCANDO
+        seed_session.commit()
+        assert _status(seed_session) == {StatusProjeto.EM_EXECUCAO.value: 2, StatusProjeto.ORCANDO.value: 1}
+
+        seed_session.delete(projetos[0])
+        seed_session.commit()
+        assert _status(seed_session) == {StatusProjeto.EM_EXECUCAO.value: 2}
+
+    def test_clientes(self, seed_session):
+        pessoas, projetos, funcionarios = _base(seed_session, 2, n_clientes=2)
+        _faturar(seed_session, projetos[0], funcionarios[0], "300.00", datetime(2026, 1, 5))
+        faturamento = _faturar(seed_session, projetos[0], funcionarios[0], "200.00", datetime(2026, 1, 6))
+        seed_session.expire_all()
+        primeiro = seed_session.get(DashboardCliente, projetos[0].cliente_id)
+        assert (primeiro.projetos, primeiro.total_faturado) == (1, Decimal("500.00"))
+
+        # Faturamento movido para o projeto do outro cliente
+        faturamento.projeto_id = projetos[1].id
+        seed_session.commit()
+        seed_session.expire_all()
+        assert seed_session.get(DashboardCliente, projetos[0].cliente_id).total_faturado == Decimal("300.00")
+        assert seed_session.get(DashboardCliente, projetos[1].cliente_id).total_faturado == Decimal("200.00")
+
+    def test_prazos(self, seed_session):
+        _, projetos, _ = _base(seed_session, 2)
+        seed_session.expire_all()
+        assert seed_session.get(DashboardPrazo, projetos[0].id).data_entrega.isoformat() == "2026-01-31"
+
+        projetos[0].prazo_entrega_dias = 60
+        projetos[1].status = StatusProjeto.CONCLUIDO
+        seed_session.commit()
+        seed_session.expire_all()
+        assert seed_session.get(DashboardPrazo, projetos[0].id).data_entrega.isoformat() == "2026-03-02"
+        assert seed_session.get(DashboardPrazo, projetos[1].id) is None
+
+    def test_escrita_em_lote(self, seed_session):
+        """insert()/update() do Core recalculam os agregados antes do commit"""
+        _, projetos, funcionarios = _base(seed_session)
+        seed_session.execute(insert(Faturamento), [
+            {"projeto_id": p.id, "tecnico_id": funcionarios[0].id, "valor_faturado": Decimal("10.00"),
+             "data_faturamento": datetime(2026, 4, 1)}
+            for p in projetos
+        ])
+        seed_session.execute(update(Faturamento).values(valor_faturado=Decimal("15.00")))
+        seed_session.commit()
+        assert _mensal(seed_session) == {"2026-04": (Decimal("30.00"), 2)}
+
+    def test_rollback(self, seed_session):
+        _, projetos, funcionarios = _base(seed_session)
+        seed_session.add(Faturamento(
+            projeto_id=projetos[0].id, tecnico_id=funcionarios[0].id,
+            valor_faturado=Decimal("10.00"), data_faturamento=datetime(2026, 4, 1),
+        ))
+        seed_session.flush()
+        seed_session.rollback()
+        assert _mensal(seed_session) == {}
+
+    def test_incremental_igual_ao_completo(self, seed_session):
+        """Depois de várias escritas, os agregados coincidem com um recálculo completo"""
+        pessoas, projetos, funcionarios = _base(seed_session, 6, n_clientes=3)
+        faturamentos = [
+            _faturar(seed_session, projetos[i % 6], funcionarios[0], f"{10 * (i + 1)}.00", datetime(2026, 1 + i % 5, 3))
+            for i in range(12)
+        ]
+        projetos[1].status = StatusProjeto.ORCAMENTO_ENVIADO
+        projetos[2].valor_venda = Decimal("9000.00")
+        projetos[3].cliente_id = pessoas[0].id
+        faturamentos[4].valor_faturado = Decimal("1.00")
+        faturamentos[5].projeto_id = projetos[5].id
+        seed_session.delete(faturamentos[6])
+        seed_session.commit()
+        seed_session.delete(projetos[4])
+        seed_session.commit()
+
+        incremental = _conteudo(seed_session)
+        recalcular(seed_session.connection())
+        assert _conteudo(seed_session) == incremental
+
+
+class TestRotaDashboard:
+    """GET /api/dashboard"""
+
+    def _dados(self, db, n_faturamentos: int):
+        pessoas, projetos, funcionarios = _base(db, 4, n_clientes=2)
+        agora = get_local_now()
+        projetos[0].status = StatusProjeto.ORCANDO
+        projetos[1].status = StatusProjeto.ORCAMENTO_ENVIADO
+        # Em execução: um no prazo e um atrasado (pedido em 2026-01-01 + 30 dias)
+        projetos[2].data_pedido_compra = agora
+        db.commit()
+        for i in range(n_faturamentos):
+            _faturar(db, projetos[i % 2], funcionarios[0], "100.00", agora - timedelta(days=31 * (i % 11)))
+        return pessoas, projetos
+
+    def test_conteudo(self, client, auth_headers, seed_session):
+        pessoas, projetos = self._dados(seed_session, 3)
+        response = client.get("/api/dashboard?meses=6&clientes=1", headers=auth_headers)
+        assert response.status_code == 200, response.text
+        dados = response.json()
+
+        meses = dados["faturamento_por_mes"]
+        assert len(meses) == 6
+        assert meses[-1] == {"mes": get_local_now().strftime("%Y-%m"), "valor_faturado": 100.0, "quantidade": 1}
+        assert sum(m["quantidade"] for m in meses) == 3
+
+        por_status = {s["status"]: s["quantidade"] for s in dados["projetos_por_status"]}
+        assert len(por_status) == len(StatusProjeto)
+        assert por_status[StatusProjeto.EM_EXECUCAO.value] == 2
+        assert por_status[StatusProjeto.CONCLUIDO.value] == 0
+        assert dados["pipeline"] == {"quantidade": 2, "valor_orcado": 2000.0, "valor_venda": 3000.0}
+        assert dados["execucao"] == {"no_prazo": 1, "atrasados": 1, "sem_prazo": 0}
+
+        assert len(dados["maiores_clientes"]) == 1
+        maior = dados["maiores_clientes"][0]
+        assert maior["cliente_id"] == projetos[0].cliente_id
+        assert maior["total_faturado"] == 200.0
+        assert maior["razao_social"]
+
+    def test_queries_constantes(self, client, auth_headers, seed_session, assert_max_queries):
+        """Autenticação e quatro consultas às tabelas de agregados, com qualquer histórico"""
+        self._dados(seed_session, 60)
+        with assert_max_queries(5):
+            response = client.get("/api/dashboard?meses=12", headers=auth_headers)
+        assert response.status_code == 200
+        assert sum(m["quantidade"] for m in response.json()["faturamento_por_mes"]) == 60
+
+    def test_parametros_invalidos(self, client, auth_headers, db_session):
+        assert client.get("/api/dashboard?meses=0", headers=auth_headers).status_code == 422
+
+    def test_requer_autenticacao(self, client, db_session):
+        assert client.get("/api/dashboard").status_code == 401
@@ -0,0 +1,103 @@
+"""Testes da instrumentação de queries do SQLAlchemy"""
+import logging
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import get_db
+from app.db_instrumentation import QueryStats, _current_stats
+from app.middleware import QueryProfilerMiddleware
+from app.models.pessoa_juridica import PessoaJuridica
+
+
+class TestQueryBudget:
+    """Orçamento de queries por endpoint"""
+
+    def test_listar_pessoas_juridicas(self, client, db_session, assert_max_queries):
+        """A listagem carrega os contatos em lote, sem uma query por empresa"""
+        for i in range(5):
+            db_session.add(PessoaJuridica(razao_social=f"Empresa {i}", sigla=f"E{i}", cnpj=f"000{i}"))
+        db_session.commit()
+
+        with assert_max_queries(2):
+            response = client.get("/api/pessoas-juridicas/")
+        assert response.status_code == 200
+        assert len(response.json()) == 5
+
+
+class TestSlowQueryLog:
+    """Log de queries lentas"""
+
+    def test_loga_query_lenta_com_parametros(self, db_engine, monkeypatch, caplog):
+        """Queries acima do limite são logadas com os parâmetros"""
+        monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0.000001)
+        with caplog.at_level(logging.WARNING, logger="app.db_instrumentation"):
+            with db_engine.connect() as conn:
+                conn.execute(text("SELECT :valor"), {"valor": 42})
+        mensagens = [r.getMessage() for r in caplog.records]
+        assert any("Query lenta" in m and "SELECT ?" in m and "42" in m for m in mensagens)
+
+    def test_limite_zero_desativa(self, db_engine, monkeypatch, caplog):
+        """SLOW_QUERY_MS=0 desativa o log"""
+        monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+        with caplog.at_level(logging.WARNING, logger="app.db_instrumentation"):
+            with db_engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        assert not any("Query lenta" in r.getMessage() for r in caplog.records)
+
+    def test_acumula_no_contexto(self, db_engine):
+        """Queries executadas no contexto da requisição são acumuladas"""
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        try:
+            with db_engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+        finally:
+            _current_stats.reset(token)
+        assert stats.count == 2
+        assert stats.total_time > 0
+
+
+class TestQueryHeaders:
+    """Headers X-DB-Queries / X-DB-Time"""
+
+    def test_headers(self, db_session):
+        """O middleware devolve a contagem de queries da requisição"""
+        mini_app = FastAPI()
+        mini_app.add_middleware(QueryProfilerMiddleware)
+
+        @mini_app.get("/duas-queries")
+        def duas_queries(db=Depends(get_db)):
+            db.execute(text("SELECT 1"))
+            db.execute(text("SELECT 2"))
+            return {"ok": True}
+
+        mini_app.dependency_overrides[get_db] = lambda: db_session
+        with TestClient(mini_app) as test_client:
+            response = test_client.get("/duas-queries")
+        assert response.headers["X-DB-Queries"] == "2"
+        assert response.headers["X-DB-Time"].endswith("ms")
+
+
+class TestBancoDeTestes:
+    """Cada teste roda em uma transação desfeita no final"""
+
+    def test_savepoint_nao_conta(self, db_session, assert_max_queries):
+        """SAVEPOINT e RELEASE são controle de transação, não queries"""
+        with assert_max_queries(1) as counter:
+            with db_session.begin_nested():
+                db_session.execute(text("SELECT 1"))
+            db_session.commit()
+        assert counter.statements == ["SELECT 1"]
+
+    def test_commit_fica_no_teste(self, db_session, seed_session):
+        """O commit de uma sessão é visto pelas outras do teste, e desfeito no final"""
+        seed_session.add(PessoaJuridica(razao_social="Empresa", sigla="EMP", cnpj="0001"))
+        seed_session.commit()
+        assert db_session.query(PessoaJuridica).count() == 1
+
+    def test_banco_limpo(self, db_session):
+        assert db_session.query(PessoaJuridica).count() == 0
@@ -0,0 +1,139 @@
+"""
+Testes da exportação em XLSX, CSV, JSON Lines e Parquet (parâmetro format) e
+da importação desses formatos
+"""
+import csv
+import importlib.util
+import io
+import json
+
+import pytest
+from openpyxl import load_workbook
+
+from app import exportacao_service
+from app.models.funcionario import Funcionario
+from app.models.pessoa_juridica import PessoaJuridica
+from tests import factories
+
+PYARROW_INSTALADO = importlib.util.find_spec("pyarrow") is not None
+
+
+class TestExportacao:
+    """Mesmas linhas em cada formato, com os nomes de coluna da importação"""
+
+    def test_xlsx_padrao(self, client, auth_headers, seed_session):
+        factories.criar_funcionarios(seed_session, 3)
+        response = client.get("/api/funcionarios/export/excel", headers=auth_headers)
+        assert response.status_code == 200
+        assert "funcionarios.xlsx" in response.headers["content-disposition"]
+        ws = load_workbook(io.BytesIO(response.content)).active
+        assert ws.title == "Funcionários"
+        assert ws["A1"].value == "ID" and ws["A1"].font.bold
+        assert ws.column_dimensions["B"].width == 25
+        assert ws.max_row == 4
+
+    def test_csv(self, client, auth_headers, seed_session):
+        factories.criar_pessoas_juridicas(seed_session, 2)
+        response = client.get("/api/pessoas-juridicas/export/excel?format=csv", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "pessoas_juridicas.csv" in response.headers["content-disposition"]
+        linhas = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(linhas) == 2
+        assert {"razao_social", "nome_fantasia", "cnpj", "ultima_atualizacao"} <= set(linhas[0])
+
+    def test_jsonl(self, client, auth_headers, seed_session):
+        pessoas = factories.criar_pessoas_juridicas(seed_session, 1)
+        factories.criar_projetos(seed_session, 2, factories.criar_contatos(seed_session, 1, pessoas))
+        response = client.get("/api/projetos/export/excel?format=jsonl", headers=auth_headers)
+        assert response.status_code == 200
+        registros = [json.loads(linha) for linha in response.text.splitlines()]
+        assert len(registros) == 2
+        assert registros[0]["cliente"] == pessoas[0].razao_social
+        assert isinstance(registros[0]["valor_de_venda"], float)
+        assert registros[0]["data_pedido_compra"] == "2026-01-01T00:00:00"
+
+    def test_parquet_tipos_declarados(self, client, auth_headers, seed_session, monkeypatch):
+        """Coluna só com nulos no primeiro grupo mantém o tipo declarado nos grupos seguintes"""
+        pq = pytest.importorskip("pyarrow.parquet")
+        monkeypatch.setattr(exportacao_service, "TAMANHO_GRUPO_PARQUET", 2)
+        pessoas = factories.criar_pessoas_juridicas(seed_session, 1)
+        projetos = factories.criar_projetos(seed_session, 3, factories.criar_contatos(seed_session, 1, pessoas))
+        for projeto in projetos[:2]:
+            projeto.prazo_entrega_dias = None
+        seed_session.commit()
+
+        response = client.get("/api/projetos/export/excel?format=parquet", headers=auth_headers)
+        assert response.status_code == 200
+        tabela = pq.read_table(io.BytesIO(response.content))
+        assert tabela.num_rows == 3
+        assert str(tabela.schema.field("prazo_dias").type) == "int64"
+        assert str(tabela.schema.field("valor_de_venda").type) == "double"
+        assert sorted(tabela.column("prazo_dias").to_pylist(), key=str) == [30, None, None]
+
+    def test_formato_desconhecido(self, client, auth_headers):
+        response = client.get("/api/contatos/export/excel?format=xls", headers=auth_headers)
+        assert response.status_code == 422
+
+    @pytest.mark.skipif(PYARROW_INSTALADO, reason="pyarrow instalado")
+    def test_parquet_sem_pyarrow(self, client, auth_headers):
+        response = client.get("/api/faturamentos/export/excel?format=parquet", headers=auth_headers)
+        assert response.status_code == 400
+        assert "pyarrow" in response.json()["detail"]
+
+
+class TestIdaEVolta:
+    """O arquivo exportado é aceito de volta pela importação"""
+
+    @pytest.mark.parametrize("formato", ["csv", "jsonl", "parquet"])
+    def test_funcionarios(self, client, auth_headers, seed_session, db_session, formato):
+        if formato == "parquet":
+            pytest.importorskip("pyarrow")
+        factories.criar_funcionarios(seed_session, 5)
+        nomes = {f.nome for f in seed_session.query(Funcionario)}
+        exportado = client.get(f"/api/funcionarios/export/excel?format={formato}", headers=auth_headers)
+        assert exportado.status_code == 200
+
+        seed_session.query(Funcionario).delete()
+        seed_session.commit()
+        response = client.post(
+            "/api/funcionarios/import/excel",
+            files={"file": (f"funcionarios.{formato}", exportado.content, "application/octet-stream")},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200, response.text
+        assert response.json()["total_sucesso"] == 5
+        assert {f.nome for f in db_session.query(Funcionario)} == nomes
+
+    def test_format_sobrepoe_extensao(self, client, auth_headers, db_session):
+        conteudo = b'{"razao_social": "Empresa", "sigla": "emp", "cnpj": "12.345.678/0001-90"}\n'
+        response = client.post(
+            "/api/pessoas-juridicas/import/excel?format=jsonl",
+            files={"file": ("upload.bin", conteudo, "application/octet-stream")},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200, response.text
+        pessoa = db_session.query(PessoaJuridica).one()
+        assert (pessoa.sigla, pessoa.cnpj) == ("EMP", "12345678000190")
+
+    def test_jsonl_invalido(self, client, auth_headers):
+        response = client.post(
+            "/api/funcionarios/import/excel",
+            files={"file": ("funcionarios.jsonl", b"[1, 2]\n", "application/x-ndjson")},
+            headers=auth_headers,
+        )
+        assert response.status_code == 400
+
+    def test_jsonl_linha_invalida_no_meio(self, client, auth_headers, db_session):
+        """Uma linha ilegível depois da primeira vira erro da linha; as demais são importadas"""
+        conteudo = b'{"nome": "Ana"}\n{"nome": "Bia"\n{"nome": "Caio"}\n'
+        response = client.post(
+            "/api/funcionarios/import/excel",
+            files={"file": ("funcionarios.jsonl", conteudo, "application/x-ndjson")},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200, response.text
+        dados = response.json()
+        assert (dados["total_sucesso"], dados["total_erros"]) == (2, 1)
+        assert "JSON inválido na linha 2" in dados["erros"][0]
+        assert {f.nome for f in db_session.query(Funcionario)} == {"Ana", "Caio"}
@@ -0,0 +1,220 @@
+"""
+Testes do resumo financeiro por projeto: manutenção incremental pelos eventos
+da sessão, verificação de divergências, recálculo diário e listagem
+"""
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import insert, update
+
+from app.financeiro_service import segundos_ate_recalculo, verificar_divergencias
+from app.models.contato import Contato
+from app.models.despesa_projeto import DespesaProjetoItem, StatusDespesa
+from app.models.faturamento import Faturamento
+from app.models.projeto import StatusProjeto
+from app.models.projeto_financeiro import ProjetoFinanceiro
+from tests import factories
+
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _base(db, n_projetos: int = 2):
+    pessoas = factories.criar_pessoas_juridicas(db, 1)
+    projetos = factories.criar_projetos(db, n_projetos, factories.criar_contatos(db, 1, pessoas))
+    funcionarios = factories.criar_funcionarios(db, 1)
+    return pessoas, projetos, funcionarios
+
+
+def _resumo(db, projeto) -> ProjetoFinanceiro:
+    db.expire_all()
+    return db.get(ProjetoFinanceiro, projeto.id)
+
+
+class TestManutencaoIncremental:
+    """Escritas em faturamentos, despesas e itens atualizam o resumo na mesma transação"""
+
+    def test_projeto_novo(self, seed_session):
+        _, projetos, _ = _base(seed_session)
+        resumo = _resumo(seed_session, projetos[0])
+        assert resumo.valor_venda == Decimal("1500.00")
+        assert resumo.total_faturado == 0
+        assert resumo.margem == Decimal("1500.00")
+
+    def test_faturamento(self, seed_session):
+        _, projetos, funcionarios = _base(seed_session)
+        faturamentos = factories.criar_faturamentos(seed_session, 3, projetos[:1], funcionarios)
+        resumo = _resumo(seed_session, projetos[0])
+        assert resumo.total_faturado == Decimal("300.00")
+        assert resumo.percentual_faturado == Decimal("20.00")
+        assert _resumo(seed_session, projetos[1]).total_faturado == 0
+
+        seed_session.delete(faturamentos[0])
+        faturamentos[1].projeto_id = projetos[1].id
+        seed_session.commit()
+        assert _resumo(seed_session, projetos[0]).total_faturado == Decimal("100.00")
+        assert _resumo(seed_session, projetos[1]).total_faturado == Decimal("100.00")
+
+    def test_despesas_e_itens(self, seed_session):
+        pessoas, projetos, funcionarios = _base(seed_session)
+        produtos = factories.criar_produtos(seed_session, 1, pessoas)
+        despesas = factories.criar_despesas(seed_session, 2, projetos[:1], pessoas, funcionarios)
+        despesas[0].valor_frete = Decimal("50.00")
+        item = DespesaProjetoItem(
+            despesa_projeto_id=despesas[0].id, produto_servico_id=produtos[0].id,
+            quantidade=Decimal("2"), valor_unitario=Decimal("100.00"), ipi=Decimal("10"),
+        )
+        seed_session.add(item)
+        seed_session.commit()
+        # 2 x 100 + 10% de IPI + 50 de frete
+        resumo = _resumo(seed_session, projetos[0])
+        assert resumo.total_despesas == Decimal("270.00")
+        assert resumo.margem == Decimal("1230.00")
+
+        item.quantidade = Decimal("3")
+        seed_session.commit()
+        assert _resumo(seed_session, projetos[0]).total_despesas == Decimal("380.00")
+
+        despesas[0].status = StatusDespesa.CANCELADO
+        seed_session.commit()
+        assert _resumo(seed_session, projetos[0]).total_despesas == 0
+
+    def test_valor_venda(self, seed_session):
+        _, projetos, funcionarios = _base(seed_session)
+        factories.criar_faturamentos(seed_session, 1, projetos[:1], funcionarios)
+        projetos[0].valor_venda = Decimal("200.00")
+        seed_session.commit()
+        resumo = _resumo(seed_session, projetos[0])
+        assert resumo.valor_venda == Decimal("200.00")
+        assert resumo.percentual_faturado == Decimal("50.00")
+
+    def test_insert_em_lote(self, seed_session):
+        """insert() do Core (importações) recalcula só os projetos das linhas"""
+        _, projetos, funcionarios = _base(seed_session)
+        seed_session.execute(insert(Faturamento), [
+            {"projeto_id": projetos[1].id, "tecnico_id": funcionarios[0].id, "valor_faturado": Decimal("750.00")},
+        ])
+        seed_session.commit()
+        assert _resumo(seed_session, projetos[1]).percentual_faturado == Decimal("50.00")
+
+    def test_update_em_lote(self, seed_session):
+        _, projetos, funcionarios = _base(seed_session)
+        factories.criar_faturamentos(seed_session, 2, projetos, funcionarios)
+        seed_session.execute(update(Faturamento).values(valor_faturado=Decimal("150.00")))
+        seed_session.commit()
+        assert _resumo(seed_session, projetos[0]).total_faturado == Decimal("150.00")
+        assert _resumo(seed_session, projetos[1]).total_faturado == Decimal("150.00")
+
+    def test_importacao_de_projetos(self, client, auth_headers, seed_session):
+        """Projetos importados (insert() do Core) entram no resumo no mesmo commit"""
+        pessoas, projetos, _ = _base(seed_session, 1)
+        contato = seed_session.get(Contato, projetos[0].contato_id)
+        planilha = factories.planilha_excel(
+            ["Número", "Cliente", "Nome do Projeto", "Contato", "Técnico", "Valor Venda"],
+            [["IMP-00001", pessoas[0].razao_social, "Importado", contato.nome, "Técnico Fake", 800]],
+        )
+        response = client.post(
+            "/api/projetos/import/excel", headers=auth_headers,
+            files={"file": ("projetos.xlsx", planilha, XLSX)},
+        )
+        assert response.json()["total_sucesso"] == 1, response.text
+
+        dados = client.get("/api/financeiro/projetos?ordenar=valor_venda", headers=auth_headers).json()
+        assert dados["total"] == 2
+        assert dados["itens"][0]["valor_venda"] == 800.0
+
+    def test_rollback(self, seed_session):
+        _, projetos, funcionarios = _base(seed_session)
+        factories.criar_faturamentos(seed_session, 1, projetos[:1], funcionarios)
+        seed_session.add(Faturamento(
+            projeto_id=projetos[0].id, tecnico_id=funcionarios[0].id, valor_faturado=Decimal("500.00")
+        ))
+        seed_session.flush()
+        seed_session.rollback()
+        assert _resumo(seed_session, projetos[0]).total_faturado == Decimal("100.00")
+
+
+class TestVerificacao:
+    """A verificação completa corrige linhas alteradas por fora dos eventos"""
+
+    def test_sem_divergencias(self, seed_session):
+        _base(seed_session)
+        assert verificar_divergencias(seed_session) == {
+            "projetos": 2, "divergentes": 0, "faltando": 0, "sobrando": 0,
+        }
+
+    def test_corrige_divergencias(self, seed_session):
+        _, projetos, _ = _base(seed_session, 3)
+        conexao = seed_session.connection()
+        conexao.execute(
+            ProjetoFinanceiro.__table__.update()
+            .where(ProjetoFinanceiro.projeto_id == projetos[0].id)
+            .values(total_faturado=999)
+        )
+        conexao.execute(
+            ProjetoFinanceiro.__table__.delete().where(ProjetoFinanceiro.projeto_id == projetos[1].id)
+        )
+        resultado = verificar_divergencias(seed_session)
+        seed_session.commit()
+        assert resultado == {"projetos": 3, "divergentes": 1, "faltando": 1, "sobrando": 0}
+        assert _resumo(seed_session, projetos[0]).total_faturado == 0
+        assert _resumo(seed_session, projetos[1]) is not None
+
+    def test_segundos_ate_recalculo(self):
+        assert segundos_ate_recalculo(3, datetime(2026, 1, 1, 2, 0)) == 3600
+        assert segundos_ate_recalculo(3, datetime(2026, 1, 1, 3, 0)) == 24 * 3600
+        assert segundos_ate_recalculo(3, datetime(2026, 1, 1, 22, 30)) == 4.5 * 3600
+
+
+class TestListagem:
+    """GET /api/financeiro/projetos ordena e filtra pelo resumo"""
+
+    def _dados(self, db):
+        _, projetos, funcionarios = _base(db, 3)
+        factories.criar_faturamentos(db, 1, projetos[1:2], funcionarios)
+        projetos[2].valor_venda = Decimal("500.00")
+        projetos[2].status = StatusProjeto.CONCLUIDO
+        db.commit()
+        return projetos
+
+    def test_ordenacao(self, client, auth_headers, seed_session):
+        projetos = self._dados(seed_session)
+        response = client.get("/api/financeiro/projetos", headers=auth_headers)
+        assert response.status_code == 200, response.text
+        dados = response.json()
+        assert dados["total"] == 3
+        assert [p["projeto_id"] for p in dados["itens"]] == [projetos[2].id, projetos[0].id, projetos[1].id]
+        assert dados["itens"][0]["margem"] == 500.0
+        assert dados["itens"][0]["cliente"]
+
+        dados = client.get(
+            "/api/financeiro/projetos?ordenar=percentual_faturado&ordem=desc&limite=1", headers=auth_headers
+        ).json()
+        assert dados["total"] == 3
+        assert [p["projeto_id"] for p in dados["itens"]] == [projetos[1].id]
+        assert dados["itens"][0]["total_faturado"] == 100.0
+
+    def test_filtros(self, client, auth_headers, seed_session):
+        projetos = self._dados(seed_session)
+        dados = client.get(
+            "/api/financeiro/projetos", params={"status": StatusProjeto.CONCLUIDO.value}, headers=auth_headers
+        ).json()
+        assert [p["projeto_id"] for p in dados["itens"]] == [projetos[2].id]
+        assert dados["itens"][0]["status"] == StatusProjeto.CONCLUIDO.value
+
+        dados = client.get("/api/financeiro/projetos?margem_max=1000", headers=auth_headers).json()
+        assert dados["total"] == 1
+
+    def test_ordenacao_invalida(self, client, auth_headers, db_session):
+        assert client.get("/api/financeiro/projetos?ordenar=nome", headers=auth_headers).status_code == 422
+
+    def test_recalcular(self, client, admin_headers, seed_session):
+        self._dados(seed_session)
+        response = client.post("/api/financeiro/projetos/recalcular", headers=admin_headers)
+        assert response.status_code == 200
+        assert response.json() == {"projetos": 3, "divergentes": 0, "faltando": 0, "sobrando": 0}
+
+    def test_recalcular_apenas_admin(self, client, auth_headers, db_session):
+        assert client.post("/api/financeiro/projetos/recalcular", headers=auth_headers).status_code == 403
+
+    def test_requer_autenticacao(self, client, db_session):
+        assert client.get("/api/financeiro/projetos").status_code == 401
@@ -0,0 +1,135 @@
+"""
+Testes do fluxo comum das importações (/import/excel): leitura em streaming,
+mapeamento de colunas e conversão dos valores
+"""
+import tracemalloc
+from datetime import datetime
+from decimal import Decimal
+from io import BytesIO
+
+import pytest
+
+from app.importacao_service import (
+    converter_data,
+    converter_inteiro,
+    ler_registros,
+    mapear_colunas,
+    registros,
+)
+from app.models.faturamento import Faturamento
+from app.models.funcionario import Funcionario
+from tests import factories
+
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class TestRegistros:
+    """Mapeamento do cabeçalho e conversão linha a linha"""
+
+    def test_mapear_colunas(self):
+        posicoes = mapear_colunas(["id", "nome_do_projeto", "valor"], {"nome": ("nome_do_projeto", "nome"), "x": ("x",)})
+        assert posicoes == {"nome": 1}
+
+    def test_conversao_e_celulas_vazias(self):
+        linhas = [(" Ana ", "12"), (None, None), ("", "3,5")]
+        resultado = list(registros(linhas, {"nome": 0, "prazo": 1}, {"prazo": converter_inteiro}))
+        assert resultado == [
+            (2, {"nome": "Ana", "prazo": 12}, None),
+            (4, {}, "valor inteiro inválido: 3,5"),
+        ]
+
+    def test_linha_curta(self):
+        """Linhas com menos células que o cabeçalho (comum no modo read_only)"""
+        assert list(registros([("Ana",)], {"nome": 0, "email": 1})) == [(2, {"nome": "Ana"}, None)]
+
+    @pytest.mark.parametrize("entrada,esperado", [
+        (datetime(2026, 3, 1, 10, 0), datetime(2026, 3, 1, 10, 0)),
+        ("01/03/2026", datetime(2026, 3, 1)),
+        ("2026-03-01", datetime(2026, 3, 1)),
+    ])
+    def test_converter_data(self, entrada, esperado):
+        assert converter_data(entrada) == esperado
+
+    def test_converter_data_invalida(self):
+        with pytest.raises(ValueError):
+            converter_data("amanhã")
+
+    def test_leitura_sem_carregar_a_planilha(self):
+        """A planilha é lida em modo read_only: a memória não cresce com o número de linhas"""
+        conteudo = factories.planilha_excel(
+            ["Nome", "Departamento", "Email"],
+            [[f"Funcionário {i}", "Técnico", f"f{i}@fake.com"] for i in range(20_000)],
+        )
+        tracemalloc.start()
+        try:
+            _, linhas = ler_registros(BytesIO(conteudo), "dados.xlsx", {"nome": ("nome",)})
+            total = sum(1 for _ in linhas)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert total == 20_000
+        assert pico < 10 * 1024 * 1024, f"pico de {pico / 1024 / 1024:.1f} MB"
+
+
+class TestRotasDeImportacao:
+    """As rotas usam o fluxo comum: cabeçalho por nome, CSV e erros de conversão"""
+
+    def test_csv(self, client, auth_headers, db_session):
+        conteudo = "Nome;Departamento;Email\nAna;Técnico;ana@x.com\nBruno;;\n".encode("utf-8")
+        response = client.post(
+            "/api/funcionarios/import/excel",
+            files={"file": ("funcionarios.csv", conteudo, "text/csv")},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200, response.text
+        assert response.json()["total_sucesso"] == 2
+        assert {f.nome for f in db_session.query(Funcionario)} == {"Ana", "Bruno"}
+
+    def test_csv_cp1252(self, client, auth_headers, db_session):
+        """CSV salvo pelo Excel em pt-BR (cp1252) é lido sem erro de decodificação"""
+        conteudo = "Nome;Departamento\nJosé;Técnico\nConceição;Elétrica\n".encode("cp1252")
+        response = client.post(
+            "/api/funcionarios/import/excel",
+            files={"file": ("funcionarios.csv", conteudo, "text/csv")},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200, response.text
+        assert {f.nome for f in db_session.query(Funcionario)} == {"José", "Conceição"}
+
+    def test_formato_invalido(self, client, auth_headers):
+        response = client.post(
+            "/api/funcionarios/import/excel",
+            files={"file": ("funcionarios.xls", b"\xd0\xcf", "application/vnd.ms-excel")},
+            headers=auth_headers,
+        )
+        assert response.status_code == 400
+
+    def test_colunas_obrigatorias(self, client):
+        conteudo = factories.planilha_excel(["Razão Social", "CNPJ"], [["Empresa", "1"]])
+        response = client.post(
+            "/api/pessoas-juridicas/import/excel", files={"file": ("pessoas.xlsx", conteudo, XLSX)}
+        )
+        assert response.status_code == 400
+
+    def test_faturamentos_por_cabecalho(self, client, auth_headers, seed_session, db_session):
+        """Colunas em outra ordem e valores como texto são aceitos"""
+        pessoas = factories.criar_pessoas_juridicas(seed_session, 1)
+        projetos = factories.criar_projetos(seed_session, 1, factories.criar_contatos(seed_session, 1, pessoas))
+        funcionarios = factories.criar_funcionarios(seed_session, 1)
+        conteudo = factories.planilha_excel(
+            ["Valor Faturado", "Técnico ID", "Projeto ID", "Data Faturamento"],
+            [
+                ["1.234,50", funcionarios[0].id, str(projetos[0].id), "15/01/2026"],
+                ["abc", funcionarios[0].id, projetos[0].id, None],
+            ],
+        )
+        response = client.post(
+            "/api/faturamentos/import/excel",
+            files={"file": ("faturamentos.xlsx", conteudo, XLSX)},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200, response.text
+        assert response.json()["erros"] == ["Linha 3: Erro valor numérico inválido: abc"]
+        faturamento = db_session.query(Faturamento).one()
+        assert faturamento.valor_faturado == Decimal("1234.50")
+        assert faturamento.data_faturamento.date() == datetime(2026, 1, 15).date()
@@ -0,0 +1,240 @@
+"""
+Testes da importação de tabelas de preço de fornecedores
+"""
+import time
+from decimal import Decimal
+from io import BytesIO
+
+import pytest
+
+from app.importacao_service import ProgressoImportacoes, converter_decimal, normalizar_cabecalho
+from app.models.produto_servico import ProdutoServicoFornecedor, ProdutoServicoHistoricoPreco
+from tests import factories
+
+
+def _csv(linhas, cabecalho="Código Fornecedor;Código Fabricante;Preço Unitário;IPI") -> bytes:
+    return ("\n".join([cabecalho] + [";".join(map(str, linha)) for linha in linhas]) + "\n").encode("utf-8")
+
+
+@pytest.fixture
+def catalogo(seed_session):
+    """Dois fornecedores e três produtos com código do fabricante, vinculados ao primeiro fornecedor"""
+    fornecedores = factories.criar_pessoas_juridicas(seed_session, 2, tipo="Fornecedor")
+    produtos = factories.criar_produtos(seed_session, 3, fornecedores[:1])
+    for i, produto in enumerate(produtos):
+        produto.codigo_fabricante = f"FAB-{i}"
+    seed_session.commit()
+    return fornecedores, produtos
+
+
+def _vinculos(db_session, fornecedor_id):
+    return {
+        v.produto_servico_id: v
+        for v in db_session.query(ProdutoServicoFornecedor).filter_by(fornecedor_id=fornecedor_id)
+    }
+
+
+class TestLeituraPlanilha:
+    """Testes das funções de leitura"""
+
+    def test_normalizar_cabecalho(self):
+        """Acentos, espaços e maiúsculas são normalizados"""
+        assert normalizar_cabecalho(" Preço Unitário ") == "preco_unitario"
+        assert normalizar_cabecalho(None) == ""
+
+    @pytest.mark.parametrize("entrada, esperado", [
+        ("1.234,56", Decimal("1234.56")),
+        ("R$ 10,5", Decimal("10.5")),
+        ("12.5", Decimal("12.5")),
+        (7, Decimal("7")),
+        ("", None),
+    ])
+    def test_converter_decimal(self, entrada, esperado):
+        """Números em texto no formato brasileiro ou internacional"""
+        assert converter_decimal(entrada) == esperado
+
+    def test_converter_decimal_invalido(self):
+        with pytest.raises(ValueError):
+            converter_decimal("abc")
+
+
+class TestProgressoImportacoes:
+    """Testes do registro de progresso"""
+
+    def test_ciclo_de_vida(self):
+        """Em andamento bloqueia o mesmo id; concluída libera"""
+        registro = ProgressoImportacoes()
+        assert registro.iniciar("a", total=10)
+        assert not registro.iniciar("a")
+        registro.atualizar("a", linhas_processadas=5)
+        assert registro.obter("a")["linhas_processadas"] == 5
+
+        registro.atualizar("a", status="concluida")
+        assert registro.obter("a")["concluido_em"] is not None
+        assert registro.iniciar("a")
+
+    def test_limite_de_itens(self):
+        """Só as importações mais recentes são mantidas"""
+        registro = ProgressoImportacoes(max_itens=2)
+        for chave in ("a", "b", "c"):
+            registro.iniciar(chave)
+        assert registro.obter("a") is None
+        assert registro.obter("c") is not None
+
+
+class TestImportarTabelaPrecos:
+    """Testes do endpoint POST /fornecedores/{id}/importar-precos"""
+
+    def _url(self, fornecedor_id, **params):
+        url = f"/api/produtos-servicos/fornecedores/{fornecedor_id}/importar-precos"
+        if params:
+            url += "?" + "&".join(f"{k}={v}" for k, v in params.items())
+        return url
+
+    def _enviar(self, client, auth_headers, fornecedor_id, conteudo, nome="tabela.csv", **params):
+        return client.post(
+            self._url(fornecedor_id, **params),
+            files={"file": (nome, BytesIO(conteudo))},
+            headers=auth_headers,
+        )
+
+    def test_jsonl_linha_invalida(self, client, auth_headers, db_session, catalogo):
+        """Linha de JSON ilegível entra nos erros sem interromper a importação"""
+        fornecedores, _ = catalogo
+        conteudo = (
+            b'{"codigo_fornecedor": "F0", "preco_unitario": 50}\n'
+            b'{"codigo_fornecedor": "F1", \n'
+            b'{"codigo_fornecedor": "F2", "preco_unitario": 70}\n'
+        )
+        response = self._enviar(client, auth_headers, fornecedores[0].id, conteudo, nome="tabela.jsonl")
+        assert response.status_code == 200, response.text
+        dados = response.json()
+        assert (dados["atualizados"], dados["total_erros"]) == (2, 1)
+        assert "JSON inválido na linha 2" in dados["erros"][0]
+
+    def test_atualiza_vinculos(self, client, auth_headers, db_session, catalogo):
+        """Casa pelo código do fornecedor ou, se ele mudou, pelo código do fabricante"""
+        fornecedores, produtos = catalogo
+        # criar_produtos vincula o produto i ao fornecedor com código "F{i}"
+        conteudo = _csv([
+            ("F0", "", "50,00", "10"),
+            ("NOVO-1", "FAB-1", "20.00", "0"),
+            ("NOVO-X", "FAB-X", "1,00", "0"),
+        ])
+        response = self._enviar(client, auth_headers, fornecedores[0].id, conteudo)
+        assert response.status_code == 200, response.text
+        dados = response.json()
+        assert (dados["atualizados"], dados["inseridos"], dados["total_erros"]) == (2, 0, 1)
+        assert "FAB-X" not in dados["erros"][0] and "NOVO-X" in dados["erros"][0]
+
+        vinculos = _vinculos(db_session, fornecedores[0].id)
+        assert vinculos[produtos[0].id].preco_unitario == Decimal("50.00")
+        assert vinculos[produtos[0].id].ipi == Decimal("10.00")
+        assert vinculos[produtos[1].id].codigo_fornecedor == "NOVO-1"
+        assert vinculos[produtos[1].id].preco_unitario == Decimal("20.00")
+
+    def test_colunas_ausentes_mantem_valores(self, client, auth_headers, db_session, catalogo):
+        """Sem a coluna de IPI, o IPI atual do vínculo é preservado"""
+        fornecedores, produtos = catalogo
+        db_session.query(ProdutoServicoFornecedor).update({"ipi": Decimal("5.00")})
+        db_session.commit()
+
+        conteudo = _csv([("F0", "12,00")], cabecalho="Codigo Fornecedor;Preco")
+        response = self._enviar(client, auth_headers, fornecedores[0].id, conteudo)
+        assert response.status_code == 200
+
+        db_session.expire_all()
+        vinculo = _vinculos(db_session, fornecedores[0].id)[produtos[0].id]
+        assert (vinculo.preco_unitario, vinculo.ipi) == (Decimal("12.00"), Decimal("5.00"))
+
+    def test_novo_fornecedor_por_fabricante(self, client, auth_headers, db_session, catalogo):
+        """Produtos sem vínculo com o fornecedor são casados pelo código do fabricante"""
+        fornecedores, produtos = catalogo
+        conteudo = _csv([(f"B{i}", f"FAB-{i}", "30,00", "0") for i in range(3)])
+        response = self._enviar(client, auth_headers, fornecedores[1].id, conteudo)
+        assert response.json()["inseridos"] == 3
+        assert set(_vinculos(db_session, fornecedores[1].id)) == {p.id for p in produtos}
+
+    def test_xlsx(self, client, auth_headers, db_session, catalogo):
+        """Planilhas XLSX são lidas em modo streaming"""
+        fornecedores, produtos = catalogo
+        conteudo = factories.planilha_excel(
+            ["Código Fornecedor", "Preço Unitário", "Prazo de Entrega"],
+            [["F0", 42.5, 7]],
+        )
+        response = self._enviar(client, auth_headers, fornecedores[0].id, conteudo, nome="tabela.xlsx")
+        assert response.status_code == 200, response.text
+
+        vinculo = _vinculos(db_session, fornecedores[0].id)[produtos[0].id]
+        assert (vinculo.preco_unitario, vinculo.prazo_entrega_dias) == (Decimal("42.50"), 7)
+
+    def test_registra_historico_dos_afetados(self, client, auth_headers, db_session, catalogo):
+        """Só os produtos tocados ganham registro de histórico"""
+        fornecedores, produtos = catalogo
+        self._enviar(client, auth_headers, fornecedores[0].id, _csv([("F2", "", "99,00", "0")]))
+
+        historico = db_session.query(ProdutoServicoHistoricoPreco).all()
+        assert [h.produto_servico_id for h in historico] == [produtos[2].id]
+        assert historico[0].preco_medio == Decimal("99.00")
+
+    def test_colunas_obrigatorias(self, client, auth_headers, catalogo):
+        """Sem código do fornecedor ou preço retorna 400"""
+        fornecedores, _ = catalogo
+        response = self._enviar(client, auth_headers, fornecedores[0].id, _csv([("x",)], cabecalho="Descricao"))
+        assert response.status_code == 400
+
+    def test_formato_invalido(self, client, auth_headers, catalogo):
+        fornecedores, _ = catalogo
+        response = self._enviar(client, auth_headers, fornecedores[0].id, b"x", nome="tabela.pdf")
+        assert response.status_code == 400
+
+    def test_fornecedor_inexistente(self, client, auth_headers):
+        response = self._enviar(client, auth_headers, 999, _csv([]))
+        assert response.status_code == 404
+
+    def test_progresso(self, client, auth_headers, catalogo):
+        """O progresso fica disponível pelo identificador informado"""
+        fornecedores, _ = catalogo
+        response = self._enviar(
+            client, auth_headers, fornecedores[0].id, _csv([("F0", "", "1,00", "0")]), importacao_id="lote-1"
+        )
+        assert response.json()["importacao_id"] == "lote-1"
+
+        progresso = client.get("/api/produtos-servicos/importacoes/lote-1", headers=auth_headers)
+        assert progresso.status_code == 200
+        assert progresso.json()["status"] == "concluida"
+        assert progresso.json()["atualizados"] == 1
+
+        assert client.get("/api/produtos-servicos/importacoes/outro", headers=auth_headers).status_code == 404
+
+    def test_queries_constantes(self, client, auth_headers, seed_session, assert_max_queries):
+        """O número de instruções não depende do número de linhas do lote"""
+        fornecedores = factories.criar_pessoas_juridicas(seed_session, 1, tipo="Fornecedor")
+        produtos = factories.criar_produtos(seed_session, 500, fornecedores)
+        for i, produto in enumerate(produtos):
+            produto.codigo_fabricante = f"FAB-{i}"
+        seed_session.commit()
+        novos = factories.criar_pessoas_juridicas(seed_session, 1, inicio=1, tipo="Fornecedor")
+        conteudo = _csv([(f"N{i}", f"FAB-{i}", "10,00", "0") for i in range(500)])
+
+        # auth + fornecedor + vínculos + fabricantes + insert + estatísticas + últimos + histórico
+        with assert_max_queries(8):
+            response = self._enviar(client, auth_headers, novos[0].id, conteudo)
+        assert response.json()["inseridos"] == 500
+
+    @pytest.mark.benchmark
+    def test_50_mil_linhas(self, client, auth_headers, seed_session):
+        """Tabela de 50 mil itens em bem menos de um minuto no SQLite"""
+        fornecedores = factories.criar_pessoas_juridicas(seed_session, 1, tipo="Fornecedor")
+        produtos = factories.criar_produtos(seed_session, 50_000, fornecedores)
+        conteudo = _csv(
+            [(f"F{i}", "", f"{10 + i % 90},50", "5") for i in range(50_000)],
+        )
+
+        inicio = time.perf_counter()
+        response = self._enviar(client, auth_headers, fornecedores[0].id, conteudo)
+        duracao = time.perf_counter() - inicio
+
+        assert response.status_code == 200
+        assert response.json()["atualizados"] == len(produtos)
+        assert duracao < 30, f"importação levou {duracao:.1f}s"
@@ -0,0 +1,167 @@
+"""
+Testes dos índices de chaves estrangeiras e colunas de filtro
+"""
+import importlib.util
+from pathlib import Path
+
+import pytest
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import func, select, text
+
+from app.database import Base
+from app.models.contato import Contato
+from app.models.cronograma import CronogramaHistorico
+from app.models.despesa_projeto import DespesaProjeto, DespesaProjetoItem
+from app.models.faturamento import Faturamento
+from app.models.produto_servico import (
+    ProdutoServico,
+    ProdutoServicoFornecedor,
+    ProdutoServicoHistoricoPreco,
+    TipoProdutoServico,
+)
+from app.models.projeto import Projeto, StatusProjeto
+
+BACKEND_DIR = Path(__file__).parent.parent
+VERSOES = BACKEND_DIR / "alembic" / "versions"
+# Migrações que declaram a lista INDICES
+MIGRACOES_INDICES = [
+    "b7d41e2c9a05_indices_chaves_estrangeiras_e_filtros.py",
+    "c4e8f1a2b3d6_sequencias_de_codigos.py",
+    "e1f7a3c5b9d2_resumo_financeiro_projetos.py",
+    "f3a9c1d7e5b2_agregados_do_dashboard.py",
+]
+
+
+def _carregar_migracao(arquivo):
+    spec = importlib.util.spec_from_file_location(f"migracao_{arquivo[:12]}", VERSOES / arquivo)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def _plano(db_session, stmt) -> str:
+    """Executa EXPLAIN QUERY PLAN (SQLite) e devolve os detalhes do plano"""
+    compilado = stmt.compile(
+        dialect=db_session.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    linhas = db_session.execute(text(f"EXPLAIN QUERY PLAN {compilado}")).all()
+    return "\n".join(linha[-1] for linha in linhas)
+
+
+class TestMigracaoIndices:
+    """Testes da migração Alembic dos índices"""
+
+    def test_migracao_cria_indices_dos_modelos(self):
+        """As migrações criam exatamente os índices não únicos declarados nos modelos"""
+        migracao = {
+            (nome, tabela, tuple(colunas))
+            for arquivo in MIGRACOES_INDICES
+            for nome, tabela, colunas in _carregar_migracao(arquivo).INDICES
+        }
+        modelos = {
+            (indice.name, tabela.name, tuple(c.name for c in indice.columns))
+            for tabela in Base.metadata.tables.values()
+            for indice in tabela.indexes
+            if not indice.unique and [c.name for c in indice.columns] != ["id"]
+        }
+        assert migracao == modelos
+
+    def test_cabeca_unica(self):
+        """As migrações formam uma única cabeça"""
+        config = Config(str(BACKEND_DIR / "alembic.ini"))
+        config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+        assert ScriptDirectory.from_config(config).get_heads() == ["f3a9c1d7e5b2"]
+
+
+CONSULTAS = [
+    (
+        "projetos-por-cliente",
+        select(Projeto).where(Projeto.cliente_id == 1),
+        "ix_projetos_cliente_id",
+    ),
+    (
+        "projetos-por-status",
+        select(Projeto).where(Projeto.status == StatusProjeto.EM_EXECUCAO),
+        "ix_projetos_status",
+    ),
+    (
+        "contatos-por-empresa",
+        select(Contato).where(Contato.pessoa_juridica_id == 1),
+        "ix_contatos_pessoa_juridica_id_nome",
+    ),
+    (
+        "contato-duplicado-na-importacao",
+        select(Contato.id).where(Contato.pessoa_juridica_id == 1, Contato.nome == "Fulano"),
+        "ix_contatos_pessoa_juridica_id_nome",
+    ),
+    (
+        "faturamentos-por-projeto",
+        select(Faturamento).where(Faturamento.projeto_id == 1),
+        "ix_faturamentos_projeto_id",
+    ),
+    (
+        "faturamentos-por-tecnico",
+        select(Faturamento).where(Faturamento.tecnico_id == 1),
+        "ix_faturamentos_tecnico_id",
+    ),
+    (
+        "despesas-por-projeto",
+        select(DespesaProjeto).where(DespesaProjeto.projeto_id == 1),
+        "ix_despesas_projetos_projeto_id_fornecedor_id",
+    ),
+    (
+        "despesas-contagem-projeto-fornecedor",
+        select(func.count(DespesaProjeto.id)).where(
+            DespesaProjeto.projeto_id == 1, DespesaProjeto.fornecedor_id == 2
+        ),
+        "ix_despesas_projetos_projeto_id_fornecedor_id",
+    ),
+    (
+        "despesas-por-fornecedor",
+        select(DespesaProjeto).where(DespesaProjeto.fornecedor_id == 1),
+        "ix_despesas_projetos_fornecedor_id",
+    ),
+    (
+        "itens-por-despesa",
+        select(DespesaProjetoItem).where(DespesaProjetoItem.despesa_projeto_id == 1),
+        "ix_despesas_projetos_itens_despesa_projeto_id",
+    ),
+    (
+        "historico-cronograma",
+        select(CronogramaHistorico)
+        .where(CronogramaHistorico.cronograma_id == 1)
+        .order_by(CronogramaHistorico.criado_em.desc()),
+        "ix_cronogramas_historico_cronograma_id_criado_em",
+    ),
+    (
+        "fornecedores-por-produto",
+        select(ProdutoServicoFornecedor).where(ProdutoServicoFornecedor.produto_servico_id == 1),
+        "ix_produtos_servicos_fornecedores_produto_servico_id",
+    ),
+    (
+        "historico-precos",
+        select(ProdutoServicoHistoricoPreco)
+        .where(ProdutoServicoHistoricoPreco.produto_servico_id == 1)
+        .order_by(ProdutoServicoHistoricoPreco.registrado_em.asc()),
+        "ix_produtos_servicos_historico_precos_produto_data",
+    ),
+    (
+        "maior-codigo-interno-por-tipo",
+        select(func.max(ProdutoServico.codigo_interno)).where(
+            ProdutoServico.tipo == TipoProdutoServico.PRODUTO, ProdutoServico.codigo_interno.like("P%")
+        ),
+        "ix_produtos_servicos_tipo_codigo_interno",
+    ),
+]
+
+
+class TestPlanoDeExecucao:
+    """O plano de execução das consultas usa os índices"""
+
+    @pytest.mark.parametrize("stmt, indice", [c[1:] for c in CONSULTAS], ids=[c[0] for c in CONSULTAS])
+    def test_consulta_usa_indice(self, db_session, stmt, indice):
+        """A consulta é resolvida pelo índice, sem varrer a tabela nem ordenar em memória"""
+        plano = _plano(db_session, stmt)
+        assert f"INDEX {indice}" in plano, plano
+        assert "TEMP B-TREE" not in plano, plano
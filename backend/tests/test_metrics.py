@@ -0,0 +1,50 @@
+"""Testes do endpoint de métricas"""
+from app.metrics import Histogram, registry
+
+
+class TestMetricsEndpoint:
+    """Testes de /api/metrics"""
+
+    def test_metrics_format(self, client):
+        """Expõe as métricas no formato texto do Prometheus"""
+        client.get("/health")
+        response = client.get("/api/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert "# TYPE http_requests_total counter" in body
+        assert 'http_requests_total{method="GET",route="/health",status="200"}' in body
+        assert "# TYPE http_request_duration_seconds histogram" in body
+        assert "db_pool_connections" in body
+
+    def test_route_template_label(self, client):
+        """Usa o template da rota como rótulo, e não o path com IDs"""
+        client.get("/api/pessoas-juridicas/987654")
+        body = client.get("/api/metrics").text
+        assert 'route="/api/pessoas-juridicas/{pessoa_id}",status="404"' in body
+        assert "/api/pessoas-juridicas/987654" not in body
+
+    def test_db_queries_per_request(self, client):
+        """Registra a quantidade de queries executadas na requisição"""
+        queries = registry.get("http_request_db_queries")
+        antes = queries.count(method="GET", route="/api/pessoas-juridicas/")
+        client.get("/api/pessoas-juridicas/")
+        assert queries.count(method="GET", route="/api/pessoas-juridicas/") == antes + 1
+        body = client.get("/api/metrics").text
+        assert 'http_request_db_queries_bucket{method="GET",route="/api/pessoas-juridicas/",le="1"}' in body
+
+
+class TestHistogram:
+    """Testes do histograma"""
+
+    def test_cumulative_buckets(self):
+        """Buckets são cumulativos e incluem +Inf"""
+        hist = Histogram("teste_latencia", "Teste", ("rota",), buckets=(0.1, 1.0))
+        hist.observe(0.05, rota="a")
+        hist.observe(0.5, rota="a")
+        hist.observe(5, rota="a")
+        lines = hist.collect()
+        assert 'teste_latencia_bucket{rota="a",le="0.1"} 1' in lines
+        assert 'teste_latencia_bucket{rota="a",le="1"} 2' in lines
+        assert 'teste_latencia_bucket{rota="a",le="+Inf"} 3' in lines
+        assert 'teste_latencia_count{rota="a"} 3' in lines
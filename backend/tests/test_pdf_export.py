@@ -0,0 +1,370 @@
+"""
+Testes da exportação de projetos em PDF e do cache de relatórios
+"""
+import base64
+import os
+import re
+import time
+import zipfile
+import zlib
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from decimal import Decimal
+from io import BytesIO
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app import pdf_service
+from app.config import settings
+from app.main import app
+from app.models.cronograma import CronogramaHistorico
+from app.models.projeto import StatusProjeto
+from app.models.user import User
+from app.pdf_service import PdfCache
+from tests import factories
+
+
+@pytest.fixture
+def cache_pdf(tmp_path, monkeypatch):
+    """Cache de PDFs em diretório temporário"""
+    cache = PdfCache(str(tmp_path / "pdf"), 10 * 1024 * 1024)
+    monkeypatch.setattr(pdf_service, "pdf_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def projeto(seed_session):
+    """Projeto com faturamentos, cronograma e histórico de alterações"""
+    pessoas = factories.criar_pessoas_juridicas(seed_session, 1)
+    contatos = factories.criar_contatos(seed_session, 1, pessoas)
+    funcionarios = factories.criar_funcionarios(seed_session, 2)
+    projeto = factories.criar_projetos(seed_session, 1, contatos)[0]
+    factories.criar_faturamentos(seed_session, 3, [projeto], funcionarios)
+    cronograma = factories.criar_cronogramas(seed_session, [projeto])[0]
+
+    usuarios = [
+        User(username=f"usuario{i}", email=f"usuario{i}@test.com", hashed_password="x")
+        for i in range(5)
+    ]
+    seed_session.add_all(usuarios)
+    seed_session.flush()
+    seed_session.add_all([
+        CronogramaHistorico(
+            cronograma_id=cronograma.id,
+            percentual_conclusao=Decimal(10 * i),
+            criado_por_id=usuario.id,
+        )
+        for i, usuario in enumerate(usuarios)
+    ])
+    seed_session.commit()
+    return projeto
+
+
+class TestPdfCache:
+    """Testes do cache LRU em disco"""
+
+    def test_put_get(self, tmp_path):
+        """Grava e lê o conteúdo pela chave"""
+        cache = PdfCache(str(tmp_path), 1024)
+        assert cache.get("abc") is None
+        cache.put("abc", b"%PDF-1")
+        assert cache.get("abc") == b"%PDF-1"
+
+    def test_evicao_lru(self, tmp_path):
+        """Remove os menos acessados quando passa do limite"""
+        cache = PdfCache(str(tmp_path), 250)
+        for i, chave in enumerate(["a", "b"]):
+            cache.put(chave, b"x" * 100)
+            os.utime(tmp_path / f"{chave}.pdf", (time.time() - 100 + i, time.time() - 100 + i))
+
+        assert cache.get("a") is not None  # "a" passa a ser o mais recente
+        cache.put("c", b"x" * 100)
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+
+    def test_desabilitado(self, tmp_path):
+        """Com o cache desligado nada é gravado"""
+        cache = PdfCache(str(tmp_path), 1024, enabled=False)
+        cache.put("abc", b"%PDF-1")
+        assert cache.get("abc") is None
+        assert not list(tmp_path.iterdir())
+
+
+def _texto_pdf(conteudo: bytes) -> bytes:
+    """Conteúdo das páginas (streams ASCII85 + Flate do reportlab) para procurar textos"""
+    streams = re.findall(rb"/ASCII85Decode /FlateDecode \][^>]*>>\s*stream\r?\n(.*?)~>", conteudo, re.S)
+    return b"".join(zlib.decompress(base64.a85decode(stream)) for stream in streams)
+
+
+class TestExportarPdf:
+    """Testes do endpoint GET /api/projetos/{id}/export/pdf"""
+
+    def _url(self, projeto):
+        return f"/api/projetos/{projeto.id}/export/pdf"
+
+    def test_gera_pdf_e_serve_do_cache(self, client, auth_headers, projeto, cache_pdf):
+        """O segundo download vem do cache com o mesmo conteúdo"""
+        primeira = client.get(self._url(projeto), headers=auth_headers)
+        assert primeira.status_code == 200
+        assert primeira.headers["content-type"] == "application/pdf"
+        assert primeira.headers["x-pdf-cache"] == "MISS"
+        assert primeira.content.startswith(b"%PDF")
+
+        segunda = client.get(self._url(projeto), headers=auth_headers)
+        assert segunda.headers["x-pdf-cache"] == "HIT"
+        assert segunda.content == primeira.content
+
+    def test_alteracao_invalida_cache(self, client, auth_headers, projeto, cache_pdf, seed_session):
+        """Um novo faturamento muda a chave e gera outro PDF"""
+        client.get(self._url(projeto), headers=auth_headers)
+
+        funcionario = factories.criar_funcionarios(seed_session, 1, inicio=10)
+        factories.criar_faturamentos(seed_session, 1, [projeto], funcionario)
+
+        response = client.get(self._url(projeto), headers=auth_headers)
+        assert response.headers["x-pdf-cache"] == "MISS"
+
+    def test_rodape_com_a_data_dos_dados(self, client, auth_headers, projeto, cache_pdf, seed_session, monkeypatch):
+        """O rodapé traz quando os dados foram lidos: o PDF do cache mantém essa data"""
+        agora = {"valor": datetime(2026, 3, 1, 9, 30)}
+
+        class Relogio(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return agora["valor"]
+
+        monkeypatch.setattr(pdf_service, "datetime", Relogio)
+        primeira = client.get(self._url(projeto), headers=auth_headers)
+        assert b"Dados de: 01/03/2026 09:30" in _texto_pdf(primeira.content)
+        assert b"Gerado em" not in _texto_pdf(primeira.content)
+
+        agora["valor"] = datetime(2026, 3, 5, 14, 0)
+        segunda = client.get(self._url(projeto), headers=auth_headers)
+        assert segunda.headers["x-pdf-cache"] == "HIT"
+        assert b"Dados de: 01/03/2026 09:30" in _texto_pdf(segunda.content)
+
+        funcionario = factories.criar_funcionarios(seed_session, 1, inicio=10)
+        factories.criar_faturamentos(seed_session, 1, [projeto], funcionario)
+        terceira = client.get(self._url(projeto), headers=auth_headers)
+        assert terceira.headers["x-pdf-cache"] == "MISS"
+        assert b"Dados de: 05/03/2026 14:00" in _texto_pdf(terceira.content)
+
+    def test_queries_nao_dependem_do_historico(self, client, auth_headers, projeto, cache_pdf, assert_max_queries):
+        """Usuários do histórico vêm no mesmo join (autenticação + 3 queries)"""
+        with assert_max_queries(4):
+            response = client.get(self._url(projeto), headers=auth_headers)
+        assert response.status_code == 200
+
+    def test_projeto_inexistente(self, client, auth_headers, cache_pdf):
+        """Retorna 404 para projeto que não existe"""
+        response = client.get("/api/projetos/999/export/pdf", headers=auth_headers)
+        assert response.status_code == 404
+
+
+@pytest.fixture
+def projetos_lote(seed_session):
+    """Dois clientes com projetos em execução e um projeto concluído"""
+    pessoas = factories.criar_pessoas_juridicas(seed_session, 2)
+    contatos = factories.criar_contatos(seed_session, 2, pessoas)
+    funcionarios = factories.criar_funcionarios(seed_session, 2)
+    projetos = factories.criar_projetos(seed_session, 4, contatos)
+    projetos += factories.criar_projetos(
+        seed_session, 1, contatos, inicio=4, status=StatusProjeto.CONCLUIDO
+    )
+    factories.criar_faturamentos(seed_session, 10, projetos, funcionarios)
+    factories.criar_cronogramas(seed_session, projetos)
+    return projetos
+
+
+@pytest.fixture
+def sem_pool(monkeypatch):
+    """Renderiza no próprio processo"""
+    monkeypatch.setattr(settings, "PDF_BATCH_WORKERS", 0)
+
+
+def _arquivos_zip(response) -> dict:
+    with zipfile.ZipFile(BytesIO(response.content)) as arquivo_zip:
+        return {nome: arquivo_zip.read(nome) for nome in arquivo_zip.namelist()}
+
+
+class TestExportarPdfLote:
+    """Testes do endpoint POST /api/projetos/export/pdf-batch"""
+
+    URL = "/api/projetos/export/pdf-batch"
+
+    def test_zip_com_todos_os_projetos(self, client, auth_headers, projetos_lote, cache_pdf, sem_pool):
+        """Sem filtro, o ZIP traz um PDF por projeto"""
+        response = client.post(self.URL, json={}, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
+        assert response.headers["x-total-projetos"] == "5"
+
+        arquivos = _arquivos_zip(response)
+        assert sorted(arquivos) == sorted(f"projeto_{p.numero}.pdf" for p in projetos_lote)
+        assert all(conteudo.startswith(b"%PDF") for conteudo in arquivos.values())
+
+    def test_filtros(self, client, auth_headers, projetos_lote, cache_pdf, sem_pool):
+        """Status e cliente restringem os projetos exportados"""
+        response = client.post(self.URL, json={"status": ["Concluído"]}, headers=auth_headers)
+        assert list(_arquivos_zip(response)) == [f"projeto_{projetos_lote[4].numero}.pdf"]
+
+        cliente_id = projetos_lote[0].cliente_id
+        response = client.post(self.URL, json={"cliente_id": cliente_id}, headers=auth_headers)
+        esperados = {f"projeto_{p.numero}.pdf" for p in projetos_lote if p.cliente_id == cliente_id}
+        assert set(_arquivos_zip(response)) == esperados
+
+    def test_filtro_por_data(self, client, auth_headers, projetos_lote, cache_pdf, sem_pool):
+        """Um intervalo sem projetos criados retorna 404"""
+        response = client.post(
+            self.URL, json={"data_inicio": "2000-01-01", "data_fim": "2000-01-31"}, headers=auth_headers
+        )
+        assert response.status_code == 404
+
+    def test_status_invalido(self, client, auth_headers):
+        """Status fora da lista é rejeitado na validação"""
+        response = client.post(self.URL, json={"status": ["Inexistente"]}, headers=auth_headers)
+        assert response.status_code == 422
+
+    def test_limite_de_projetos(self, client, auth_headers, projetos_lote, monkeypatch):
+        """Filtros que retornam projetos demais são recusados"""
+        monkeypatch.setattr(settings, "PDF_BATCH_MAX_PROJETOS", 3)
+        response = client.post(self.URL, json={}, headers=auth_headers)
+        assert response.status_code == 400
+
+    def test_usa_cache(self, client, auth_headers, projetos_lote, cache_pdf, sem_pool, monkeypatch):
+        """Relatórios já gerados não são renderizados de novo"""
+        primeira = _arquivos_zip(client.post(self.URL, json={}, headers=auth_headers))
+
+        def falhar(*args, **kwargs):
+            raise AssertionError("não deveria renderizar")
+
+        monkeypatch.setattr(pdf_service, "renderizar_pdf_projeto", falhar)
+        segunda = _arquivos_zip(client.post(self.URL, json={}, headers=auth_headers))
+        assert segunda == primeira
+
+    def test_falha_individual_vai_para_erros(self, client, auth_headers, projetos_lote, cache_pdf, sem_pool, monkeypatch):
+        """Um relatório que falha não interrompe o lote"""
+        renderizar = pdf_service.renderizar_pdf_projeto
+        numero_falha = projetos_lote[0].numero
+
+        def renderizar_com_falha(dados, usuario):
+            if dados["numero"] == numero_falha:
+                raise ValueError("falha simulada")
+            return renderizar(dados, usuario)
+
+        monkeypatch.setattr(pdf_service, "renderizar_pdf_projeto", renderizar_com_falha)
+        arquivos = _arquivos_zip(client.post(self.URL, json={}, headers=auth_headers))
+
+        assert f"projeto_{numero_falha}.pdf" not in arquivos
+        assert len(arquivos) == 5
+        assert b"falha simulada" in arquivos["erros.txt"]
+
+    def test_queries_constantes(self, client, auth_headers, projetos_lote, cache_pdf, sem_pool, assert_max_queries):
+        """Autenticação + projetos + faturamentos + cronogramas, independente do número de projetos"""
+        with assert_max_queries(4):
+            response = client.post(self.URL, json={}, headers=auth_headers)
+        assert response.status_code == 200
+
+    def test_pool_de_processos(self, client, auth_headers, projetos_lote, cache_pdf, monkeypatch):
+        """Os PDFs renderizados nos processos do pool vão para o ZIP e para o cache"""
+        monkeypatch.setattr(settings, "PDF_BATCH_WORKERS", 2)
+        try:
+            response = client.post(self.URL, json={}, headers=auth_headers)
+        finally:
+            pdf_service.encerrar_pool()
+
+        arquivos = _arquivos_zip(response)
+        assert len(arquivos) == 5
+        assert all(conteudo.startswith(b"%PDF") for conteudo in arquivos.values())
+        assert len(list(cache_pdf.diretorio.glob("*.pdf"))) == 5
+
+
+class _PoolFalso:
+    """Pool com resultados definidos pelo teste"""
+
+    def __init__(self, resultados):
+        self.resultados = list(resultados)
+        self.futuros = []
+
+    def submit(self, funcao, *args):
+        futuro = Future()
+        resultado = self.resultados.pop(0)
+        if isinstance(resultado, Exception):
+            futuro.set_exception(resultado)
+        elif resultado is not None:
+            futuro.set_result(resultado)
+        self.futuros.append(futuro)
+        return futuro
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+class TestPoolDeProcessos:
+    """Pool quebrado e cancelamento das renderizações pendentes"""
+
+    PENDENTES = [("a", {"numero": "A"}), ("b", {"numero": "B"})]
+
+    def test_worker_morto(self, monkeypatch):
+        """Com um worker morto o pool é descartado e o lote termina no próprio processo"""
+        monkeypatch.setattr(settings, "PDF_BATCH_WORKERS", 1)
+        try:
+            pool = pdf_service._obter_pool()
+            with pytest.raises(BrokenProcessPool):
+                pool.submit(os._exit, 1).result()
+            monkeypatch.setattr(pdf_service, "renderizar_pdf_projeto", lambda dados, usuario: b"%PDF local")
+
+            resultados = list(pdf_service._renderizar_pendentes(self.PENDENTES, "teste"))
+            assert sorted(r[0] for r in resultados) == ["a", "b"]
+            assert all(r[2] == b"%PDF local" for r in resultados)
+            assert pdf_service._obter_pool() is not pool
+        finally:
+            pdf_service.encerrar_pool()
+
+    def test_encerrado_no_shutdown(self, db_session, monkeypatch):
+        """O lifespan encerra o pool quando a aplicação para"""
+        chamadas = []
+        monkeypatch.setattr(pdf_service, "encerrar_pool", lambda: chamadas.append(True))
+        with TestClient(app):
+            pass
+        assert chamadas
+
+    def test_pool_quebra_no_meio(self, monkeypatch):
+        pool = _PoolFalso([b"%PDF pool", BrokenProcessPool("worker morto")])
+        monkeypatch.setattr(pdf_service, "_obter_pool", lambda: pool)
+        monkeypatch.setattr(pdf_service, "renderizar_pdf_projeto", lambda dados, usuario: b"%PDF local")
+        resultados = {r[0]: r[2] for r in pdf_service._renderizar_pendentes(self.PENDENTES, "teste")}
+        assert resultados == {"a": b"%PDF pool", "b": b"%PDF local"}
+
+    def test_cancela_pendentes(self, monkeypatch):
+        """Fechar o gerador (cliente desconectado) cancela o que não foi concluído"""
+        pool = _PoolFalso([b"%PDF pool", None])
+        monkeypatch.setattr(pdf_service, "_obter_pool", lambda: pool)
+        gerador = pdf_service._renderizar_pendentes(self.PENDENTES, "teste")
+        assert next(gerador)[0] == "a"
+        gerador.close()
+        assert pool.futuros[1].cancelled()
+
+
+class TestLogo:
+    """O logo é decodificado uma única vez"""
+
+    def test_logo_em_memoria(self, tmp_path, monkeypatch, projeto, db_session):
+        """Renderizações seguidas reutilizam o logo já carregado"""
+        logo_path = tmp_path / "logo.png"
+        Image.new("RGB", (400, 100), "navy").save(logo_path)
+        monkeypatch.setattr(settings, "LOGO_PATH", str(logo_path))
+        pdf_service._carregar_logo.cache_clear()
+
+        dados = pdf_service.carregar_dados_projeto(db_session, projeto.id)
+        pdf_service.renderizar_pdf_projeto(dados, "teste")
+        pdf_service.renderizar_pdf_projeto(dados, "teste")
+
+        info = pdf_service._carregar_logo.cache_info()
+        assert info.misses == 1
+        assert info.hits >= 1
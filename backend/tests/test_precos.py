@@ -0,0 +1,293 @@
+"""
+Testes das estatísticas de preço dos produtos/serviços
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app import precos_service
+from app.models.produto_servico import ProdutoServicoFornecedor, ProdutoServicoHistoricoPreco
+from tests import factories
+
+
+def _fornecedor_payload(fornecedor_id, preco, ipi="0.00", codigo="F1"):
+    return {
+        "fornecedor_id": fornecedor_id,
+        "codigo_fornecedor": codigo,
+        "preco_unitario": preco,
+        "prazo_entrega_dias": 5,
+        "icms": "0.00",
+        "ipi": ipi,
+        "pis": "0.00",
+        "cofins": "0.00",
+        "iss": "0.00",
+    }
+
+
+def _produto_payload(fornecedores):
+    return {
+        "tipo": "Produto",
+        "unidade_medida": "un",
+        "descricao": "Parafuso",
+        "preco_unitario": "10.00",
+        "fornecedores": fornecedores,
+    }
+
+
+@pytest.fixture
+def fornecedores(seed_session):
+    return factories.criar_pessoas_juridicas(seed_session, 3, tipo="Fornecedor")
+
+
+def _historico(db_session, produto_id):
+    return db_session.query(ProdutoServicoHistoricoPreco).filter(
+        ProdutoServicoHistoricoPreco.produto_servico_id == produto_id
+    ).order_by(ProdutoServicoHistoricoPreco.id).all()
+
+
+class TestCalcularEstatisticas:
+    """Testes do agregado de preços com IPI"""
+
+    def test_media_minimo_maximo_com_ipi(self, seed_session, fornecedores):
+        """O IPI é somado ao preço antes de agregar"""
+        produto = factories.criar_produtos(seed_session, 1, fornecedores)[0]
+        seed_session.add(ProdutoServicoFornecedor(
+            produto_servico_id=produto.id,
+            fornecedor_id=fornecedores[1].id,
+            codigo_fornecedor="X",
+            preco_unitario=Decimal("95.00"),
+            ipi=Decimal("5.00"),
+        ))
+        seed_session.commit()
+
+        # 90.00 sem IPI e 95.00 + 5% = 99.75
+        media, minimo, maximo = precos_service.calcular_preco_medio_com_impostos(seed_session, produto.id)
+        assert (media, minimo, maximo) == (Decimal("94.88"), Decimal("90.00"), Decimal("99.75"))
+
+    def test_equivale_ao_calculo_por_fornecedor(self, seed_session, fornecedores):
+        """O agregado em SQL bate com o cálculo linha a linha"""
+        produtos = factories.criar_produtos(seed_session, 4, fornecedores)
+        for i, produto in enumerate(produtos):
+            seed_session.add(ProdutoServicoFornecedor(
+                produto_servico_id=produto.id,
+                fornecedor_id=fornecedores[2].id,
+                codigo_fornecedor=f"Y{i}",
+                preco_unitario=Decimal("33.33") * (i + 1),
+                ipi=Decimal("7.50"),
+            ))
+        seed_session.commit()
+
+        estatisticas = precos_service.calcular_estatisticas(seed_session)
+        assert set(estatisticas) == {p.id for p in produtos}
+        for produto in produtos:
+            precos = [
+                precos_service.calcular_preco_com_impostos(f.preco_unitario, f.ipi)
+                for f in seed_session.query(ProdutoServicoFornecedor).filter_by(produto_servico_id=produto.id)
+            ]
+            esperado = tuple(
+                v.quantize(Decimal("0.01")) for v in (sum(precos) / len(precos), min(precos), max(precos))
+            )
+            assert estatisticas[produto.id] == esperado
+
+    def test_uma_query_para_todos(self, seed_session, fornecedores, assert_max_queries):
+        """O número de queries não depende do número de produtos"""
+        factories.criar_produtos(seed_session, 200, fornecedores)
+        with assert_max_queries(1):
+            estatisticas = precos_service.calcular_estatisticas(seed_session)
+        assert len(estatisticas) == 200
+
+    def test_produto_sem_fornecedores(self, db_session):
+        """Produtos sem fornecedores têm preços zerados"""
+        assert precos_service.calcular_preco_medio_com_impostos(db_session, 999) == (
+            Decimal("0.00"), Decimal("0.00"), Decimal("0.00")
+        )
+
+
+class TestRecalcularPrecos:
+    """Testes do recálculo em massa"""
+
+    def test_registra_apenas_alterados(self, seed_session, fornecedores):
+        """Só produtos com preço diferente do último registro ganham histórico"""
+        produtos = factories.criar_produtos(seed_session, 3, fornecedores)
+        assert len(precos_service.recalcular_precos(seed_session)) == 3
+        seed_session.commit()
+
+        assert precos_service.recalcular_precos(seed_session) == {}
+
+        fornecedor = seed_session.query(ProdutoServicoFornecedor).filter_by(
+            produto_servico_id=produtos[1].id
+        ).one()
+        fornecedor.preco_unitario = Decimal("120.00")
+        seed_session.commit()
+
+        registrados = precos_service.recalcular_precos(seed_session)
+        assert list(registrados) == [produtos[1].id]
+
+    def test_nao_faz_commit(self, seed_session, fornecedores):
+        """O histórico fica na transação de quem chamou"""
+        factories.criar_produtos(seed_session, 2, fornecedores)
+        precos_service.recalcular_precos(seed_session)
+        seed_session.rollback()
+        assert seed_session.query(ProdutoServicoHistoricoPreco).count() == 0
+
+    def test_endpoint(self, client, admin_headers, seed_session, fornecedores):
+        """POST /recalcular-precos registra e faz commit uma vez"""
+        factories.criar_produtos(seed_session, 5, fornecedores)
+        response = client.post("/api/produtos-servicos/recalcular-precos", headers=admin_headers)
+        assert response.status_code == 200
+        assert response.json()["total_registrados"] == 5
+
+        response = client.post("/api/produtos-servicos/recalcular-precos", headers=admin_headers)
+        assert response.json()["total_registrados"] == 0
+
+    def test_endpoint_apenas_admin(self, client, auth_headers, db_session):
+        """Usuário comum recebe 403"""
+        response = client.post("/api/produtos-servicos/recalcular-precos", headers=auth_headers)
+        assert response.status_code == 403
+
+    def test_endpoint_requer_autenticacao(self, client):
+        """Sem token retorna 401"""
+        response = client.post("/api/produtos-servicos/recalcular-precos")
+        assert response.status_code == 401
+
+
+class TestHistoricoNoCadastro:
+    """O cadastro e a edição registram o histórico na mesma transação"""
+
+    def test_criar_registra_historico(self, client, db_session, fornecedores):
+        """Criar com fornecedores grava o preço inicial"""
+        response = client.post("/api/produtos-servicos/", json=_produto_payload([
+            _fornecedor_payload(fornecedores[0].id, "100.00", ipi="10.00"),
+            _fornecedor_payload(fornecedores[1].id, "80.00", codigo="F2"),
+        ]))
+        assert response.status_code == 200
+
+        historico = _historico(db_session, response.json()["id"])
+        assert len(historico) == 1
+        assert historico[0].preco_medio == Decimal("95.00")
+        assert historico[0].preco_minimo == Decimal("80.00")
+        assert historico[0].preco_maximo == Decimal("110.00")
+
+    def test_criar_sem_fornecedores(self, client, db_session):
+        """Sem fornecedores não há histórico"""
+        response = client.post("/api/produtos-servicos/", json=_produto_payload([]))
+        assert _historico(db_session, response.json()["id"]) == []
+
+    def test_atualizar_fornecedores_registra_historico(self, client, db_session, fornecedores):
+        """Trocar os fornecedores grava um novo registro"""
+        produto_id = client.post("/api/produtos-servicos/", json=_produto_payload([
+            _fornecedor_payload(fornecedores[0].id, "100.00"),
+        ])).json()["id"]
+
+        response = client.put(f"/api/produtos-servicos/{produto_id}", json={"fornecedores": [
+            _fornecedor_payload(fornecedores[0].id, "50.00"),
+        ]})
+        assert response.status_code == 200
+
+        historico = _historico(db_session, produto_id)
+        assert [h.preco_medio for h in historico] == [Decimal("100.00"), Decimal("50.00")]
+
+    def test_atualizar_sem_mudanca_de_preco(self, client, db_session, fornecedores):
+        """Salvar o produto com os mesmos preços não repete o registro"""
+        payload = _produto_payload([_fornecedor_payload(fornecedores[0].id, "100.00")])
+        produto_id = client.post("/api/produtos-servicos/", json=payload).json()["id"]
+
+        client.put(f"/api/produtos-servicos/{produto_id}", json={"fornecedores": payload["fornecedores"]})
+        client.put(f"/api/produtos-servicos/{produto_id}", json={"descricao": "Outro nome"})
+
+        assert len(_historico(db_session, produto_id)) == 1
+
+    def test_fornecedor_inexistente_nao_grava_nada(self, client, db_session):
+        """Erro de validação desfaz produto e histórico juntos"""
+        response = client.post("/api/produtos-servicos/", json=_produto_payload([
+            _fornecedor_payload(999, "100.00"),
+        ]))
+        assert response.status_code == 400
+        assert db_session.query(ProdutoServicoHistoricoPreco).count() == 0
+
+
+def _registros(seed_session, produto, valores):
+    """Histórico com (data, preço médio) informados; mínimo e máximo a 10 do médio"""
+    seed_session.add_all([
+        ProdutoServicoHistoricoPreco(
+            produto_servico_id=produto.id,
+            preco_medio=Decimal(media),
+            preco_minimo=Decimal(media) - 10,
+            preco_maximo=Decimal(media) + 10,
+            registrado_em=data,
+        )
+        for data, media in valores
+    ])
+    seed_session.commit()
+
+
+class TestSerieHistorico:
+    """Testes do endpoint GET /{id}/historico-precos/serie"""
+
+    @pytest.fixture
+    def produto(self, seed_session, fornecedores):
+        produto = factories.criar_produtos(seed_session, 1, fornecedores)[0]
+        _registros(seed_session, produto, [
+            (datetime(2026, 3, 2, 9), "100"),   # segunda-feira
+            (datetime(2026, 3, 2, 15), "120"),
+            (datetime(2026, 3, 4, 10), "90"),
+            (datetime(2026, 3, 10, 10), "110"),
+            (datetime(2026, 4, 1, 10), "130"),
+        ])
+        return produto
+
+    def _serie(self, client, produto, **params):
+        response = client.get(f"/api/produtos-servicos/{produto.id}/historico-precos/serie", params=params)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    def test_diario(self, client, produto):
+        """Um período por dia com abertura, fechamento, máxima e mínima"""
+        serie = self._serie(client, produto)
+        assert [p["periodo"] for p in serie] == ["2026-03-02", "2026-03-04", "2026-03-10", "2026-04-01"]
+        primeiro = serie[0]
+        assert (primeiro["abertura"], primeiro["fechamento"]) == (100.0, 120.0)
+        assert (primeiro["minima"], primeiro["maxima"]) == (100.0, 120.0)
+        assert (primeiro["preco_minimo"], primeiro["preco_maximo"]) == (90.0, 130.0)
+        assert primeiro["registros"] == 2
+
+    def test_semanal(self, client, produto):
+        """Semanas começam na segunda-feira"""
+        serie = self._serie(client, produto, intervalo="semana")
+        assert [(p["periodo"], p["registros"]) for p in serie] == [
+            ("2026-03-02", 3), ("2026-03-09", 1), ("2026-03-30", 1),
+        ]
+        assert (serie[0]["abertura"], serie[0]["fechamento"], serie[0]["minima"]) == (100.0, 90.0, 90.0)
+
+    def test_mensal_com_intervalo(self, client, produto):
+        """inicio/fim limitam os registros considerados"""
+        serie = self._serie(client, produto, intervalo="mes", inicio="2026-03-03T00:00:00")
+        assert [(p["periodo"], p["registros"]) for p in serie] == [("2026-03-01", 2), ("2026-04-01", 1)]
+        assert serie[0]["abertura"] == 90.0
+
+    def test_intervalo_invalido(self, client, produto):
+        response = client.get(f"/api/produtos-servicos/{produto.id}/historico-precos/serie?intervalo=ano")
+        assert response.status_code == 422
+
+    def test_produto_inexistente(self, client):
+        assert client.get("/api/produtos-servicos/999/historico-precos/serie").status_code == 404
+
+    def test_lista_com_intervalo(self, client, produto):
+        """A listagem completa também aceita inicio/fim"""
+        response = client.get(
+            f"/api/produtos-servicos/{produto.id}/historico-precos",
+            params={"inicio": "2026-03-04T00:00:00", "fim": "2026-03-31T00:00:00"},
+        )
+        assert [h["preco_medio"] for h in response.json()] == [90.0, 110.0]
+
+    def test_serie_longa(self, seed_session, fornecedores):
+        """Anos de registros viram poucos pontos no agrupamento mensal"""
+        produto = factories.criar_produtos(seed_session, 1, fornecedores, inicio=1)[0]
+        inicio = datetime(2020, 1, 1)
+        _registros(seed_session, produto, [
+            (inicio + timedelta(hours=12 * i), str(100 + i % 7)) for i in range(2 * 365 * 3)
+        ])
+        serie = precos_service.serie_historico(seed_session, produto.id, "mes")
+        assert len(serie) == 36
+        assert sum(p["registros"] for p in serie) == 2 * 365 * 3
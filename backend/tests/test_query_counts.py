@@ -0,0 +1,275 @@
+"""
+Regressão de N+1: a quantidade de comandos SQL das listagens, exportações e
+importações não pode depender da quantidade de registros
+
+Cada cenário é executado com N = 10, 100 e 1000 registros. O tempo de cada
+chamada é registrado e, se a variável QUERY_BENCHMARK_OUTPUT estiver definida,
+gravado em JSON ao final da sessão para acompanhamento no CI.
+"""
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, List
+
+import pytest
+
+from app.db_instrumentation import QueryCounter
+from app.models.contato import Contato
+from app.models.faturamento import Faturamento
+from app.models.funcionario import Funcionario
+from app.models.pessoa_juridica import PessoaJuridica
+from app.models.projeto import Projeto
+
+from tests import factories
+
+TAMANHOS = (10, 100, 1000)
+
+# Registros de apoio (chaves estrangeiras) ficam fora da faixa usada pelos cenários
+INICIO_BASE = 17000
+QUANTIDADE_BASE = 5
+
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+@pytest.fixture(scope="module")
+def benchmark():
+    """Acumula as medições e grava o relatório quando solicitado"""
+    medicoes: List[dict] = []
+    yield medicoes
+    destino = os.getenv("QUERY_BENCHMARK_OUTPUT")
+    if destino and medicoes:
+        existentes = []
+        if os.path.exists(destino):
+            with open(destino, encoding="utf-8") as f:
+                existentes = json.load(f)
+        with open(destino, "w", encoding="utf-8") as f:
+            json.dump(existentes + medicoes, f, ensure_ascii=False, indent=2)
+
+
+@pytest.fixture
+def base(seed_session):
+    """Empresas, contatos, funcionários e projetos usados como chaves estrangeiras"""
+    pessoas = factories.criar_pessoas_juridicas(seed_session, QUANTIDADE_BASE, inicio=INICIO_BASE)
+    contatos = factories.criar_contatos(seed_session, QUANTIDADE_BASE, pessoas, inicio=INICIO_BASE)
+    funcionarios = factories.criar_funcionarios(seed_session, QUANTIDADE_BASE, inicio=INICIO_BASE)
+    projetos = factories.criar_projetos(seed_session, QUANTIDADE_BASE, contatos, inicio=INICIO_BASE)
+    factories.criar_cronogramas(seed_session, projetos)
+    return {
+        "pessoas": pessoas,
+        "contatos": contatos,
+        "funcionarios": funcionarios,
+        "projetos": projetos,
+    }
+
+
+def _medir(client, db_engine, metodo: str, url: str, **kwargs):
+    with QueryCounter(db_engine) as counter:
+        inicio = time.perf_counter()
+        response = client.request(metodo, url, **kwargs)
+        duracao = time.perf_counter() - inicio
+    assert response.status_code == 200, response.text
+    return counter, duracao, response
+
+
+def _verificar_constante(nome: str, contagens: dict, comandos: dict):
+    if len(set(contagens.values())) > 1:
+        detalhes = "\n".join(
+            f"N={n}: {contagens[n]} queries\n" + "\n".join(f"    {s}" for s in comandos[n])
+            for n in contagens
+        )
+        pytest.fail(f"{nome}: quantidade de queries varia com N\n{detalhes}")
+
+
+@dataclass
+class CenarioLeitura:
+    nome: str
+    url: str
+    semear: Callable[[object, dict, int, int], None]
+    autenticado: bool = False
+
+
+def _semear_pessoas(db, base, inicio, n):
+    factories.criar_pessoas_juridicas(db, n, inicio=inicio)
+
+
+def _semear_contatos(db, base, inicio, n):
+    factories.criar_contatos(db, n, base["pessoas"], inicio=inicio)
+
+
+def _semear_funcionarios(db, base, inicio, n):
+    factories.criar_funcionarios(db, n, inicio=inicio)
+
+
+def _semear_projetos(db, base, inicio, n):
+    factories.criar_projetos(db, n, base["contatos"], inicio=inicio)
+
+
+def _semear_faturamentos(db, base, inicio, n):
+    factories.criar_faturamentos(db, n, base["projetos"], base["funcionarios"])
+
+
+def _semear_cronogramas(db, base, inicio, n):
+    # Metade dos projetos já tem cronograma; a listagem cria o restante
+    projetos = factories.criar_projetos(db, n, base["contatos"], inicio=inicio)
+    factories.criar_cronogramas(db, projetos[: n // 2])
+
+
+def _semear_produtos(db, base, inicio, n):
+    factories.criar_produtos(db, n, base["pessoas"], inicio=inicio)
+
+
+def _semear_despesas(db, base, inicio, n):
+    factories.criar_despesas(
+        db, n, base["projetos"], base["pessoas"], base["funcionarios"], inicio=inicio
+    )
+
+
+CENARIOS_LEITURA = [
+    CenarioLeitura("pessoas-lista", "/api/pessoas-juridicas/", _semear_pessoas),
+    CenarioLeitura("pessoas-export", "/api/pessoas-juridicas/export/excel", _semear_pessoas),
+    CenarioLeitura("contatos-lista", "/api/contatos/", _semear_contatos),
+    CenarioLeitura("contatos-export", "/api/contatos/export/excel", _semear_contatos),
+    CenarioLeitura("funcionarios-lista", "/api/funcionarios/", _semear_funcionarios, True),
+    CenarioLeitura("funcionarios-tecnicos", "/api/funcionarios/tecnicos", _semear_funcionarios, True),
+    CenarioLeitura("funcionarios-export", "/api/funcionarios/export/excel", _semear_funcionarios, True),
+    CenarioLeitura("projetos-lista", "/api/projetos/", _semear_projetos, True),
+    CenarioLeitura("projetos-clientes", "/api/projetos/clientes", _semear_pessoas, True),
+    CenarioLeitura("projetos-export", "/api/projetos/export/excel", _semear_projetos, True),
+    CenarioLeitura("faturamentos-lista", "/api/faturamentos/", _semear_faturamentos, True),
+    CenarioLeitura("faturamentos-export", "/api/faturamentos/export/excel", _semear_faturamentos, True),
+    CenarioLeitura("cronogramas-lista", "/api/cronogramas/", _semear_cronogramas, True),
+    CenarioLeitura("produtos-lista", "/api/produtos-servicos/", _semear_produtos),
+    CenarioLeitura("despesas-lista", "/api/despesas-projetos", _semear_despesas, True),
+]
+
+
+class TestQueryCountListagens:
+    """Listagens e exportações executam um número fixo de queries"""
+
+    @pytest.mark.parametrize("cenario", CENARIOS_LEITURA, ids=lambda c: c.nome)
+    def test_queries_constantes(
+        self, cenario, client, db_engine, seed_session, base, auth_headers, benchmark
+    ):
+        headers = auth_headers if cenario.autenticado else {}
+        contagens, comandos = {}, {}
+        semeados = 0
+        for tamanho in TAMANHOS:
+            cenario.semear(seed_session, base, semeados, tamanho - semeados)
+            semeados = tamanho
+
+            counter, duracao, _ = _medir(client, db_engine, "GET", cenario.url, headers=headers)
+            contagens[tamanho] = counter.count
+            comandos[tamanho] = list(counter.statements)
+            benchmark.append({
+                "cenario": cenario.nome, "n": tamanho,
+                "queries": counter.count, "segundos": round(duracao, 4),
+            })
+
+        _verificar_constante(cenario.nome, contagens, comandos)
+
+
+@dataclass
+class CenarioImportacao:
+    nome: str
+    url: str
+    modelo: type
+    planilha: Callable[[dict, int, int], bytes]
+    autenticado: bool = False
+
+
+def _planilha_pessoas(base, inicio, n):
+    return factories.planilha_excel(
+        ["Razão Social", "Sigla", "CNPJ"],
+        [
+            [f"Importada {i} Ltda", factories.gerar_sigla(i), f"{i:014d}"]
+            for i in range(inicio, inicio + n)
+        ],
+    )
+
+
+def _planilha_contatos(base, inicio, n):
+    empresas = [p.razao_social for p in base["pessoas"]]
+    return factories.planilha_excel(
+        ["Nome", "Empresa", "Email"],
+        [
+            [f"Contato Importado {i}", empresas[i % len(empresas)], f"imp{i}@fake.com"]
+            for i in range(inicio, inicio + n)
+        ],
+    )
+
+
+def _planilha_funcionarios(base, inicio, n):
+    return factories.planilha_excel(
+        ["Nome", "Departamento"],
+        [[f"Funcionário Importado {i}", "Técnico"] for i in range(inicio, inicio + n)],
+    )
+
+
+def _planilha_projetos(base, inicio, n):
+    contatos = base["contatos"]
+    empresas = {p.id: p.razao_social for p in base["pessoas"]}
+    return factories.planilha_excel(
+        ["Número", "Cliente", "Nome do Projeto", "Contato", "Técnico"],
+        [
+            [
+                f"IMP-{i:05d}",
+                empresas[contatos[i % len(contatos)].pessoa_juridica_id],
+                f"Projeto Importado {i}",
+                contatos[i % len(contatos)].nome,
+                "Técnico Fake",
+            ]
+            for i in range(inicio, inicio + n)
+        ],
+    )
+
+
+def _planilha_faturamentos(base, inicio, n):
+    projetos, funcionarios = base["projetos"], base["funcionarios"]
+    return factories.planilha_excel(
+        ["ID", "Projeto ID", "Técnico ID", "Valor Faturado", "Data Faturamento", "Observações"],
+        [
+            [None, projetos[i % len(projetos)].id, funcionarios[i % len(funcionarios)].id, 100, None, f"Importado {i}"]
+            for i in range(inicio, inicio + n)
+        ],
+    )
+
+
+CENARIOS_IMPORTACAO = [
+    CenarioImportacao("pessoas-import", "/api/pessoas-juridicas/import/excel", PessoaJuridica, _planilha_pessoas),
+    CenarioImportacao("contatos-import", "/api/contatos/import/excel", Contato, _planilha_contatos),
+    CenarioImportacao("funcionarios-import", "/api/funcionarios/import/excel", Funcionario, _planilha_funcionarios, True),
+    CenarioImportacao("projetos-import", "/api/projetos/import/excel", Projeto, _planilha_projetos, True),
+    CenarioImportacao("faturamentos-import", "/api/faturamentos/import/excel", Faturamento, _planilha_faturamentos, True),
+]
+
+
+class TestQueryCountImportacoes:
+    """Importações validam e inserem em lote, sem queries por linha"""
+
+    @pytest.mark.parametrize("cenario", CENARIOS_IMPORTACAO, ids=lambda c: c.nome)
+    def test_queries_constantes(
+        self, cenario, client, db_engine, seed_session, base, auth_headers, benchmark
+    ):
+        headers = auth_headers if cenario.autenticado else {}
+        contagens, comandos = {}, {}
+        inicio = 0
+        for tamanho in TAMANHOS:
+            antes = seed_session.query(cenario.modelo).count()
+            arquivo = cenario.planilha(base, inicio, tamanho)
+            inicio += tamanho
+
+            counter, duracao, _ = _medir(
+                client, db_engine, "POST", cenario.url, headers=headers,
+                files={"file": ("dados.xlsx", arquivo, XLSX)},
+            )
+            assert seed_session.query(cenario.modelo).count() == antes + tamanho
+
+            contagens[tamanho] = counter.count
+            comandos[tamanho] = list(counter.statements)
+            benchmark.append({
+                "cenario": cenario.nome, "n": tamanho,
+                "queries": counter.count, "segundos": round(duracao, 4),
+            })
+
+        _verificar_constante(cenario.nome, contagens, comandos)
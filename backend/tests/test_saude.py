@@ -0,0 +1,141 @@
+"""
+Testes da preparação do banco (Alembic fora da importação) e das sondas de
+vivacidade e prontidão
+"""
+import time
+
+import pytest
+from alembic import command
+from sqlalchemy import create_engine, inspect, text
+
+from app.database import Base
+from app.models.dashboard import (
+    DashboardCliente,
+    DashboardFaturamentoMensal,
+    DashboardPrazo,
+    DashboardProjetosStatus,
+)
+from app.preparar_banco import configuracao_alembic, preparar_banco, revisao_head
+from app.saude_service import Prontidao, prontidao
+
+
+@pytest.fixture
+def banco(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'preparar.db'}")
+    yield engine
+    engine.dispose()
+
+
+def _versao(engine) -> str:
+    with engine.connect() as conexao:
+        return conexao.execute(text("SELECT version_num FROM alembic_version")).scalar_one()
+
+
+class TestPreparacaoBanco:
+    """python -m app.preparar_banco cria ou migra o schema e marca a revisão"""
+
+    def test_banco_vazio(self, banco):
+        assert preparar_banco(banco) == "create"
+        assert set(Base.metadata.tables) <= set(inspect(banco).get_table_names())
+        assert _versao(banco) == revisao_head()
+
+    def test_idempotente(self, banco):
+        preparar_banco(banco)
+        assert preparar_banco(banco) == "upgrade"
+        assert _versao(banco) == revisao_head()
+
+    def test_banco_sem_versao(self, banco):
+        """Bancos criados pelo antigo create_all da inicialização são adotados pelo Alembic"""
+        Base.metadata.create_all(bind=banco)
+        assert preparar_banco(banco) == "stamp"
+        assert _versao(banco) == revisao_head()
+
+    def test_aplica_migracao_pendente(self, banco):
+        """Com uma revisão anterior, o upgrade cria só o que falta"""
+        Base.metadata.create_all(bind=banco)
+        tabelas = (DashboardFaturamentoMensal, DashboardProjetosStatus, DashboardCliente, DashboardPrazo)
+        Base.metadata.drop_all(bind=banco, tables=[t.__table__ for t in tabelas])
+        with banco.begin() as conexao:
+            command.stamp(configuracao_alembic(conexao), "e1f7a3c5b9d2")
+
+        assert preparar_banco(banco) == "upgrade"
+        assert {t.__tablename__ for t in tabelas} <= set(inspect(banco).get_table_names())
+        assert _versao(banco) == revisao_head()
+
+
+class TestProntidao:
+    """Banco acessível e schema na revisão head"""
+
+    def test_pronto(self, banco):
+        preparar_banco(banco)
+        resultado = Prontidao().verificar(banco)
+        assert resultado["ready"] is True
+        assert (resultado["database"], resultado["schema"]) == ("connected", "atualizado")
+
+    def test_sem_migracoes(self, banco):
+        Base.metadata.create_all(bind=banco)
+        resultado = Prontidao().verificar(banco)
+        assert resultado["ready"] is False
+        assert (resultado["database"], resultado["schema"]) == ("connected", "sem_versao")
+
+    def test_schema_desatualizado(self, banco):
+        preparar_banco(banco)
+        with banco.begin() as conexao:
+            conexao.execute(text("UPDATE alembic_version SET version_num = 'e1f7a3c5b9d2'"))
+        assert Prontidao().verificar(banco)["schema"] == "desatualizado"
+
+    def test_banco_inacessivel(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'inexistente' / 'banco.db'}")
+        resultado = Prontidao().verificar(engine)
+        assert (resultado["ready"], resultado["database"]) == (False, "disconnected")
+
+    def test_resultado_em_cache(self, banco, monkeypatch):
+        estado = Prontidao()
+        primeiro = estado.atual(banco)
+        monkeypatch.setattr(estado, "verificar", lambda engine: pytest.fail("verificou de novo"))
+        assert estado.atual(banco) is primeiro
+
+
+class TestSondas:
+    """As sondas respondem pelo resultado da prontidão"""
+
+    @pytest.fixture
+    def em_cache(self, monkeypatch):
+        """Define o resultado da prontidão; pedir antes de `client` (a tarefa do lifespan verifica ao iniciar)"""
+        resultado = {}
+
+        def definir(pronto: bool):
+            resultado.update({
+                "ready": pronto,
+                "database": "connected",
+                "schema": "atualizado" if pronto else "sem_versao",
+                "verificado_em": "2026-01-01T00:00:00",
+            })
+            monkeypatch.setattr(prontidao, "resultado", resultado)
+            monkeypatch.setattr(prontidao, "_verificado_em", time.monotonic())
+
+        monkeypatch.setattr(prontidao, "verificar", lambda engine: resultado)
+        return definir
+
+    def test_vivacidade(self, client):
+        response = client.get("/health/live")
+        assert response.status_code == 200
+        assert response.json() == {"status": "alive"}
+
+    def test_pronto(self, em_cache, client):
+        em_cache(True)
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+
+    def test_nao_pronto(self, em_cache, client):
+        em_cache(False)
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json()["schema"] == "sem_versao"
+
+    def test_health_compativel(self, em_cache, client):
+        em_cache(False)
+        dados = client.get("/health").json()
+        assert dados["status"] == "healthy"
+        assert dados["database"] == "connected"
@@ -0,0 +1,159 @@
+"""
+Testes das sequências de códigos e da reserva de códigos internos
+"""
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import sequencia_service
+from app.database import Base
+from app.models.produto_servico import ProdutoServico, TipoProdutoServico
+from app.models.sequencia import SequenciaCodigo
+
+
+def _produto_payload(tipo="Produto"):
+    return {"tipo": tipo, "unidade_medida": "un", "descricao": "Item", "fornecedores": []}
+
+
+class TestReservar:
+    """Testes da reserva atômica"""
+
+    def test_valores_consecutivos(self, db_session):
+        """Reservas seguidas continuam de onde a anterior parou"""
+        assert list(sequencia_service.reservar(db_session, "teste")) == [1]
+        assert list(sequencia_service.reservar(db_session, "teste", 3)) == [2, 3, 4]
+        assert db_session.get(SequenciaCodigo, "teste").ultimo_valor == 4
+
+    def test_valor_inicial(self, db_session):
+        """A primeira reserva parte do valor atual informado"""
+        assert list(sequencia_service.reservar(db_session, "teste", 2, valor_atual=lambda: 41)) == [42, 43]
+        assert list(sequencia_service.reservar(db_session, "teste", valor_atual=lambda: 0)) == [44]
+
+    def test_rollback_devolve_valores(self, db_session):
+        """A reserva faz parte da transação de quem chamou"""
+        sequencia_service.reservar(db_session, "teste", 5)
+        db_session.commit()
+        sequencia_service.reservar(db_session, "teste", 5)
+        db_session.rollback()
+        assert list(sequencia_service.reservar(db_session, "teste")) == [6]
+
+    def test_quantidade_invalida(self, db_session):
+        with pytest.raises(ValueError):
+            sequencia_service.reservar(db_session, "teste", 0)
+
+    def test_concorrencia(self, tmp_path):
+        """Sessões concorrentes nunca recebem o mesmo valor"""
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'sequencias.db'}",
+            connect_args={"check_same_thread": False, "timeout": 30},
+        )
+        Base.metadata.create_all(bind=engine, tables=[SequenciaCodigo.__table__])
+        Sessao = sessionmaker(bind=engine)
+        reservados = []
+        lock = threading.Lock()
+
+        def trabalhador():
+            for _ in range(25):
+                with Sessao() as db:
+                    valores = list(sequencia_service.reservar(db, "concorrente", 2))
+                    db.commit()
+                with lock:
+                    reservados.extend(valores)
+
+        threads = [threading.Thread(target=trabalhador) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+        assert sorted(reservados) == list(range(1, 8 * 25 * 2 + 1))
+
+
+class TestCodigoInterno:
+    """Testes dos códigos internos de produtos/serviços"""
+
+    def test_prefixo_por_tipo(self, client):
+        """Produtos e serviços têm sequências independentes"""
+        codigos = [
+            client.post("/api/produtos-servicos/", json=_produto_payload(tipo)).json()["codigo_interno"]
+            for tipo in ("Produto", "Serviço", "Produto")
+        ]
+        assert codigos == ["P0000001", "S0000001", "P0000002"]
+
+    def test_continua_do_maior_existente(self, client, seed_session):
+        """Bancos com produtos antigos continuam a partir do maior código do tipo"""
+        seed_session.add(ProdutoServico(
+            codigo_interno="P0000120",
+            tipo=TipoProdutoServico.PRODUTO,
+            unidade_medida="un",
+            descricao="Antigo",
+        ))
+        seed_session.commit()
+
+        response = client.post("/api/produtos-servicos/", json=_produto_payload())
+        assert response.json()["codigo_interno"] == "P0000121"
+
+    def test_reserva_em_lote(self, client, auth_headers):
+        """O endpoint reserva N códigos de uma vez, e o cadastro segue depois deles"""
+        response = client.post(
+            "/api/produtos-servicos/codigos-internos/reservar",
+            json={"tipo": "Produto", "quantidade": 3},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["codigos"] == ["P0000001", "P0000002", "P0000003"]
+
+        criado = client.post("/api/produtos-servicos/", json=_produto_payload())
+        assert criado.json()["codigo_interno"] == "P0000004"
+
+    def test_cadastro_com_codigo_reservado(self, client, auth_headers):
+        """Um código reservado é usado no cadastro, uma vez só"""
+        codigos = client.post(
+            "/api/produtos-servicos/codigos-internos/reservar",
+            json={"tipo": "Produto", "quantidade": 2},
+            headers=auth_headers,
+        ).json()["codigos"]
+
+        criado = client.post("/api/produtos-servicos/", json={**_produto_payload(), "codigo_interno": codigos[1]})
+        assert criado.status_code == 200, criado.text
+        assert criado.json()["codigo_interno"] == "P0000002"
+
+        repetido = client.post("/api/produtos-servicos/", json={**_produto_payload(), "codigo_interno": codigos[1]})
+        assert repetido.status_code == 400
+
+    @pytest.mark.parametrize("codigo", ["P0000003", "S0000001", "P001", "PABCDEFG"])
+    def test_codigo_nao_reservado(self, client, auth_headers, codigo):
+        client.post(
+            "/api/produtos-servicos/codigos-internos/reservar",
+            json={"tipo": "Produto", "quantidade": 2},
+            headers=auth_headers,
+        )
+        response = client.post("/api/produtos-servicos/", json={**_produto_payload(), "codigo_interno": codigo})
+        assert response.status_code == 400
+
+    def test_codigos_esgotados(self, client, db_session):
+        """Além de 7 dígitos o código não cabe na coluna; a reserva é recusada"""
+        sequencia_service.reservar(db_session, "codigo_interno_P", 9_999_999)
+        db_session.commit()
+        response = client.post("/api/produtos-servicos/", json=_produto_payload())
+        assert response.status_code == 400
+        assert "esgotados" in response.json()["detail"]
+
+    def test_reserva_tipo_invalido(self, client, auth_headers):
+        response = client.post(
+            "/api/produtos-servicos/codigos-internos/reservar",
+            json={"tipo": "Outro", "quantidade": 1},
+            headers=auth_headers,
+        )
+        assert response.status_code == 400
+
+    def test_reserva_quantidade_invalida(self, client, auth_headers):
+        response = client.post(
+            "/api/produtos-servicos/codigos-internos/reservar",
+            json={"tipo": "Produto", "quantidade": 0},
+            headers=auth_headers,
+        )
+        assert response.status_code == 422
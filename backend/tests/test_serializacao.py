@@ -0,0 +1,262 @@
+"""
+Testes da serialização das respostas: ORJSONResponse como padrão, schemas de
+despesa lidos direto do ORM e o caminho rápido resposta_orm()
+"""
+import asyncio
+import gc
+import json
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List
+
+import pytest
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.main import app
+from app.models.despesa_projeto import DespesaProjeto, DespesaProjetoItem, StatusDespesa, TipoFrete
+from app.models.funcionario import Funcionario
+from app.models.pessoa_juridica import PessoaJuridica
+from app.models.projeto import Projeto
+from app.schemas.despesa_projeto import DespesaProjeto as DespesaProjetoSchema
+from app.serializacao import resposta_orm
+from tests import factories
+
+
+def _despesas_transientes(n: int) -> List[DespesaProjeto]:
+    """Despesas fora do banco, com os relacionamentos já preenchidos"""
+    projeto = Projeto(id=1, numero="TC2601001", nome="Projeto")
+    fornecedor = PessoaJuridica(id=2, razao_social="Fornecedor Ltda", sigla="FOR")
+    tecnico = Funcionario(id=3, nome="Técnico")
+    despesas = []
+    for i in range(n):
+        despesa = DespesaProjeto(
+            id=i + 1,
+            numero_despesa=f"PC2601001-FOR{i:05d}",
+            projeto_id=1,
+            fornecedor_id=2,
+            tecnico_responsavel_id=3,
+            status=StatusDespesa.CONFIRMADO,
+            data_pedido=date(2026, 1, 1),
+            previsao_entrega=date(2026, 2, 1),
+            prazo_entrega_dias=30,
+            condicao_pagamento="30 dias",
+            tipo_frete=TipoFrete.CIF,
+            valor_frete=Decimal("150.00"),
+            observacoes="Observação",
+            criado_em=datetime(2026, 1, 1, 8, 0),
+            atualizado_em=datetime(2026, 1, 2, 8, 0),
+        )
+        despesa.projeto = projeto
+        despesa.fornecedor = fornecedor
+        despesa.tecnico_responsavel = tecnico
+        despesas.append(despesa)
+    return despesas
+
+
+def _dict_despesa(despesa) -> dict:
+    """Montagem manual usada pelas rotas antes dos schemas com from_attributes"""
+    return {
+        "id": despesa.id,
+        "numero_despesa": despesa.numero_despesa,
+        "projeto_id": despesa.projeto_id,
+        "fornecedor_id": despesa.fornecedor_id,
+        "tecnico_responsavel_id": despesa.tecnico_responsavel_id,
+        "contato_id": despesa.contato_id,
+        "status": despesa.status,
+        "data_pedido": despesa.data_pedido,
+        "previsao_entrega": despesa.previsao_entrega,
+        "prazo_entrega_dias": despesa.prazo_entrega_dias,
+        "condicao_pagamento": despesa.condicao_pagamento,
+        "tipo_frete": despesa.tipo_frete,
+        "valor_frete": float(despesa.valor_frete) if despesa.valor_frete else 0.0,
+        "observacoes": despesa.observacoes,
+        "criado_em": despesa.criado_em,
+        "atualizado_em": despesa.atualizado_em,
+        "projeto": {
+            "id": despesa.projeto.id,
+            "numero": despesa.projeto.numero,
+            "nome": despesa.projeto.nome,
+        },
+        "fornecedor": {
+            "id": despesa.fornecedor.id,
+            "razao_social": despesa.fornecedor.razao_social,
+            "sigla": despesa.fornecedor.sigla,
+        },
+        "tecnico_responsavel": {
+            "id": despesa.tecnico_responsavel.id,
+            "nome": despesa.tecnico_responsavel.nome,
+        },
+    }
+
+
+def _caminho_padrao(despesas) -> bytes:
+    """Dicts por linha, validação do response_model e json da biblioteca padrão"""
+    campo = create_model_field(name="Response", type_=List[DespesaProjetoSchema], mode="serialization")
+    conteudo = asyncio.run(serialize_response(
+        field=campo, response_content=[_dict_despesa(d) for d in despesas], is_coroutine=False
+    ))
+    return JSONResponse(conteudo).body
+
+
+def _p95(*funcoes, repeticoes: int = 7) -> List[float]:
+    """p95 de cada função, executadas de forma alternada após um aquecimento"""
+    duracoes = [[] for _ in funcoes]
+    for funcao in funcoes:
+        funcao()
+    for _ in range(repeticoes):
+        for i, funcao in enumerate(funcoes):
+            gc.collect()
+            inicio = time.perf_counter()
+            funcao()
+            duracoes[i].append(time.perf_counter() - inicio)
+    return [sorted(d)[int(0.95 * (len(d) - 1))] for d in duracoes]
+
+
+class TestRespostaOrm:
+    """O caminho rápido gera o mesmo JSON que o caminho padrão"""
+
+    def test_orjson_padrao(self):
+        assert app.router.default_response_class is ORJSONResponse
+
+    def test_mesmo_conteudo(self):
+        despesas = _despesas_transientes(3)
+        assert json.loads(resposta_orm(List[DespesaProjetoSchema], despesas).body) == json.loads(
+            _caminho_padrao(despesas)
+        )
+
+    def test_frete_ausente(self):
+        despesa = _despesas_transientes(1)[0]
+        despesa.valor_frete = None
+        assert json.loads(resposta_orm(DespesaProjetoSchema, despesa).body)["valor_frete"] == 0.0
+
+    @pytest.mark.benchmark
+    def test_p95_listagem_10k(self):
+        """Com 10 mil despesas o p95 do caminho rápido fica abaixo do caminho padrão"""
+        despesas = _despesas_transientes(10_000)
+        padrao, rapido = _p95(
+            lambda: _caminho_padrao(despesas),
+            lambda: resposta_orm(List[DespesaProjetoSchema], despesas),
+        )
+        assert rapido < padrao, f"p95 padrão {padrao * 1000:.0f} ms, rápido {rapido * 1000:.0f} ms"
+
+
+class TestRotasDespesa:
+    """As rotas de despesa respondem pelos schemas, sem montar dicts"""
+
+    def _base(self, seed_session):
+        pessoas = factories.criar_pessoas_juridicas(seed_session, 1)
+        projetos = factories.criar_projetos(seed_session, 1, factories.criar_contatos(seed_session, 1, pessoas))
+        funcionarios = factories.criar_funcionarios(seed_session, 1)
+        return pessoas, projetos, funcionarios
+
+    def test_listar_e_obter(self, client, auth_headers, seed_session):
+        pessoas, projetos, funcionarios = self._base(seed_session)
+        despesas = factories.criar_despesas(seed_session, 2, projetos, pessoas, funcionarios)
+
+        lista = client.get("/api/despesas-projetos", headers=auth_headers).json()
+        assert len(lista) == 2
+        assert lista[0]["status"] == "Rascunho"
+        assert lista[0]["valor_frete"] == 0.0
+        assert lista[0]["projeto"] == {"id": projetos[0].id, "numero": projetos[0].numero, "nome": projetos[0].nome}
+        assert lista[0]["fornecedor"]["sigla"] == pessoas[0].sigla
+        assert lista[0]["tecnico_responsavel"] == {"id": funcionarios[0].id, "nome": funcionarios[0].nome}
+
+        response = client.get(f"/api/despesas-projetos/{despesas[1].id}", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json() == lista[1]
+
+    def test_criar_e_atualizar(self, client, auth_headers, seed_session):
+        pessoas, projetos, funcionarios = self._base(seed_session)
+        response = client.post("/api/despesas-projetos", json={
+            "projeto_id": projetos[0].id,
+            "fornecedor_id": pessoas[0].id,
+            "tecnico_responsavel_id": funcionarios[0].id,
+            "status": "enviado",
+            "data_pedido": "2026-03-01",
+            "valor_frete": 80.5,
+        }, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        criada = response.json()
+        assert criada["status"] == "Enviado"
+        assert criada["valor_frete"] == 80.5
+        assert criada["fornecedor"]["id"] == pessoas[0].id
+
+        response = client.put(
+            f"/api/despesas-projetos/{criada['id']}", json={"tipo_frete": "FOB"}, headers=auth_headers
+        )
+        assert response.status_code == 200, response.text
+        assert response.json()["tipo_frete"] == "FOB"
+
+    def test_inexistente(self, client, auth_headers, db_session):
+        assert client.get("/api/despesas-projetos/999", headers=auth_headers).status_code == 404
+
+
+class TestIncludeDespesas:
+    """?include=itens,totais traz itens e totais na mesma requisição"""
+
+    def _despesas(self, seed_session):
+        pessoas = factories.criar_pessoas_juridicas(seed_session, 1)
+        projetos = factories.criar_projetos(seed_session, 1, factories.criar_contatos(seed_session, 1, pessoas))
+        funcionarios = factories.criar_funcionarios(seed_session, 1)
+        produtos = factories.criar_produtos(seed_session, 1, pessoas)
+        despesas = factories.criar_despesas(seed_session, 3, projetos, pessoas, funcionarios)
+        despesas[0].valor_frete = Decimal("50.00")
+        seed_session.add_all([
+            DespesaProjetoItem(
+                despesa_projeto_id=despesas[0].id, produto_servico_id=produtos[0].id,
+                quantidade=Decimal("2"), valor_unitario=Decimal("100.00"),
+                icms=Decimal("18"), ipi=Decimal("10"), pis=Decimal("0"), cofins=Decimal("0"), iss=Decimal("0"),
+            ),
+            DespesaProjetoItem(
+                despesa_projeto_id=despesas[0].id, produto_servico_id=produtos[0].id,
+                quantidade=Decimal("1"), valor_unitario=Decimal("300.00"),
+                icms=Decimal("0"), ipi=Decimal("5"), pis=Decimal("0"), cofins=Decimal("0"), iss=Decimal("0"),
+            ),
+            DespesaProjetoItem(
+                despesa_projeto_id=despesas[1].id, produto_servico_id=produtos[0].id,
+                quantidade=Decimal("4"), valor_unitario=Decimal("25.00"),
+            ),
+        ])
+        seed_session.commit()
+        return despesas
+
+    def test_sem_include(self, client, auth_headers, seed_session):
+        self._despesas(seed_session)
+        lista = client.get("/api/despesas-projetos", headers=auth_headers).json()
+        assert "itens" not in lista[0] and "totais" not in lista[0]
+
+    def test_itens_e_totais(self, client, auth_headers, seed_session, assert_max_queries):
+        despesas = self._despesas(seed_session)
+        # Autenticação, despesas (com joins), itens (selectinload) e totais
+        with assert_max_queries(4):
+            response = client.get("/api/despesas-projetos?include=itens,totais", headers=auth_headers)
+        assert response.status_code == 200
+        por_id = {d["id"]: d for d in response.json()}
+
+        primeira = por_id[despesas[0].id]
+        assert len(primeira["itens"]) == 2
+        assert primeira["totais"] == {
+            "quantidade_itens": 2,
+            "subtotal": 500.0,
+            "valor_ipi": 35.0,
+            "valor_impostos": 71.0,
+            "valor_frete": 50.0,
+            "total": 585.0,
+        }
+        assert por_id[despesas[1].id]["totais"]["subtotal"] == 100.0
+        assert por_id[despesas[2].id]["itens"] == []
+        assert por_id[despesas[2].id]["totais"]["total"] == 0.0
+
+    def test_somente_totais(self, client, auth_headers, seed_session):
+        despesas = self._despesas(seed_session)
+        response = client.get(f"/api/despesas-projetos/{despesas[0].id}?include=totais", headers=auth_headers)
+        assert response.status_code == 200
+        assert "itens" not in response.json()
+        assert response.json()["totais"]["total"] == 585.0
+
+    def test_include_invalido(self, client, auth_headers, db_session):
+        response = client.get("/api/despesas-projetos?include=pagamentos", headers=auth_headers)
+        assert response.status_code == 400
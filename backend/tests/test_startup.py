@@ -0,0 +1,72 @@
+"""
+Tempo de inicialização: `python -X importtime -c "import app.main"` em um
+processo novo, como em cada worker e em cada --reload
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+BACKEND_DIR = Path(__file__).parent.parent
+# Dependências carregadas só no primeiro uso (relatórios, planilhas, OneDrive, status)
+PESADOS = ("reportlab", "openpyxl", "msal", "requests", "psutil", "pyarrow")
+# Limite para a importação de app.main, em ms (STARTUP_BUDGET_MS para ajustar)
+ORCAMENTO_MS = float(os.getenv("STARTUP_BUDGET_MS", "4000"))
+
+
+def _importtime(banco: Path) -> dict:
+    """Módulo -> (tempo próprio, tempo acumulado) em µs, lidos do -X importtime"""
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{banco}"}
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert resultado.returncode == 0, resultado.stderr[-2000:]
+    modulos = {}
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, acumulado, nome = linha[len("import time:"):].split("|")
+        modulos[nome.strip()] = (int(proprio), int(acumulado))
+    return modulos
+
+
+@pytest.fixture(scope="module")
+def banco(tmp_path_factory) -> Path:
+    return tmp_path_factory.mktemp("startup") / "startup.db"
+
+
+@pytest.fixture(scope="module")
+def importacao(banco):
+    return _importtime(banco)
+
+
+def _mais_lentos(modulos: dict, n: int = 15) -> str:
+    lentos = sorted(modulos.items(), key=lambda item: item[1][1], reverse=True)[:n]
+    return "\n".join(f"{acumulado / 1000:8.1f} ms  {nome}" for nome, (_, acumulado) in lentos)
+
+
+class TestInicializacao:
+    """Importar a aplicação não carrega dependências pesadas, não toca no schema e cabe no orçamento"""
+
+    def test_sem_dependencias_pesadas(self, importacao):
+        carregados = sorted({nome.split(".")[0] for nome in importacao} & set(PESADOS))
+        assert not carregados, f"Importados na inicialização: {carregados}"
+
+    @pytest.mark.benchmark
+    def test_orcamento(self, importacao):
+        total_ms = importacao["app.main"][1] / 1000
+        assert total_ms <= ORCAMENTO_MS, (
+            f"app.main levou {total_ms:.0f} ms (orçamento {ORCAMENTO_MS:.0f} ms):\n{_mais_lentos(importacao)}"
+        )
+
+    def test_sem_schema_na_importacao(self, importacao, banco):
+        """O schema é do Alembic (app.preparar_banco), não de cada worker ao importar"""
+        engine = create_engine(f"sqlite:///{banco}")
+        try:
+            assert inspect(engine).get_table_names() == []
+        finally:
+            engine.dispose()
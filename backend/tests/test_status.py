@@ -0,0 +1,82 @@
+"""
+Testes da amostra do sistema (/api/status/info): campos, cache e atraso do
+event loop
+"""
+import asyncio
+import time
+
+import pytest
+
+from app import status_service
+from app.config import settings
+from app.database import engine
+from app.metrics import registry
+from app.routes import status as status_route
+from app.status_service import AmostraSistema, amostrar_periodicamente
+
+
+class TestAmostra:
+    """Campos da amostra e reaproveitamento"""
+
+    def test_campos(self):
+        dados = AmostraSistema().amostrar(engine)
+        assert dados["db_status"] in ("ok", "erro")
+        assert dados["hostname"] and dados["ip"]
+        assert isinstance(dados["server_count"], int)
+        worker = dados["worker"]
+        assert worker["rss_bytes"] > 0
+        assert worker["threads"] >= 1
+        assert set(worker["db_connections"]) == {"size", "checked_out", "checked_in", "overflow"}
+        assert worker["event_loop_lag_ms"] == 0
+
+    def test_em_cache(self, db_engine, monkeypatch):
+        amostra = AmostraSistema()
+        engine = db_engine
+        primeira = amostra.atual(engine)
+        monkeypatch.setattr(amostra, "amostrar", lambda engine: pytest.fail("amostrou de novo"))
+        assert amostra.atual(engine) is primeira
+
+    def test_amostra_vencida(self, db_engine, monkeypatch):
+        """Sem a tarefa de fundo (amostra com mais de 3 intervalos), amostra na hora"""
+        amostra = AmostraSistema()
+        engine = db_engine
+        primeira = amostra.amostrar(engine)
+        monkeypatch.setattr(amostra, "_amostrado_em", time.monotonic() - 3 * settings.STATUS_REFRESH_SEGUNDOS - 1)
+        assert amostra.atual(engine) is not primeira
+
+
+class TestRota:
+    """A rota só devolve a amostra em cache"""
+
+    def test_devolve_amostra(self, client, monkeypatch, assert_max_queries):
+        amostra = AmostraSistema()
+        amostra.dados = {"db_status": "ok", "hostname": "srv", "ip": "10.0.0.1", "server_count": 2}
+        amostra._amostrado_em = time.monotonic()
+        monkeypatch.setattr(status_route, "amostra_sistema", amostra)
+        with assert_max_queries(0):
+            response = client.get("/api/status/info")
+        assert response.status_code == 200
+        assert response.json() == amostra.dados
+
+
+class TestAtrasoEventLoop:
+    """A tarefa de amostragem mede quanto o event loop ficou bloqueado"""
+
+    def test_mede_bloqueio(self, monkeypatch):
+        amostra = AmostraSistema()
+        monkeypatch.setattr(amostra, "amostrar", lambda engine: None)
+        monkeypatch.setattr(settings, "STATUS_REFRESH_SEGUNDOS", 0.1)
+
+        async def executar():
+            tarefa = asyncio.create_task(amostrar_periodicamente(None, amostra))
+            await asyncio.sleep(0.05)
+            time.sleep(0.3)  # bloqueia o loop enquanto o timer da tarefa está pendente
+            await asyncio.sleep(0.02)
+            tarefa.cancel()
+
+        asyncio.run(executar())
+        assert amostra.atraso_event_loop > 0.1
+
+    def test_metricas(self, monkeypatch):
+        monkeypatch.setattr(status_service.amostra_sistema, "atraso_event_loop", 0.25)
+        assert "event_loop_lag_seconds 0.25" in registry.render()
@@ -56,7 +56,8 @@ echo   Pressione Ctrl+C para parar
 echo ========================================
 echo.
 
-REM Iniciar servidor
+REM Migrar o banco (Alembic) e iniciar servidor
+python -m app.preparar_banco
 uvicorn app.main:app --reload --host 0.0.0.0 --port 8000
 
 pause
@@ -57,5 +57,6 @@ Write-Host "  Pressione Ctrl+C para parar"
 Write-Host "========================================"
 Write-Host ""
 
-# Iniciar servidor
+# Migrar o banco (Alembic) e iniciar servidor
+& python -m app.preparar_banco
 & uvicorn app.main:app --reload --host 0.0.0.0 --port 8000